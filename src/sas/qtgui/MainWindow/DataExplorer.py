@@ -4,6 +4,7 @@ import os
 import time
 import logging
 import copy
+import threading
 
 from PyQt5 import QtCore
 from PyQt5 import QtGui
@@ -52,6 +53,8 @@ class DataExplorerWindow(DroppableDataLoadWidget):
         # in order to set the widget parentage properly.
         self.parent = guimanager
         self.loader = Loader()
+        # Set to stop reading the files of the current load
+        self.load_cancel = threading.Event()
 
         # Read in default locations
         self.default_save_location = None
@@ -269,7 +272,8 @@ class DataExplorerWindow(DroppableDataLoadWidget):
         kwargs = {
             'parent'    : self,
             'caption'   : 'Open Project',
-            'filter'    : 'Project Files (*.json);;Old Project Files (*.svs);;All files (*.*)',
+            'filter'    : 'Project Files (*.{0} *.json);;Old Project Files (*.svs);;'
+                          'All files (*.*)'.format(GuiUtils.PROJECT_EXTENSION),
             'options'   : QtWidgets.QFileDialog.DontUseNativeDialog
         }
         filename = QtWidgets.QFileDialog.getOpenFileName(**kwargs)[0]
@@ -304,7 +308,7 @@ class DataExplorerWindow(DroppableDataLoadWidget):
         kwargs = {
             'parent'    : self,
             'caption'   : 'Save Project',
-            'filter'    : 'Project (*.json)',
+            'filter'    : 'Project (*.{0})'.format(GuiUtils.PROJECT_EXTENSION),
             'options'   : QtWidgets.QFileDialog.DontUseNativeDialog,
             'directory' : self.default_project_location
         }
@@ -313,9 +317,10 @@ class DataExplorerWindow(DroppableDataLoadWidget):
         if not filename:
             return
         self.default_project_location = os.path.dirname(filename)
-        _, extension = os.path.splitext(filename)
-        if not extension:
-            filename = '.'.join((filename, 'json'))
+        root, extension = os.path.splitext(filename)
+        # .json is kept for the projects older versions can read
+        if extension.lower() in ('', '.json'):
+            filename = '.'.join((root, GuiUtils.PROJECT_EXTENSION))
         self.communicator.statusBarUpdateSignal.emit("Saving Project... %s\n" % os.path.basename(filename))
 
         return filename
@@ -350,7 +355,7 @@ class DataExplorerWindow(DroppableDataLoadWidget):
             filename = '.'.join((filename, ext))
         self.communicator.statusBarUpdateSignal.emit("Saving analysis... %s\n" % os.path.basename(filename))
 
-        with open(filename, 'w') as outfile:
+        with GuiUtils.replaceFile(filename) as outfile:
             GuiUtils.saveData(outfile, data)
 
         self.communicator.statusBarUpdateSignal.emit('Analysis saved.')
@@ -465,7 +470,7 @@ class DataExplorerWindow(DroppableDataLoadWidget):
 
     def saveDataToFile(self, outfile):
         """
-        Save every dataset to a json file
+        Save every dataset to a project archive, outfile being a binary file
         """
         all_data = self.getAllData()
         # save datas
@@ -497,7 +502,7 @@ class DataExplorerWindow(DroppableDataLoadWidget):
                 logging.error(msg)
                 pass
         else:
-            with open(filename, 'r') as infile:
+            with open(filename, 'rb') as infile:
                 try:
                     all_data = GuiUtils.readDataFromFile(infile)
                 except Exception as ex:
@@ -1269,10 +1274,10 @@ class DataExplorerWindow(DroppableDataLoadWidget):
         any_error = False
         data_error = False
         error_message = ""
-        number_of_files = len(path)
         self.communicator.progressBarUpdateSignal.emit(0.0)
 
-        for index, p_file in enumerate(path):
+        data_files = []
+        for p_file in path:
             basename = os.path.basename(p_file)
             _, extension = os.path.splitext(basename)
             if extension.lower() in GuiUtils.EXTENSIONS:
@@ -1284,14 +1289,25 @@ class DataExplorerWindow(DroppableDataLoadWidget):
                 error_message = log_msg + "\n"
                 logging.info(log_msg)
                 continue
-
+            data_files.append(p_file)
+
+        # Files are read concurrently and added to the model in the order
+        # they were selected
+        number_of_files = len(data_files)
+        self.load_cancel.clear()
+        self.communicator.dataLoadingSignal.emit(True)
+        loaded = self.loader.load_many(data_files, ordered=True,
+                                       cancel=self.load_cancel)
+        for index, (_, p_file, output_objects, load_error) in enumerate(loaded):
+            basename = os.path.basename(p_file)
             try:
                 message = "Loading Data... " + str(basename) + "\n"
 
                 # change this to signal notification in GuiManager
                 self.communicator.statusBarUpdateSignal.emit(message)
 
-                output_objects = self.loader.load(p_file)
+                if load_error is not None:
+                    raise load_error
 
                 for item in output_objects:
                     # cast sascalc.dataloader.data_info.Data1D into
@@ -1337,9 +1353,13 @@ class DataExplorerWindow(DroppableDataLoadWidget):
                 else:
                     error_message += "%s\n" % str(p_file)
 
-            current_percentage = int(100.0* index/number_of_files)
+            current_percentage = int(100.0*(index + 1)/number_of_files)
             self.communicator.progressBarUpdateSignal.emit(current_percentage)
 
+        self.communicator.dataLoadingSignal.emit(False)
+        if self.load_cancel.is_set():
+            log_msg += "Loading cancelled.\n"
+
         if any_error or error_message:
             logging.error(error_message)
             status_bar_message = "Errors occurred while loading %s" % format(basename)
@@ -1851,6 +1871,14 @@ class DataExplorerWindow(DroppableDataLoadWidget):
         self.communicator.fileDataReceivedSignal.emit(output_data)
         self.manager.add_data(data_list=output_data)
 
+    def cancelLoad(self):
+        """
+        Stop reading the files of the current load, on request of the
+        cancel button of the status bar.
+        Files already read are still added to the data explorer.
+        """
+        self.load_cancel.set()
+
     def loadFailed(self, reason):
         print("File Load Failed with:\n", reason)
         pass
@@ -23,11 +23,13 @@ import copy
 import logging
 import json
 import time
+import zipfile
 from io import BytesIO
 import numpy as np
 
 from sas.qtgui.Plotting.PlotterData import Data1D
 from sas.qtgui.Plotting.PlotterData import Data2D
+from sas.qtgui.Plotting.Plottables import Plottable
 from sas.qtgui.Plotting.Plottables import PlottableTheory1D
 from sas.qtgui.Plotting.Plottables import PlottableFit1D
 from sas.qtgui.Plotting.Plottables import Text
@@ -43,7 +45,6 @@ from sas.sascalc.dataloader.data_info import Sample, Source, Vector
 
 from sas.sasview import __version__ as SASVIEW_VERSION
 
-
 class DataManager(object):
     """
     Manage a list of data
@@ -347,8 +348,14 @@ class DataManager(object):
 
     def save_to_writable(self, fp):
         """
-        save content of stored_data to fp (a .write()-supporting file-like object)
+        save content of stored_data to fp (a .write()-supporting binary file-like object)
+
+        The project is a zip archive: stored_data without its arrays is kept
+        as JSON in PROJECT_METADATA and each array is a raw .npy member
+        of ARRAY_DIRECTORY, referenced from the JSON by its name.
+        Use GuiUtils.replaceFile() to overwrite a project file.
         """
+        arrays = []
 
         def add_type(dict, type):
             dict['__type__'] = type.__name__
@@ -378,23 +385,36 @@ class DataManager(object):
 
             # ndarray
             if isinstance(o, np.ndarray):
-                buffer = BytesIO()
-                np.save(buffer, o)
-                buffer.seek(0)
-                content = { 'data': buffer.read().decode('latin-1') }
+                if o.dtype.hasobject:
+                    content = { 'data': o.tolist() }
+                else:
+                    name = "%s%d.npy" % (GuiUtils.ARRAY_DIRECTORY, len(arrays))
+                    arrays.append((name, o))
+                    content = { 'file': name }
                 return add_type(content, type(o))
 
             # not supported
             logging.info("data cannot be serialized to json: %s" % type(o))
             return None
 
-        json.dump(self.stored_data, fp, indent=2, sort_keys=True, default=jdefault)
-
+        metadata = json.dumps(self.stored_data, indent=2, sort_keys=True, default=jdefault)
+        with zipfile.ZipFile(fp, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+            archive.writestr(GuiUtils.PROJECT_METADATA, metadata,
+                             compress_type=zipfile.ZIP_DEFLATED)
+            for name, array in arrays:
+                GuiUtils.writeArray(archive, name, array)
 
     def load_from_readable(self, fp):
         """
-        load content from tp to stored_data (a .read()-supporting file-like object)
+        load content from fp to stored_data (a .read()-supporting file-like object)
+
+        fp is either a project archive written by save_to_writable or
+        a JSON document with the arrays embedded as latin-1 strings.
         """
+        archive = None
+        if zipfile.is_zipfile(fp):
+            archive = zipfile.ZipFile(fp)
+        fp.seek(0)
 
         supported = [
             tuple, set,
@@ -445,6 +465,10 @@ class DataManager(object):
 
             # ndarray
             if cls == np.ndarray:
+                if 'file' in data:
+                    return GuiUtils.readArray(archive, data['file'])
+                if isinstance(data['data'], list):
+                    return np.array(data['data'])
                 buffer = BytesIO()
                 buffer.write(data['data'].encode('latin-1'))
                 buffer.seek(0)
@@ -476,12 +500,19 @@ class DataManager(object):
 
             return data
 
+        if archive is not None:
+            content = json.loads(archive.read(GuiUtils.PROJECT_METADATA).decode('utf-8'))
+        else:
+            content = json.load(fp)
+
         new_stored_data = {}
-        for id, data in json.load(fp).items():
+        for id, data in content.items():
             try:
                 new_stored_data[id] = generate(data, 0)
             except TooComplexException:
                 logging.info('unable to load %s' % id)
+        if archive is not None:
+            archive.close()
 
         self.stored_data = new_stored_data
 
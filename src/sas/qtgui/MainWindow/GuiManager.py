@@ -3,9 +3,14 @@ import os
 import subprocess
 import logging
 import json
+import time
+import importlib
 import webbrowser
 import traceback
 
+# Time spent importing this module and its dependencies is reported at startup
+_IMPORT_START = time.perf_counter()
+
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import *
 from PyQt5.QtCore import Qt, QLocale, QUrl
@@ -13,7 +18,6 @@ from PyQt5.QtCore import Qt, QLocale, QUrl
 import matplotlib as mpl
 mpl.use("Qt5Agg")
 
-from twisted.internet import reactor
 # General SAS imports
 from sas import get_local_config, get_custom_config
 from sas.qtgui.Utilities.ConnectionProxy import ConnectionProxy
@@ -23,12 +27,9 @@ import sas.qtgui.Utilities.LocalConfig as LocalConfig
 import sas.qtgui.Utilities.GuiUtils as GuiUtils
 
 import sas.qtgui.Utilities.ObjectLibrary as ObjectLibrary
-from sas.qtgui.Utilities.TabbedModelEditor import TabbedModelEditor
-from sas.qtgui.Utilities.PluginManager import PluginManager
 from sas.qtgui.Utilities.GridPanel import BatchOutputPanel
 from sas.qtgui.Utilities.ResultPanel import ResultPanel
 
-from sas.qtgui.Utilities.ReportDialog import ReportDialog
 from sas.qtgui.MainWindow.UI.AcknowledgementsUI import Ui_Acknowledgements
 from sas.qtgui.MainWindow.AboutBox import AboutBox
 from sas.qtgui.MainWindow.WelcomePanel import WelcomePanel
@@ -36,27 +37,32 @@ from sas.qtgui.MainWindow.CategoryManager import CategoryManager
 
 from sas.qtgui.MainWindow.DataManager import DataManager
 
-from sas.qtgui.Calculators.SldPanel import SldPanel
-from sas.qtgui.Calculators.DensityPanel import DensityPanel
-from sas.qtgui.Calculators.KiessigPanel import KiessigPanel
-from sas.qtgui.Calculators.SlitSizeCalculator import SlitSizeCalculator
-from sas.qtgui.Calculators.GenericScatteringCalculator import GenericScatteringCalculator
-from sas.qtgui.Calculators.ResolutionCalculatorPanel import ResolutionCalculatorPanel
-from sas.qtgui.Calculators.DataOperationUtilityPanel import DataOperationUtilityPanel
-
 import sas.qtgui.Plotting.PlotHelper as PlotHelper
 
 # Perspectives
 import sas.qtgui.Perspectives as Perspectives
-from sas.qtgui.Perspectives.Fitting.FittingPerspective import FittingWindow
 from sas.qtgui.MainWindow.DataExplorer import DataExplorerWindow, DEFAULT_PERSPECTIVE
 
-from sas.qtgui.Utilities.AddMultEditor import AddMultEditor
-from sas.qtgui.Utilities.ImageViewer import ImageViewer
-from sas.qtgui.Utilities.FileConverter import FileConverterWidget
+IMPORT_TIME = time.perf_counter() - _IMPORT_START
 
 logger = logging.getLogger(__name__)
 
+# Floating tool windows, created on first use: attribute name -> (module, class).
+# Each class is constructed with the GuiManager as its only argument.
+TOOL_WINDOWS = {
+    "SLDCalculator": ("sas.qtgui.Calculators.SldPanel", "SldPanel"),
+    "DVCalculator": ("sas.qtgui.Calculators.DensityPanel", "DensityPanel"),
+    "KIESSIGCalculator": ("sas.qtgui.Calculators.KiessigPanel", "KiessigPanel"),
+    "SlitSizeCalculator": ("sas.qtgui.Calculators.SlitSizeCalculator", "SlitSizeCalculator"),
+    "GENSASCalculator": ("sas.qtgui.Calculators.GenericScatteringCalculator",
+                         "GenericScatteringCalculator"),
+    "ResolutionCalculator": ("sas.qtgui.Calculators.ResolutionCalculatorPanel",
+                             "ResolutionCalculatorPanel"),
+    "DataOperation": ("sas.qtgui.Calculators.DataOperationUtilityPanel",
+                      "DataOperationUtilityPanel"),
+    "FileConverter": ("sas.qtgui.Utilities.FileConverter", "FileConverterWidget"),
+}
+
 class Acknowledgements(QDialog, Ui_Acknowledgements):
     def __init__(self, parent=None):
         QDialog.__init__(self, parent)
@@ -73,6 +79,10 @@ class GuiManager(object):
         """
         Initialize the manager as a child of MainWindow.
         """
+        # Duration of each startup stage, in seconds
+        self.startup_times = [("imports", IMPORT_TIME)]
+        self._stage_start = time.perf_counter()
+
         self._workspace = parent
         self._parent = parent
 
@@ -87,6 +97,7 @@ class GuiManager(object):
 
         # Assure model categories are available
         self.addCategories()
+        self.markStartupStage("categories")
 
         # Create the data manager
         # TODO: pull out all required methods from DataManager and reimplement
@@ -101,6 +112,7 @@ class GuiManager(object):
 
         # Populate the main window with stuff
         self.addWidgets()
+        self.markStartupStage("widgets")
 
         # Fork off logging messages to the Log Window
         handler = setup_qt_logging()
@@ -113,12 +125,53 @@ class GuiManager(object):
 
         # Set up the status bar
         self.statusBarSetup()
+        self.markStartupStage("status bar")
 
         # Current tutorial location
         self._tutorialLocation = os.path.abspath(os.path.join(GuiUtils.HELP_DIRECTORY_LOCATION,
                                               "_downloads",
                                               "Tutorial.pdf"))
 
+    def __getattr__(self, name):
+        """
+        Create the tool windows listed in TOOL_WINDOWS on first access
+        """
+        if name not in TOOL_WINDOWS:
+            raise AttributeError("%s object has no attribute %s"
+                                 % (type(self).__name__, name))
+        module_name, class_name = TOOL_WINDOWS[name]
+        start = time.perf_counter()
+        widget_class = getattr(importlib.import_module(module_name), class_name)
+        widget = widget_class(self)
+        logger.debug("%s created in %.3f s" % (class_name, time.perf_counter() - start))
+        setattr(self, name, widget)
+        return widget
+
+    def markStartupStage(self, stage):
+        """
+        Record the time spent since the previous startup stage
+        """
+        now = time.perf_counter()
+        self.startup_times.append((stage, now - self._stage_start))
+        self._stage_start = now
+
+    def startupReport(self, total=None):
+        """
+        Summarize the startup stage timings in a single line
+
+        :param total: wall time from launch to the window being shown.
+            Time not covered by the recorded stages is reported as 'other'.
+        """
+        times = list(self.startup_times)
+        measured = sum(duration for _, duration in times)
+        if total is None:
+            total = measured
+        elif total > measured:
+            times.append(("other", total - measured))
+        stages = ", ".join("%s %.2f s" % (stage, duration)
+                           for stage, duration in times)
+        return "Startup time: %.2f s (%s)" % (total, stages)
+
     def info(self, type, value, tb):
         logger.error("".join(traceback.format_exception(type, value, tb)))
 
@@ -126,7 +179,7 @@ class GuiManager(object):
         """
         Populate the main window with widgets
         """
-        # Preload all perspectives
+        # Perspectives are created when first shown
         self.loadAllPerspectives()
 
         # Add FileDialog widget as docked
@@ -174,28 +227,33 @@ class GuiManager(object):
         self._workspace.toolBar.setVisible(LocalConfig.TOOLBAR_SHOW)
         self._workspace.actionHide_Toolbar.setText("Show Toolbar")
 
-        # Add calculators - floating for usability
-        self.SLDCalculator = SldPanel(self)
-        self.DVCalculator = DensityPanel(self)
-        self.KIESSIGCalculator = KiessigPanel(self)
-        self.SlitSizeCalculator = SlitSizeCalculator(self)
-        self.GENSASCalculator = GenericScatteringCalculator(self)
-        self.ResolutionCalculator = ResolutionCalculatorPanel(self)
-        self.DataOperation = DataOperationUtilityPanel(self)
-        self.FileConverter = FileConverterWidget(self)
+        # Calculators and other tools are floating for usability.
+        # They are created on first use, see TOOL_WINDOWS.
 
     def loadAllPerspectives(self):
+        """
+        Reset the perspectives. Each one is created again when first shown.
+        """
         # Close any existing perspectives to prevent multiple open instances
         self.closeAllPerspectives()
-        # Load all perspectives
-        loaded_dict = {}
-        for name, perspective in Perspectives.PERSPECTIVES.items():
+
+    def loadPerspective(self, name):
+        """
+        Return the named perspective, creating it on first request
+
+        :param name: perspective name, as in Perspectives.PERSPECTIVES
+        """
+        if name not in self.loadedPerspectives:
+            start = time.perf_counter()
             try:
-                loaded_perspective = perspective(parent=self)
-                loaded_dict[name] = loaded_perspective
+                perspective = Perspectives.PERSPECTIVES[name](parent=self)
             except Exception as e:
-                logger.log(f"Unable to load {name} perspective.\n{e}")
-        self.loadedPerspectives = loaded_dict
+                logger.error(f"Unable to load {name} perspective.\n{e}")
+                raise
+            logger.debug("%s perspective created in %.3f s"
+                         % (name, time.perf_counter() - start))
+            self.loadedPerspectives[name] = perspective
+        return self.loadedPerspectives[name]
 
     def closeAllPerspectives(self):
         # Close all perspectives if they are open
@@ -309,9 +367,10 @@ class GuiManager(object):
     def statusBarSetup(self):
         """
         Define the status bar.
-        | <message label> .... | Progress Bar |
+        | <message label> .... | Progress Bar | Cancel |
 
-        Progress bar invisible until explicitly shown
+        Progress bar invisible until explicitly shown, cancel button
+        only shown while data files are loaded
         """
         self.progress = QProgressBar()
         self._workspace.statusbar.setSizeGripEnabled(False)
@@ -325,6 +384,12 @@ class GuiManager(object):
         self.progress.setTextVisible(True)
         self.progress.setVisible(False)
 
+        self.cancelLoadButton = QPushButton("Cancel")
+        self.cancelLoadButton.setToolTip("Stop loading the data files")
+        self._workspace.statusbar.addPermanentWidget(self.cancelLoadButton, stretch=0)
+        self.cancelLoadButton.setVisible(False)
+        self.cancelLoadButton.clicked.connect(self.cancelDataLoading)
+
     def fileWasRead(self, data):
         """
         Callback for fileDataReceivedSignal
@@ -356,7 +421,7 @@ class GuiManager(object):
             self._workspace.workspace.removeSubWindow(self._current_perspective)
             self._workspace.workspace.removeSubWindow(self.subwindow)
         # Get new perspective
-        self._current_perspective = self.loadedPerspectives[str(perspective_name)]
+        self._current_perspective = self.loadPerspective(str(perspective_name))
 
         self.setupPerspectiveMenubarOptions(self._current_perspective)
 
@@ -404,6 +469,20 @@ class GuiManager(object):
 
         self.progress.setValue(value)
 
+    def updateDataLoading(self, loading):
+        """
+        Show the cancel button while data files are loaded
+        """
+        self.cancelLoadButton.setEnabled(True)
+        self.cancelLoadButton.setVisible(loading)
+
+    def cancelDataLoading(self):
+        """
+        Stop the data files being loaded
+        """
+        self.cancelLoadButton.setEnabled(False)
+        self.filesWidget.cancelLoad()
+
     def updateStatusBar(self, text):
         """
         Set the status bar text
@@ -454,6 +533,8 @@ class GuiManager(object):
         if reply == QMessageBox.Yes:
             # save the paths etc.
             self.saveCustomConfig()
+            # Import moved here for startup performance reasons
+            from twisted.internet import reactor
             reactor.callFromThread(reactor.stop)
             return True
 
@@ -543,6 +624,7 @@ class GuiManager(object):
         self.communicate.statusBarUpdateSignal.connect(self.updateStatusBar)
         self.communicate.updatePerspectiveWithDataSignal.connect(self.updatePerspective)
         self.communicate.progressBarUpdateSignal.connect(self.updateProgressBar)
+        self.communicate.dataLoadingSignal.connect(self.updateDataLoading)
         self.communicate.perspectiveChangedSignal.connect(self.perspectiveChanged)
         self.communicate.updateTheoryFromPerspectiveSignal.connect(self.updateTheoryFromPerspective)
         self.communicate.deleteIntermediateTheoryPlotsSignal.connect(self.deleteIntermediateTheoryPlotsByModelID)
@@ -642,6 +724,7 @@ class GuiManager(object):
         self._workspace.actionCheck_for_update.triggered.connect(self.actionCheck_for_update)
 
         self.communicate.sendDataToGridSignal.connect(self.showBatchOutput)
+        self.communicate.sendResultToGridSignal.connect(self.updateBatchOutput)
         self.communicate.resultPlotUpdateSignal.connect(self.showFitResults)
 
     #============ FILE =================
@@ -696,7 +779,7 @@ class GuiManager(object):
         final_data['batch_grid'] = self.grid_window.data_dict
         final_data['visible_perspective'] = self._current_perspective.name
 
-        with open(filename, 'w') as outfile:
+        with GuiUtils.replaceFile(filename) as outfile:
             GuiUtils.saveData(outfile, final_data)
 
     def actionSave_Analysis(self):
@@ -768,6 +851,8 @@ class GuiManager(object):
                 logging.error("Report generation failed with: " + str(ex))
 
         if report_list is not None:
+            # Import moved here for startup performance reasons
+            from sas.qtgui.Utilities.ReportDialog import ReportDialog
             self.report_dialog = ReportDialog(parent=self, report_list=report_list)
             self.report_dialog.show()
 
@@ -814,6 +899,12 @@ class GuiManager(object):
         if output_data:
             self.grid_window.addFitResults(output_data)
 
+    def updateBatchOutput(self, page_name, index, result):
+        """
+        Show a new result of a batch fit in the batch fit viewer
+        """
+        self.grid_window.updateFitResult(page_name, index, result)
+
     def actionHide_Toolbar(self):
         """
         Toggle toolbar vsibility
@@ -861,10 +952,12 @@ class GuiManager(object):
     def actionData_Operation(self):
         """
         """
+        # The panel listens to sendDataToPanelSignal, so create it first
+        panel = self.DataOperation
         data, theory = self.filesWidget.getAllFlatData()
         self.communicate.sendDataToPanelSignal.emit(dict(data, **theory))
 
-        self.DataOperation.show()
+        panel.show()
 
     def actionSLD_Calculator(self):
         """
@@ -937,6 +1030,8 @@ class GuiManager(object):
     def actionImage_Viewer(self):
         """
         """
+        # Import moved here for startup performance reasons
+        from sas.qtgui.Utilities.ImageViewer import ImageViewer
         try:
             self.image_viewer = ImageViewer(self)
             if sys.platform == "darwin":
@@ -963,7 +1058,7 @@ class GuiManager(object):
         """
         # Make sure the perspective is correct
         per = self.perspective()
-        if not isinstance(per, FittingWindow):
+        if not isinstance(per, Perspectives.PERSPECTIVES["Fitting"]):
             return
         per.addFit(None)
 
@@ -972,7 +1067,7 @@ class GuiManager(object):
         Add a new Constrained and Simult. Fit page in the fitting perspective.
         """
         per = self.perspective()
-        if not isinstance(per, FittingWindow):
+        if not isinstance(per, Perspectives.PERSPECTIVES["Fitting"]):
             return
         per.addConstraintTab()
 
@@ -1013,24 +1108,32 @@ class GuiManager(object):
     def actionAdd_Custom_Model(self):
         """
         """
+        # Import moved here for startup performance reasons
+        from sas.qtgui.Utilities.TabbedModelEditor import TabbedModelEditor
         self.model_editor = TabbedModelEditor(self)
         self.model_editor.show()
 
     def actionEdit_Custom_Model(self):
         """
         """
+        # Import moved here for startup performance reasons
+        from sas.qtgui.Utilities.TabbedModelEditor import TabbedModelEditor
         self.model_editor = TabbedModelEditor(self, edit_only=True)
         self.model_editor.show()
 
     def actionManage_Custom_Models(self):
         """
         """
+        # Import moved here for startup performance reasons
+        from sas.qtgui.Utilities.PluginManager import PluginManager
         self.model_manager = PluginManager(self)
         self.model_manager.show()
 
     def actionAddMult_Models(self):
         """
         """
+        # Import moved here for startup performance reasons
+        from sas.qtgui.Utilities.AddMultEditor import AddMultEditor
         # Add Simple Add/Multiply Editor
         self.add_mult_editor = AddMultEditor(self)
         self.add_mult_editor.show()
@@ -1167,7 +1270,7 @@ class GuiManager(object):
         item = self.filesWidget.updateTheoryFromPerspective(index)
         # Now notify the perspective that the item was/wasn't replaced
         per = self.perspective()
-        if not isinstance(per, FittingWindow):
+        if not isinstance(per, Perspectives.PERSPECTIVES["Fitting"]):
             # currently only fitting supports generation of theories.
             return
         per.currentTab.setTheoryItem(item)
@@ -1231,7 +1334,7 @@ class GuiManager(object):
         for menuItem in self._workspace.menuAnalysis.actions():
             menuItem.setChecked(False)
 
-        if isinstance(self._current_perspective, Perspectives.PERSPECTIVES["Fitting"]):
+        if getattr(self._current_perspective, 'name', None) == "Fitting":
             self._workspace.menubar.removeAction(self._workspace.menuFitting.menuAction())
 
     def setupPerspectiveMenubarOptions(self, perspective):
@@ -1245,7 +1348,9 @@ class GuiManager(object):
             self._workspace.actionOpen_Analysis.setEnabled(True)
             self._workspace.actionSave_Analysis.setEnabled(True)
 
-        if isinstance(perspective, Perspectives.PERSPECTIVES["Fitting"]):
+        # Compare names, so the other perspective modules need not be imported
+        name = getattr(perspective, 'name', None)
+        if name == "Fitting":
             self.checkAnalysisOption(self._workspace.actionFitting)
             # Put the fitting menu back in
             # This is a bit involved but it is needed to preserve the menu ordering
@@ -1256,11 +1361,11 @@ class GuiManager(object):
             self._workspace.menubar.addAction(self._workspace.menuHelp.menuAction())
             self._workspace.actionReport.setEnabled(True)
 
-        elif isinstance(perspective, Perspectives.PERSPECTIVES["Invariant"]):
+        elif name == "Invariant":
             self.checkAnalysisOption(self._workspace.actionInvariant)
-        elif isinstance(perspective, Perspectives.PERSPECTIVES["Inversion"]):
+        elif name == "Inversion":
             self.checkAnalysisOption(self._workspace.actionInversion)
-        elif isinstance(perspective, Perspectives.PERSPECTIVES["Corfunc"]):
+        elif name == "Corfunc":
             self.checkAnalysisOption(self._workspace.actionCorfunc)
 
     def saveCustomConfig(self):
@@ -2,6 +2,7 @@
 # ESPECIALLY ANYTHING IN SAS, SASMODELS NAMESPACE
 import os
 import sys
+import time
 
 from PyQt5.QtWidgets import QMainWindow
 from PyQt5.QtWidgets import QMdiArea
@@ -61,6 +62,7 @@ def SplashScreen():
     return splashScreen
 
 def run_sasview():
+    start = time.perf_counter()
     app = QApplication([])
 
     #Initialize logger
@@ -109,6 +111,10 @@ def run_sasview():
     # no more splash screen
     splash.finish(mainwindow)
 
+    # Report where the startup time went
+    import logging
+    logging.info(mainwindow.guiManager.startupReport(time.perf_counter() - start))
+
     # Time for the welcome window
     mainwindow.guiManager.showWelcomeMessage()
 
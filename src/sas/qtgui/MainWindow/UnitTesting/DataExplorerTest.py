@@ -181,12 +181,53 @@ class DataExplorerTest(unittest.TestCase):
         filename = ["cyl_400_20.txt", "P123_D2O_10_percent.dat", "cyl_400_20.txt"]
         self.form.readData(filename)
 
-        # 0, 0, 33, 66, -1 -> 5 signals reaching progressBar
+        # 0, 33, 66, 100, -1 -> 5 signals reaching progressBar
         self.assertEqual(spy_progress_bar_update.count(), 5)
 
-        expected_list = [0, 0, 33, 66, -1]
+        expected_list = [0, 33, 66, 100, -1]
         spied_list = [spy_progress_bar_update.called()[i]['args'][0] for i in range(5)]
         self.assertEqual(expected_list, spied_list)
+
+    def testLoadFilesProgressSkipped(self):
+        """
+        Files which are not loaded do not count in the progress
+        """
+        spy_progress_bar_update = QtSignalSpy(self.form,
+            self.form.communicator.progressBarUpdateSignal)
+
+        filename = ["cyl_400_20.txt", "state.fitv", "cyl_400_20.txt"]
+        self.form.readData(filename)
+
+        expected_list = [0, 50, 100, -1]
+        spied_list = [spy_progress_bar_update.called()[i]['args'][0]
+                      for i in range(spy_progress_bar_update.count())]
+        self.assertEqual(expected_list, spied_list)
+
+    def testCancelLoad(self):
+        """
+        Cancelling a load stops adding files to the model
+        """
+        spy_loading = QtSignalSpy(self.form,
+            self.form.communicator.dataLoadingSignal)
+        # Cancel as soon as the first file is in
+        def cancel(value):
+            if value > 0:
+                self.form.cancelLoad()
+        self.form.communicator.progressBarUpdateSignal.connect(cancel)
+
+        filename = ["cyl_400_20.txt", "cyl_400_20.txt", "cyl_400_20.txt"]
+        _, message = self.form.readData(filename)
+
+        self.assertEqual(self.form.model.rowCount(), 1)
+        self.assertIn("Loading cancelled", message)
+        # The cancel button is shown for the duration of the load
+        self.assertEqual([spy_loading.called()[i]['args'][0] for i in range(2)],
+                         [True, False])
+
+        # The next load starts afresh
+        self.form.communicator.progressBarUpdateSignal.disconnect(cancel)
+        self.form.readData(filename)
+        self.assertEqual(self.form.model.rowCount(), 4)
         
     def testDeleteButton(self):
         """
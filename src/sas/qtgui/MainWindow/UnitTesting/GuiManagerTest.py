@@ -100,6 +100,40 @@ class GuiManagerTest(unittest.TestCase):
         self.assertIsInstance(self.manager.ipDockWidget.widget(), IPythonWidget)
         self.assertEqual(self.manager._workspace.dockWidgetArea(self.manager.ipDockWidget), QtCore.Qt.RightDockWidgetArea)
 
+    def testLazyTools(self):
+        """
+        Calculators are only created when first used
+        """
+        from sas.qtgui.Calculators.SldPanel import SldPanel
+        self.assertNotIn('SLDCalculator', vars(self.manager))
+
+        self.manager.actionSLD_Calculator()
+
+        self.assertIsInstance(self.manager.SLDCalculator, SldPanel)
+        self.assertIs(self.manager.SLDCalculator, vars(self.manager)['SLDCalculator'])
+        self.assertTrue(self.manager.SLDCalculator.isVisible())
+        self.assertFalse(hasattr(self.manager, 'NoSuchCalculator'))
+
+    def testLazyPerspectives(self):
+        """
+        Only the default perspective is created at startup
+        """
+        self.assertEqual(['Fitting'], list(self.manager.loadedPerspectives))
+        perspective = self.manager.loadPerspective('Corfunc')
+        self.assertEqual('Corfunc', perspective.name)
+        self.assertIs(perspective, self.manager.loadPerspective('Corfunc'))
+
+    def testStartupReport(self):
+        """
+        Startup stages are timed and reported in one line
+        """
+        stages = [stage for stage, _ in self.manager.startup_times]
+        self.assertEqual(stages, ['imports', 'categories', 'widgets', 'status bar'])
+        measured = sum(duration for _, duration in self.manager.startup_times)
+        report = self.manager.startupReport(measured + 1.0)
+        self.assertTrue(report.startswith("Startup time: "))
+        self.assertIn("other 1.00 s", report)
+
     def testUpdatePerspective(self):
         """
         """
@@ -241,6 +275,23 @@ class GuiManagerTest(unittest.TestCase):
         # Test the getOpenFileName() dialog called once
         self.assertTrue(QFileDialog.getExistingDirectory.called)
 
+    def testCancelDataLoading(self):
+        """
+        Status bar cancel button shown while data files are loaded
+        """
+        self.assertTrue(self.manager.cancelLoadButton.isHidden())
+        self.manager.communicate.dataLoadingSignal.emit(True)
+        self.assertFalse(self.manager.cancelLoadButton.isHidden())
+
+        self.manager.filesWidget.cancelLoad = MagicMock()
+        QTest.mouseClick(self.manager.cancelLoadButton, QtCore.Qt.LeftButton)
+        self.manager.filesWidget.cancelLoad.assert_called_once()
+        self.assertFalse(self.manager.cancelLoadButton.isEnabled())
+
+        self.manager.communicate.dataLoadingSignal.emit(False)
+        self.assertTrue(self.manager.cancelLoadButton.isHidden())
+        self.assertTrue(self.manager.cancelLoadButton.isEnabled())
+
     #### VIEW ####
     def testActionHideToolbar(self):
         """
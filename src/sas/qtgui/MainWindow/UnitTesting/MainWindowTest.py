@@ -80,7 +80,8 @@ class MainWindowTest(unittest.TestCase):
         sendDataButton = filesWidget.cmdSendTo
         # Verify defaults
         self.assertTrue(hasattr(gui, 'loadedPerspectives'))
-        self.assertEqual(4, len(gui.loadedPerspectives))
+        # Only the default perspective is created at startup
+        self.assertEqual([FIT], list(gui.loadedPerspectives))
         # Load data
         file = ["cyl_400_20.txt"]
         filesWidget.readData(file)
@@ -94,6 +95,7 @@ class MainWindowTest(unittest.TestCase):
         currentPers.setCurrentIndex(currentPers.findText(PR))
         QTest.mouseClick(sendDataButton, QtCore.Qt.LeftButton)
         check_after_load(PR)
+        self.assertEqual(2, len(gui.loadedPerspectives))
         # Change back to Fitting Perspective and verify
         currentPers.setCurrentIndex(currentPers.findText(FIT))
         check_after_load(FIT)
@@ -177,10 +177,14 @@ class MyMplCanvas(FigureCanvas):
         self.fig.tight_layout()
 
         if self.data:
+            # The transforms are drawn as they are computed, so some of them
+            # may still be missing
             data1, data3, data_idf = self.data
-            self.axes.plot(data1.x, data1.y, label="1D Correlation")
-            self.axes.plot(data3.x, data3.y, label="3D Correlation")
-            self.axes.set_xlim(0, max(data1.x) / 4)
+            if data1 is not None:
+                self.axes.plot(data1.x, data1.y, label="1D Correlation")
+                self.axes.set_xlim(0, max(data1.x) / 4)
+            if data3 is not None:
+                self.axes.plot(data3.x, data3.y, label="3D Correlation")
             self.legend = self.axes.legend()
 
         self.draw()
@@ -192,6 +196,8 @@ class CorfuncWindow(QtWidgets.QDialog, Ui_CorfuncDialog):
     ext = " crf"  # File extension used for saving analysis files
 
     trigger = QtCore.pyqtSignal(tuple)
+    # (index, transform) of each correlation function as soon as it is computed
+    transformResultSignal = QtCore.pyqtSignal(tuple)
 
 # pylint: disable=unused-argument
     def __init__(self, parent=None):
@@ -257,6 +263,7 @@ class CorfuncWindow(QtWidgets.QDialog, Ui_CorfuncDialog):
         self.model.itemChanged.connect(self.model_changed)
 
         self.trigger.connect(self.finish_transform)
+        self.transformResultSignal.connect(self.add_transform)
 
     def setup_model(self):
         """Populate the model with default data."""
@@ -375,18 +382,37 @@ class CorfuncWindow(QtWidgets.QDialog, Ui_CorfuncDialog):
 
         def completefn(transforms):
             """Extract the values from the transforms and plot"""
-            self.trigger.emit(transforms)
+            if transforms is not None:
+                self.trigger.emit(transforms)
+
+        def resultfn(index, transform):
+            """Plot each transform as soon as it is computed"""
+            self.transformResultSignal.emit((index, transform))
+
+        # Only enable the extraction once all the transforms are in
+        self._realplot.data = None
+        self.cmdExtract.setEnabled(False)
+        self.cmdSave.setEnabled(False)
 
         self._update_calculator()
         self._calculator.compute_transform(extrap, method, background,
-                                           completefn, updatefn)
+                                           completefn, updatefn, resultfn)
+
+    def add_transform(self, result):
+        """Plot a single transform, sent as (index, transform)"""
+        index, transform = result
+        data = list(self._realplot.data or (None, None, None))
+        data[index] = transform
+        self._realplot.data = tuple(data)
 
+        self.add_real_space_plot(index, transform)
+
+        self._realplot.draw_real_space()
 
     def finish_transform(self, transforms):
+        # The transforms have already been plotted one by one
         self._realplot.data = transforms
 
-        self.update_real_space_plot(transforms)
-
         self._realplot.draw_real_space()
         self.cmdExtract.setEnabled(True)
         self.cmdSave.setEnabled(True)
@@ -411,23 +437,24 @@ class CorfuncWindow(QtWidgets.QDialog, Ui_CorfuncDialog):
         """take the datas tuple and create a plot in DE"""
 
         assert isinstance(datas, tuple)
-        plot_id = id(self)
-        titles = ['1D Correlation', '3D Correlation', 'Interface Distribution Function']
         for i, plot in enumerate(datas):
-            plot_to_add = self.parent.createGuiData(plot)
-            # set plot properties
-            title = plot_to_add.title
-            plot_to_add.scale = 'linear'
-            plot_to_add.symbol = 'Line'
-            plot_to_add._xaxis = "x"
-            plot_to_add._xunit = "A"
-            plot_to_add._yaxis = "\Gamma"
-            if i < len(titles):
-                title = titles[i]
-                plot_to_add.name = titles[i]
-            GuiUtils.updateModelItemWithPlot(self._model_item, plot_to_add, title)
-            #self.axes.set_xlim(min(data1.x), max(data1.x) / 4)
-        pass
+            self.add_real_space_plot(i, plot)
+
+    def add_real_space_plot(self, index, plot):
+        """create a plot in DE for the transform at index in the datas tuple"""
+        titles = ['1D Correlation', '3D Correlation', 'Interface Distribution Function']
+        plot_to_add = self.parent.createGuiData(plot)
+        # set plot properties
+        title = plot_to_add.title
+        plot_to_add.scale = 'linear'
+        plot_to_add.symbol = 'Line'
+        plot_to_add._xaxis = "x"
+        plot_to_add._xunit = "A"
+        plot_to_add._yaxis = "\Gamma"
+        if index < len(titles):
+            title = titles[index]
+            plot_to_add.name = titles[index]
+        GuiUtils.updateModelItemWithPlot(self._model_item, plot_to_add, title)
 
     def setup_mapper(self):
         """Creating mapping between model and gui elements."""
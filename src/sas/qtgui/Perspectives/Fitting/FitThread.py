@@ -1,13 +1,35 @@
+import io
+import os
 import sys
 import time
 import copy
+import pickle
+import copyreg
 import traceback
 import logging
+from concurrent.futures import wait, FIRST_COMPLETED
+
+from sasmodels import core
+from sasmodels import generate
+from sasmodels import modelinfo
+from sasmodels import product
+from sasmodels import models as standard_models
+from sasmodels.sasview_model import SasviewModel, make_model_from_info
 
 from sas.sascalc.data_util.calcthread import CalcThread
+from sas.sascalc.data_util.process_pool import ProcessPool
 
 logger = logging.getLogger(__name__)
 
+# Time between checks for interruption while waiting for the workers [s]
+POLL_INTERVAL = 0.1
+
+# Directory of the models distributed with sasmodels
+STANDARD_MODEL_DIR = os.path.dirname(os.path.abspath(standard_models.__file__))
+
+# Model classes built from their source by load_model, in each process
+_model_classes = {}
+
 def map_getattr(classInstance, classFunc, *args):
     """
     Take an instance of a class and a function name as a string.
@@ -18,6 +40,112 @@ def map_getattr(classInstance, classFunc, *args):
 def map_apply(arguments):
     return arguments[0](*arguments[1:])
 
+def model_source(model_info):
+    """
+    Describe how to build the model of *model_info* again in another process
+
+    :return: ('product', form factor source, structure factor source),
+        ('custom', plugin model path) or ('standard', model name)
+    """
+    if model_info.composition is not None \
+            and model_info.composition[0] == 'product':
+        return ('product',) + tuple(model_source(part)
+                                    for part in model_info.composition[1])
+    filename = model_info.filename
+    if filename and os.path.dirname(os.path.abspath(filename)) != STANDARD_MODEL_DIR:
+        return ('custom', filename)
+    return ('standard', model_info.id)
+
+def _load_model_info(source):
+    """
+    Load the model info of a model_source()
+    """
+    if source[0] == 'product':
+        return product.make_product_info(*[_load_model_info(part)
+                                           for part in source[1:]])
+    if source[0] == 'custom':
+        return modelinfo.make_model_info(generate.load_kernel_module(source[1]))
+    return core.load_model_info(source[1])
+
+def load_model(source, state):
+    """
+    Build a sasmodels model from its model_source() and the attributes
+    (parameters, dispersion...) of the pickled instance.
+
+    The class of each model is built once per process, so that its kernel
+    is only compiled for the first data set fitted with it.
+    """
+    model_class = _model_classes.get(source)
+    if model_class is None:
+        model_class = make_model_from_info(_load_model_info(source))
+        _model_classes[source] = model_class
+    model = model_class.__new__(model_class)
+    model.__dict__.update(state)
+    return model
+
+def reduce_model(model):
+    """
+    Reduce a sasmodels model to its model_source() and attributes
+    """
+    if model._model_info is None:
+        return model.__reduce_ex__(pickle.HIGHEST_PROTOCOL)
+    return load_model, (model_source(model._model_info), model.__dict__)
+
+class FitDispatchTable(dict):
+    """
+    Pickle reduction functions of the fitters and results exchanged with
+    the worker processes.
+
+    The classes of the sasmodels models are built at runtime and cannot be
+    pickled by reference, so the models are sent as their model_source()
+    and attributes, and built again by load_model(). A dispatch table is
+    keyed by exact class, so the model classes are added as they are met.
+    """
+    def __init__(self):
+        dict.__init__(self, copyreg.dispatch_table)
+
+    def __missing__(self, cls):
+        if isinstance(cls, type) and issubclass(cls, SasviewModel):
+            self[cls] = reduce_model
+            return reduce_model
+        raise KeyError(cls)
+
+    def get(self, cls, default=None):
+        try:
+            return self[cls]
+        except KeyError:
+            return default
+
+def dumps(obj):
+    """
+    Pickle a fitter or fit result, with the models reduced by reduce_model()
+    """
+    buffer = io.BytesIO()
+    pickler = pickle.Pickler(buffer, pickle.HIGHEST_PROTOCOL)
+    pickler.dispatch_table = FitDispatchTable()
+    pickler.dump(obj)
+    return buffer.getvalue()
+
+class WorkerThread(object):
+    """
+    Stand-in for the fit thread in the worker processes.
+
+    The worker processes are terminated when the batch fit is interrupted.
+    """
+    def isquit(self):
+        pass
+
+def fit_in_worker(fitter, reset_flag):
+    """
+    Run the fit of a single data set in a worker process
+
+    :param fitter: fitter pickled by dumps()
+    :return: fit result pickled by dumps()
+    """
+    fitter = pickle.loads(fitter)
+    return dumps(map_getattr(fitter, 'fit', None, None, None, WorkerThread(),
+                             reset_flag))
+
 class FitThread(CalcThread):
     """Thread performing the fit """
 
@@ -32,7 +160,9 @@ class FitThread(CalcThread):
                  updatefn=None,
                  yieldtime=0.03,
                  worktime=0.03,
-                 reset_flag=False):
+                 reset_flag=False,
+                 workers=1,
+                 resultfn=None):
         CalcThread.__init__(self,
                  completefn,
                  updatefn,
@@ -48,6 +178,11 @@ class FitThread(CalcThread):
         self.updatefn = updatefn
         #Relative error desired in the sum of squares.
         self.reset_flag = reset_flag
+        # Number of processes fitting the data sets of a batch;
+        # None for one per CPU core
+        self.workers = workers if workers is not None else os.cpu_count()
+        # Called with (index, result) as soon as each fit is done
+        self.resultfn = resultfn
 
     def isquit(self):
         """
@@ -76,7 +211,14 @@ class FitThread(CalcThread):
             inputs = list(zip(list_map_get_attr, self.fitter, list_fit_function,
                          list_q, list_q, list_handler, list_curr_thread,
                          list_reset_flag))
-            result = list(map(map_apply, inputs))
+            if self.workers > 1 and fitter_size > 1:
+                result = self.computeParallel(inputs)
+            else:
+                result = []
+                for index, arguments in enumerate(inputs):
+                    result.append(map_apply(arguments))
+                    if self.resultfn is not None:
+                        self.resultfn(index, result[-1])
             results = (result, time.time()-self.starttime)
             if self.handler:
                 self.completefn(results)
@@ -103,6 +245,62 @@ class FitThread(CalcThread):
             else:
                 return None
 
+    def computeParallel(self, inputs):
+        """
+        Fit the independent data sets of a batch in a pool of processes
 
+        :param inputs: map_apply arguments of the fit of each data set
+        :return: list of fit results, in the order of the inputs
+        """
+        fitter_size = len(inputs)
+        result = [None]*fitter_size
+        n_done = 0
 
+        # Fitters which cannot be sent to another process are run here
+        remote, local = {}, []
+        for index, fitter in enumerate(self.fitter):
+            try:
+                remote[index] = dumps(fitter)
+            except Exception:
+                logger.info("Fitting data set %d in the main process", index)
+                local.append(index)
 
+        pool = ProcessPool(max(min(self.workers, len(remote)), 1))
+        pending = {}
+        try:
+            for index, fitter in remote.items():
+                future = pool.submit(fit_in_worker, fitter, self.reset_flag)
+                pending[future] = index
+            for index in local:
+                self.isquit()
+                result[index] = map_apply(inputs[index])
+                n_done += 1
+                self.reportResult(index, result[index], n_done)
+            while pending:
+                done, _ = wait(pending, timeout=POLL_INTERVAL,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    result[index] = pickle.loads(future.result())
+                    n_done += 1
+                    self.reportResult(index, result[index], n_done)
+                self.isquit()
+        except BaseException:
+            # Stop the fits still running and drop the queued ones
+            pool.shutdown(cancel=True)
+            raise
+        pool.shutdown()
+        return result
+
+    def reportResult(self, index, result, n_done):
+        """
+        Report progress once the fit of a data set of a parallel batch is done
+
+        :param index: index of the data set in the batch
+        :param result: fit result of the data set
+        :param n_done: number of data sets fitted so far
+        """
+        if self.handler is not None:
+            self.handler.progress(n_done, len(self.fitter))
+        if self.resultfn is not None:
+            self.resultfn(index, result)
@@ -107,6 +107,7 @@ class FittingWidget(QtWidgets.QWidget, Ui_FittingWidgetUI):
     newModelSignal = QtCore.pyqtSignal()
     fittingFinishedSignal = QtCore.pyqtSignal(tuple)
     batchFittingFinishedSignal = QtCore.pyqtSignal(tuple)
+    batchFitResultSignal = QtCore.pyqtSignal(tuple)
     Calc1DFinishedSignal = QtCore.pyqtSignal(dict)
     Calc2DFinishedSignal = QtCore.pyqtSignal(dict)
 
@@ -239,6 +240,8 @@ class FittingWidget(QtWidgets.QWidget, Ui_FittingWidgetUI):
         self.fit_started = False
         # The current fit thread
         self.calc_fit = None
+        # Results of the data sets of the current batch fit, None until fitted
+        self._batch_results = None
         # Current SasModel in view
         self.kernel_module = None
         # Current SasModel view dimension
@@ -543,7 +546,7 @@ class FittingWidget(QtWidgets.QWidget, Ui_FittingWidgetUI):
     def customModels(cls):
         """ Reads in file names in the custom plugin directory """
         manager = models.ModelManager()
-        # TODO: Cache plugin models instead of scanning the directory each time.
+        # Only the new or changed plugins are imported, see the plugin manifest
         manager.update()
         # TODO: Define plugin_models property in ModelManager.
         return manager.base.plugin_models
@@ -601,6 +604,7 @@ class FittingWidget(QtWidgets.QWidget, Ui_FittingWidgetUI):
         # Local signals
         self.batchFittingFinishedSignal.connect(self.batchFitComplete)
         self.fittingFinishedSignal.connect(self.fitComplete)
+        self.batchFitResultSignal.connect(self.batchFitResult)
         self.Calc1DFinishedSignal.connect(self.complete1D)
         self.Calc2DFinishedSignal.connect(self.complete2D)
 
@@ -1662,6 +1666,16 @@ class FittingWidget(QtWidgets.QWidget, Ui_FittingWidgetUI):
         # Create the fitting thread, based on the fitter
         completefn = self.batchFittingCompleted if self.is_batch_fitting else self.fittingCompleted
 
+        # Data sets of a batch are independent and can be fitted concurrently.
+        # Chain fitting has to proceed one data set after the other.
+        workers = 1
+        resultfn = None
+        self._batch_results = None
+        if self.is_batch_fitting and not self.is_chain_fitting:
+            workers = LocalConfig.BATCH_FIT_WORKERS
+            self._batch_results = [None]*len(fitters)
+            resultfn = lambda index, result: self.batchFitResultSignal.emit((index, result))
+
         self.calc_fit = FitThread(handler=handler,
                             fn=fitters,
                             batch_inputs=batch_inputs,
@@ -1669,7 +1683,9 @@ class FittingWidget(QtWidgets.QWidget, Ui_FittingWidgetUI):
                             page_id=[[self.page_id]],
                             updatefn=updater,
                             completefn=completefn,
-                            reset_flag=self.is_chain_fitting)
+                            reset_flag=self.is_chain_fitting,
+                            workers=workers,
+                            resultfn=resultfn)
 
         if LocalConfig.USING_TWISTED:
             # start the trhrhread with twisted
@@ -1687,6 +1703,31 @@ class FittingWidget(QtWidgets.QWidget, Ui_FittingWidgetUI):
         # Disable some elements
         self.disableInteractiveElements()
 
+    def batchFitResult(self, output_tuple):
+        """
+        Display the result of a data set of a batch fit as soon as it is fitted.
+        Called in the main thread.
+        """
+        index, res_list = output_tuple
+        if self._batch_results is None:
+            return
+        n_done = sum(row is not None for row in self._batch_results) + 1
+        self._batch_results[index] = res_list
+
+        page_name = "BatchPage" + str(self.tab_id)
+        if n_done == 1:
+            # Show the grid panel, with the rows of the other data sets empty
+            results = copy.deepcopy(self._batch_results)
+            results.append(page_name)
+            self.communicate.sendDataToGridSignal.emit(results)
+        else:
+            self.communicate.sendResultToGridSignal.emit(page_name, index,
+                                                         copy.deepcopy(res_list))
+        self.updateBatchResult(index, res_list)
+
+        msg = "Fitted data set %d of %d." % (n_done, len(self._batch_results))
+        self.communicate.statusBarUpdateSignal.emit(msg)
+
     def stopFit(self):
         """
         Attempt to stop the fitting thread
@@ -1733,41 +1774,53 @@ class FittingWidget(QtWidgets.QWidget, Ui_FittingWidgetUI):
             self.communicate.statusBarUpdateSignal.emit(msg)
             return
 
-        # Show the grid panel
-        page_name = "BatchPage" + str(self.tab_id)
-        results = copy.deepcopy(result[0])
-        results.append(page_name)
-        self.communicate.sendDataToGridSignal.emit(results)
+        # The results streamed by batchFitResult are already displayed
+        streamed = self._batch_results is not None
+        self._batch_results = None
+
+        if not streamed:
+            # Show the grid panel
+            page_name = "BatchPage" + str(self.tab_id)
+            results = copy.deepcopy(result[0])
+            results.append(page_name)
+            self.communicate.sendDataToGridSignal.emit(results)
 
         elapsed = result[1]
         msg = "Fitting completed successfully in: %s s.\n" % GuiUtils.formatNumber(elapsed)
         self.communicate.statusBarUpdateSignal.emit(msg)
 
-        # Run over the list of results and update the items
-        for res_index, res_list in enumerate(result[0]):
-            # results
-            res = res_list[0]
-            param_dict = self.paramDictFromResults(res)
-
-            # create local kernel_module
-            kernel_module = FittingUtilities.updateKernelWithResults(self.kernel_module, param_dict)
-            # pull out current data
-            data = self._logic[res_index].data
-
-            # Switch indexes
-            self.data_index = res_index
-            # Recompute Q ranges
-            if self.data_is_loaded:
-                self.q_range_min, self.q_range_max, self.npts = self.logic.computeDataRange()
-
-            # Recalculate theories
-            method = self.complete1D if isinstance(self.data, Data1D) else self.complete2D
-            self.calculateQGridForModelExt(data=data, model=kernel_module, completefn=method, use_threads=False)
+        if not streamed:
+            # Run over the list of results and update the items
+            for res_index, res_list in enumerate(result[0]):
+                self.updateBatchResult(res_index, res_list)
 
         # Restore original kernel_module, so subsequent fits on the same model don't pick up the new params
         if self.kernel_module is not None:
             self.kernel_module = copy.deepcopy(self.kernel_module_copy)
 
+    def updateBatchResult(self, res_index, res_list):
+        """
+        Recalculate the theory of a data set of a batch with its fit results
+        """
+        # results
+        res = res_list[0]
+        param_dict = self.paramDictFromResults(res)
+
+        # create local kernel_module
+        kernel_module = FittingUtilities.updateKernelWithResults(self.kernel_module, param_dict)
+        # pull out current data
+        data = self._logic[res_index].data
+
+        # Switch indexes
+        self.data_index = res_index
+        # Recompute Q ranges
+        if self.data_is_loaded:
+            self.q_range_min, self.q_range_max, self.npts = self.logic.computeDataRange()
+
+        # Recalculate theories
+        method = self.complete1D if isinstance(self.data, Data1D) else self.complete2D
+        self.calculateQGridForModelExt(data=data, model=kernel_module, completefn=method, use_threads=False)
+
     def paramDictFromResults(self, results):
         """
         Given the fit results structure, pull out optimized parameters and return them as nicely
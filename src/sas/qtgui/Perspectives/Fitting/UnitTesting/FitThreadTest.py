@@ -0,0 +1,116 @@
+import time
+import unittest
+
+import numpy as np
+from unittest.mock import MagicMock, patch
+
+from sasmodels.sasview_model import _make_standard_model, MultiplicationModel
+
+# set up import paths
+import sas.qtgui.path_prepare
+
+from sas.sascalc.dataloader.data_info import Data1D
+from sas.sascalc.fit.BumpsFitting import BumpsFit
+
+# Local
+from sas.qtgui.Perspectives.Fitting import FitThread as FitThreadModule
+from sas.qtgui.Perspectives.Fitting.FitThread import FitThread
+
+
+class DummyFitter(object):
+    """Picklable stand-in for BumpsFit"""
+    def __init__(self, value, delay=0.0):
+        self.value = value
+        self.delay = delay
+
+    def fit(self, msg_q=None, q=None, handler=None, curr_thread=None,
+            ftol=None, reset_flag=False):
+        end = time.time() + self.delay
+        while time.time() < end:
+            curr_thread.isquit()
+            time.sleep(0.01)
+        return [self.value]
+
+
+def makeBumpsFit(model, scale):
+    """Fitter of the scale of a model, as built by the fitting widget"""
+    x = np.linspace(0.005, 0.3, 50)
+    model.setParam('scale', scale)
+    y = model.evalDistribution(x)
+    data = Data1D(x=x, y=y, dy=0.05*y)
+    model.setParam('scale', 1.0)
+    fitter = BumpsFit()
+    fitter.set_model(model, 1, ['scale'], data=data)
+    fitter.set_data(data=data, id=1)
+    fitter.select_problem_for_fit(id=1, value=1)
+    return fitter
+
+
+class FitThreadTest(unittest.TestCase):
+    """Test the fit thread"""
+
+    def makeThread(self, fitters, **kwargs):
+        return FitThread(fn=fitters, page_id=[[1]], handler=None,
+                         batch_outputs={}, batch_inputs={}, **kwargs)
+
+    def testSerial(self):
+        """Fit the data sets one after the other"""
+        resultfn = MagicMock()
+        thread = self.makeThread([DummyFitter(i) for i in range(3)],
+                                 resultfn=resultfn)
+        result, _ = thread.compute()
+        self.assertEqual(result, [[0], [1], [2]])
+        self.assertEqual(resultfn.call_count, 3)
+        resultfn.assert_called_with(2, [2])
+
+    def testParallel(self):
+        """Results of a parallel fit are in the order of the data sets"""
+        resultfn = MagicMock()
+        fitters = [DummyFitter(i, delay=0.05*(4-i)) for i in range(4)]
+        thread = self.makeThread(fitters, workers=2, resultfn=resultfn)
+        result, _ = thread.compute()
+        self.assertEqual(result, [[0], [1], [2], [3]])
+        indices = sorted(args[0][0] for args in resultfn.call_args_list)
+        self.assertEqual(indices, [0, 1, 2, 3])
+
+    def testParallelUnpicklable(self):
+        """Fitters which cannot be pickled are fitted in the calling process"""
+        local = DummyFitter(1)
+        local.lock = lambda: None
+        thread = self.makeThread([DummyFitter(0), local], workers=2)
+        result, _ = thread.compute()
+        self.assertEqual(result, [[0], [1]])
+
+    def testParallelBumps(self):
+        """sasmodels models are rebuilt in the worker processes"""
+        sphere = _make_standard_model('sphere')
+        hardsphere = _make_standard_model('hardsphere')
+        fitters = [makeBumpsFit(sphere(), 2.0),
+                   makeBumpsFit(sphere(), 3.0),
+                   makeBumpsFit(MultiplicationModel(sphere(), hardsphere()), 4.0)]
+        thread = self.makeThread(fitters, workers=2)
+        # No data set is fitted in the main process
+        with patch.object(FitThreadModule, 'map_apply',
+                          side_effect=AssertionError("fitted locally")):
+            result, _ = thread.compute()
+        for scale, fit_result in zip([2.0, 3.0, 4.0], result):
+            self.assertEqual(fit_result[0].param_list, ['scale'])
+            self.assertAlmostEqual(fit_result[0].pvec[0], scale, places=4)
+        self.assertEqual(result[2][0].model.name, 'sphere@hardsphere')
+
+    def testParallelAbort(self):
+        """Stopping the thread interrupts the workers"""
+        handler = MagicMock()
+        fitters = [DummyFitter(i, delay=60.0) for i in range(2)]
+        thread = FitThread(fn=fitters, page_id=[[1]], handler=handler,
+                           batch_outputs={}, batch_inputs={},
+                           completefn=MagicMock(), workers=2)
+        thread.isquit = MagicMock(side_effect=KeyboardInterrupt("stop"))
+        start = time.time()
+        thread.compute()
+        self.assertLess(time.time() - start, 30.0)
+        handler.stop.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -17,6 +17,7 @@ from PyQt5 import QtWidgets
 from sas.qtgui.Plotting.PlotterData import Data1D
 from sas.qtgui.Plotting.Plotter import PlotterWidget
 import sas.qtgui.Utilities.GuiUtils as GuiUtils
+from sas.sascalc.pr.distance_explorer import DistExplorer
 
 # local
 from .UI.DMaxExplorer import Ui_DmaxExplorer
@@ -127,35 +128,20 @@ class DmaxWindow(QtWidgets.QDialog, Ui_DmaxExplorer):
                    .format(e.message))
             logger.error(msg)
 
-        original = self.pr_state.d_max
-
-        for x in xs:
-            self.pr_state.d_max = x
-            try:
-                out, cov = self.pr_state.invert(self.pr_state.nfunc)
-
-                iq0.append(self.pr_state.iq0(out))
-                rg.append(self.pr_state.rg(out))
-                pos.append(self.pr_state.get_positive(out))
-                pos_err.append(self.pr_state.get_pos_err(out, cov))
-                osc.append(self.pr_state.oscillations(out))
-                bck.append(self.pr_state.background)
-                chi2.append(self.pr_state.chi2)
-                plotable_xs.append(x)
-            except Exception as ex:
-                # This inversion failed, skip this D_max value
-                msg = "ExploreDialog: inversion failed "
-                msg += "for D_max=%s\n%s" % (str(x), ex)
-                logger.error(msg)
-
-        #Return the invertor to its original state
-        self.pr_state.d_max = original
-        try:
-            self.pr_state.invert(self.nfunc)
-        except RuntimeError as ex:
-            msg = "ExploreDialog: inversion failed "
-            msg += "for D_max=%s\n%s" % (str(x), ex)
+        # The inversions are done on copies of the invertor, spread over
+        # several processes for large problems
+        results = DistExplorer(self.pr_state).scan(list(xs))
+        for msg in results.errors:
+            # This inversion failed, skip this D_max value
             logger.error(msg)
+        iq0 = results.iq0
+        rg = results.rg
+        pos = results.pos
+        pos_err = results.pos_err
+        osc = results.osc
+        bck = results.bck
+        chi2 = results.chi2
+        plotable_xs = results.d_max
 
         plotter = self.dependentVariable.currentText()
         x_label = "D_{max}"
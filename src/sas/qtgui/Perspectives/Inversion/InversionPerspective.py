@@ -47,6 +47,8 @@ class InversionWindow(QtWidgets.QDialog, Ui_PrInversion):
     estimateDynamicNTSignal = QtCore.pyqtSignal(tuple)
     estimateDynamicSignal = QtCore.pyqtSignal(tuple)
     calculateSignal = QtCore.pyqtSignal(tuple)
+    batchResultSignal = QtCore.pyqtSignal(tuple)
+    batchCompleteSignal = QtCore.pyqtSignal(tuple)
 
     def __init__(self, parent=None, data=None):
         super(InversionWindow, self).__init__()
@@ -105,6 +107,8 @@ class InversionWindow(QtWidgets.QDialog, Ui_PrInversion):
         self.batchResultsWindow = None
         self.batchResults = {}
         self.batchComplete = []
+        # Data references of the data sets of the running batch
+        self.batchItems = []
 
         # Add validators
         self.setupValidators()
@@ -219,6 +223,8 @@ class InversionWindow(QtWidgets.QDialog, Ui_PrInversion):
         self.estimateDynamicSignal.connect(self._estimateDynamicUpdate)
         self.estimateSignal.connect(self._estimateUpdate)
         self.calculateSignal.connect(self._calculateUpdate)
+        self.batchResultSignal.connect(self._batchResultUpdate)
+        self.batchCompleteSignal.connect(self._batchCompleteUpdate)
 
         self.maxDistanceInput.textEdited.connect(self.performEstimateDynamic)
 
@@ -454,6 +460,7 @@ class InversionWindow(QtWidgets.QDialog, Ui_PrInversion):
             self.showBatchOutput()
         self.isBatch = False
         self.isCalculating = False
+        self.calculateAllButton.setText("Calculate All")
         self.updateGuiValues()
 
     ######################################################################
@@ -733,6 +740,13 @@ class InversionWindow(QtWidgets.QDialog, Ui_PrInversion):
     # Thread Creators
 
     def startThreadAll(self):
+        """
+            Start the inversion of all the data sets.
+            The data sets are inverted in a pool of processes, each with
+            its own estimate of alpha and of the number of terms.
+        """
+        from .Thread import CalcBatchPr
+
         self.isCalculating = True
         self.isBatch = True
         self.batchComplete = []
@@ -740,26 +754,26 @@ class InversionWindow(QtWidgets.QDialog, Ui_PrInversion):
         self.enableButtons()
         self.batchResultsWindow = BatchInversionOutputPanel(
             parent=self, output_data=self.batchResults)
-        self.performEstimate()
 
-    def startNextBatchItem(self):
-        self.isBatch = False
-        for index in range(len(self._dataList)):
-            if index not in self.batchComplete:
-                self.dataList.setCurrentIndex(index)
-                self.isBatch = True
-                # Add the index before calculating in case calculation fails
-                self.batchComplete.append(index)
-                break
-        if self.isBatch:
-            self.performEstimate()
-        else:
-            # If no data sets left, end batch calculation
-            self.isCalculating = False
-            self.batchComplete = []
-            self.calculateAllButton.setText("Calculate All")
-            self.showBatchOutput()
-            self.enableButtons()
+        # If the thread is already started, stop it
+        self.stopCalcThread()
+
+        # Apply the current parameters to each data set
+        self.batchItems = list(self._dataList.keys())
+        invertors = []
+        for data_ref in self.batchItems:
+            data = GuiUtils.dataFromItem(data_ref)
+            pr = self._calculator.clone()
+            pr.set_x(data.x)
+            pr.set_y(data.y)
+            pr.set_err(data.dy)
+            invertors.append(pr)
+        self.calcThread = CalcBatchPr(invertors, self.getNFunc(),
+                                      error_func=self._threadError,
+                                      completefn=self._batchCompleted,
+                                      resultfn=self._batchResultCompleted)
+        self.calcThread.queue()
+        self.calcThread.ready(2.5)
 
     def startThread(self):
         """
@@ -953,10 +967,6 @@ class InversionWindow(QtWidgets.QDialog, Ui_PrInversion):
         self.updateGuiValues()
         if message:
             logger.info(message)
-        if self.isBatch:
-            self.acceptAlpha()
-            self.acceptNoTerms()
-            self.startThread()
 
     def _estimateDynamicNTUpdate(self, output_tuple):
         """
@@ -975,10 +985,6 @@ class InversionWindow(QtWidgets.QDialog, Ui_PrInversion):
         self.updateDynamicGuiValues()
         if message:
             logger.info(message)
-        if self.isBatch:
-            self.acceptAlpha()
-            self.acceptNoTerms()
-            self.startThread()
 
     def _calculateCompleted(self, out, cov, pr, elapsed):
         ''' Send a signal to the main thread for model update'''
@@ -1011,19 +1017,78 @@ class InversionWindow(QtWidgets.QDialog, Ui_PrInversion):
 
         # Udpate internals and GUI
         self.updateDataList(self._data)
-        if self.isBatch:
-            self.batchComplete.append(self.dataList.currentIndex())
-            self.startNextBatchItem()
-        else:
-            self.isCalculating = False
+        self.isCalculating = False
         self.updateGuiValues()
 
+    def _batchResultCompleted(self, result):
+        ''' Send a signal to the main thread for model update'''
+        self.batchResultSignal.emit((result,))
+
+    def _batchResultUpdate(self, output_tuple):
+        """
+        Method called with the results of each data set of a batch
+        as soon as they are available
+
+        :param result: BatchResult of the data set
+        """
+        result, = output_tuple
+        self.batchComplete.append(result.index)
+        if result.error is not None:
+            logger.error(result.error)
+            return
+        data_ref = self.batchItems[result.index]
+        if data_ref not in self._dataList:
+            # The data set was removed during the calculation
+            return
+        pr = result.pr
+        logic = InversionLogic(GuiUtils.dataFromItem(data_ref))
+        pr_plot = logic.newPRPlot(pr.out, pr, pr.cov)
+        pr_plot.name = logic.data.name
+        pr_plot.plot_role = Data1D.ROLE_RESIDUAL
+        data_plot = logic.new1DPlot(pr.out, pr)
+        data_plot.name = logic.data.name
+        data_plot.plot_role = Data1D.ROLE_DEFAULT
+        data_plot.symbol = "Line"
+        data_plot.show_errors = False
+        GuiUtils.updateModelItemWithPlot(data_ref, pr_plot, pr_plot.name)
+        GuiUtils.updateModelItemWithPlot(data_ref, data_plot, data_plot.name)
+
+        self._dataList[data_ref] = {
+            DICT_KEYS[0]: pr,
+            DICT_KEYS[1]: pr_plot,
+            DICT_KEYS[2]: data_plot
+        }
+        self.batchResults[logic.data.name] = pr
+        if data_ref is self._data:
+            self._calculator = pr
+            self.prPlot = pr_plot
+            self.dataPlot = data_plot
+            self.updateGuiValues()
+        if self.batchResultsWindow is not None:
+            self.showBatchOutput()
+
+    def _batchCompleted(self, results, elapsed):
+        ''' Send a signal to the main thread for model update'''
+        self.batchCompleteSignal.emit((results, elapsed))
+
+    def _batchCompleteUpdate(self, output_tuple):
+        """
+        Method called when all the data sets of a batch are inverted
+
+        :param results: list of BatchResult
+        :param elapsed: time spent computing
+        """
+        self.isBatch = False
+        self.isCalculating = False
+        self.batchComplete = []
+        self.batchItems = []
+        self.calculateAllButton.setText("Calculate All")
+        self.showBatchOutput()
+        self.enableButtons()
+
     def _threadError(self, error):
         """
             Call-back method for calculation errors
         """
         logger.error(error)
-        if self.isBatch:
-            self.startNextBatchItem()
-        else:
-            self.stopCalculation()
+        self.stopCalculation()
@@ -1,6 +1,7 @@
 import sys
 import time
 from sas.sascalc.data_util.calcthread import CalcThread
+from sas.sascalc.pr.batch_invertor import BatchInvertor
 
 
 class CalcPr(CalcThread):
@@ -35,6 +36,44 @@ class CalcPr(CalcThread):
                 self.error_func("CalcPr.compute: %s" % sys.exc_info()[1])
 
 
+class CalcBatchPr(CalcThread):
+    """
+    Compute P(r) for a batch of data sets in a pool of processes
+    """
+
+    def __init__(self, invertors, nfunc=None, error_func=None, completefn=None,
+                 updatefn=None, resultfn=None, workers=None,
+                 yieldtime=0.01, worktime=0.01):
+        """
+        :param invertors: list of Invertor objects, one per data set
+        :param resultfn: called with the BatchResult of each data set
+            as soon as it is available
+        :param workers: number of processes; see BatchInvertor
+        """
+        CalcThread.__init__(self, completefn, updatefn, yieldtime, worktime)
+        self.batch = BatchInvertor(invertors, nfunc=nfunc, workers=workers)
+        self.error_func = error_func
+        self.resultfn = resultfn
+        self.starttime = 0
+
+    def compute(self):
+        """
+        Perform the P(r) inversions
+        """
+        try:
+            self.starttime = time.time()
+            results = self.batch.run(resultfn=self.resultfn,
+                                     isquit=self.isquit)
+            elapsed = time.time() - self.starttime
+            self.complete(results=results, elapsed=elapsed)
+        except KeyboardInterrupt:
+            # Thread was interrupted, just proceed
+            pass
+        except:
+            if self.error_func is not None:
+                self.error_func("CalcBatchPr.compute: %s" % sys.exc_info()[1])
+
+
 class EstimatePr(CalcThread):
     """
     Estimate P(r)
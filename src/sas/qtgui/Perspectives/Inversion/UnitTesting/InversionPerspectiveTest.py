@@ -5,9 +5,11 @@ from unittest.mock import MagicMock
 from PyQt5 import QtGui, QtWidgets
 
 from sas.qtgui.Utilities.GuiUtils import *
-from sas.qtgui.Perspectives.Inversion.InversionPerspective import InversionWindow
+from sas.qtgui.Perspectives.Inversion.InversionPerspective import InversionWindow, DICT_KEYS
 from sas.qtgui.Perspectives.Inversion.InversionUtils import WIDGETS
 from sas.qtgui.Plotting.PlotterData import Data1D
+from sas.sascalc.pr.invertor import Invertor
+from sas.sascalc.pr.batch_invertor import BatchResult
 
 import sas.qtgui.Utilities.GuiUtils as GuiUtils
 
@@ -330,6 +332,34 @@ class InversionTest(unittest.TestCase):
         self.assertEqual(params.get('alpha', None), page.get('alpha', None))
         self.assertTrue(np.isnan(params.get('rg')))
 
+    def testBatchResult(self):
+        """ Batch results are stored as soon as they are available """
+        self.widget.setData([self.fakeData1, self.fakeData2])
+        self.widget.isBatch = True
+        self.widget.batchItems = [self.fakeData1, self.fakeData2]
+        pr = Invertor()
+        pr.d_max = 100.0
+        pr.x = np.array([0.1, 0.15, 0.2])
+        pr.y = np.array([1.0, 0.7, 0.5])
+        pr.err = np.array([0.1, 0.1, 0.1])
+        pr.invert(2)
+
+        # A failed inversion leaves the data set as it was
+        calculator = self.widget._dataList[self.fakeData1][DICT_KEYS[0]]
+        self.widget._batchResultUpdate((BatchResult(0, error="failed"),))
+        self.assertIs(self.widget._dataList[self.fakeData1][DICT_KEYS[0]], calculator)
+
+        self.widget._batchResultUpdate((BatchResult(1, pr),))
+        self.assertEqual(self.widget.batchComplete, [0, 1])
+        self.assertIs(self.widget._dataList[self.fakeData2][DICT_KEYS[0]], pr)
+        self.assertIsNotNone(self.widget._dataList[self.fakeData2][DICT_KEYS[1]])
+        self.assertIn(pr, self.widget.batchResults.values())
+
+        self.widget._batchCompleteUpdate(([], 0.0))
+        self.assertFalse(self.widget.isBatch)
+        self.assertFalse(self.widget.isCalculating)
+        self.assertEqual(self.widget.batchComplete, [])
+
 
 if __name__ == "__main__":
     unittest.main()
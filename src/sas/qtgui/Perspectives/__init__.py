@@ -1,14 +1,40 @@
 # Available perspectives.
 # When adding a new perspective, this dictionary needs to be updated
+# with the perspective name, the module defining it and the window class.
+# The modules are only imported when a perspective is first requested,
+# so listing the names does not pull the perspectives in at startup.
 
-from .Fitting.FittingPerspective import FittingWindow
-from .Invariant.InvariantPerspective import InvariantWindow
-from .Inversion.InversionPerspective import InversionWindow
-from .Corfunc.CorfuncPerspective import CorfuncWindow
-
-PERSPECTIVES = {
-    FittingWindow.name: FittingWindow,
-    InvariantWindow.name: InvariantWindow,
-    InversionWindow.name: InversionWindow,
-    CorfuncWindow.name: CorfuncWindow,
-}
\ No newline at end of file
+import importlib
+from collections.abc import Mapping
+
+PERSPECTIVE_MODULES = {
+    "Fitting": ("sas.qtgui.Perspectives.Fitting.FittingPerspective", "FittingWindow"),
+    "Invariant": ("sas.qtgui.Perspectives.Invariant.InvariantPerspective", "InvariantWindow"),
+    "Inversion": ("sas.qtgui.Perspectives.Inversion.InversionPerspective", "InversionWindow"),
+    "Corfunc": ("sas.qtgui.Perspectives.Corfunc.CorfuncPerspective", "CorfuncWindow"),
+}
+
+
+class PerspectiveRegistry(Mapping):
+    """
+    Read-only mapping of perspective name to perspective window class.
+    The window class is imported the first time it is looked up.
+    """
+    def __init__(self, modules):
+        self._modules = modules
+
+    def __getitem__(self, name):
+        module_name, class_name = self._modules[name]
+        return getattr(importlib.import_module(module_name), class_name)
+
+    def __contains__(self, name):
+        return name in self._modules
+
+    def __iter__(self):
+        return iter(self._modules)
+
+    def __len__(self):
+        return len(self._modules)
+
+
+PERSPECTIVES = PerspectiveRegistry(PERSPECTIVE_MODULES)
@@ -1,6 +1,7 @@
 import sys
 import numpy
 import string
+import hashlib
 
 from collections import OrderedDict
 
@@ -42,6 +43,12 @@ COLORS = OrderedDict([
         ('Custom', 'x'),
 ])
 
+# Number of (qx_data, qy_data) geometries whose pixel maps are kept
+PIXEL_MAP_CACHE_SIZE = 4
+# Pixel maps keyed by the digest of their (qx_data, qy_data), most
+# recently used last
+_pixel_maps = OrderedDict()
+
 def build_matrix(data, qx_data, qy_data):
     """
     Build a matrix for 2d plot from a vector
@@ -56,51 +63,87 @@ def build_matrix(data, qx_data, qy_data):
             or qx_data.ndim != 1 or qy_data.ndim != 1:
         return data
 
-    # maximum # of loops to fillup_pixels
-    # otherwise, loop could never stop depending on data
-    max_loop = 1
-    # get the x and y_bin arrays.
-    x_bins, y_bins = get_bins(qx_data, qy_data)
-    # set zero to None
-
     #Note: Can not use scipy.interpolate.Rbf:
     # 'cause too many data points (>10000)<=JHC.
-    # 1d array to use for weighting the data point averaging
-    #when they fall into a same bin.
-    weights_data = numpy.ones([data.size])
-    # get histogram of ones w/len(data); this will provide
-    #the weights of data on each bins
-    weights, xedges, yedges = numpy.histogram2d(x=qy_data,
-                                                y=qx_data,
-                                                bins=[y_bins, x_bins],
-                                                weights=weights_data)
-    # get histogram of data, all points into a bin in a way of summing
-    image, xedges, yedges = numpy.histogram2d(x=qy_data,
-                                              y=qx_data,
-                                              bins=[y_bins, x_bins],
-                                              weights=data)
-    # Now, normalize the image by weights only for weights>1:
-    # If weight == 1, there is only one data point in the bin so
-    # that no normalization is required.
-    image[weights > 1] = image[weights > 1] / weights[weights > 1]
-    # Set image bins w/o a data point (weight==0) as None (was set to zero
-    # by histogram2d.)
-    image[weights == 0] = None
+    index, valid, weights = get_pixel_map(qx_data, qy_data)
+    values = data if valid is None else data[valid]
+    # Sum all data points falling into the same bin
+    image = numpy.bincount(index, weights=values, minlength=weights.size)
+    image = image.reshape(weights.shape)
+    # Normalize the image by the number of points in each bin.
+    # Bins w/o a data point (weight==0) become NaN.
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        image /= weights
 
     # Fill empty bins with 8 nearest neighbors only when at least
-    #one None point exists
-    loop = 0
-
-    # do while loop until all vacant bins are filled up up
-    #to loop = max_loop
-    while not(numpy.isfinite(image[weights == 0])).all():
-        if loop >= max_loop:  # this protects never-ending loop
-            break
+    # one None point exists. A single pass is made, otherwise the
+    # filling could never stop depending on data.
+    if not numpy.isfinite(image[weights == 0]).all():
         image = fillupPixels(image=image, weights=weights)
-        loop += 1
 
     return image
 
+def get_pixel_map(qx_data, qy_data):
+    """
+    Get the map of the data points onto the pixels of the 2d image
+    built by build_matrix. The maps of the last PIXEL_MAP_CACHE_SIZE
+    geometries are cached by the content of the arrays.
+
+    :param qx_data: 1d array of the x axis values
+    :param qy_data: 1d array of the y axis values
+
+    :return: (index, valid, weights) where index is the flat pixel index
+        of each valid point, valid is the mask of the points inside the
+        image (None when all of them are) and weights is the 2d array
+        of the number of points in each pixel
+    """
+    key = _pixel_map_key(qx_data, qy_data)
+    pixel_map = _pixel_maps.pop(key, None)
+    if pixel_map is not None:
+        _pixel_maps[key] = pixel_map
+        return pixel_map
+
+    x_bins, y_bins = get_bins(qx_data, qy_data)
+    x_index = _bin_index(qx_data, x_bins)
+    y_index = _bin_index(qy_data, y_bins)
+    shape = (len(y_bins) - 1, len(x_bins) - 1)
+    valid = (x_index >= 0) & (y_index >= 0)
+    index = y_index * shape[1] + x_index
+    if valid.all():
+        valid = None
+    else:
+        index = index[valid]
+    weights = numpy.bincount(index, minlength=shape[0] * shape[1])
+    pixel_map = (index, valid, weights.reshape(shape).astype(float))
+
+    while len(_pixel_maps) >= max(PIXEL_MAP_CACHE_SIZE, 1):
+        _pixel_maps.popitem(last=False)
+    _pixel_maps[key] = pixel_map
+    return pixel_map
+
+def _pixel_map_key(qx_data, qy_data):
+    """
+    Digest of the content of the qx/qy arrays of a pixel map
+    """
+    digest = hashlib.sha1()
+    for values in (qx_data, qy_data):
+        values = numpy.ascontiguousarray(values)
+        digest.update(str((values.dtype.str, values.shape)).encode())
+        digest.update(values)
+    return digest.hexdigest()
+
+def _bin_index(values, edges):
+    """
+    Index of the bin of each value, as numpy.histogram2d assigns them,
+    or -1 for values outside of the edges
+    """
+    nbins = len(edges) - 1
+    index = numpy.searchsorted(edges, values, side='right') - 1
+    # The last bin includes its right edge
+    index[values == edges[-1]] = nbins - 1
+    index[(index < 0) | (index >= nbins)] = -1
+    return index
+
 def get_bins(qx_data, qy_data):
     """
     get bins
@@ -156,8 +199,6 @@ def fillupPixels(image=None, weights=None):
 
     :return: image (2d array )
 
-    :TODO: Find better way to do for-loop below
-
     """
     # No image matrix given
     if image is None or numpy.ndim(image) != 2 \
@@ -165,52 +206,25 @@ def fillupPixels(image=None, weights=None):
             or weights is None:
         return image
     # Get bin size in y and x directions
-    len_y = len(image)
-    len_x = len(image[1])
+    len_y, len_x = image.shape
+    # Pad with one empty pixel on each side, so the neighbors
+    # of all pixels can be taken by shifting
+    finite = numpy.zeros([len_y + 2, len_x + 2], dtype=bool)
+    finite[1:-1, 1:-1] = numpy.isfinite(image)
+    values = numpy.zeros([len_y + 2, len_x + 2])
+    values[finite] = image[finite[1:-1, 1:-1]]
+    # Sum over the 4 nearest and 4 next nearest neighbors
     temp_image = numpy.zeros([len_y, len_x])
     weit = numpy.zeros([len_y, len_x])
-    # do for-loop for all pixels
-    for n_y in range(len(image)):
-        for n_x in range(len(image[1])):
-            # find only null pixels
-            if weights[n_y][n_x] > 0 or numpy.isfinite(image[n_y][n_x]):
+    for d_y in range(3):
+        for d_x in range(3):
+            if d_y == 1 and d_x == 1:
                 continue
-            else:
-                # find 4 nearest neighbors
-                # check where or not it is at the corner
-                if n_y != 0 and numpy.isfinite(image[n_y - 1][n_x]):
-                    temp_image[n_y][n_x] += image[n_y - 1][n_x]
-                    weit[n_y][n_x] += 1
-                if n_x != 0 and numpy.isfinite(image[n_y][n_x - 1]):
-                    temp_image[n_y][n_x] += image[n_y][n_x - 1]
-                    weit[n_y][n_x] += 1
-                if n_y != len_y - 1 and numpy.isfinite(image[n_y + 1][n_x]):
-                    temp_image[n_y][n_x] += image[n_y + 1][n_x]
-                    weit[n_y][n_x] += 1
-                if n_x != len_x - 1 and numpy.isfinite(image[n_y][n_x + 1]):
-                    temp_image[n_y][n_x] += image[n_y][n_x + 1]
-                    weit[n_y][n_x] += 1
-                # go 4 next nearest neighbors when no non-zero
-                # neighbor exists
-                if n_y != 0 and n_x != 0 and\
-                        numpy.isfinite(image[n_y - 1][n_x - 1]):
-                    temp_image[n_y][n_x] += image[n_y - 1][n_x - 1]
-                    weit[n_y][n_x] += 1
-                if n_y != len_y - 1 and n_x != 0 and \
-                    numpy.isfinite(image[n_y + 1][n_x - 1]):
-                    temp_image[n_y][n_x] += image[n_y + 1][n_x - 1]
-                    weit[n_y][n_x] += 1
-                if n_y != len_y and n_x != len_x - 1 and \
-                    numpy.isfinite(image[n_y - 1][n_x + 1]):
-                    temp_image[n_y][n_x] += image[n_y - 1][n_x + 1]
-                    weit[n_y][n_x] += 1
-                if n_y != len_y - 1 and n_x != len_x - 1 and \
-                    numpy.isfinite(image[n_y + 1][n_x + 1]):
-                    temp_image[n_y][n_x] += image[n_y + 1][n_x + 1]
-                    weit[n_y][n_x] += 1
-
-    # get it normalized
-    ind = (weit > 0)
+            temp_image += values[d_y:d_y + len_y, d_x:d_x + len_x]
+            weit += finite[d_y:d_y + len_y, d_x:d_x + len_x]
+
+    # get it normalized for the null pixels only
+    ind = (weit > 0) & ~(numpy.asarray(weights) > 0) & ~finite[1:-1, 1:-1]
     image[ind] = temp_image[ind] / weit[ind]
 
     return image
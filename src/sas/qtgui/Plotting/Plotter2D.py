@@ -1,4 +1,3 @@
-import copy
 import numpy
 import functools
 import logging
@@ -469,7 +468,7 @@ class Plotter2DWidget(PlotterBase):
         elif data.ndim == 1:
             output = PlotUtilities.build_matrix(data, self.qx_data, self.qy_data)
         else:
-            output = copy.deepcopy(data)
+            output = numpy.array(data, dtype=float)
 
         # get the x and y_bin arrays.
         x_bins, y_bins = PlotUtilities.get_bins(self.qx_data, self.qy_data)
@@ -479,28 +478,8 @@ class Plotter2DWidget(PlotterBase):
         zmin_temp = self.zmin
         # check scale
         if self.scale == 'log_{10}':
-            #with numpy.errstate(all='ignore'):
-            #    output = numpy.log10(output)
-            #index = numpy.isfinite(output)
-            #if not index.all():
-            #    cutoff = (numpy.quantile(output[index], 0.05) - numpy.log10(2) if index.any() else 0.)
-            #    output[output < cutoff] = cutoff
-            #    output[~index] = cutoff
-            try:
-                if  self.zmin <= 0  and len(output[output > 0]) > 0:
-                    zmin_temp = self.zmin
-                    output[output > 0] = numpy.log10(output[output > 0])
-                elif self.zmin <= 0:
-                    zmin_temp = self.zmin
-                    output[output > 0] = numpy.zeros(len(output))
-                    output[output <= 0] = MIN_Z
-                else:
-                    zmin_temp = self.zmin
-                    output[output > 0] = numpy.log10(output[output > 0])
-            except:
-                #Too many problems in 2D plot with scale
-                output[output > 0] = numpy.log10(output[output > 0])
-                pass
+            # Take the log of the positive values, in place
+            numpy.log10(output, out=output, where=output > 0)
 
         vmin, vmax = None, None
 
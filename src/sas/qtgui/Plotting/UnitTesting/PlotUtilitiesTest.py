@@ -2,6 +2,8 @@ import sys
 import unittest
 from collections import OrderedDict
 
+import numpy
+
 from UnitTesting.TestUtils import WarningTestNotImplemented
 
 # Tested module
@@ -24,7 +26,33 @@ class PlotUtilitiesTest(unittest.TestCase):
 
     def testBuildMatrix(self):
         """ build matrix for 2d plot from a vector """
-        WarningTestNotImplemented()
+        qx, qy = numpy.meshgrid(numpy.linspace(-0.1, 0.1, 20),
+                                numpy.linspace(-0.2, 0.2, 20))
+        qx, qy = qx.ravel(), qy.ravel()
+        data = numpy.arange(qx.size, dtype=float)
+        x_bins, y_bins = PlotUtilities.get_bins(qx, qy)
+        weights, _, _ = numpy.histogram2d(qy, qx, bins=[y_bins, x_bins])
+        total, _, _ = numpy.histogram2d(qy, qx, bins=[y_bins, x_bins],
+                                        weights=data)
+        image = PlotUtilities.build_matrix(data, qx, qy)
+
+        self.assertEqual(image.shape, weights.shape)
+        full = weights > 0
+        numpy.testing.assert_allclose(image[full], total[full] / weights[full])
+        # Pixels without data get the average of their neighbors
+        self.assertTrue(numpy.isfinite(image).all())
+
+    def testPixelMapCache(self):
+        """ pixel maps are reused for the same geometry """
+        qx, qy = numpy.meshgrid(numpy.linspace(-0.1, 0.1, 10),
+                                numpy.linspace(-0.1, 0.1, 10))
+        qx, qy = qx.ravel(), qy.ravel()
+        pixel_map = PlotUtilities.get_pixel_map(qx, qy)
+        self.assertIs(pixel_map, PlotUtilities.get_pixel_map(qx.copy(), qy.copy()))
+        self.assertIsNot(pixel_map, PlotUtilities.get_pixel_map(qx, 2 * qy))
+        # the cache does not hold on to the arrays
+        qy *= 2
+        self.assertIsNot(pixel_map, PlotUtilities.get_pixel_map(qx, qy))
 
     def testGetBins(self):
         """ test 1d arrays of the index with square binning """
@@ -32,7 +60,18 @@ class PlotUtilitiesTest(unittest.TestCase):
 
     def testFillupPixels(self):
         """ test filling z values of the empty cells of 2d image matrix """
-        WarningTestNotImplemented()
+        image = numpy.arange(12, dtype=float).reshape(3, 4)
+        weights = numpy.ones([3, 4])
+        image[0, 0] = image[1, 2] = numpy.nan
+        weights[0, 0] = weights[1, 2] = 0
+        # Pixels with data are left alone, even when not finite
+        image[2, 3] = numpy.nan
+
+        image = PlotUtilities.fillupPixels(image=image, weights=weights)
+
+        self.assertAlmostEqual(image[0, 0], (1 + 4 + 5) / 3)
+        self.assertAlmostEqual(image[1, 2], (1 + 2 + 3 + 5 + 7 + 9 + 10) / 7)
+        self.assertTrue(numpy.isnan(image[2, 3]))
 
     def testRescale(sef):
         """ test the helper function for step based zooming """
@@ -374,8 +374,8 @@ class FileConverterWidget(QtWidgets.QDialog, Ui_FileConverterUI):
         :param filename: The header file to extract the data from
         :return x_data: A 1D array containing all the x coordinates of the data
         :return y_data: A 1D array containing all the y coordinates of the data
-        :return frame_data: A dictionary of the form *{frame_number: data}*,
-            where data is a 2D numpy array containing the intensity data
+        :return frame_data: A sequence of Data2D, one for each selected frame,
+            read from the file as they are converted
         """
         loader = Utilities.BSLLoader(filename)
         frames = [0]
@@ -414,7 +414,7 @@ class FileConverterWidget(QtWidgets.QDialog, Ui_FileConverterUI):
 
         if not should_continue:
             return None
-        frame_data = loader.load_frames(frames)
+        frame_data = loader.iter_frames(frames)
 
         return frame_data
 
@@ -59,7 +59,7 @@ class BatchOutputPanel(QtWidgets.QMainWindow, Ui_GridPanelUI):
         self.setupTable(widget=self.tblParams, data=output_data)
         if output_data is not None:
             # Set a table tooltip describing the model
-            model_name = output_data[0][0].model.id
+            model_name = self.fittedRows(output_data)[0][0].model.id
             self.tabWidget.setTabToolTip(0, model_name)
 
     def closeEvent(self, event):
@@ -157,6 +157,9 @@ class BatchOutputPanel(QtWidgets.QMainWindow, Ui_GridPanelUI):
     def addFitResults(self, results):
         """
         Create a new tab with batch fitting results
+
+        The results of the data sets not fitted yet are None, and can be
+        shown later with updateFitResult.
         """
         # pull out page name from results
         page_name = None
@@ -176,10 +179,31 @@ class BatchOutputPanel(QtWidgets.QMainWindow, Ui_GridPanelUI):
         self.has_data = True
 
         # Set a table tooltip describing the model
-        model_name = results[0][0].model.id
+        model_name = self.fittedRows(results)[0][0].model.id
         self.tabWidget.setTabToolTip(self.tabWidget.count()-1, model_name)
         self.data_dict[page_name] = results
 
+    def updateFitResult(self, page_name, index, result):
+        """
+        Show the result of a data set of a batch fit, as soon as it is
+        fitted, in its row of the newest tab created for the batch
+        """
+        results = self.data_dict.get(page_name)
+        if results is None or not 0 <= index < len(results):
+            return
+        results[index] = result
+        for tab_index in reversed(range(self.tabWidget.count())):
+            if self.tabWidget.tabText(tab_index) == page_name:
+                self.setupRow(self.tables[tab_index], index, result)
+                break
+
+    @classmethod
+    def fittedRows(cls, results):
+        """
+        Returns the results of the data sets already fitted
+        """
+        return [row for row in results if row is not None]
+
     @classmethod
     def onHelp(cls):
         """
@@ -218,7 +242,9 @@ class BatchOutputPanel(QtWidgets.QMainWindow, Ui_GridPanelUI):
         assert(isinstance(table, QtWidgets.QTableWidget))
         params = {}
         for column in range(table.columnCount()):
-            value = [table.item(row, column).data(0) for row in range(table.rowCount())]
+            # rows of the data sets not fitted yet are empty
+            items = [table.item(row, column) for row in range(table.rowCount())]
+            value = [item.data(0) if item is not None else "" for item in items]
             key = table.horizontalHeaderItem(column).data(0)
             params[key] = value
         return params
@@ -312,11 +338,11 @@ class BatchOutputPanel(QtWidgets.QMainWindow, Ui_GridPanelUI):
         Create tablewidget items and show them, based on params
         """
         # quietly leave is nothing to show
-        if data is None or widget is None:
+        if data is None or widget is None or not self.fittedRows(data):
             return
 
         # Figure out the headers
-        model = data[0][0]
+        model = self.fittedRows(data)[0][0]
 
         disperse_params = list(model.model.dispersion.keys())
         magnetic_params = model.model.magnetic_params
@@ -337,69 +363,65 @@ class BatchOutputPanel(QtWidgets.QMainWindow, Ui_GridPanelUI):
             if 'phi' in param_list:
                 param_list.remove('phi')
 
-        rows = len(data)
-        columns = len(param_list)
-
-        widget.setColumnCount(columns+2) # add 2 initial columns defined below
-        widget.setRowCount(rows)
-
         # Insert two additional columns
         param_list.insert(0, "Data")
         param_list.insert(0, "Chi2")
-        for i, param in enumerate(param_list):
-            widget.setHorizontalHeaderItem(i, QtWidgets.QTableWidgetItem(param))
 
-        # dictionary of parameter errors for post-processing
-        # [param_name] = [param_column_nr, error_for_row_1, error_for_row_2,...]
-        error_columns = {}
-        # first - Chi2 and data filename
-        for i_row, row in enumerate(data):
-            # each row corresponds to a single fit
-            chi2 = row[0].fitness
-            filename = ""
-            if hasattr(row[0].data, "sas_data"):
-                filename = row[0].data.sas_data.filename
-            widget.setItem(i_row, 0, QtWidgets.QTableWidgetItem(GuiUtils.formatNumber(chi2, high=True)))
-            widget.setItem(i_row, 1, QtWidgets.QTableWidgetItem(str(filename)))
-            # Now, all the parameters
-            for i_col, param in enumerate(param_list[2:]):
-                if param in row[0].param_list:
-                    # parameter is on the to-optimize list - get the optimized value
-                    par_value = row[0].pvec[row[0].param_list.index(param)]
-                    # parse out errors and store them for later use
-                    err_value = row[0].stderr[row[0].param_list.index(param)]
-                    if param in error_columns:
-                        error_columns[param].append(err_value)
-                    else:
-                        error_columns[param] = [i_col, err_value]
-                else:
-                    # parameter was not varied
-                    par_value = row[0].model.params[param]
+        # Errors of the optimized parameters follow their values
+        columns = []
+        for param in param_list:
+            columns.append(param)
+            if param in optimized_params:
+                columns.append(param + self.ERROR_COLUMN_CAPTION)
 
-                widget.setItem(i_row, i_col+2, QtWidgets.QTableWidgetItem(
-                    GuiUtils.formatNumber(par_value, high=True)))
+        widget.setColumnCount(len(columns))
+        widget.setRowCount(len(data))
+        for i, column in enumerate(columns):
+            widget.setHorizontalHeaderItem(i, QtWidgets.QTableWidgetItem(column))
 
-        # Add errors
-        error_list = list(error_columns.keys())
-        for error_param in error_list[::-1]: # must be reverse to keep column indices
-            # the offset for the err column: +2 from the first two extra columns, +1 to append this column
-            error_column = error_columns[error_param][0]+3
-            error_values = error_columns[error_param][1:]
-            widget.insertColumn(error_column)
+        for i_row, row in enumerate(data):
+            # each row corresponds to a single fit
+            if row is not None:
+                self.setupRow(widget, i_row, row)
 
-            column_name = error_param + self.ERROR_COLUMN_CAPTION
-            widget.setHorizontalHeaderItem(error_column, QtWidgets.QTableWidgetItem(column_name))
+        # resize content
+        widget.resizeColumnsToContents()
 
-            for i_row, error in enumerate(error_values):
-                item = QtWidgets.QTableWidgetItem(GuiUtils.formatNumber(error, high=True))
+    def setupRow(self, widget, i_row, row):
+        """
+        Fill in the row i_row of the table from the results of a fit
+        """
+        result = row[0]
+        for i_col in range(widget.columnCount()):
+            column = widget.horizontalHeaderItem(i_col).text()
+            is_error = column.endswith(self.ERROR_COLUMN_CAPTION)
+            if column == "Chi2":
+                value = result.fitness
+            elif column == "Data":
+                filename = ""
+                if hasattr(result.data, "sas_data"):
+                    filename = result.data.sas_data.filename
+                widget.setItem(i_row, i_col, QtWidgets.QTableWidgetItem(str(filename)))
+                continue
+            elif is_error:
+                param = column[:-len(self.ERROR_COLUMN_CAPTION)]
+                if param not in result.param_list:
+                    continue
+                value = result.stderr[result.param_list.index(param)]
+            elif column in result.param_list:
+                # parameter is on the to-optimize list - get the optimized value
+                value = result.pvec[result.param_list.index(column)]
+            else:
+                # parameter was not varied
+                value = result.model.params[column]
+
+            item = QtWidgets.QTableWidgetItem(GuiUtils.formatNumber(value, high=True))
+            if is_error:
                 # Fancy, italic font for errors
                 font = QtGui.QFont()
                 font.setItalic(True)
                 item.setFont(font)
-                widget.setItem(i_row, error_column, item)
-
-        # resize content
-        widget.resizeColumnsToContents()
+            widget.setItem(i_row, i_col, item)
 
     @classmethod
     def writeBatchToFile(cls, data, tmpfile, details=""):
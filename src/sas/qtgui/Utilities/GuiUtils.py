@@ -12,6 +12,8 @@ import webbrowser
 import urllib.parse
 import json
 import types
+import zipfile
+from contextlib import contextmanager
 from io import BytesIO
 
 import numpy as np
@@ -253,6 +255,9 @@ class Communicate(QtCore.QObject):
     # Progress bar update value
     progressBarUpdateSignal = QtCore.pyqtSignal(int)
 
+    # Data files are being loaded (True) or the load is over (False)
+    dataLoadingSignal = QtCore.pyqtSignal(bool)
+
     # Workspace charts added/removed
     activeGraphsSignal = QtCore.pyqtSignal(list)
 
@@ -277,6 +282,9 @@ class Communicate(QtCore.QObject):
     # Notify the gui manager about new data to be added to the grid view
     sendDataToGridSignal = QtCore.pyqtSignal(list)
 
+    # Notify the gui manager about a new result of a batch shown in the grid view
+    sendResultToGridSignal = QtCore.pyqtSignal(str, int, list)
+
     # Mask Editor requested
     maskEditorSignal = QtCore.pyqtSignal(Data2D)
 
@@ -1198,10 +1206,57 @@ def checkModel(path):
 
     return result
 
+# Extension of project archives, .json being the older JSON projects
+PROJECT_EXTENSION = 'sasproj'
+# Members of a project archive
+PROJECT_METADATA = 'project.json'
+ARRAY_DIRECTORY = 'arrays/'
+
+def writeArray(archive, name, array):
+    """
+    Store *array* as an uncompressed .npy member of the zip *archive*
+    """
+    with archive.open(name, 'w', force_zip64=True) as member:
+        np.lib.format.write_array(member, array, allow_pickle=False)
+
+def readArray(archive, name):
+    """
+    Read the .npy member *name* of the zip *archive*.
+
+    The member is read into memory rather than mapped from the archive,
+    so the project file is not held open by the loaded data and can be
+    saved over or removed.
+    """
+    with archive.open(name) as member:
+        return np.lib.format.read_array(member, allow_pickle=False)
+
+@contextmanager
+def replaceFile(filename):
+    """
+    Open a temporary binary file next to *filename*, which replaces
+    *filename* once it is written.
+
+    A failed save then leaves the previous project file intact.
+    """
+    tmp_name = "%s.%d.tmp" % (filename, os.getpid())
+    try:
+        with open(tmp_name, 'wb') as outfile:
+            yield outfile
+        os.replace(tmp_name, filename)
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
 def saveData(fp, data):
     """
-    save content of data to fp (a .write()-supporting file-like object)
+    save content of data to fp (a .write()-supporting binary file-like object)
+
+    The project is a zip archive: data without its arrays is kept as JSON
+    in PROJECT_METADATA and each array is a raw .npy member of
+    ARRAY_DIRECTORY, referenced from the JSON by its name.
+    Use replaceFile() to overwrite a project file.
     """
+    arrays = []
 
     def add_type(dict, type):
         dict['__type__'] = type.__name__
@@ -1240,7 +1295,12 @@ def saveData(fp, data):
 
         # ndarray
         if isinstance(o, np.ndarray):
-            content = {'data':o.tolist()}
+            if o.dtype.hasobject:
+                content = {'data':o.tolist()}
+            else:
+                name = "%s%d.npy" % (ARRAY_DIRECTORY, len(arrays))
+                arrays.append((name, o))
+                content = {'file':name}
             return add_type(content, type(o))
 
         if isinstance(o, types.FunctionType):
@@ -1252,13 +1312,23 @@ def saveData(fp, data):
         logging.info("data cannot be serialized to json: %s" % type(o))
         return None
 
-    json.dump(data, fp, indent=2, sort_keys=True, default=jdefault)
+    metadata = json.dumps(data, indent=2, sort_keys=True, default=jdefault)
+    with zipfile.ZipFile(fp, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+        archive.writestr(PROJECT_METADATA, metadata, compress_type=zipfile.ZIP_DEFLATED)
+        for name, array in arrays:
+            writeArray(archive, name, array)
 
 def readDataFromFile(fp):
     '''
     Reads in Data1D/Data2 datasets from the file.
-    Datasets are stored in the JSON format.
+    fp is either a project archive written by saveData or a JSON document
+    with the arrays embedded as lists.
     '''
+    archive = None
+    if zipfile.is_zipfile(fp):
+        archive = zipfile.ZipFile(fp)
+    fp.seek(0)
+
     supported = [
         tuple, set, types.FunctionType,
         Sample, Source, Vector,
@@ -1311,6 +1381,8 @@ def readDataFromFile(fp):
 
         # ndarray
         if cls == np.ndarray:
+            if 'file' in data:
+                return readArray(archive, data['file'])
             o = data['data']
             if isinstance(o, list):
                 # new format - ndarray as ascii list
@@ -1352,12 +1424,19 @@ def readDataFromFile(fp):
 
         return data
 
+    if archive is not None:
+        content = json.loads(archive.read(PROJECT_METADATA).decode('utf-8'))
+    else:
+        content = json.load(fp)
+
     new_stored_data = {}
-    for id, data in json.load(fp).items():
+    for id, data in content.items():
         try:
             new_stored_data[id] = generate(data, 0)
         except TooComplexException:
             logging.info('unable to load %s' % id)
+    if archive is not None:
+        archive.close()
 
     return new_stored_data
 
@@ -135,6 +135,10 @@ DEFAULT_PERSPECTIVE = 'None'
 # Default threading model
 USING_TWISTED = False
 
+# Number of processes fitting the data sets of a batch fit;
+# None for one per CPU core, 1 to fit them one after the other
+BATCH_FIT_WORKERS = None
+
 # Time out for updating sasview
 UPDATE_TIMEOUT = 2
 
@@ -1,4 +1,5 @@
 import sys
+import copy
 import numpy as np
 import unittest
 from unittest.mock import mock_open, patch
@@ -128,6 +129,30 @@ Chi2,Data,scale,background,radius_equat_core,x_core,thick_shell,x_polar_shell,sl
         self.assertEqual(params['Data'][1], '')
         self.assertEqual(params['sld_solvent'][1], '0.02')
 
+    def testUpdateFitResult(self):
+        '''Test rows filled in as the data sets of a batch are fitted'''
+        output = self.output_for_test()
+        # both rows share their FResult
+        output[0] = [copy.copy(output[0][0])]
+        output[0][0].fitness = 10.0
+        self.widget.addFitResults([None, output[1], None, "BatchPage1"])
+        table = self.widget.tables[-1]
+        self.assertEqual(table.rowCount(), 3)
+        params = self.widget.dataFromTable(table)
+        self.assertEqual(len(params), 13)
+        self.assertEqual(params['Chi2'], ['', '9000', ''])
+        self.assertEqual(params['sld_shell (Err)'], ['', '0.001', ''])
+
+        self.widget.updateFitResult("BatchPage1", 2, output[0])
+        params = self.widget.dataFromTable(table)
+        self.assertEqual(params['Chi2'], ['', '9000', '10'])
+        self.assertEqual(params['sld_solvent'][2], '0.02')
+        self.assertIs(self.widget.data_dict["BatchPage1"][2], output[0])
+
+        # Unknown pages are ignored
+        self.widget.updateFitResult("BatchPage2", 0, output[0])
+        self.assertIsNone(self.widget.data_dict["BatchPage1"][0])
+
     def testActionSendToExcel(self):
         '''Test Excel bindings'''
         pass
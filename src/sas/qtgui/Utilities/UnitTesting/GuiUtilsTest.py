@@ -1,8 +1,14 @@
 # -*- coding: utf-8 -*-
+import os
 import sys
+import json
+import shutil
+import tempfile
 import unittest
 import webbrowser
 
+import numpy as np
+
 from PyQt5 import QtCore
 from PyQt5 import QtGui, QtWidgets
 from unittest.mock import MagicMock
@@ -583,6 +589,74 @@ class GuiUtilsTest(unittest.TestCase):
         with self.assertRaises(TypeError):
             toDouble(value)
 
+    def testProjectRoundTrip(self):
+        '''test saving and loading a project archive'''
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        filename = os.path.join(tmp_dir, "project." + PROJECT_EXTENSION)
+        data = Data1D(x=[1.0, 2.0, 3.0], y=[10.0, 11.0, 12.0],
+                      dx=[0.1, 0.2, 0.3], dy=[0.1, 0.2, 0.3])
+        project = {'data_1': {'fit_data': [data, None], 'is_data': True}}
+
+        with replaceFile(filename) as outfile:
+            saveData(outfile, project)
+        with open(filename, 'rb') as infile:
+            loaded = readDataFromFile(infile)
+        new_data = loaded['data_1']['fit_data'][0]
+        self.assertIsInstance(new_data, Data1D)
+        self.assertTrue(loaded['data_1']['is_data'])
+        np.testing.assert_array_equal(new_data.x, data.x)
+        np.testing.assert_array_equal(new_data.dy, data.dy)
+
+        # save the loaded project over the file it was read from
+        new_data.y[0] = 5.0
+        with replaceFile(filename) as outfile:
+            saveData(outfile, loaded)
+        self.assertEqual(os.listdir(tmp_dir), [os.path.basename(filename)])
+        # and remove it while the data is loaded
+        os.remove(filename)
+        np.testing.assert_array_equal(new_data.x, data.x)
+        with replaceFile(filename) as outfile:
+            saveData(outfile, loaded)
+        with open(filename, 'rb') as infile:
+            reloaded = readDataFromFile(infile)
+        np.testing.assert_array_equal(reloaded['data_1']['fit_data'][0].y,
+                                      [5.0, 11.0, 12.0])
+
+    def testReadJSONProject(self):
+        '''test loading a project saved as a JSON document'''
+        content = {'data_1': {'__type__': 'ndarray', 'data': [1.0, 2.0]}}
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as outfile:
+            json.dump(content, outfile)
+        self.addCleanup(os.remove, outfile.name)
+        with open(outfile.name, 'rb') as infile:
+            loaded = readDataFromFile(infile)
+        np.testing.assert_array_equal(loaded['data_1'], [1.0, 2.0])
+
+    def testDataManagerRoundTrip(self):
+        '''test saving and loading the data manager content'''
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        filename = os.path.join(tmp_dir, "manager." + PROJECT_EXTENSION)
+        manager = DataManager()
+        manager.add_data({"data_1": Data1D(x=[1.0, 2.0], y=[3.0, 4.0])})
+
+        with replaceFile(filename) as outfile:
+            manager.save_to_writable(outfile)
+        loaded = DataManager()
+        with open(filename, 'rb') as infile:
+            loaded.load_from_readable(infile)
+        y = loaded.stored_data["data_1"].data.y
+        np.testing.assert_array_equal(y, [3.0, 4.0])
+
+        # and again over the file the arrays are mapped from
+        with replaceFile(filename) as outfile:
+            loaded.save_to_writable(outfile)
+        reloaded = DataManager()
+        with open(filename, 'rb') as infile:
+            reloaded.load_from_readable(infile)
+        np.testing.assert_array_equal(reloaded.stored_data["data_1"].data.y, y)
+
 
 class DoubleValidatorTest(unittest.TestCase):
     """ Test the validator for floats """
@@ -1,11 +1,16 @@
 """
 Compute scattering from a set of points.
 
-For 1-D scattering use *Iq(q, x, y, z, sld, vol, is_avg)*
+For 1-D scattering use *Iq(q, x, y, z, sld, vol, is_avg)*, or
+*Iq_grid(q, x, y, z, sld, vol)* for large numbers of points.
+*PairDistanceHistogram* keeps the pair distance histogram of a model
+made of several groups of points, for repeated 1-D evaluations.
 """
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
+from scipy.spatial.distance import cdist, pdist
 
 try:
     if os.environ.get('SAS_NUMBA', '1').lower() in ('1', 'yes', 'true', 't'):
@@ -23,7 +28,19 @@ except ImportError:
         # Otherwise we have @njit(...), so return the identity decorator.
         return lambda fn: fn
 
-def Iq(q, x, y, z, sld, vol, is_avg=False):
+# Memory budget for the temporary arrays of the 2D kernels without numba [bytes]
+IQXY_MEMORY = 2**26
+# Number of threads of the 2D kernels without numba, or None for one per core
+IQXY_THREADS = None
+
+# Largest number of cells of the zero padded grid used by Iq_grid
+MAX_GRID_CELLS = 2**24
+# Default number of distance bins of a PairDistanceHistogram over the model
+PAIR_HISTOGRAM_BINS = 2000
+# Largest value of |d/dx sin(x)/x|, reached near x = 2.08
+_MAX_DSINC = 0.4362
+
+def Iq(q, x, y, z, sld, vol, is_avg=False, method='exact', grid_spacing=None):
     """
     Computes 1D isotropic.
 
@@ -33,12 +50,19 @@ def Iq(q, x, y, z, sld, vol, is_avg=False):
 
     All values must be numpy vectors of the correct size.
 
+    *method* is 'exact' for the full Debye sum, or 'grid' for the pair
+    distance histogram of :func:`Iq_grid` with cells of *grid_spacing*.
+
     Returns *I(q)*
     """
+    if method == 'grid' and not is_avg:
+        return Iq_grid(q, x, y, z, sld, vol, grid_spacing=grid_spacing)[0]
+    elif method not in ('exact', 'grid'):
+        raise ValueError("Unknown method %r for Iq" % method)
     coords = np.vstack((x, y, z))
     index = (sld != 0.)
     if not index.all():
-        coords, sld, vol = (v[index] for v in (sld, coords, vol))
+        coords, sld, vol = coords[:, index], sld[index], vol[index]
     q, coords, sld, vol = [np.asarray(v, dtype='d') for v in (q, coords, sld, vol)]
     I_out = np.empty_like(q)
     if is_avg:
@@ -50,6 +74,62 @@ def Iq(q, x, y, z, sld, vol, is_avg=False):
         _calc_Iq(I_out, q, coords, sld, vol)
     return I_out * (1.0E+8/np.sum(vol))
 
+def Iq_grid(q, x, y, z, sld, vol, grid_spacing=None):
+    """
+    Computes 1D isotropic from the pair distance histogram of the points.
+
+    The points are moved to the nodes of a cubic grid of *grid_spacing*
+    (by default the spacing of the points, for points on a lattice). The
+    weighted pair distance histogram is then given exactly by the
+    autocorrelation of the grid, computed by FFT, so the cost grows with
+    the volume of the grid rather than with the square of the number of
+    points.
+
+    Points which already are on the grid, such as voxel models, give the
+    Debye sum of :func:`Iq` up to rounding errors. Otherwise, moving point
+    *j* by *d_j* changes each pair distance by at most *d_j + d_k*, which
+    bounds the error on *I(q)*.
+
+    Returns *I(q)* and the bound on its error against the exact Debye sum
+    """
+    coords = np.vstack((x, y, z))
+    index = (sld != 0.)
+    if not index.all():
+        coords, sld, vol = coords[:, index], sld[index], vol[index]
+    q, coords, sld, vol = [np.asarray(v, dtype='d') for v in (q, coords, sld, vol)]
+    I_out = np.empty_like(q)
+    error = _calc_Iq_grid(I_out, q, coords, sld, vol, grid_spacing)
+    scale = 1.0E+8/np.sum(vol)
+    return I_out * scale, error * scale
+
+def Iq_histogram(q, x, y, z, sld, vol, histogram=None, bin_width=None):
+    """
+    Computes 1D isotropic from the binned pair distance histogram of the
+    points, which is kept in *histogram* between calls.
+
+    *histogram* is the :class:`PairDistanceHistogram` from the previous
+    call, or None to create one with bins of *bin_width* (by default
+    1/PAIR_HISTOGRAM_BINS of the size of the model). The pair distances
+    are only recomputed when the points or their weights change, so the
+    repeated evaluations of a fit are cheap.
+
+    Returns *I(q)*, the bound on its error against the exact Debye sum
+    and the histogram to pass to the next call.
+    """
+    coords = np.vstack((x, y, z))
+    index = (sld != 0.)
+    if not index.all():
+        coords, sld, vol = coords[:, index], sld[index], vol[index]
+    if histogram is None:
+        if bin_width is None:
+            extent = np.linalg.norm(np.ptp(coords, axis=1)) if coords.size else 0.
+            bin_width = extent/PAIR_HISTOGRAM_BINS if extent > 0 else 1.0
+        histogram = PairDistanceHistogram(bin_width)
+    histogram.set_points(0, coords[0], coords[1], coords[2], sld*vol)
+    q = np.asarray(q, dtype='d')
+    scale = 1.0E+8/np.sum(vol)
+    return histogram.Iq(q) * scale, histogram.Iq_error(q) * scale, histogram
+
 def Iqxy(qx, qy, x, y, z, sld, vol, mx, my, mz, in_spin, out_spin, s_theta):
     """
     Computes 2D anisotropic.
@@ -84,6 +164,124 @@ def Iqxy(qx, qy, x, y, z, sld, vol, mx, my, mz, in_spin, out_spin, s_theta):
         I_out = I_out.reshape(qx.shape)
     return I_out * (1.0E+8/np.sum(vol))
 
+class PairDistanceHistogram(object):
+    """
+    Weighted histogram of the distances between the pairs of points of a
+    model made of several groups of points, such as the shapes of a
+    :class:`sas.sascalc.realspace.VolumeCanvas.VolumeCanvas`.
+
+    The histograms of the pairs within each group and between each two
+    groups are kept, so changing the points of one group only recomputes
+    the terms which involve that group.
+
+    *bin_width* is the width of the distance bins [A].
+    """
+    def __init__(self, bin_width):
+        if not bin_width > 0:
+            raise ValueError("The bin width must be positive")
+        self.bin_width = float(bin_width)
+        # group -> (coords, weight)
+        self._points = {}
+        # frozenset of one or two groups -> histogram of w_j w_k and (w_j w_k)^2
+        self._terms = {}
+
+    def keys(self):
+        """
+        Returns the list of groups
+        """
+        return list(self._points)
+
+    def set_points(self, key, x, y, z, weight):
+        """
+        Sets the points of group *key*, with the *weight* of each point
+        (usually sld*volume).
+
+        Returns True if the points changed, in which case the terms
+        involving the group will be recomputed.
+        """
+        coords = np.vstack((x, y, z)).astype('d')
+        weight = np.broadcast_to(np.asarray(weight, dtype='d'),
+                                 coords.shape[1:]).copy()
+        if key in self._points:
+            old_coords, old_weight = self._points[key]
+            if (np.array_equal(old_coords, coords)
+                    and np.array_equal(old_weight, weight)):
+                return False
+        self._points[key] = (coords, weight)
+        self._discard(key)
+        return True
+
+    def remove(self, key):
+        """
+        Removes group *key* from the model
+        """
+        del self._points[key]
+        self._discard(key)
+
+    def _discard(self, key):
+        for pair in [pair for pair in self._terms if key in pair]:
+            del self._terms[pair]
+
+    def histogram(self):
+        """
+        Returns *r*, *hist*, *hist_sq* and *diagonal*. *hist* is the sum of
+        w_j w_k over the pairs j < k in each bin, *hist_sq* the sum of
+        (w_j w_k)^2, and *r* the distance at the centre of the bins.
+        *diagonal* is the sum of w_j^2 of the points paired with themselves.
+        """
+        keys = list(self._points)
+        terms = []
+        for i, first in enumerate(keys):
+            for second in keys[i:]:
+                pair = frozenset((first, second))
+                if pair not in self._terms:
+                    coords, weight = self._points[first]
+                    if second == first:
+                        other_coords = other_weight = None
+                    else:
+                        other_coords, other_weight = self._points[second]
+                    self._terms[pair] = _pair_histogram(
+                        coords, weight, other_coords, other_weight,
+                        self.bin_width)
+                terms.append(self._terms[pair])
+        nbins = max([term.shape[1] for term in terms], default=0)
+        total = np.zeros((2, nbins))
+        for term in terms:
+            total[:, :term.shape[1]] += term
+        diagonal = sum(np.sum(weight**2) for _, weight in self._points.values())
+        r = (np.arange(nbins) + 0.5) * self.bin_width
+        return r, total[0], total[1], diagonal
+
+    def Iq(self, q, worksize=1000000):
+        """
+        Returns *I(q)* as the Debye sum over the pair distance histogram::
+
+            I(q) = sum_j w_j^2 + 2 sum_{j<k} w_j w_k sin(q r_jk)/(q r_jk)
+
+        with each r_jk at the centre of its bin.
+        """
+        q = np.asarray(q, dtype='d')
+        r, hist, _, diagonal = self.histogram()
+        used = np.flatnonzero(hist)
+        r, hist = r[used], hist[used]
+        I_out = np.empty_like(q)
+        q_pi = q/np.pi
+        batch_size = max(worksize // max(len(r), 1), 1)
+        for batch in range(0, len(q), batch_size):
+            bes = np.sinc(q_pi[batch:batch+batch_size, None]*r[None, :])
+            I_out[batch:batch+batch_size] = diagonal + 2*np.dot(bes, hist)
+        return I_out
+
+    def Iq_error(self, q):
+        """
+        Returns the bound on the difference between :meth:`Iq` and the
+        Debye sum over the exact pair distances.
+        """
+        # each distance is moved by at most half a bin
+        abs_weight = sum(np.sum(np.abs(weight))
+                         for _, weight in self._points.values())
+        return _MAX_DSINC * np.asarray(q) * self.bin_width * abs_weight**2 / 2
+
 @njit('(f8[:], f8[:], f8[:], f8[:], f8[:])')
 def _calc_Iq_avg(Iq, q, r, sld, vol):
     weight = sld * vol
@@ -132,6 +330,150 @@ def _calc_Iq_batch(Iq, q_pi, coords, weight):
         # Don't double-count the diagonal.
         Iq += 2*np.sum(I_jk, axis=1) - I_jk[:, 0]
 
+def _grid_spacing(coords, max_cells=MAX_GRID_CELLS):
+    """
+    Return the spacing of the points if they are on a lattice, increased
+    so that the zero padded grid has at most *max_cells* cells.
+    """
+    extent = np.ptp(coords, axis=1)
+    spacing = np.inf
+    for axis_coords, axis_extent in zip(coords, extent):
+        steps = np.diff(np.unique(axis_coords))
+        # ignore rounding differences of the positions
+        steps = steps[steps > 1e-6*axis_extent]
+        if len(steps):
+            spacing = min(spacing, steps.min())
+    if not np.isfinite(spacing):
+        # all points at the same position
+        return 1.0
+    while np.prod(2*(np.floor(extent/spacing + 0.5) + 1)) > max_cells:
+        spacing *= 1.1
+    return spacing
+
+def _calc_Iq_grid(Iq, q, coords, sld, vol, spacing=None, worksize=1000000):
+    """
+    Compute Iq as sum rho_j rho_k j0(q ||x_j - x_k||) with the points
+    moved to the nodes of a grid of *spacing*.
+
+    Returns the bound on the difference with the sum over the original
+    points.
+    """
+    weight = sld * vol
+    if spacing is None:
+        spacing = _grid_spacing(coords)
+    origin = coords.min(axis=1)
+    nodes = np.rint((coords - origin[:, None])/spacing).astype(np.int64)
+    shape = tuple(nodes.max(axis=1) + 1)
+    # distance by which each point is moved
+    moved = np.linalg.norm(coords - (origin[:, None] + nodes*spacing), axis=0)
+
+    # weights on the grid and their autocorrelation; padding the grid to
+    # 2n-1 cells per axis avoids wrapping around
+    rho = np.bincount(np.ravel_multi_index(nodes, shape), weights=weight,
+                      minlength=int(np.prod(shape))).reshape(shape)
+    padded = tuple(2*n - 1 for n in shape)
+    power = np.fft.rfftn(rho, s=padded)
+    power = (power * power.conj()).real
+    correlation = np.fft.irfftn(power, s=padded)
+
+    # squared length of each lag, in units of the spacing
+    lags = [np.arange(n) for n in padded]
+    lags = [np.where(lag < n, lag, lag - m)**2
+            for lag, n, m in zip(lags, shape, padded)]
+    lag_sq = lags[0][:, None, None] + lags[1][None, :, None] + lags[2][None, None, :]
+    # histogram of the pair distances; exact since the squared distances
+    # between nodes are integers
+    histogram = np.bincount(lag_sq.ravel(), weights=correlation.ravel())
+    counts = np.bincount(lag_sq.ravel())
+    used = np.flatnonzero(counts)
+    histogram = histogram[used]
+    r = spacing * np.sqrt(used)
+
+    # Debye sum over the distances in the histogram
+    q_pi = q/np.pi
+    batch_size = max(worksize // len(r), 1)
+    for batch in range(0, len(q), batch_size):
+        bes = np.sinc(q_pi[batch:batch+batch_size, None]*r[None, :])
+        Iq[batch:batch+batch_size] = np.dot(bes, histogram)
+
+    # each pair term changes by at most |d sinc(qr)/d(qr)| q (d_j + d_k)
+    abs_weight = np.abs(weight)
+    error = (2*_MAX_DSINC) * q * np.sum(abs_weight) * np.sum(abs_weight*moved)
+    # rounding errors of the FFT
+    error += (np.finfo(float).eps * np.log2(correlation.size) * len(r)
+              * np.sum(abs_weight)**2)
+    return error
+
+def _pair_histogram(coords, weight, other_coords, other_weight, bin_width,
+                    worksize=1000000):
+    """
+    Histogram of the distances between the points of *coords* and
+    *other_coords*, weighted by the product of the point weights.
+    When *other_coords* is None, the pairs j < k of *coords* are used.
+
+    Returns an array with the histogram of w_j w_k in the first row and
+    the histogram of (w_j w_k)^2 in the second row.
+    """
+    same = other_coords is None
+    if same:
+        other_coords, other_weight = coords, weight
+    if coords.shape[1] == 0 or other_coords.shape[1] == 0:
+        return np.zeros((2, 0))
+    # the longest distance fits the diagonal of the common bounding box
+    low = np.minimum(coords.min(axis=1), other_coords.min(axis=1))
+    high = np.maximum(coords.max(axis=1), other_coords.max(axis=1))
+    nbins = int(np.linalg.norm(high - low) / bin_width) + 2
+    hist = np.zeros((2, nbins))
+    if USE_NUMBA:
+        _pair_histogram_numba(hist, coords, weight, other_coords, other_weight,
+                              1.0/bin_width, same)
+        return hist
+
+    points, other_points = coords.T.copy(), other_coords.T.copy()
+    batch_size = max(worksize // len(other_points), 1)
+    for start in range(0, len(points), batch_size):
+        stop = min(start + batch_size, len(points))
+        block, block_weight = points[start:stop], weight[start:stop]
+        if same:
+            # pairs j < k within the block, in the order of pdist
+            j, k = np.triu_indices(stop - start, 1)
+            _bin_pairs(hist, pdist(block), block_weight[j]*block_weight[k],
+                       bin_width)
+            rest = slice(stop, None)
+        else:
+            rest = slice(None)
+        r = cdist(block, other_points[rest])
+        w_jk = np.multiply.outer(block_weight, other_weight[rest])
+        _bin_pairs(hist, r.ravel(), w_jk.ravel(), bin_width)
+    return hist
+
+def _bin_pairs(hist, r, w_jk, bin_width):
+    """
+    Add the pair weights *w_jk* and their squares to the bins of the
+    distances *r* in *hist*.
+    """
+    index = (r / bin_width).astype(np.int64)
+    nbins = hist.shape[1]
+    hist[0] += np.bincount(index, weights=w_jk, minlength=nbins)
+    hist[1] += np.bincount(index, weights=w_jk**2, minlength=nbins)
+
+@njit('(f8[:, :], f8[:, :], f8[:], f8[:, :], f8[:], f8, b1)', cache=True)
+def _pair_histogram_numba(hist, coords, weight, other_coords, other_weight,
+                          inv_width, same):
+    """
+    Numba version of the loop over the pairs of points in _pair_histogram.
+    """
+    for j in range(coords.shape[1]):
+        first = j + 1 if same else 0
+        for k in range(first, other_coords.shape[1]):
+            dx = coords[0, j] - other_coords[0, k]
+            dy = coords[1, j] - other_coords[1, k]
+            dz = coords[2, j] - other_coords[2, k]
+            index = int(np.sqrt(dx*dx + dy*dy + dz*dz) * inv_width)
+            w_jk = weight[j] * other_weight[k]
+            hist[0, index] += w_jk
+            hist[1, index] += w_jk * w_jk
+
 @njit('(f8[:], f8[:], f8[:, :], f8[:], f8[:])')
 def _calc_Iq_numba(Iq, q, coords, sld, vol):
     """
@@ -174,9 +516,8 @@ if USE_NUMBA:
         return Iq
 else:
     def _calc_Iqxy(scale, x, y, qx, qy):
-        Iq = [abs(np.sum(scale*np.exp(1j*(qx_k*x + qy_k*y))))**2
-              for qx_k, qy_k in zip(qx.flat, qy.flat)]
-        return np.asarray(Iq).reshape(qx.shape)
+        Fq = _calc_Fqxy(qx, qy, x, y, scale[:, None])[:, 0]
+        return (Fq.real**2 + Fq.imag**2).reshape(qx.shape)
 _calc_Iqxy.__doc__ = """
     Compute I(q) for a set of points (x, y).
 
@@ -188,6 +529,61 @@ _calc_Iqxy.__doc__ = """
     """
 
 
+def _calc_Fqxy(qx, qy, x, y, weights, memory=None, threads=None):
+    """
+    Compute F_c(q) = sum w_c(r) e^(1j q.r) for each column c of *weights*.
+
+    The phases are computed for tiles of q x points, with the cos and sin
+    of each tile summed against all the weight columns at once. The q
+    values are split between *threads* threads (default IQXY_THREADS), and
+    the tiles of all the threads use at most *memory* bytes (default
+    IQXY_MEMORY).
+
+    Returns a complex array of shape (len(q), number of columns).
+    """
+    memory = IQXY_MEMORY if memory is None else memory
+    if threads is None:
+        threads = IQXY_THREADS or os.cpu_count() or 1
+    nq, npoints = len(qx), len(x)
+    threads = max(1, min(threads, nq))
+    # each thread has two float tiles
+    tile_size = max(memory // (16*threads), 1)
+    q_block = min(-(-nq // threads), max(tile_size // max(npoints, 1), 1))
+    point_block = max(min(npoints, tile_size // q_block), 1)
+    Fq = np.empty((nq, weights.shape[1]), dtype='complex')
+
+    def _accumulate(start, stop):
+        phase_tile = np.empty((q_block, point_block))
+        trig_tile = np.empty((q_block, point_block))
+        for q_start in range(start, stop, q_block):
+            q_index = slice(q_start, min(q_start + q_block, stop))
+            nq_tile = q_index.stop - q_index.start
+            real = np.zeros((nq_tile, weights.shape[1]))
+            imag = np.zeros((nq_tile, weights.shape[1]))
+            for p_start in range(0, npoints, point_block):
+                p_index = slice(p_start, min(p_start + point_block, npoints))
+                np_tile = p_index.stop - p_index.start
+                phase = phase_tile[:nq_tile, :np_tile]
+                trig = trig_tile[:nq_tile, :np_tile]
+                np.multiply.outer(qx[q_index], x[p_index], out=phase)
+                np.multiply.outer(qy[q_index], y[p_index], out=trig)
+                phase += trig
+                real += np.dot(np.cos(phase, out=trig), weights[p_index])
+                imag += np.dot(np.sin(phase, out=trig), weights[p_index])
+            Fq[q_index].real = real
+            Fq[q_index].imag = imag
+
+    if threads == 1:
+        _accumulate(0, nq)
+    else:
+        bounds = np.linspace(0, nq, threads + 1).astype(int)
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            jobs = [executor.submit(_accumulate, start, stop)
+                    for start, stop in zip(bounds[:-1], bounds[1:])]
+            for job in jobs:
+                job.result()
+    return Fq
+
 def _calc_Iqxy_magnetic(
         qx, qy, x, y, rho, vol, rho_m,
         up_frac_i=0, up_frac_f=0, up_angle=0.):
@@ -222,7 +618,9 @@ def _calc_Iqxy_magnetic(
     qx, qy = (np.asarray(v, 'd').flatten() for v in (qx, qy))
     Iq = np.zeros(shape=qx.shape, dtype='d')
     #print("mag", [v.shape for v in (x, y, rho, vol, mx, my, mz)])
-    _calc_Iqxy_magnetic_helper(
+    helper = (_calc_Iqxy_magnetic_helper if USE_NUMBA
+              else _calc_Iqxy_magnetic_blocked)
+    helper(
         Iq, qx, qy, x, y, rho, vol, mx, my, mz,
         cos_spin, sin_spin, dd, du, ud, uu)
     return Iq.reshape(shape)
@@ -255,6 +653,32 @@ def _calc_Iqxy_magnetic_helper(
         if ud > 1e-10:
             Iq[k] += ud * abs(np.sum((py+1j*pz)*ephase))**2
 
+def _calc_Iqxy_magnetic_blocked(
+        Iq, qx, qy, x, y, rho, vol, mx, my, mz, cos_spin, sin_spin,
+        dd, du, ud, uu):
+    """
+    Version of _calc_Iqxy_magnetic_helper for use without numba.
+
+    The spin dependent amplitudes are linear in the transforms of rho, mx,
+    my and mz, so only those four sums are computed, using _calc_Fqxy.
+    """
+    weights = vol[:, None] * np.column_stack((rho, mx, my, mz))
+    f_rho, f_mx, f_my, f_mz = _calc_Fqxy(qx, qy, x, y, weights).T
+    qsq = qx**2 + qy**2
+    norm = np.divide(1., qsq, out=np.zeros_like(qsq), where=qsq > 1e-16)
+    perp = norm*(qy*f_mx - qx*f_my)
+    px = perp*(qy*cos_spin + qx*sin_spin)
+    py = perp*(qy*sin_spin - qx*cos_spin)
+    pz = f_mz
+    if dd > 1e-10:
+        Iq += dd * abs(f_rho-px)**2
+    if uu > 1e-10:
+        Iq += uu * abs(f_rho+px)**2
+    if du > 1e-10:
+        Iq += du * abs(py-1j*pz)**2
+    if ud > 1e-10:
+        Iq += ud * abs(py+1j*pz)**2
+
 def _spin_weights(in_spin, out_spin):
     """
     Compute spin cross weights given in_spin and out_spin
@@ -193,6 +193,33 @@ class ResolutionCalculator(object):
         # plot image
         return self.plot_image(self.image)
 
+    def compute_sigmas(self, qx_value, qy_value, coord='cartesian'):
+        """
+        Compute the resolution at many q points at once, averaged over
+        the wavelength spectrum as in compute_and_plot, without the images
+        : qx_value: x component of q; a number or an array
+        : qy_value: y component of q; a number or an array
+
+        : return sigma_1, sigma_2, sigma_r, sigma1d: arrays of the shape
+            of qx_value and qy_value
+        """
+        self.get_all_instrument_params()
+        lamda_list, dlamb_list = self.get_wave_list()
+        num_lamda = len(lamda_list)
+        tof = num_lamda > 1
+        total_intensity = 0
+        variances = [0, 0, 0, 0]
+        for lam, dlam in zip(lamda_list, dlamb_list):
+            intens = self.setup_tof(lam, dlam)
+            sigmas = self.compute(lam, dlam, qx_value, qy_value, coord, tof)[2:]
+            for ind, sigma in enumerate(sigmas):
+                variances[ind] = variances[ind] + sigma * sigma * intens
+            total_intensity += intens
+        if total_intensity == 0:
+            return tuple(np.zeros_like(variance) for variance in variances)
+        return tuple(np.sqrt(variance / total_intensity)
+                     for variance in variances)
+
     def setup_tof(self, wavelength, wavelength_spread):
         """
         Setup all parameters in instrument
@@ -214,9 +241,15 @@ class ResolutionCalculator(object):
                 coord='cartesian', tof=False):
         """
         Compute the Q resoltuion in || and + direction of 2D
-        : qx_value: x component of q
-        : qy_value: y component of q
+        : qx_value: x component of q; a number or an array
+        : qy_value: y component of q; a number or an array
+
+        : return qr_value, phi, sigma_1, sigma_2, sigma_r, sigma1d:
+            numbers, or arrays of the shape of qx_value and qy_value
         """
+        is_scalar = np.ndim(qx_value) == 0 and np.ndim(qy_value) == 0
+        qx_value = np.asarray(qx_value, dtype=float)
+        qy_value = np.asarray(qy_value, dtype=float)
         coord = 'cartesian'
         lamb = wavelength
         lamb_spread = wavelength_spread
@@ -234,10 +267,8 @@ class ResolutionCalculator(object):
         knot = 2*pi/lamb
         # scattering angle theta; always true for plane detector
         # aligned vertically to the ko direction
-        if qr_value > knot:
-            theta = pi/2
-        else:
-            theta = math.asin(qr_value/knot)
+        theta = np.where(qr_value > knot, pi/2,
+                         np.arcsin(np.minimum(qr_value/knot, 1.0)))
         # source aperture size
         rone = self.source_aperture_size
         # sample aperture size
@@ -259,7 +290,7 @@ class ResolutionCalculator(object):
         l1_cor = (l_ssa * l_two) / (l_sas + l_two)
         lp_cor = (l_ssa * l_two) / (l_one + l_two)
         # the radial distance to the pixel from the center of the detector
-        radius = math.tan(theta) * l_two
+        radius = np.tan(theta) * l_two
         #Lp = l_one*l_two/(l_one+l_two)
         # default polar coordinate
         comp1 = 'radial'
@@ -295,8 +326,8 @@ class ResolutionCalculator(object):
         # for 2d
         #sigma_1 += sigma_wave_1
         # normalize
-        sigma_1 = knot * sqrt(sigma_1 / 12)
-        sigma_r = knot * sqrt(sigma_wave_1 / (tof_factor *12))
+        sigma_1 = knot * np.sqrt(sigma_1 / 12)
+        sigma_r = knot * np.sqrt(sigma_wave_1 / (tof_factor *12))
         # sigma in the phi/y direction
         # for source apperture
         sigma_2 = self.get_variance(rone, l1_cor, phi, comp2)
@@ -327,8 +358,15 @@ class ResolutionCalculator(object):
         #sigma_2 =  knot*sqrt(sigma_2/12)
         #sigma_2 += sigma_wave_2
         # normalize
-        sigma_2 = knot * sqrt(sigma_2 / 12)
-        sigma1d = sqrt(variance_1d_1 + variance_1d_2)
+        sigma_2 = knot * np.sqrt(sigma_2 / 12)
+        sigma1d = np.sqrt(variance_1d_1 + variance_1d_2)
+        # same shape for all the outputs
+        qr_value, phi, sigma_1, sigma_2, sigma_r, sigma1d = \
+            np.broadcast_arrays(qr_value, phi, sigma_1, sigma_2, sigma_r, sigma1d)
+        if is_scalar:
+            qr_value, phi, sigma_1, sigma_2, sigma_r, sigma1d = \
+                [float(value) for value in
+                 (qr_value, phi, sigma_1, sigma_2, sigma_r, sigma1d)]
         # set sigmas
         self.sigma_1 = sigma_1
         self.sigma_lamd = sigma_r
@@ -477,11 +515,11 @@ class ResolutionCalculator(object):
 
         # define sigma component direction
         if comp == 'radial':
-            phi_x = math.cos(phi)
-            phi_y = math.sin(phi)
+            phi_x = np.cos(phi)
+            phi_y = np.sin(phi)
         elif comp == 'phi':
-            phi_x = math.sin(phi)
-            phi_y = math.cos(phi)
+            phi_x = np.sin(phi)
+            phi_y = np.cos(phi)
         elif comp == 'x':
             phi_x = 1
             phi_y = 0
@@ -530,27 +568,27 @@ class ResolutionCalculator(object):
             return 0, 0
         else:
             # calculate sigma^2 for 1d
-            sigma1d = 2 * math.pow(radius/distance*spread, 2)
+            sigma1d = 2 * (radius/distance*spread)**2
             if comp == 'x':
-                sigma1d *= (math.cos(phi)*math.cos(phi))
+                sigma1d *= (np.cos(phi)*np.cos(phi))
             elif comp == 'y':
-                sigma1d *= (math.sin(phi)*math.sin(phi))
+                sigma1d *= (np.sin(phi)*np.sin(phi))
             else:
                 sigma1d *= 1
             # sigma^2 for 2d
             # shift the coordinate due to the gravitational shift
-            rad_x = radius * math.cos(phi)
-            rad_y = A_value - radius * math.sin(phi)
-            radius = math.sqrt(rad_x * rad_x + rad_y * rad_y)
+            rad_x = radius * np.cos(phi)
+            rad_y = A_value - radius * np.sin(phi)
+            radius = np.sqrt(rad_x * rad_x + rad_y * rad_y)
             # new phi
-            phi = math.atan2(-rad_y, rad_x)
+            phi = np.arctan2(-rad_y, rad_x)
             self.gravity_phi = phi
             # calculate sigma^2
-            sigma = 2 * math.pow(radius/distance*spread, 2)
+            sigma = 2 * (radius/distance*spread)**2
             if comp == 'x':
-                sigma *= (math.cos(phi)*math.cos(phi))
+                sigma *= (np.cos(phi)*np.cos(phi))
             elif comp == 'y':
-                sigma *= (math.sin(phi)*math.sin(phi))
+                sigma *= (np.sin(phi)*np.sin(phi))
             else:
                 sigma *= 1
 
@@ -970,7 +1008,7 @@ class ResolutionCalculator(object):
 
         : return phi: the azimuthal angle of q on x-y plane
         """
-        phi = math.atan2(qy_value, qx_value)
+        phi = np.arctan2(qy_value, qx_value)
         return phi
 
     def _get_detector_qxqy_pixels(self):
@@ -1119,7 +1157,7 @@ class ResolutionCalculator(object):
         : return qr_value, phi
         """
         # find |q| on detector plane
-        qr_value = sqrt(qx_value*qx_value + qy_value*qy_value)
+        qr_value = np.sqrt(qx_value*qx_value + qy_value*qy_value)
         # find angle phi
         phi = self._atan_phi(qy_value, qx_value)
 
@@ -14,7 +14,7 @@ import logging
 import numpy as np
 from periodictable import formula, nsf
 
-from .geni import Iq, Iqxy
+from .geni import Iq, Iq_grid, Iq_histogram, Iqxy
 
 logger = logging.getLogger(__name__)
 
@@ -76,6 +76,15 @@ class GenSAS(object):
         self.data_mz = None
         self.data_vol = None #[A^3]
         self.is_avg = False
+        ## 1D method, 'exact' Debye sum, 'grid' pair distance histogram
+        ## or 'histogram' of the binned pair distances
+        self.iq_method = 'exact'
+        self.grid_spacing = None
+        self.bin_width = None
+        ## Pair distance histogram kept by the 'histogram' method
+        self._pair_histogram = None
+        ## Bound on the error of the last 'grid' 1D calculation
+        self.iq_error = None
         ## Name of the model
         self.name = "GenSAS"
         ## Define parameters
@@ -115,6 +124,28 @@ class GenSAS(object):
         """
         self.is_avg = bool(is_avg)
 
+    def set_iq_method(self, method='exact', grid_spacing=None, bin_width=None):
+        """
+        Sets the method of the 1D calculation
+
+        :param method: 'exact' for the Debye sum over all pairs of points,
+            'grid' for the pair distance histogram of the points on a
+            grid, which scales to millions of points (see geni.Iq_grid),
+            or 'histogram' for the Debye sum over the binned pair
+            distances, which are kept until the points or slds change
+            (see geni.Iq_histogram)
+        :param grid_spacing: spacing of the grid [A]; by default the
+            spacing of the points
+        :param bin_width: width of the distance bins [A]; by default
+            1/geni.PAIR_HISTOGRAM_BINS of the size of the model
+        """
+        if method not in ('exact', 'grid', 'histogram'):
+            raise ValueError("Unknown 1D method %r" % method)
+        self.iq_method = method
+        self.grid_spacing = grid_spacing
+        self.bin_width = bin_width
+        self._pair_histogram = None
+
     def calculate_Iq(self, qx, qy=None):
         """
         Evaluate the function
@@ -125,6 +156,7 @@ class GenSAS(object):
         x, y, z = self.data_x, self.data_y, self.data_z
         sld = self.data_sldn - self.params['solvent_SLD']
         vol = self.data_vol
+        error = None
         if qy is not None and len(qy) > 0:
             # 2-D calculation
             qx, qy = _vec(qx), _vec(qy)
@@ -141,9 +173,19 @@ class GenSAS(object):
             q = _vec(qx)
             if self.is_avg:
                 x, y, z = transform_center(x, y, z)
-            I_out = Iq(q, x, y, z, sld, vol, is_avg=self.is_avg)
+            if self.iq_method == 'grid' and not self.is_avg:
+                I_out, error = Iq_grid(
+                    q, x, y, z, sld, vol, grid_spacing=self.grid_spacing)
+            elif self.iq_method == 'histogram' and not self.is_avg:
+                I_out, error, self._pair_histogram = Iq_histogram(
+                    q, x, y, z, sld, vol, histogram=self._pair_histogram,
+                    bin_width=self.bin_width)
+            else:
+                I_out = Iq(q, x, y, z, sld, vol, is_avg=self.is_avg)
 
         vol_correction = self.data_total_volume / self.params['total_volume']
+        self.iq_error = (None if error is None
+                         else (self.params['scale'] * vol_correction) * error)
         result = ((self.params['scale'] * vol_correction) * I_out
                   + self.params['background'])
         return result
@@ -155,6 +197,8 @@ class GenSAS(object):
         """
         self.sld_data = sld_data
         self.data_pos_unit = sld_data.pos_unit
+        # the bins of the kept histogram were chosen for the previous data
+        self._pair_histogram = None
         self.data_x = _vec(sld_data.pos_x)
         self.data_y = _vec(sld_data.pos_y)
         self.data_z = _vec(sld_data.pos_z)
@@ -366,9 +410,8 @@ class OMFReader(object):
         :return: x, y, z, sld_n, sld_mx, sld_my, sld_mz
         """
         desc = ""
-        mx = np.zeros(0)
-        my = np.zeros(0)
-        mz = np.zeros(0)
+        # blocks of data lines, with the value unit they are read in
+        blocks = []
         try:
             input_f = open(path, 'rb')
             buff = decode(input_f.read())
@@ -378,22 +421,13 @@ class OMFReader(object):
             valueunit = None
             for line in lines:
                 line = line.strip()
-                # Read data
+                # Read data; the lines are converted by block once read
                 if line and not line.startswith('#'):
-                    try:
-                        toks = line.split()
-                        _mx = float(toks[0])
-                        _my = float(toks[1])
-                        _mz = float(toks[2])
-                        _mx = mag2sld(_mx, valueunit)
-                        _my = mag2sld(_my, valueunit)
-                        _mz = mag2sld(_mz, valueunit)
-                        mx = np.append(mx, _mx)
-                        my = np.append(my, _my)
-                        mz = np.append(mz, _mz)
-                    except Exception as exc:
-                        # Skip non-data lines
-                        logger.error(str(exc)+" when processing %r"%line)
+                    if not blocks or blocks[-1][0] != valueunit:
+                        blocks.append((valueunit, []))
+                    blocks[-1][1].append(line)
+                    if line[0] in '0123456789+-.':
+                        continue
                 #Reading Header; Segment count ignored
                 s_line = line.split(":", 1)
                 if s_line[0].lower().count("oommf") > 0:
@@ -475,6 +509,7 @@ class OMFReader(object):
                                                       valueunit)
                     output.valuerangemaxmag = mag2sld(float(valuerangemaxmag), \
                                                       valueunit)
+            mx, my, mz = self._read_values(blocks)
             output.set_m(mx, my, mz)
             return output
         except Exception:
@@ -482,6 +517,37 @@ class OMFReader(object):
             msg += "We accept only Text format OMF file."
             raise RuntimeError(msg)
 
+    @staticmethod
+    def _read_values(blocks):
+        """
+        Convert the data lines to the magnetic sld arrays.
+
+        :param blocks: list of (valueunit, lines) for the data lines
+        :return: mx, my, mz
+        """
+        values = [np.zeros((0, 3))]
+        for valueunit, lines in blocks:
+            try:
+                block = np.loadtxt(lines, usecols=(0, 1, 2), ndmin=2)
+            except Exception:
+                # Go line by line to skip the lines which are not data
+                block = []
+                for line in lines:
+                    try:
+                        toks = line.split()
+                        block.append((float(toks[0]), float(toks[1]),
+                                      float(toks[2])))
+                    except Exception as exc:
+                        # Skip non-data lines
+                        logger.error(str(exc)+" when processing %r"%line)
+                block = np.reshape(np.array(block, dtype=float), (-1, 3))
+            try:
+                values.append(mag2sld(block, valueunit))
+            except Exception as exc:
+                logger.error(str(exc)+" when processing %d lines"%len(lines))
+        values = np.vstack(values)
+        return values[:, 0].copy(), values[:, 1].copy(), values[:, 2].copy()
+
 class PDBReader(object):
     """
     PDB reader class: limited for reading the lines starting with 'ATOM'
@@ -504,17 +570,17 @@ class PDBReader(object):
         pos_y = []
         pos_z = []
         sld_n = []
-        sld_mx = []
-        sld_my = []
-        sld_mz = []
         vol_pix = []
         pix_symbol = []
         x_line = []
         y_line = []
         z_line = []
-        x_lines = []
-        y_lines = []
-        z_lines = []
+        # lines already in x_line, y_line and z_line
+        x_seen = set()
+        y_seen = set()
+        z_seen = set()
+        # sld and volume of each element, or None if unknown
+        elements = {}
         try:
             input_f = open(path, 'rb')
             buff = decode(input_f.read())
@@ -541,25 +607,19 @@ class PDBReader(object):
                         _pos_x = float(line[30:38].strip())
                         _pos_y = float(line[38:46].strip())
                         _pos_z = float(line[46:54].strip())
-                        pos_x = np.append(pos_x, _pos_x)
-                        pos_y = np.append(pos_y, _pos_y)
-                        pos_z = np.append(pos_z, _pos_z)
-                        try:
-                            val = nsf.neutron_sld(atom_name)[0]
-                            # sld in Ang^-2 unit
-                            val *= 1.0e-6
-                            sld_n = np.append(sld_n, val)
-                            atom = formula(atom_name)
-                            # cm to A units
-                            vol = 1.0e+24 * atom.mass / atom.density / NA
-                            vol_pix = np.append(vol_pix, vol)
-                        except Exception:
+                        pos_x.append(_pos_x)
+                        pos_y.append(_pos_y)
+                        pos_z.append(_pos_z)
+                        if atom_name not in elements:
+                            elements[atom_name] = self._element_sld(atom_name)
+                        element = elements[atom_name]
+                        if element is not None:
+                            sld_n.append(element[0])
+                            vol_pix.append(element[1])
+                        else:
                             logger.error("Error: set the sld of %s to zero"% atom_name)
-                            sld_n = np.append(sld_n, 0.0)
-                        sld_mx = np.append(sld_mx, 0)
-                        sld_my = np.append(sld_my, 0)
-                        sld_mz = np.append(sld_mz, 0)
-                        pix_symbol = np.append(pix_symbol, atom_name)
+                            sld_n.append(0.0)
+                        pix_symbol.append(atom_name)
                     elif line[0:6] == 'CONECT':
                         toks = line.split()
                         num = int(toks[1]) - 1
@@ -575,20 +635,24 @@ class PDBReader(object):
                         #need val_list ordered
                         for val in val_list:
                             index = val - 1
-                            if (pos_x[index], pos_x[num]) in x_line and \
-                               (pos_y[index], pos_y[num]) in y_line and \
-                               (pos_z[index], pos_z[num]) in z_line:
+                            if (pos_x[index], pos_x[num]) in x_seen and \
+                               (pos_y[index], pos_y[num]) in y_seen and \
+                               (pos_z[index], pos_z[num]) in z_seen:
                                 continue
                             x_line.append((pos_x[num], pos_x[index]))
                             y_line.append((pos_y[num], pos_y[index]))
                             z_line.append((pos_z[num], pos_z[index]))
-                    if len(x_line) > 0:
-                        x_lines.append(x_line)
-                        y_lines.append(y_line)
-                        z_lines.append(z_line)
+                            x_seen.add(x_line[-1])
+                            y_seen.add(y_line[-1])
+                            z_seen.add(z_line[-1])
                 except Exception as exc:
                     logger.error(exc)
 
+            pos_x, pos_y, pos_z, sld_n, vol_pix = (
+                np.array(v, dtype=float)
+                for v in (pos_x, pos_y, pos_z, sld_n, vol_pix))
+            sld_mx, sld_my, sld_mz = (np.zeros(len(pos_x)) for _ in range(3))
+            pix_symbol = np.array(pix_symbol, dtype=str)
             output = MagSLD(pos_x, pos_y, pos_z, sld_n, sld_mx, sld_my, sld_mz)
             output.set_conect_lines(x_line, y_line, z_line)
             output.filename = os.path.basename(path)
@@ -601,6 +665,22 @@ class PDBReader(object):
         except Exception:
             raise RuntimeError("%s is not a sld file" % path)
 
+    @staticmethod
+    def _element_sld(atom_name):
+        """
+        Return the neutron sld [1/A^2] and the atomic volume [A^3] of an
+        element, or None if they are unknown.
+        """
+        try:
+            # sld in Ang^-2 unit
+            sld = nsf.neutron_sld(atom_name)[0] * 1.0e-6
+            atom = formula(atom_name)
+            # cm to A units
+            vol = 1.0e+24 * atom.mass / atom.density / NA
+        except Exception:
+            return None
+        return sld, vol
+
     def write(self, path, data):
         """
         Write
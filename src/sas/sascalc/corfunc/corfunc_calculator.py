@@ -1,6 +1,7 @@
 """
 This module implements corfunc
 """
+import logging
 import warnings
 import numpy as np
 from scipy.optimize import curve_fit
@@ -12,6 +13,16 @@ from sas.sascalc.dataloader.data_info import Data1D
 from sas.sascalc.corfunc.transform_thread import FourierThread
 from sas.sascalc.corfunc.transform_thread import HilbertThread
 
+logger = logging.getLogger(__name__)
+
+# Maximum number of points of the extrapolation grid
+EXTRAPOLATION_POINTS = 2**20
+# The extrapolation extends to EXTRAPOLATION_QMAX times the largest data q
+EXTRAPOLATION_QMAX = 100
+# Largest relative error of the invariant computed on the extrapolation
+# grid, which normalises the correlation functions
+EXTRAPOLATION_TOLERANCE = 1e-3
+
 class CorfuncCalculator(object):
 
     class _Interpolator(object):
@@ -58,7 +69,8 @@ class CorfuncCalculator(object):
             return ys
 
 
-    def __init__(self, data=None, lowerq=None, upperq=None, scale=1):
+    def __init__(self, data=None, lowerq=None, upperq=None, scale=1,
+                 max_points=None, tolerance=None):
         """
         Initialize the class.
 
@@ -68,8 +80,20 @@ class CorfuncCalculator(object):
         :param upperq: A tuple of the form (lower, upper).
             Values between lower and upper will be used for Porod extrapolation
         :param scale: Scaling factor for I(q)
+        :param max_points: Maximum number of points of the extrapolation
+            grid, EXTRAPOLATION_POINTS by default
+        :param tolerance: Largest relative error of the invariant on the
+            extrapolation grid, EXTRAPOLATION_TOLERANCE by default
         """
         self._data = None
+        self._fits = {}
+        self.max_points = (max_points if max_points is not None
+                           else EXTRAPOLATION_POINTS)
+        self.tolerance = (tolerance if tolerance is not None
+                          else EXTRAPOLATION_TOLERANCE)
+        # Estimated relative error of the invariant on the last
+        # extrapolation grid
+        self.grid_error = None
         self.set_data(data, scale)
         self.lowerq = lowerq
         self.upperq = upperq
@@ -98,6 +122,8 @@ class CorfuncCalculator(object):
             new_data.dy = np.ones(len(new_data.x))
 
         self._data = new_data
+        # Fits of the extrapolation tails to the previous data
+        self._fits = {}
 
     def compute_background(self, upperq=None):
         """
@@ -106,16 +132,68 @@ class CorfuncCalculator(object):
         if self._data is None: return 0
         elif upperq is None and self.upperq is not None: upperq = self.upperq
         elif upperq is None and self.upperq is None: return 0
-        q = self._data.x
-        mask = np.logical_and(q > upperq[0], q < upperq[1])
-        _, _, bg = self._fit_porod(q[mask], self._data.y[mask])
+        _, _, bg = self._porod_tail(upperq)
 
         return bg
 
+    def extrapolation_grid(self, qs_max=None):
+        """
+        Compute the q values of the extrapolation
+
+        The grid extends from 0 to qs_max, EXTRAPOLATION_QMAX times the
+        largest q of the data by default, with the q step of the data, or a
+        larger step if the grid would otherwise have more than max_points
+        points. The transforms are sampled every pi/qs[-1] in real space
+        and are free of aliasing up to pi/(qs[1]-qs[0]), which is at least
+        pi*max_points/qs_max.
+
+        :param qs_max: The end of the grid
+        :return: The q values of the extrapolation
+        """
+        q = self._data.x
+        if qs_max is None:
+            qs_max = q[-1]*EXTRAPOLATION_QMAX
+        dq = max(q[1]-q[0], qs_max/self.max_points)
+        return np.arange(0, qs_max, dq)
+
+    def _invariant(self, qs, iqs):
+        """
+        Invariant int q^2 (I(q)-bg) dq of the extrapolation on the grid qs,
+        and the same on every other point of the grid
+        """
+        integrand = (iqs - self.background)*qs**2
+        dq = qs[1] - qs[0]
+        return integrand.sum()*dq, integrand[::2].sum()*2*dq
+
+    def grid_error_estimate(self, qs, iqs, porod_k):
+        """
+        Estimate the relative error of the invariant, which normalises the
+        correlation functions, computed on the extrapolation grid.
+
+        The sampling error is estimated from the difference with the
+        invariant on every other point of the grid. The Porod tail left out
+        beyond the grid is at most K/qs[-1].
+
+        :param qs: q values of the extrapolation grid
+        :param iqs: extrapolated intensity on the grid
+        :param porod_k: K of the Porod fit of the extrapolation
+        :return: the estimated relative error
+        """
+        invariant, coarse = self._invariant(qs, iqs)
+        if invariant == 0:
+            return np.inf
+        return (abs(invariant - coarse) + abs(porod_k)/qs[-1])/abs(invariant)
+
     def compute_extrapolation(self):
         """
         Extrapolate and interpolate scattering data
 
+        The extrapolation grid is extended beyond EXTRAPOLATION_QMAX times
+        the largest data q if the Porod tail left out would otherwise be
+        more than tolerance times the invariant. The estimated error of the
+        invariant on the grid is kept in grid_error, and a warning is
+        logged if it is over the tolerance.
+
         :return: The extrapolated data
         """
         q = self._data.x
@@ -123,15 +201,32 @@ class CorfuncCalculator(object):
 
         params, s2 = self._fit_data(q, iq)
         # Extrapolate to 100*Qmax in experimental data
-        qs = np.arange(0, q[-1]*100, (q[1]-q[0]))
+        qs = self.extrapolation_grid()
         iqs = s2(qs)
 
+        # Extend the grid until the Porod tail left out is within half the
+        # tolerance, leaving the other half to the sampling error
+        invariant, _ = self._invariant(qs, iqs)
+        if invariant != 0:
+            qs_max = 2*abs(params['K'])/(self.tolerance*abs(invariant))
+            if qs_max > qs[-1]:
+                qs = self.extrapolation_grid(qs_max)
+                iqs = s2(qs)
+
+        self.grid_error = self.grid_error_estimate(qs, iqs, params['K'])
+        if self.grid_error > self.tolerance:
+            logger.warning("The correlation functions are normalised to "
+                           "%.2g relative accuracy, short of the %.2g "
+                           "tolerance: the extrapolation grid is limited "
+                           "to %d points.", self.grid_error, self.tolerance,
+                           self.max_points)
+
         extrapolation = Data1D(qs, iqs)
 
         return params, extrapolation, s2
 
     def compute_transform(self, extrapolation, trans_type, background=None,
-        completefn=None, updatefn=None):
+        completefn=None, updatefn=None, resultfn=None):
         """
         Transform an extrapolated scattering curve into a correlation function.
 
@@ -143,6 +238,8 @@ class CorfuncCalculator(object):
             is complete
         :param updatefn: The function to call to update the GUI with the status
             of the transform calculation
+        :param resultfn: The function to call with each correlation function
+            as soon as it is computed, as resultfn(index, transform)
         :return: The transformed data
         """
         if self._transform_thread is not None:
@@ -153,7 +250,7 @@ class CorfuncCalculator(object):
         if trans_type == 'fourier':
             self._transform_thread = FourierThread(self._data, extrapolation,
             background, completefn=completefn,
-            updatefn=updatefn)
+            updatefn=updatefn, resultfn=resultfn)
         elif trans_type == 'hilbert':
             self._transform_thread = HilbertThread(self._data, extrapolation,
             background, completefn=completefn, updatefn=updatefn)
@@ -255,16 +352,42 @@ class CorfuncCalculator(object):
         k, sigma, bg = fitp
         return k, sigma, bg
 
+    def _porod_tail(self, upperq):
+        """
+        Fit the Porod region upperq[0] < q < upperq[1] of the data, reusing
+        the fit for the same region
+
+        :return: k, sigma and bg of the best-fit Porod function
+        """
+        key = ('porod', upperq[0], upperq[1])
+        if key not in self._fits:
+            q, iq = self._data.x, self._data.y
+            mask = np.logical_and(q > upperq[0], q < upperq[1])
+            self._fits[key] = self._fit_porod(q[mask], iq[mask])
+        return self._fits[key]
+
+    def _guinier_tail(self, lowerq):
+        """
+        Fit the Guinier region 0 < q < lowerq of the data, reusing the fit
+        for the same region
+
+        :return: slope and intercept of the best-fit Guinier function
+        """
+        key = ('guinier', lowerq)
+        if key not in self._fits:
+            q, iq = self._data.x, self._data.y
+            mask = np.logical_and(q < lowerq, 0 < q)
+            self._fits[key] = self._fit_guinier(q[mask], iq[mask])[0]
+        return self._fits[key]
+
     def _fit_data(self, q, iq):
         """
         Given a data set, extrapolate out to large q with Porod and
         to q=0 with Guinier
         """
-        mask = np.logical_and(q > self.upperq[0], q < self.upperq[1])
-
         # Returns an array where the 1st and 2nd elements are the values of k
         # and sigma for the best-fit Porod function
-        k, sigma, _ = self._fit_porod(q[mask], iq[mask])
+        k, sigma, _ = self._porod_tail(self.upperq)
         bg = self.background
 
         # Smooths between the best-fit porod function and the data to produce a
@@ -273,10 +396,8 @@ class CorfuncCalculator(object):
         s1 = self._Interpolator(data,
             lambda x: self._porod(x, k, sigma, bg), self.upperq[0], q[-1])
 
-        mask = np.logical_and(q < self.lowerq, 0 < q)
-
         # Returns parameters for the best-fit Guinier function
-        g = self._fit_guinier(q[mask], iq[mask])[0]
+        g = self._guinier_tail(self.lowerq)
 
         # Smooths between the best-fit Guinier function and the Porod curve
         s2 = self._Interpolator((lambda x: (np.exp(g[1]+g[0]*x**2))), s1, q[0],
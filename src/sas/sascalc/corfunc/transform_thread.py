@@ -7,11 +7,22 @@ from time import sleep
 
 class FourierThread(CalcThread):
     def __init__(self, raw_data, extrapolated_data, bg, updatefn=None,
-        completefn=None):
+        completefn=None, resultfn=None):
+        """
+        :param resultfn: function called as resultfn(index, transform) as
+            soon as each of gamma1 (0), gamma3 (1) and the IDF (2) is
+            computed
+        """
         CalcThread.__init__(self, updatefn=updatefn, completefn=completefn)
         self.data = raw_data
         self.background = bg
         self.extrapolation = extrapolated_data
+        self.resultfn = resultfn
+
+    def result(self, index, transform):
+        """Report a single transform as soon as it is computed"""
+        if self.resultfn is not None:
+            self.resultfn(index, transform)
 
     def check_if_cancelled(self):
         if self.isquit():
@@ -23,10 +34,11 @@ class FourierThread(CalcThread):
     def compute(self):
         qs = self.extrapolation.x
         iqs = self.extrapolation.y
-        q = self.data.x
         background = self.background
 
-        xs = np.pi*np.arange(len(qs),dtype=np.float32)/(q[1]-q[0])/len(qs)
+        # The real space points of the transforms follow from the q step of
+        # the extrapolation grid
+        xs = np.pi*np.arange(len(qs),dtype=np.float32)/(qs[1]-qs[0])/len(qs)
 
         self.ready(delay=0.0)
         self.update(msg="Fourier transform in progress.")
@@ -35,9 +47,12 @@ class FourierThread(CalcThread):
         if self.check_if_cancelled(): return
         try:
             # ----- 1D Correlation Function -----
-            gamma1 = dct((iqs-background)*qs**2)
+            signal = iqs - background
+            gamma1 = dct(signal*qs**2)
             Q = gamma1.max()
             gamma1 /= Q
+            transform1 = Data1D(xs, gamma1)
+            self.result(0, transform1)
 
             if self.check_if_cancelled(): return
 
@@ -47,11 +62,14 @@ class FourierThread(CalcThread):
             # Note: SasView 4.x series limited the range to xs <= 1000.0
             gamma3 = cumtrapz(gamma1, xs)/xs[1:]
             gamma3 = np.hstack((1.0, gamma3)) # gamma3(0) is defined as 1
+            transform3 = Data1D(xs, gamma3)
+            self.result(1, transform3)
 
             if self.check_if_cancelled(): return
 
             # ----- Interface Distribution function -----
-            idf = dct(-qs**4 * (iqs-background))
+            signal *= -qs**4
+            idf = dct(signal)
 
             if self.check_if_cancelled(): return
 
@@ -59,8 +77,10 @@ class FourierThread(CalcThread):
             # very large negative value.
             # IDF(x) = int_0^inf q^4 * I(q) * cos(q*x) * dq
             # => IDF(0) = int_0^inf q^4 * I(q) * dq
-            idf[0] = trapz(-qs**4 * (iqs-background), qs)
+            idf[0] = trapz(signal, qs)
             idf /= Q # Normalise using scattering invariant
+            idf = Data1D(xs, idf)
+            self.result(2, idf)
 
         except Exception as e:
             import logging
@@ -74,10 +94,6 @@ class FourierThread(CalcThread):
             return
         self.update(msg="Fourier transform completed.")
 
-        transform1 = Data1D(xs, gamma1)
-        transform3 = Data1D(xs, gamma3)
-        idf = Data1D(xs, idf)
-
         transforms = (transform1, transform3, idf)
 
         self.complete(transforms=transforms)
@@ -0,0 +1,73 @@
+"""
+Pool of worker processes for the parallel computations.
+
+concurrent.futures.ProcessPoolExecutor only takes the start method and
+the initializer of its workers from Python 3.7. ProcessPool provides the
+part of its interface used here on top of multiprocessing.Pool, which
+has both on every supported Python version.
+"""
+import multiprocessing
+from concurrent.futures import Future
+
+
+class ProcessPool(object):
+    """
+    Pool of worker processes started with the 'spawn' method
+
+    Spawned workers do not inherit the threads and open files of the
+    calling process, and behave the same way on every platform.
+    """
+    def __init__(self, max_workers, initializer=None, initargs=()):
+        """
+        :param max_workers: number of worker processes
+        :param initializer: function called with *initargs* when each
+            worker starts
+        """
+        context = multiprocessing.get_context('spawn')
+        self._pool = context.Pool(max_workers, initializer, initargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Do not wait for the remaining tasks when leaving on an error
+        self.shutdown(cancel=exc_type is not None)
+        return False
+
+    def submit(self, fn, *args):
+        """
+        Schedule fn(*args) in a worker process
+
+        The returned future is already running and cannot be cancelled:
+        use shutdown(cancel=True) to drop the pending tasks.
+
+        :return: concurrent.futures.Future of the result
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+        self._pool.apply_async(fn, args, callback=future.set_result,
+                               error_callback=future.set_exception)
+        return future
+
+    def map(self, fn, *iterables):
+        """
+        Apply *fn* to the items of *iterables* in the worker processes
+
+        :return: list of the results, in the order of the items
+        """
+        return self._pool.starmap(fn, zip(*iterables))
+
+    def shutdown(self, wait=True, cancel=False):
+        """
+        Stop the worker processes
+
+        :param wait: wait for the worker processes to exit
+        :param cancel: drop the pending tasks and kill the running ones
+            instead of completing them
+        """
+        if cancel:
+            self._pool.terminate()
+        else:
+            self._pool.close()
+        if wait:
+            self._pool.join()
@@ -19,8 +19,11 @@
 
 import os
 import sys
+import copy
 import logging
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from zipfile import ZipFile
 
 from sas.sascalc.data_util.registry import ExtensionRegistry
@@ -99,6 +102,34 @@ class Registry(ExtensionRegistry):
             logger.debug(traceback.print_exc())
             raise
 
+    def clone(self):
+        """
+        Return a copy of the registry with its own reader instances.
+
+        Readers keep the state of the file being read, so a reader instance
+        can only read one file at a time. Each thread loading files
+        concurrently uses a clone of the registry.
+        """
+        readers = {}
+
+        def clone_loader(loader):
+            reader = getattr(loader, '__self__', None)
+            if reader is None or isinstance(reader, type(os)):
+                # plain function
+                return loader
+            if id(reader) not in readers:
+                try:
+                    readers[id(reader)] = type(reader)()
+                except TypeError:
+                    readers[id(reader)] = copy.copy(reader)
+            return getattr(readers[id(reader)], loader.__name__)
+
+        registry = copy.copy(self)
+        registry.loaders = dict((ext, [clone_loader(loader) for loader in loaders])
+                                for ext, loaders in self.loaders.items())
+        registry.writers = self.writers.copy()
+        return registry
+
     def load_using_generic_loaders(self, path):
         """
         If the expected reader cannot load the file or no known loader exists,
@@ -392,6 +423,68 @@ class Loader(object):
         """
         return self.__registry.load(file, format)
 
+    def load_many(self, files, format=None, workers=None, ordered=False,
+                  cancel=None):
+        """
+        Load several files concurrently, in a pool of threads.
+
+        Results are yielded as the files are loaded, as tuples
+        (index, file, data_list, error) where index is the position of the
+        file in *files*. A file which could not be loaded has data_list None
+        and the exception raised by its reader as error.
+
+        :param files: list of file names (paths)
+        :param format: specified format to use (optional)
+        :param workers: number of loading threads; None for a default
+                        based on the number of CPU cores
+        :param ordered: when True, yield the results in the order of *files*
+        :param cancel: threading.Event; once set, the files not yet being
+                       read are skipped and no more results are yielded
+        """
+        files = list(files)
+        local = threading.local()
+
+        def load_one(file):
+            if cancel is not None and cancel.is_set():
+                return None
+            if not hasattr(local, 'registry'):
+                local.registry = self.__registry.clone()
+            return local.registry.load(file, format)
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        pending = {}
+        try:
+            for index, file in enumerate(files):
+                pending[executor.submit(load_one, file)] = index
+            done_results = {}
+            next_index = 0
+            while pending:
+                done, _ = wait(pending, timeout=0.1,
+                               return_when=FIRST_COMPLETED)
+                if cancel is not None and cancel.is_set():
+                    return
+                for future in done:
+                    index = pending.pop(future)
+                    error = future.exception()
+                    data = None if error is not None else future.result()
+                    done_results[index] = (index, files[index], data, error)
+                if not ordered:
+                    for index in sorted(done_results):
+                        if cancel is not None and cancel.is_set():
+                            return
+                        yield done_results.pop(index)
+                    continue
+                while next_index in done_results:
+                    if cancel is not None and cancel.is_set():
+                        return
+                    yield done_results.pop(next_index)
+                    next_index += 1
+        finally:
+            # Also reached when the caller stops iterating
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
     def save(self, file, data, format):
         """
         Save a DataInfo object to file
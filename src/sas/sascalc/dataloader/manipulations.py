@@ -20,7 +20,11 @@ PYTHONPATH=../src/ python2  -m sasdataloader.test.utest_averaging DataInfoTests.
 
 
 # TODO: copy the meta data from the 2D object to the resulting 1D object
+import copy
 import math
+import hashlib
+from collections import OrderedDict
+
 import numpy as np
 import sys
 
@@ -196,23 +200,38 @@ def get_dq_data(data2D):
     q = 0. Note This method works on only pinhole geometry.
     Extrapolate dqx(r) and dqy(phi) at q = 0, and take an average.
     '''
-    z_max = max(data2D.q_data)
-    z_min = min(data2D.q_data)
-    dqx_at_z_max = data2D.dqx_data[np.argmax(data2D.q_data)]
-    dqx_at_z_min = data2D.dqx_data[np.argmin(data2D.q_data)]
-    dqy_at_z_max = data2D.dqy_data[np.argmax(data2D.q_data)]
-    dqy_at_z_min = data2D.dqy_data[np.argmin(data2D.q_data)]
+    return _get_dq_data(data2D)[np.isfinite(data2D.data)]
+
+def _get_dq_data(data2D, geometry=None):
+    '''
+    Same as :func:`get_dq_data` but returns the dq of every point,
+    including those with a non-finite intensity.
+
+    :param geometry: optional DetectorGeometryIndex of the data
+    '''
+    if geometry is None:
+        geometry = DetectorGeometryIndex.from_data(data2D)
+    i_max = geometry.q_argmax
+    i_min = geometry.q_argmin
+    z_max = geometry.q_data[i_max]
+    z_min = geometry.q_data[i_min]
+    dqx_at_z_max = data2D.dqx_data[i_max]
+    dqx_at_z_min = data2D.dqx_data[i_min]
+    dqy_at_z_max = data2D.dqy_data[i_max]
+    dqy_at_z_min = data2D.dqy_data[i_min]
     # Find qdx at q = 0
     dq_overlap_x = (dqx_at_z_min * z_max - dqx_at_z_max * z_min) / (z_max - z_min)
     # when extrapolation goes wrong
-    if dq_overlap_x > min(data2D.dqx_data):
-        dq_overlap_x = min(data2D.dqx_data)
+    dqx_min = np.min(data2D.dqx_data)
+    if dq_overlap_x > dqx_min:
+        dq_overlap_x = dqx_min
     dq_overlap_x *= dq_overlap_x
     # Find qdx at q = 0
     dq_overlap_y = (dqy_at_z_min * z_max - dqy_at_z_max * z_min) / (z_max - z_min)
     # when extrapolation goes wrong
-    if dq_overlap_y > min(data2D.dqy_data):
-        dq_overlap_y = min(data2D.dqy_data)
+    dqy_min = np.min(data2D.dqy_data)
+    if dq_overlap_y > dqy_min:
+        dq_overlap_y = dqy_min
     # get dq at q=0.
     dq_overlap_y *= dq_overlap_y
 
@@ -220,9 +239,8 @@ def get_dq_data(data2D):
     # Final protection of dq
     if dq_overlap < 0:
         dq_overlap = dqy_at_z_min
-    dqx_data = data2D.dqx_data[np.isfinite(data2D.data)]
-    dqy_data = data2D.dqy_data[np.isfinite(
-        data2D.data)] - dq_overlap
+    dqx_data = data2D.dqx_data
+    dqy_data = data2D.dqy_data - dq_overlap
     # def; dqx_data = dq_r dqy_data = dq_phi
     # Convert dq 2D to 1D here
     dq_data = np.sqrt(dqx_data**2 + dqx_data**2)
@@ -300,6 +318,335 @@ class Binning(object):
         # Bin index calulation
         return int(math.floor(temp_x / temp_y))
 
+    def get_bin_indices(self, values):
+        '''
+        Array version of :meth:`get_bin_index`.
+
+        :param values: array of values to bin
+        :return: integer array of bin indices; values that cannot be
+            binned (e.g. log of zero) get a negative index
+        '''
+        values = np.asarray(values, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if self.base:
+                log_base = math.log(self.base)
+                temp_x = self.n_bins * (np.log(values) / log_base
+                                        - math.log(self.min, self.base))
+                temp_y = math.log(self.max, self.base) - math.log(self.min, self.base)
+            else:
+                temp_x = self.n_bins * (values - self.min)
+                temp_y = self.max - self.min
+            index = np.floor(temp_x / temp_y)
+        index[~np.isfinite(index)] = -1
+        return index.astype(int)
+
+
+################################################################################
+
+def _get_variance(data, err_data):
+    """
+    Variance of each data point.
+
+    Points without an error estimate fall back on counting statistics,
+    i.e. a variance of abs(I).
+
+    :param data: intensity of each point
+    :param err_data: uncertainty of each point, or None
+    :return: array of variances
+    """
+    if err_data is None:
+        return np.fabs(data)
+    variance = err_data * err_data
+    no_err = (err_data == 0.0)
+    variance[no_err] = np.fabs(data[no_err])
+    return variance
+
+
+class _BinSums(object):
+    """
+    Accumulate per-pixel quantities into 1D bins.
+
+    The bin index of every pixel is computed once by the caller; each
+    quantity is then summed over the bins with a single np.bincount
+    instead of a python loop over the pixels. Pixels are accumulated
+    in their original order, so the sums match those of a sequential
+    loop exactly.
+    """
+
+    def __init__(self, index, nbins, roi):
+        """
+        :param index: integer array with the bin index of each pixel
+        :param nbins: number of bins
+        :param roi: boolean array selecting the pixels to bin. Pixels
+            with an index outside [0, nbins) are always left out.
+        """
+        keep = roi & (index >= 0) & (index < nbins)
+        self.nbins = nbins
+        if 2 * np.count_nonzero(keep) < len(keep):
+            # Small ROI: only look at the pixels inside of it
+            self.select = np.flatnonzero(keep)
+            self.index = index[self.select]
+        else:
+            # Large ROI: the pixels outside of it go to an extra bin
+            # that is dropped, which is cheaper than selecting the ROI
+            # for every quantity.
+            self.select = None
+            self.index = np.where(keep, index, nbins)
+        # Number of pixels in each bin
+        self.counts = self._bincount(None).astype(float)
+
+    def _take(self, values):
+        """
+        Values of the pixels that the bin index refers to.
+        """
+        if self.select is None or values is None:
+            return values
+        return values[self.select]
+
+    def _bincount(self, weights):
+        """
+        Sum the weights over the bins, dropping the out-of-ROI bin.
+        """
+        return np.bincount(self.index, weights=weights,
+                           minlength=self.nbins + 1)[:self.nbins]
+
+    def restrict(self, roi):
+        """
+        Leave out the pixels outside of *roi* as well.
+
+        :param roi: boolean array selecting the pixels to keep
+        :return: _BinSums object; self if all the pixels are kept
+        """
+        roi = self._take(roi)
+        if roi.all():
+            return self
+        bins = copy.copy(self)
+        if self.select is None:
+            bins.index = np.where(roi, self.index, self.nbins)
+        else:
+            bins.select = self.select[roi]
+            bins.index = self.index[roi]
+        bins.counts = bins._bincount(None).astype(float)
+        return bins
+
+    def sum(self, values):
+        """
+        Sum a per-pixel quantity over each bin.
+
+        :param values: array with one entry per pixel, or None
+        :return: array of nbins sums, or None if values is None
+        """
+        if values is None:
+            return None
+        return self._bincount(self._take(values))
+
+    def variance(self, data, err_data):
+        """
+        Sum the variance of the pixels over each bin.
+
+        :param data: intensity of each pixel
+        :param err_data: uncertainty of each pixel, or None
+        :return: array of nbins summed variances
+        """
+        variance = _get_variance(self._take(data), self._take(err_data))
+        return self._bincount(variance)
+
+
+################################################################################
+
+class DetectorGeometryIndex(object):
+    """
+    Intensity-independent quantities of a 2D detector geometry.
+
+    Reductions of many frames measured on the same detector share the
+    |q| and phi of every pixel, as well as the bin layout of every
+    region of interest. Building them once and passing the index to the
+    averagers (``geometry=...``) leaves only the intensity-dependent
+    work to be done for each frame.
+
+    The index keeps references to the qx/qy arrays it was built from;
+    these arrays must not be modified in place afterwards.
+    """
+    #: Maximum number of ROI bin layouts kept, least recently used first out
+    max_layouts = 64
+
+    def __init__(self, qx_data, qy_data, q_data=None):
+        """
+        :param qx_data: qx value of each pixel [A-1]
+        :param qy_data: qy value of each pixel [A-1]
+        :param q_data: |q| of each pixel [A-1], computed if not given
+        """
+        self.qx_data = np.asarray(qx_data)
+        self.qy_data = np.asarray(qy_data)
+        if q_data is None:
+            q_data = np.sqrt(self.qx_data * self.qx_data
+                             + self.qy_data * self.qy_data)
+        self.q_data = np.asarray(q_data)
+        # Pixels with a well defined position in q-space
+        self.finite = (np.isfinite(self.qx_data) & np.isfinite(self.qy_data)
+                       & np.isfinite(self.q_data))
+        self._phi = None
+        self._q_order = None
+        self._q_sorted = None
+        self._q_argmin = None
+        self._q_argmax = None
+        self._n_q_range = 0
+        self._layouts = OrderedDict()
+
+    @classmethod
+    def from_data(cls, data2D):
+        """
+        Build the geometry index of a Data2D object.
+        """
+        return cls(data2D.qx_data, data2D.qy_data, data2D.q_data)
+
+    def __len__(self):
+        return len(self.q_data)
+
+    @property
+    def phi(self):
+        """
+        Azimuthal angle atan2(qy, qx) of each pixel, in [-pi, pi]
+        """
+        if self._phi is None:
+            self._phi = np.arctan2(self.qy_data, self.qx_data)
+        return self._phi
+
+    @property
+    def q_order(self):
+        """
+        Indices of the pixels sorted by increasing |q|
+        """
+        if self._q_order is None:
+            self._q_order = np.argsort(self.q_data, kind='mergesort')
+            self._q_sorted = self.q_data[self._q_order]
+        return self._q_order
+
+    @property
+    def q_argmin(self):
+        """
+        Index of the first pixel with the smallest |q|
+        """
+        if self._q_argmin is None:
+            self._q_argmin = np.argmin(self.q_data)
+        return self._q_argmin
+
+    @property
+    def q_argmax(self):
+        """
+        Index of the first pixel with the largest |q|
+        """
+        if self._q_argmax is None:
+            self._q_argmax = np.argmax(self.q_data)
+        return self._q_argmax
+
+    def q_range(self, q_min, q_max):
+        """
+        Find the pixels with q_min <= |q| <= q_max.
+
+        Sorting the pixels by |q| only pays off when the geometry is
+        reused, so the first range is found by comparing every pixel
+        and the following ones by bisection of the sorted |q|.
+
+        :return: boolean array, True for the pixels inside the range
+        """
+        self._n_q_range += 1
+        if self._q_order is None and self._n_q_range < 2:
+            return (q_min <= self.q_data) & (self.q_data <= q_max)
+        order = self.q_order
+        lo = np.searchsorted(self._q_sorted, q_min, side='left')
+        hi = np.searchsorted(self._q_sorted, q_max, side='right')
+        out = np.zeros(len(order), dtype=bool)
+        out[order[lo:hi]] = True
+        return out
+
+    def layout(self, key, build):
+        """
+        Get an intensity-independent ROI layout, building it if needed.
+
+        :param key: hashable description of the ROI
+        :param build: callable returning the layout for this geometry
+        :return: the cached or newly built layout
+        """
+        try:
+            value = self._layouts.pop(key)
+        except KeyError:
+            value = build()
+            while len(self._layouts) >= self.max_layouts:
+                self._layouts.popitem(last=False)
+        self._layouts[key] = value
+        return value
+
+    def check(self, data2D):
+        """
+        Make sure data2D can be reduced with this geometry index.
+        """
+        if len(data2D.data) != len(self.q_data):
+            msg = "Detector geometry of %d pixels" % len(self.q_data)
+            msg += " does not match data of %d pixels" % len(data2D.data)
+            raise ValueError(msg)
+
+
+#: Maximum number of detector geometries kept by get_geometry_index
+GEOMETRY_CACHE_SIZE = 8
+_geometry_cache = OrderedDict()
+
+
+def _geometry_key(qx_data, qy_data):
+    """
+    Digest of the content of the qx/qy arrays of a detector.
+    """
+    digest = hashlib.sha1()
+    for values in (qx_data, qy_data):
+        values = np.ascontiguousarray(values)
+        digest.update(str((values.dtype.str, values.shape)).encode())
+        digest.update(values)
+    return digest.hexdigest()
+
+
+def get_geometry_index(data2D):
+    """
+    Get the DetectorGeometryIndex of a Data2D object.
+
+    The index is shared by all the data sets with the same qx_data and
+    qy_data values. The most recently used geometries are kept, up to
+    GEOMETRY_CACHE_SIZE of them.
+
+    :param data2D: Data2D object
+    :return: DetectorGeometryIndex object
+    """
+    # Same arrays as a cached geometry: no need to look at their content
+    for key, geometry in _geometry_cache.items():
+        if (geometry.qx_data is data2D.qx_data
+                and geometry.qy_data is data2D.qy_data):
+            break
+    else:
+        key = _geometry_key(data2D.qx_data, data2D.qy_data)
+        geometry = _geometry_cache.get(key, None)
+        if geometry is None:
+            geometry = DetectorGeometryIndex.from_data(data2D)
+    _geometry_cache.pop(key, None)
+    while len(_geometry_cache) >= max(GEOMETRY_CACHE_SIZE, 1):
+        _geometry_cache.popitem(last=False)
+    _geometry_cache[key] = geometry
+    return geometry
+
+
+def clear_geometry_cache():
+    """
+    Forget all the detector geometries kept by get_geometry_index.
+    """
+    _geometry_cache.clear()
+
+
+def _get_geometry(data2D, geometry):
+    """
+    Geometry index to reduce data2D with; a new one if none is given.
+    """
+    if geometry is None:
+        return DetectorGeometryIndex.from_data(data2D)
+    geometry.check(data2D)
+    return geometry
 
 ################################################################################
 
@@ -324,10 +671,10 @@ class _Slab(object):
         # negative q-values are allowed
         self.fold = False
 
-    def __call__(self, data2D):
+    def __call__(self, data2D, geometry=None):
         return NotImplemented
 
-    def _avg(self, data2D, maj):
+    def _avg(self, data2D, maj, geometry=None):
         """
         Compute average I(Q_maj) for a region of interest.
         The major axis is defined as the axis of Q_maj.
@@ -335,18 +682,54 @@ class _Slab(object):
 
         :param data2D: Data2D object
         :param maj_min: min value on the major axis
+        :param geometry: optional DetectorGeometryIndex of the data
         :return: Data1D object
         """
         if len(data2D.detector) > 1:
             msg = "_Slab._avg: invalid number of "
             msg += " detectors: %g" % len(data2D.detector)
             raise RuntimeError(msg)
+        if maj not in ('x', 'y'):
+            raise RuntimeError("_Slab._avg: unrecognized axis %s" % str(maj))
+        geometry = _get_geometry(data2D, geometry)
 
         # Get data
-        data = data2D.data[np.isfinite(data2D.data)]
-        err_data = data2D.err_data[np.isfinite(data2D.data)]
-        qx_data = data2D.qx_data[np.isfinite(data2D.data)]
-        qy_data = data2D.qy_data[np.isfinite(data2D.data)]
+        data = data2D.data
+        err_data = data2D.err_data
+
+        key = ('slab', maj, self.x_min, self.x_max, self.y_min, self.y_max,
+               self.bin_width, self.fold)
+        bins, q_values = geometry.layout(
+            key, lambda: self._get_layout(geometry, maj))
+        bins = bins.restrict(np.isfinite(data))
+
+        # TODO: find better definition of x[i_q] based on q_data
+        # min_value + (i_q + 1) * self.bin_width / 2.0
+        x = bins.sum(q_values)
+        y = bins.sum(data)
+        err_y = np.sqrt(bins.variance(data, err_data))
+        y_counts = bins.counts
+
+        # Average the sums
+        with np.errstate(divide='ignore', invalid='ignore'):
+            err_y = err_y / y_counts
+            y = y / y_counts
+            x = x / y_counts
+        idx = (np.isfinite(y) & np.isfinite(x))
+
+        if not idx.any():
+            msg = "Average Error: No points inside ROI to average..."
+            raise ValueError(msg)
+        return Data1D(x=x[idx], y=y[idx], dy=err_y[idx])
+
+    def _get_layout(self, geometry, maj):
+        """
+        Bin the pixels of the ROI along the major axis.
+
+        :return: _BinSums object, q-value of each pixel on the major axis
+        """
+        qx_data = geometry.qx_data
+        qy_data = geometry.qy_data
 
         # Build array of Q intervals
         if maj == 'x':
@@ -355,76 +738,27 @@ class _Slab(object):
             else:
                 x_min = self.x_min
             nbins = int(math.ceil((self.x_max - x_min) / self.bin_width))
+            q_values = qx_data
+            min_value = x_min
         elif maj == 'y':
             if self.fold:
                 y_min = 0
             else:
                 y_min = self.y_min
             nbins = int(math.ceil((self.y_max - y_min) / self.bin_width))
-        else:
-            raise RuntimeError("_Slab._avg: unrecognized axis %s" % str(maj))
+            q_values = qy_data
+            min_value = y_min
 
-        x = np.zeros(nbins)
-        y = np.zeros(nbins)
-        err_y = np.zeros(nbins)
-        y_counts = np.zeros(nbins)
-
-        # Average pixelsize in q space
-        for npts in range(len(data)):
-            # default frac
-            frac_x = 0
-            frac_y = 0
-            # get ROI
-            if self.x_min <= qx_data[npts] and self.x_max > qx_data[npts]:
-                frac_x = 1
-            if self.y_min <= qy_data[npts] and self.y_max > qy_data[npts]:
-                frac_y = 1
-            frac = frac_x * frac_y
-
-            if frac == 0:
-                continue
-            # binning: find axis of q
-            if maj == 'x':
-                q_value = qx_data[npts]
-                min_value = x_min
-            if maj == 'y':
-                q_value = qy_data[npts]
-                min_value = y_min
-            if self.fold and q_value < 0:
-                q_value = -q_value
-            # bin
-            i_q = int(math.ceil((q_value - min_value) / self.bin_width)) - 1
-
-            # skip outside of max bins
-            if i_q < 0 or i_q >= nbins:
-                continue
-
-            # TODO: find better definition of x[i_q] based on q_data
-            # min_value + (i_q + 1) * self.bin_width / 2.0
-            x[i_q] += frac * q_value
-            y[i_q] += frac * data[npts]
-
-            if err_data is None or err_data[npts] == 0.0:
-                if data[npts] < 0:
-                    data[npts] = -data[npts]
-                err_y[i_q] += frac * frac * data[npts]
-            else:
-                err_y[i_q] += frac * frac * err_data[npts] * err_data[npts]
-            y_counts[i_q] += frac
+        # get ROI
+        roi = (geometry.finite
+               & (self.x_min <= qx_data) & (self.x_max > qx_data)
+               & (self.y_min <= qy_data) & (self.y_max > qy_data))
+        if self.fold:
+            q_values = np.fabs(q_values)
 
-        # Average the sums
-        for n in range(nbins):
-            err_y[n] = math.sqrt(err_y[n])
-
-        err_y = err_y / y_counts
-        y = y / y_counts
-        x = x / y_counts
-        idx = (np.isfinite(y) & np.isfinite(x))
-
-        if not idx.any():
-            msg = "Average Error: No points inside ROI to average..."
-            raise ValueError(msg)
-        return Data1D(x=x[idx], y=y[idx], dy=err_y[idx])
+        # bin; points outside of the max bins are skipped
+        i_q = np.ceil((q_values - min_value) / self.bin_width).astype(int) - 1
+        return _BinSums(i_q, nbins, roi), q_values
 
 
 class SlabY(_Slab):
@@ -432,14 +766,15 @@ class SlabY(_Slab):
     Compute average I(Qy) for a region of interest
     """
 
-    def __call__(self, data2D):
+    def __call__(self, data2D, geometry=None):
         """
         Compute average I(Qy) for a region of interest
 
         :param data2D: Data2D object
+        :param geometry: optional DetectorGeometryIndex of the data
         :return: Data1D object
         """
-        return self._avg(data2D, 'y')
+        return self._avg(data2D, 'y', geometry)
 
 
 class SlabX(_Slab):
@@ -447,13 +782,14 @@ class SlabX(_Slab):
     Compute average I(Qx) for a region of interest
     """
 
-    def __call__(self, data2D):
+    def __call__(self, data2D, geometry=None):
         """
         Compute average I(Qx) for a region of interest
         :param data2D: Data2D object
+        :param geometry: optional DetectorGeometryIndex of the data
         :return: Data1D object
         """
-        return self._avg(data2D, 'x')
+        return self._avg(data2D, 'x', geometry)
 
 ################################################################################
 
@@ -472,15 +808,16 @@ class Boxsum(object):
         # Maximum Qy value [A-1]
         self.y_max = y_max
 
-    def __call__(self, data2D):
+    def __call__(self, data2D, geometry=None):
         """
         Perform the sum in the region of interest
 
         :param data2D: Data2D object
+        :param geometry: optional DetectorGeometryIndex of the data
         :return: number of counts, error on number of counts,
             number of points summed
         """
-        y, err_y, y_counts = self._sum(data2D)
+        y, err_y, y_counts = self._sum(data2D, geometry)
 
         # Average the sums
         counts = 0 if y_counts == 0 else y
@@ -489,11 +826,12 @@ class Boxsum(object):
         # Added y_counts to return, SMK & PDB, 04/03/2013
         return counts, error, y_counts
 
-    def _sum(self, data2D):
+    def _sum(self, data2D, geometry=None):
         """
         Perform the sum in the region of interest
 
         :param data2D: Data2D object
+        :param geometry: optional DetectorGeometryIndex of the data
         :return: number of counts,
             error on number of counts, number of entries summed
         """
@@ -501,45 +839,33 @@ class Boxsum(object):
             msg = "Circular averaging: invalid number "
             msg += "of detectors: %g" % len(data2D.detector)
             raise RuntimeError(msg)
+        geometry = _get_geometry(data2D, geometry)
         # Get data
-        data = data2D.data[np.isfinite(data2D.data)]
-        err_data = data2D.err_data[np.isfinite(data2D.data)]
-        qx_data = data2D.qx_data[np.isfinite(data2D.data)]
-        qy_data = data2D.qy_data[np.isfinite(data2D.data)]
-
-        y = 0.0
-        err_y = 0.0
-        y_counts = 0.0
-
-        # Average pixelsize in q space
-        for npts in range(len(data)):
-            # default frac
-            frac_x = 0
-            frac_y = 0
-
-            # get min and max at each points
-            qx = qx_data[npts]
-            qy = qy_data[npts]
-
-            # get the ROI
-            if self.x_min <= qx and self.x_max > qx:
-                frac_x = 1
-            if self.y_min <= qy and self.y_max > qy:
-                frac_y = 1
-            # Find the fraction along each directions
-            frac = frac_x * frac_y
-            if frac == 0:
-                continue
-            y += frac * data[npts]
-            if err_data is None or err_data[npts] == 0.0:
-                if data[npts] < 0:
-                    data[npts] = -data[npts]
-                err_y += frac * frac * data[npts]
-            else:
-                err_y += frac * frac * err_data[npts] * err_data[npts]
-            y_counts += frac
+        data = data2D.data
+        err_data = data2D.err_data
+
+        # get the ROI, made of the finite points only
+        key = ('box', self.x_min, self.x_max, self.y_min, self.y_max)
+        roi = geometry.layout(key, lambda: self._get_layout(geometry))
+        roi = roi & np.isfinite(data)
+        if err_data is not None:
+            err_data = err_data[roi]
+        y = np.sum(data[roi])
+        err_y = np.sum(_get_variance(data[roi], err_data))
+        y_counts = float(np.count_nonzero(roi))
         return y, err_y, y_counts
 
+    def _get_layout(self, geometry):
+        """
+        Find the pixels inside the region of interest.
+
+        :return: boolean array, True for the pixels inside the ROI
+        """
+        qx_data = geometry.qx_data
+        qy_data = geometry.qy_data
+        return ((self.x_min <= qx_data) & (self.x_max > qx_data)
+                & (self.y_min <= qy_data) & (self.y_max > qy_data))
+
 
 class Boxavg(Boxsum):
     """
@@ -550,15 +876,16 @@ class Boxavg(Boxsum):
         super(Boxavg, self).__init__(x_min=x_min, x_max=x_max,
                                      y_min=y_min, y_max=y_max)
 
-    def __call__(self, data2D):
+    def __call__(self, data2D, geometry=None):
         """
         Perform the sum in the region of interest
 
         :param data2D: Data2D object
+        :param geometry: optional DetectorGeometryIndex of the data
         :return: average counts, error on average counts
 
         """
-        y, err_y, y_counts = self._sum(data2D)
+        y, err_y, y_counts = self._sum(data2D, geometry)
 
         # Average the sums
         counts = 0 if y_counts == 0 else y / y_counts
@@ -584,91 +911,59 @@ class CircularAverage(object):
         # Bin width (step size) [A-1]
         self.bin_width = bin_width
 
-    def __call__(self, data2D, ismask=False):
+    def __call__(self, data2D, ismask=False, geometry=None):
         """
         Perform circular averaging on the data
 
         :param data2D: Data2D object
+        :param ismask: if True, only the unmasked points are averaged
+        :param geometry: optional DetectorGeometryIndex of the data
         :return: Data1D object
         """
+        geometry = _get_geometry(data2D, geometry)
+
         # Get data W/ finite values
-        data = data2D.data[np.isfinite(data2D.data)]
-        q_data = data2D.q_data[np.isfinite(data2D.data)]
-        err_data = data2D.err_data[np.isfinite(data2D.data)]
-        mask_data = data2D.mask[np.isfinite(data2D.data)]
+        finite = np.isfinite(data2D.data)
+        data = data2D.data
+        q_data = geometry.q_data
+        err_data = data2D.err_data
 
         dq_data = None
         if data2D.dqx_data is not None and data2D.dqy_data is not None:
-            dq_data = get_dq_data(data2D)
+            dq_data = _get_dq_data(data2D, geometry)
 
-        if len(q_data) == 0:
+        if not finite.any():
             msg = "Circular averaging: invalid q_data: %g" % data2D.q_data
             raise RuntimeError(msg)
 
-        # Build array of Q intervals
-        nbins = int(math.ceil((self.r_max - self.r_min) / self.bin_width))
-
-        x = np.zeros(nbins)
-        y = np.zeros(nbins)
-        err_y = np.zeros(nbins)
-        err_x = np.zeros(nbins)
-        y_counts = np.zeros(nbins)
-
-        for npt in range(len(data)):
-
-            if ismask and not mask_data[npt]:
-                continue
-
-            frac = 0
-
-            # q-value at the pixel (j,i)
-            q_value = q_data[npt]
-            data_n = data[npt]
-
-            # No need to calculate the frac when all data are within range
-            if self.r_min >= self.r_max:
-                raise ValueError("Limit Error: min > max")
-
-            if self.r_min <= q_value and q_value <= self.r_max:
-                frac = 1
-            if frac == 0:
-                continue
-            i_q = int(math.floor((q_value - self.r_min) / self.bin_width))
-
-            # Take care of the edge case at phi = 2pi.
-            if i_q == nbins:
-                i_q = nbins - 1
-            y[i_q] += frac * data_n
-            # Take dqs from data to get the q_average
-            x[i_q] += frac * q_value
-            if err_data is None or err_data[npt] == 0.0:
-                if data_n < 0:
-                    data_n = -data_n
-                err_y[i_q] += frac * frac * data_n
-            else:
-                err_y[i_q] += frac * frac * err_data[npt] * err_data[npt]
-            if dq_data is not None:
-                # To be consistent with dq calculation in 1d reduction,
-                # we need just the averages (not quadratures) because
-                # it should not depend on the number of the q points
-                # in the qr bins.
-                err_x[i_q] += frac * dq_data[npt]
-            else:
-                err_x = None
-            y_counts[i_q] += frac
+        # No need to calculate the frac when all data are within range
+        if self.r_min >= self.r_max:
+            raise ValueError("Limit Error: min > max")
+
+        key = ('circular', self.r_min, self.r_max, self.bin_width)
+        bins = geometry.layout(key, lambda: self._get_layout(geometry))
+        roi = finite
+        if ismask:
+            roi = roi & data2D.mask.astype(bool)
+        bins = bins.restrict(roi)
+
+        y = bins.sum(data)
+        # Take dqs from data to get the q_average
+        x = bins.sum(q_data)
+        err_y = np.sqrt(bins.variance(data, err_data))
+        # To be consistent with dq calculation in 1d reduction,
+        # we need just the averages (not quadratures) because
+        # it should not depend on the number of the q points
+        # in the qr bins.
+        err_x = bins.sum(dq_data)
+        y_counts = bins.counts
 
         # Average the sums
-        for n in range(nbins):
-            if err_y[n] < 0:
-                err_y[n] = -err_y[n]
-            err_y[n] = math.sqrt(err_y[n])
-            # if err_x is not None:
-            #    err_x[n] = math.sqrt(err_x[n])
-
-        err_y = err_y / y_counts
-        err_y[err_y == 0] = np.average(err_y)
-        y = y / y_counts
-        x = x / y_counts
+        with np.errstate(divide='ignore', invalid='ignore'):
+            err_y = err_y / y_counts
+            err_y[err_y == 0] = np.average(err_y)
+            y = y / y_counts
+            x = x / y_counts
         idx = (np.isfinite(y)) & (np.isfinite(x))
 
         if err_x is not None:
@@ -682,6 +977,21 @@ class CircularAverage(object):
 
         return Data1D(x=x[idx], y=y[idx], dy=err_y[idx], dx=d_x)
 
+    def _get_layout(self, geometry):
+        """
+        Bin the pixels of the ring in |q|.
+
+        :return: _BinSums object
+        """
+        # Build array of Q intervals
+        nbins = int(math.ceil((self.r_max - self.r_min) / self.bin_width))
+
+        roi = geometry.finite & geometry.q_range(self.r_min, self.r_max)
+        i_q = np.floor((geometry.q_data - self.r_min) / self.bin_width).astype(int)
+        # Take care of the edge case at q = r_max.
+        i_q[i_q == nbins] = nbins - 1
+        return _BinSums(i_q, nbins, roi)
+
 ################################################################################
 
 class Ring(object):
@@ -710,71 +1020,32 @@ class Ring(object):
         # Number of angular bins
         self.nbins_phi = nbins
 
-    def __call__(self, data2D):
+    def __call__(self, data2D, geometry=None):
         """
         Apply the ring to the data set.
         Returns the angular distribution for a given q range
 
         :param data2D: Data2D object
+        :param geometry: optional DetectorGeometryIndex of the data
 
         :return: Data1D object
         """
         if data2D.__class__.__name__ not in ["Data2D", "plottable_2D"]:
             raise RuntimeError("Ring averaging only take plottable_2D objects")
-
-        Pi = math.pi
+        geometry = _get_geometry(data2D, geometry)
 
         # Get data
-        data = data2D.data[np.isfinite(data2D.data)]
-        q_data = data2D.q_data[np.isfinite(data2D.data)]
-        err_data = data2D.err_data[np.isfinite(data2D.data)]
-        qx_data = data2D.qx_data[np.isfinite(data2D.data)]
-        qy_data = data2D.qy_data[np.isfinite(data2D.data)]
-
-        # Set space for 1d outputs
-        phi_bins = np.zeros(self.nbins_phi)
-        phi_counts = np.zeros(self.nbins_phi)
-        phi_values = np.zeros(self.nbins_phi)
-        phi_err = np.zeros(self.nbins_phi)
+        data = data2D.data
+        err_data = data2D.err_data
 
-        # Shift to apply to calculated phi values in order
-        # to center first bin at zero
-        phi_shift = Pi / self.nbins_phi
+        key = ('ring', self.r_min, self.r_max, self.nbins_phi)
+        bins = geometry.layout(key, lambda: self._get_layout(geometry))
+        bins = bins.restrict(np.isfinite(data))
 
-        for npt in range(len(data)):
-            frac = 0
-            # q-value at the point (npt)
-            q_value = q_data[npt]
-            data_n = data[npt]
-
-            # phi-value at the point (npt)
-            phi_value = math.atan2(qy_data[npt], qx_data[npt]) + Pi
-
-            if self.r_min <= q_value and q_value <= self.r_max:
-                frac = 1
-            if frac == 0:
-                continue
-            # binning
-            i_phi = int(math.floor((self.nbins_phi) *
-                                   (phi_value + phi_shift) / (2 * Pi)))
-
-            # Take care of the edge case at phi = 2pi.
-            if i_phi >= self.nbins_phi:
-                i_phi = 0
-            phi_bins[i_phi] += frac * data[npt]
-
-            if err_data is None or err_data[npt] == 0.0:
-                if data_n < 0:
-                    data_n = -data_n
-                phi_err[i_phi] += frac * frac * math.fabs(data_n)
-            else:
-                phi_err[i_phi] += frac * frac * err_data[npt] * err_data[npt]
-            phi_counts[i_phi] += frac
-
-        for i in range(self.nbins_phi):
-            phi_bins[i] = phi_bins[i] / phi_counts[i]
-            phi_err[i] = math.sqrt(phi_err[i]) / phi_counts[i]
-            phi_values[i] = 2.0 * math.pi / self.nbins_phi * (1.0 * i)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            phi_bins = bins.sum(data) / bins.counts
+            phi_err = np.sqrt(bins.variance(data, err_data)) / bins.counts
+        phi_values = 2.0 * math.pi / self.nbins_phi * np.arange(self.nbins_phi)
 
         idx = (np.isfinite(phi_bins))
 
@@ -786,6 +1057,29 @@ class Ring(object):
         #,"empty bin(s) due to tight binning..."
         return Data1D(x=phi_values[idx], y=phi_bins[idx], dy=phi_err[idx])
 
+    def _get_layout(self, geometry):
+        """
+        Bin the pixels of the ring in phi.
+
+        :return: _BinSums object
+        """
+        Pi = math.pi
+
+        # Shift to apply to calculated phi values in order
+        # to center first bin at zero
+        phi_shift = Pi / self.nbins_phi
+
+        # phi-value at each point
+        phi_data = geometry.phi + Pi
+        roi = geometry.finite & geometry.q_range(self.r_min, self.r_max)
+
+        # binning
+        i_phi = np.floor((self.nbins_phi) *
+                         (phi_data + phi_shift) / (2 * Pi)).astype(int)
+        # Take care of the edge case at phi = 2pi.
+        i_phi[i_phi >= self.nbins_phi] = 0
+        return _BinSums(i_phi, self.nbins_phi, roi)
+
 
 class _Sector(object):
     """
@@ -813,118 +1107,44 @@ class _Sector(object):
         self.nbins = nbins
         self.base = base
 
-    def _agv(self, data2D, run='phi'):
+    def _agv(self, data2D, run='phi', geometry=None):
         """
         Perform sector averaging.
 
         :param data2D: Data2D object
         :param run:  define the varying parameter ('phi' , 'q' , or 'q2')
+        :param geometry: optional DetectorGeometryIndex of the data
 
         :return: Data1D object
         """
         if data2D.__class__.__name__ not in ["Data2D", "plottable_2D"]:
             raise RuntimeError("Ring averaging only take plottable_2D objects")
+        geometry = _get_geometry(data2D, geometry)
 
         # Get the all data & info
-        data = data2D.data[np.isfinite(data2D.data)]
-        q_data = data2D.q_data[np.isfinite(data2D.data)]
-        err_data = data2D.err_data[np.isfinite(data2D.data)]
-        qx_data = data2D.qx_data[np.isfinite(data2D.data)]
-        qy_data = data2D.qy_data[np.isfinite(data2D.data)]
+        data = data2D.data
+        q_data = geometry.q_data
+        err_data = data2D.err_data
 
         dq_data = None
         if data2D.dqx_data is not None and data2D.dqy_data is not None:
-            dq_data = get_dq_data(data2D)
-
-        # set space for 1d outputs
-        x = np.zeros(self.nbins)
-        y = np.zeros(self.nbins)
-        y_err = np.zeros(self.nbins)
-        x_err = np.zeros(self.nbins)
-        y_counts = np.zeros(self.nbins)  # Cycle counts (for the mean)
-
-        # Get the min and max into the region: 0 <= phi < 2Pi
-        phi_min = flip_phi(self.phi_min)
-        phi_max = flip_phi(self.phi_max)
-
-        #  binning object
-        if run.lower() == 'phi':
-            binning = Binning(self.phi_min, self.phi_max, self.nbins, self.base)
-        else:
-            binning = Binning(self.r_min, self.r_max, self.nbins, self.base)
-
-        for n in range(len(data)):
-
-            # q-value at the pixel (j,i)
-            q_value = q_data[n]
-            data_n = data[n]
-
-            # Is pixel within range?
-            is_in = False
-
-            # phi-value of the pixel (j,i)
-            phi_value = math.atan2(qy_data[n], qx_data[n]) + math.pi
-
-            # No need to calculate: data outside of the radius
-            if self.r_min > q_value or q_value > self.r_max:
-                continue
-
-            # In case of two ROIs (symmetric major and minor regions)(for 'q2')
-            if run.lower() == 'q2':
-                # For minor sector wing
-                # Calculate the minor wing phis
-                phi_min_minor = flip_phi(phi_min - math.pi)
-                phi_max_minor = flip_phi(phi_max - math.pi)
-                # Check if phis of the minor ring is within 0 to 2pi
-                if phi_min_minor > phi_max_minor:
-                    is_in = (phi_value > phi_min_minor or
-                             phi_value < phi_max_minor)
-                else:
-                    is_in = (phi_value > phi_min_minor and
-                             phi_value < phi_max_minor)
-
-            # For all cases(i.e.,for 'q', 'q2', and 'phi')
-            # Find pixels within ROI
-            if phi_min > phi_max:
-                is_in = is_in or (phi_value > phi_min or
-                                  phi_value < phi_max)
-            else:
-                is_in = is_in or (phi_value >= phi_min and
-                                  phi_value < phi_max)
-
-            # data oustide of the phi range
-            if not is_in:
-                continue
-
-            # Get the binning index
-            if run.lower() == 'phi':
-                i_bin = binning.get_bin_index(phi_value)
-            else:
-                i_bin = binning.get_bin_index(q_value)
-
-            # Take care of the edge case at phi = 2pi.
-            if i_bin == self.nbins:
-                i_bin = self.nbins - 1
-
-            # Get the total y
-            y[i_bin] += data_n
-            x[i_bin] += q_value
-            if err_data[n] is None or err_data[n] == 0.0:
-                if data_n < 0:
-                    data_n = -data_n
-                y_err[i_bin] += data_n
-            else:
-                y_err[i_bin] += err_data[n]**2
-
-            if dq_data is not None:
-                # To be consistent with dq calculation in 1d reduction,
-                # we need just the averages (not quadratures) because
-                # it should not depend on the number of the q points
-                # in the qr bins.
-                x_err[i_bin] += dq_data[n]
-            else:
-                x_err = None
-            y_counts[i_bin] += 1
+            dq_data = _get_dq_data(data2D, geometry)
+
+        key = ('sector', run.lower(), self.r_min, self.r_max,
+               self.phi_min, self.phi_max, self.nbins, self.base)
+        bins = geometry.layout(key, lambda: self._get_layout(geometry, run))
+        bins = bins.restrict(np.isfinite(data))
+
+        # Get the total y
+        y = bins.sum(data)
+        x = bins.sum(q_data)
+        y_err = bins.variance(data, err_data)
+        # To be consistent with dq calculation in 1d reduction,
+        # we need just the averages (not quadratures) because
+        # it should not depend on the number of the q points
+        # in the qr bins.
+        x_err = bins.sum(dq_data)
+        y_counts = bins.counts
 
         # Organize the results
         with np.errstate(divide='ignore', invalid='ignore'):
@@ -959,6 +1179,57 @@ class _Sector(object):
         # "empty bin(s) due to tight binning..."
         return Data1D(x=x[idx], y=y[idx], dy=y_err[idx], dx=d_x)
 
+    def _get_layout(self, geometry, run):
+        """
+        Bin the pixels of the sector in phi or |q|.
+
+        :param run:  define the varying parameter ('phi' , 'q' , or 'q2')
+        :return: _BinSums object
+        """
+        # Get the min and max into the region: 0 <= phi < 2Pi
+        phi_min = flip_phi(self.phi_min)
+        phi_max = flip_phi(self.phi_max)
+
+        # phi-value of each pixel
+        phi_data = geometry.phi + math.pi
+
+        # No need to calculate: data outside of the radius
+        roi = geometry.finite & geometry.q_range(self.r_min, self.r_max)
+
+        # For all cases(i.e.,for 'q', 'q2', and 'phi')
+        # Find pixels within ROI
+        if phi_min > phi_max:
+            is_in = (phi_data > phi_min) | (phi_data < phi_max)
+        else:
+            is_in = (phi_data >= phi_min) & (phi_data < phi_max)
+
+        # In case of two ROIs (symmetric major and minor regions)(for 'q2')
+        if run.lower() == 'q2':
+            # For minor sector wing
+            # Calculate the minor wing phis
+            phi_min_minor = flip_phi(phi_min - math.pi)
+            phi_max_minor = flip_phi(phi_max - math.pi)
+            # Check if phis of the minor ring is within 0 to 2pi
+            if phi_min_minor > phi_max_minor:
+                is_in |= ((phi_data > phi_min_minor) |
+                          (phi_data < phi_max_minor))
+            else:
+                is_in |= ((phi_data > phi_min_minor) &
+                          (phi_data < phi_max_minor))
+        roi &= is_in
+
+        # Get the binning index
+        if run.lower() == 'phi':
+            binning = Binning(self.phi_min, self.phi_max, self.nbins, self.base)
+            i_bin = binning.get_bin_indices(phi_data)
+        else:
+            binning = Binning(self.r_min, self.r_max, self.nbins, self.base)
+            i_bin = binning.get_bin_indices(geometry.q_data)
+
+        # Take care of the edge case at phi = 2pi.
+        i_bin[i_bin == self.nbins] = self.nbins - 1
+        return _BinSums(i_bin, self.nbins, roi)
+
 
 class SectorPhi(_Sector):
     """
@@ -969,14 +1240,15 @@ class SectorPhi(_Sector):
     The number of bin in phi also has to be defined.
     """
 
-    def __call__(self, data2D):
+    def __call__(self, data2D, geometry=None):
         """
         Perform sector average and return I(phi).
 
         :param data2D: Data2D object
+        :param geometry: optional DetectorGeometryIndex of the data
         :return: Data1D object
         """
-        return self._agv(data2D, 'phi')
+        return self._agv(data2D, 'phi', geometry)
 
 
 class SectorQ(_Sector):
@@ -989,15 +1261,16 @@ class SectorQ(_Sector):
     The number of bin in Q also has to be defined.
     """
 
-    def __call__(self, data2D):
+    def __call__(self, data2D, geometry=None):
         """
         Perform sector average and return I(Q).
 
         :param data2D: Data2D object
+        :param geometry: optional DetectorGeometryIndex of the data
 
         :return: Data1D object
         """
-        return self._agv(data2D, 'q2')
+        return self._agv(data2D, 'q2', geometry)
 
 ################################################################################
 
@@ -1023,18 +1296,23 @@ class Ringcut(object):
         # Center of the ring in y
         self.center_y = center_y
 
-    def __call__(self, data2D):
+    def __call__(self, data2D, geometry=None):
         """
         Apply the ring to the data set.
         Returns the angular distribution for a given q range
 
         :param data2D: Data2D object
+        :param geometry: optional DetectorGeometryIndex of the data
 
         :return: index array in the range
         """
         if data2D.__class__.__name__ not in ["Data2D", "plottable_2D"]:
             raise RuntimeError("Ring cut only take plottable_2D objects")
 
+        if geometry is not None:
+            geometry.check(data2D)
+            return geometry.q_range(self.r_min, self.r_max)
+
         # Get data
         qx_data = data2D.qx_data
         qy_data = data2D.qy_data
@@ -1061,23 +1339,25 @@ class Boxcut(object):
         # Maximum Qy value [A-1]
         self.y_max = y_max
 
-    def __call__(self, data2D):
+    def __call__(self, data2D, geometry=None):
         """
        Find a rectangular 2D region of interest.
 
        :param data2D: Data2D object
+       :param geometry: optional DetectorGeometryIndex of the data
        :return: mask, 1d array (len = len(data))
            with Trues where the data points are inside ROI, otherwise False
         """
-        mask = self._find(data2D)
+        mask = self._find(data2D, geometry)
 
         return mask
 
-    def _find(self, data2D):
+    def _find(self, data2D, geometry=None):
         """
         Find a rectangular 2D region of interest.
 
         :param data2D: Data2D object
+        :param geometry: optional DetectorGeometryIndex of the data
 
         :return: out, 1d array (length = len(data))
            with Trues where the data points are inside ROI, otherwise Falses
@@ -1085,8 +1365,13 @@ class Boxcut(object):
         if data2D.__class__.__name__ not in ["Data2D", "plottable_2D"]:
             raise RuntimeError("Boxcut take only plottable_2D objects")
         # Get qx_ and qy_data
-        qx_data = data2D.qx_data
-        qy_data = data2D.qy_data
+        if geometry is not None:
+            geometry.check(data2D)
+            qx_data = geometry.qx_data
+            qy_data = geometry.qy_data
+        else:
+            qx_data = data2D.qx_data
+            qy_data = data2D.qy_data
 
         # check whether or not the data point is inside ROI
         outx = (self.x_min <= qx_data) & (self.x_max > qx_data)
@@ -1111,25 +1396,27 @@ class Sectorcut(object):
         self.phi_min = phi_min
         self.phi_max = phi_max
 
-    def __call__(self, data2D):
+    def __call__(self, data2D, geometry=None):
         """
         Find a rectangular 2D region of interest.
 
         :param data2D: Data2D object
+        :param geometry: optional DetectorGeometryIndex of the data
 
         :return: mask, 1d array (len = len(data))
 
         with Trues where the data points are inside ROI, otherwise False
         """
-        mask = self._find(data2D)
+        mask = self._find(data2D, geometry)
 
         return mask
 
-    def _find(self, data2D):
+    def _find(self, data2D, geometry=None):
         """
         Find a rectangular 2D region of interest.
 
         :param data2D: Data2D object
+        :param geometry: optional DetectorGeometryIndex of the data
 
         :return: out, 1d array (length = len(data))
 
@@ -1138,12 +1425,13 @@ class Sectorcut(object):
         if data2D.__class__.__name__ not in ["Data2D", "plottable_2D"]:
             raise RuntimeError("Sectorcut take only plottable_2D objects")
         Pi = math.pi
-        # Get data
-        qx_data = data2D.qx_data
-        qy_data = data2D.qy_data
 
         # get phi from data
-        phi_data = np.arctan2(qy_data, qx_data)
+        if geometry is not None:
+            geometry.check(data2D)
+            phi_data = geometry.phi
+        else:
+            phi_data = np.arctan2(data2D.qy_data, data2D.qx_data)
 
         # Get the min and max into the region: -pi <= phi < Pi
         phi_min_major = flip_phi(self.phi_min + Pi) - Pi
@@ -55,6 +55,10 @@ class Reader(XMLreader):
     # Temporary storage location for loading multiple data sets in a single file
     current_data1d = None
     data = None
+    # Values of the data set and transmission spectrum arrays, gathered as
+    # lists while reading and stored as arrays once the element is read
+    data_columns = None
+    trans_columns = None
     # Wildcards
     type = ["XML files (*.xml)|*.xml", "SasView Save Files (*.svs)|*.svs"]
     # List of allowed extensions
@@ -79,6 +83,10 @@ class Reader(XMLreader):
         self.ns_list = None
         self.logging = []
         self.encoding = None
+        self.data_columns = {}
+        self.trans_columns = {}
+        self._namespaces = {}
+        self._converters = {}
 
     def get_file_contents(self):
         self.reset_state()
@@ -205,7 +213,7 @@ class Reader(XMLreader):
                 continue
             # Get where to store content
             self.names.append(tagname_original)
-            self.ns_list = CONSTANTS.iterate_namespace(self.names)
+            self.ns_list = self._iterate_namespace()
             # If the element is a child element, recurse
             if len(node.getchildren()) > 0:
                 self.parent_class = tagname_original
@@ -312,18 +320,18 @@ class Reader(XMLreader):
         """
         if tagname == 'I' and isinstance(self.current_dataset, plottable_1D):
             self.current_dataset.yaxis("Intensity", unit)
-            self.current_dataset.y = np.append(self.current_dataset.y, data_point)
+            self.data_columns.setdefault('y', []).append(data_point)
         elif tagname == 'Idev' and isinstance(self.current_dataset, plottable_1D):
-            self.current_dataset.dy = np.append(self.current_dataset.dy, data_point)
+            self.data_columns.setdefault('dy', []).append(data_point)
         elif tagname == 'Q':
             self.current_dataset.xaxis("Q", unit)
-            self.current_dataset.x = np.append(self.current_dataset.x, data_point)
+            self.data_columns.setdefault('x', []).append(data_point)
         elif tagname == 'Qdev':
-            self.current_dataset.dx = np.append(self.current_dataset.dx, data_point)
+            self.data_columns.setdefault('dx', []).append(data_point)
         elif tagname == 'dQw':
-            self.current_dataset.dxw = np.append(self.current_dataset.dxw, data_point)
+            self.data_columns.setdefault('dxw', []).append(data_point)
         elif tagname == 'dQl':
-            self.current_dataset.dxl = np.append(self.current_dataset.dxl, data_point)
+            self.data_columns.setdefault('dxl', []).append(data_point)
         elif tagname == 'Qmean':
             pass
         elif tagname == 'Shadowfactor':
@@ -577,13 +585,13 @@ class Reader(XMLreader):
         :return: None
         """
         if tagname == 'T':
-            self.transspectrum.transmission = np.append(self.transspectrum.transmission, data_point)
+            self.trans_columns.setdefault('transmission', []).append(data_point)
             self.transspectrum.transmission_unit = unit
         elif tagname == 'Tdev':
-            self.transspectrum.transmission_deviation = np.append(self.transspectrum.transmission_deviation, data_point)
+            self.trans_columns.setdefault('transmission_deviation', []).append(data_point)
             self.transspectrum.transmission_deviation_unit = unit
         elif tagname == 'Lambda':
-            self.transspectrum.wavelength = np.append(self.transspectrum.wavelength, data_point)
+            self.trans_columns.setdefault('wavelength', []).append(data_point)
             self.transspectrum.wavelength_unit = unit
         else:
             self.process_meta_data(tagname, data_point)
@@ -621,6 +629,7 @@ class Reader(XMLreader):
             self.current_datainfo.detector.append(self.detector)
             self.detector = Detector()
         elif self.parent_class == 'SAStransmission_spectrum':
+            self._store_columns(self.transspectrum, self.trans_columns)
             self.current_datainfo.trans_spectrum.append(self.transspectrum)
             self.transspectrum = TransmissionSpectrum()
         elif self.parent_class == 'SAScollimation':
@@ -630,8 +639,45 @@ class Reader(XMLreader):
             self.collimation.aperture.append(self.aperture)
             self.aperture = Aperture()
         elif self.parent_class == 'SASdata':
+            self._store_columns(self.current_dataset, self.data_columns)
             self.data.append(self.current_dataset)
 
+    @staticmethod
+    def _store_columns(target, columns):
+        """
+        Append the values gathered while reading an element to the arrays of
+        the object storing them.
+
+        :param target: The data set or transmission spectrum
+        :param columns: dictionary of attribute name and list of values,
+            emptied once stored
+        """
+        for name, values in columns.items():
+            setattr(target, name, np.append(getattr(target, name), values))
+        columns.clear()
+
+    def _iterate_namespace(self):
+        """
+        Find the canSAS constants for the current list of names; the result
+        only depends on the names, so it is computed once for each path.
+        """
+        key = tuple(self.names)
+        ns_list = self._namespaces.get(key)
+        if ns_list is None:
+            ns_list = CONSTANTS.iterate_namespace(self.names)
+            self._namespaces[key] = ns_list
+        return ns_list
+
+    def _get_converter(self, unit):
+        """
+        Return the unit converter for *unit*, reused for all the points of
+        the file.
+        """
+        converter = self._converters.get(unit)
+        if converter is None:
+            converter = self._converters[unit] = Converter(unit)
+        return converter
+
     def _get_node_value(self, node, tagname):
         """
         Get the value of a node and any applicable units
@@ -703,9 +749,9 @@ class Reader(XMLreader):
                 elif "SAStransmission_spectrum" in self.names:
                     save_in = "transspectrum"
                 elif "SASdata" in self.names:
-                    x = np.zeros(1)
-                    y = np.zeros(1)
-                    self.current_data1d = Data1D(x, y)
+                    # only used for its default units
+                    if self.current_data1d is None:
+                        self.current_data1d = Data1D(np.zeros(1), np.zeros(1))
                     save_in = "current_data1d"
                 elif "SASsource" in self.names:
                     save_in = "current_datainfo.source"
@@ -721,7 +767,7 @@ class Reader(XMLreader):
                         and local_unit.lower() != "none"):
                     # Check local units - bad units raise KeyError
                     #print("loading", tagname, node_value, local_unit, default_unit)
-                    data_conv_q = Converter(local_unit)
+                    data_conv_q = self._get_converter(local_unit)
                     value_unit = default_unit
                     node_value = data_conv_q(node_value, units=default_unit)
                 else:
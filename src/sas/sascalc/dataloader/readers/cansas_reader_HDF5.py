@@ -2,16 +2,18 @@
     NXcanSAS data reader for reading HDF5 formatted CanSAS files.
 """
 
+import copy
 import logging
 import h5py
 import numpy as np
 import re
 import os
 import traceback
+from collections import OrderedDict
 
 from ..data_info import plottable_1D, plottable_2D,\
     Data1D, Data2D, DataInfo, Process, Aperture, Collimation, \
-    TransmissionSpectrum, Detector
+    TransmissionSpectrum, Detector, combine_data_info_with_plottable
 from ..loader_exceptions import FileContentsException, DefaultReaderException
 from ..file_reader_base_class import FileReader, decode
 
@@ -22,6 +24,9 @@ except NameError:  # CRUFT: python 2 support
 
 logger = logging.getLogger(__name__)
 
+# Number of frames of a lazily read multi-frame data set kept in memory
+FRAME_CACHE_SIZE = 16
+
 
 def h5attr(node, key, default=None):
     value = node.attrs.get(key, default)
@@ -34,6 +39,180 @@ def h5attr(node, key, default=None):
         return decode(value)
 
 
+class _FrameArray(object):
+    """
+    Frames of an HDF5 dataset, one frame for each index of the first axis,
+    read when accessed. Contiguous datasets are memory mapped, others are
+    sliced through h5py.
+
+    The memory map and file handle are opened on the first access and
+    released by close(), when leaving a with block or when the array is
+    garbage collected.
+    """
+    def __init__(self, filename, path):
+        self.filename = filename
+        self.path = path
+        self._file = None
+        self._memmap = None
+        with h5py.File(filename, 'r') as h5_file:
+            dataset = h5_file[path]
+            self.shape = dataset.shape
+            self.dtype = dataset.dtype
+            # datasets without chunks cannot have filters, so the data is
+            # stored as is from the offset, if any
+            self._offset = (dataset.id.get_offset()
+                            if dataset.chunks is None
+                            and dataset.dtype.kind in 'fiu' else None)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, index):
+        if self._offset is not None:
+            if self._memmap is None:
+                self._memmap = np.memmap(self.filename, dtype=self.dtype,
+                                         mode='r', offset=self._offset,
+                                         shape=self.shape)
+            return np.array(self._memmap[index], dtype=np.float64)
+        if self._file is None:
+            self._file = h5py.File(self.filename, 'r')
+        return np.asarray(self._file[self.path][index], dtype=np.float64)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        self._memmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class FrameSet(object):
+    """
+    The frames of a multi-frame 1D or 2D NXcanSAS data set, as returned by
+    the reader in lazy mode.
+
+    Indexing or iterating gives a Data1D or Data2D for each frame, processed
+    as the reader would. The intensity and uncertainty of a frame are only
+    read from the file when the frame is accessed, and the last *cache_size*
+    frames are kept in memory. The arrays shared by all frames (Q, Q
+    resolution and mask) are read with the first frame.
+
+    The file handles are released by close(), when leaving a with block or
+    when the FrameSet is garbage collected.
+    """
+    def __init__(self, filename, dataset, datainfo, frame_paths,
+                 shared_paths=None, names=None, cache_size=None):
+        """
+        :param filename: path of the NXcanSAS file
+        :param dataset: plottable_1D or plottable_2D of the SASdata group
+        :param datainfo: DataInfo of the SASentry
+        :param frame_paths: {name: (HDF5 path, unit)} of the SASdata
+            datasets with one entry per frame, the intensity at least
+        :param shared_paths: {name: (HDF5 path, unit)} of the SASdata
+            datasets shared by all frames
+        :param names: reader attributes naming the SASdata datasets, as
+            given by Reader.data_names()
+        :param cache_size: number of frames kept in memory, FRAME_CACHE_SIZE
+            by default
+        """
+        self.filename = filename
+        self.datainfo = datainfo
+        self.cache_size = (FRAME_CACHE_SIZE if cache_size is None
+                           else cache_size)
+        self._dataset = dataset
+        self._shared_paths = shared_paths or {}
+        self._shared = None
+        self._frames = OrderedDict()
+        self._cache = OrderedDict()
+        # One reader processes all the frames
+        self._reader = Reader()
+        self._reader.reset_state()
+        for attr, value in (names or {}).items():
+            setattr(self._reader, attr, value)
+        for key, (path, unit) in frame_paths.items():
+            self._frames[key] = (_FrameArray(filename, path), unit)
+        self._intensity = self._frames[self._reader.i_name][0]
+
+    def __len__(self):
+        return len(self._intensity)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("frame index out of range")
+        if index in self._cache:
+            self._cache.move_to_end(index)
+            return self._cache[index]
+        data = self._read_frame(index)
+        if self.cache_size > 0:
+            while len(self._cache) >= self.cache_size:
+                self._cache.popitem(last=False)
+            self._cache[index] = data
+        return data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def _read_shared(self):
+        if self._shared is None:
+            self._shared = OrderedDict()
+            with h5py.File(self.filename, 'r') as h5_file:
+                for key, (path, unit) in self._shared_paths.items():
+                    self._shared[key] = (h5_file[path][()], unit)
+        return self._shared
+
+    def _read_frame(self, index):
+        reader = self._reader
+        reader.current_datainfo = self.datainfo
+        reader.current_dataset = copy.copy(self._dataset)
+        is_2d = isinstance(reader.current_dataset, plottable_2D)
+        process = (reader.process_2d_data_object if is_2d
+                   else reader.process_1d_data_object)
+        for key, (data_set, unit) in self._read_shared().items():
+            process(data_set, key, unit)
+        for key, (frames, unit) in self._frames.items():
+            process(frames[index], key, unit)
+        if is_2d:
+            reader.finalize_2d_data(reader.current_dataset)
+        # Apply the unit conversion and sorting of the loaded data sets
+        reader.output = []
+        reader.send_to_output()
+        reader.convert_data_units()
+        reader.sort_data()
+        data = reader.output[0]
+        reader.output = []
+        reader.current_dataset = None
+        return data
+
+    def close(self):
+        """
+        Close the file handles of the frames.
+        """
+        for frames, _ in self._frames.values():
+            frames.close()
+        self._shared = None
+        self._cache.clear()
+
+
 class Reader(FileReader):
     """
     A class for reading in NXcanSAS data files. The current implementation has
@@ -47,6 +226,9 @@ class Reader(FileReader):
     within each SASdata group can be a single 1D I(Q), multi-framed 1D I(Q),
     2D I(Qx, Qy) or multi-framed 2D I(Qx, Qy).
 
+    In lazy mode, each multi-frame 1D or 2D data set is returned as a
+    FrameSet, which only reads the frames when they are accessed.
+
     :Dependencies:
         The NXcanSAS HDF5 reader requires h5py => v2.5.0 or later.
     """
@@ -62,6 +244,28 @@ class Reader(FileReader):
     # Flag to bypass extension check
     allow_all = True
 
+    def __init__(self, lazy=False, frame_cache_size=None):
+        """
+        :param lazy: return multi-frame data sets as FrameSet objects
+        :param frame_cache_size: number of frames each FrameSet keeps in
+            memory, FRAME_CACHE_SIZE by default
+        """
+        super(Reader, self).__init__()
+        self.lazy = lazy
+        self.frame_cache_size = frame_cache_size
+        self.lazy_data = []
+        self.frame_sets = []
+
+    def read(self, filepath):
+        """
+        Read the file, with the FrameSets of lazy mode after the data sets.
+        """
+        self.frame_sets = []
+        output = super(Reader, self).read(filepath)
+        output.extend(self.frame_sets)
+        self.frame_sets = []
+        return output
+
     def get_file_contents(self):
         """
         This is the general read method that all SasView data_loaders must have.
@@ -117,8 +321,12 @@ class Reader(FileReader):
         self.data2d = []
         self.raw_data = None
         self.multi_frame = False
+        self.multi_frame_2d = False
         self.data_frames = []
         self.data_uncertainty_frames = []
+        self.frame_paths = OrderedDict()
+        self.shared_paths = OrderedDict()
+        self.lazy_data = []
         self.errors = []
         self.logging = []
         self.q_names = []
@@ -181,6 +389,16 @@ class Reader(FileReader):
                 parent_list.remove(key)
 
             elif isinstance(value, h5py.Dataset):
+                if self._is_lazy_frame(key):
+                    # Frames are read when accessed, the arrays they share
+                    # with the first frame
+                    path = (value.name, self._get_unit(value))
+                    if (key in (self.i_name, self.i_uncertainties_name)
+                            and value.ndim == self.i_node.ndim):
+                        self.frame_paths[key] = path
+                    else:
+                        self.shared_paths[key] = path
+                    continue
                 # If this is a dataset, store the data appropriately
                 data_set = value[()]
                 unit = self._get_unit(value)
@@ -316,10 +534,18 @@ class Reader(FileReader):
 
     def process_2d_data_object(self, data_set, key, unit):
         if key == self.i_name:
-            self.current_dataset.data = data_set
+            if self.multi_frame_2d:
+                for x in range(0, data_set.shape[0]):
+                    self.data_frames.append(data_set[x])
+            else:
+                self.current_dataset.data = data_set
             self.current_dataset.zaxis("Intensity", unit)
         elif key == self.i_uncertainties_name:
-            self.current_dataset.err_data = data_set.flatten()
+            if self.multi_frame_2d and data_set.ndim == 3:
+                for x in range(0, data_set.shape[0]):
+                    self.data_uncertainty_frames.append(data_set[x].flatten())
+            else:
+                self.current_dataset.err_data = data_set.flatten()
         elif key in self.q_names:
             self.current_dataset.xaxis("Q_x", unit)
             self.current_dataset.yaxis("Q_y", unit)
@@ -557,15 +783,31 @@ class Reader(FileReader):
             self.aperture = Aperture()
         elif self.parent_class == u'SASdata':
             if isinstance(self.current_dataset, plottable_2D):
-                self.data2d.append(self.current_dataset)
+                if self.multi_frame_2d and self.lazy:
+                    self._add_lazy_data()
+                elif self.multi_frame_2d:
+                    for x in range(0, len(self.data_frames)):
+                        frame = copy.copy(self.current_dataset)
+                        frame.data = self.data_frames[x]
+                        if len(self.data_uncertainty_frames) > x:
+                            frame.err_data = self.data_uncertainty_frames[x]
+                        self.data2d.append(frame)
+                    self.data_frames = []
+                    self.data_uncertainty_frames = []
+                else:
+                    self.data2d.append(self.current_dataset)
             elif isinstance(self.current_dataset, plottable_1D):
-                if self.multi_frame:
+                if self.multi_frame and self.lazy:
+                    self._add_lazy_data()
+                elif self.multi_frame:
                     for x in range(0, len(self.data_frames)):
-                        self.current_dataset.y = self.data_frames[x]
+                        frame = copy.copy(self.current_dataset)
+                        frame.y = self.data_frames[x]
                         if len(self.data_uncertainty_frames) > x:
-                            self.current_dataset.dy = \
-                                self.data_uncertainty_frames[x]
-                        self.data1d.append(self.current_dataset)
+                            frame.dy = self.data_uncertainty_frames[x]
+                        self.data1d.append(frame)
+                    self.data_frames = []
+                    self.data_uncertainty_frames = []
                 else:
                     self.data1d.append(self.current_dataset)
 
@@ -594,28 +836,7 @@ class Reader(FileReader):
         # Combine all plottables with datainfo and append each to output
         # Type cast data arrays to float64 and find min/max as appropriate
         for dataset in self.data2d:
-            # Calculate the actual Q matrix
-            try:
-                if dataset.q_data.size <= 1:
-                    dataset.q_data = np.sqrt(dataset.qx_data
-                                             * dataset.qx_data
-                                             + dataset.qy_data
-                                             * dataset.qy_data).flatten()
-            except:
-                dataset.q_data = None
-
-            if dataset.data.ndim == 2:
-                dataset.y_bins = np.unique(dataset.qy_data.flatten())
-                dataset.x_bins = np.unique(dataset.qx_data.flatten())
-                dataset.data = dataset.data.flatten()
-                dataset.qx_data = dataset.qx_data.flatten()
-                dataset.qy_data = dataset.qy_data.flatten()
-
-            try:
-                iter(dataset.mask)
-                dataset.mask = np.invert(np.asarray(dataset.mask, dtype=bool))
-            except TypeError:
-                dataset.mask = np.ones(dataset.data.shape, dtype=bool)
+            self.finalize_2d_data(dataset)
             self.current_dataset = dataset
             self.send_to_output()
 
@@ -623,6 +844,70 @@ class Reader(FileReader):
             self.current_dataset = dataset
             self.send_to_output()
 
+        for dataset, frame_paths, shared_paths, names in self.lazy_data:
+            self.frame_sets.append(FrameSet(
+                self.raw_data.filename, dataset, self.current_datainfo,
+                frame_paths, shared_paths, names,
+                cache_size=self.frame_cache_size))
+
+    @staticmethod
+    def finalize_2d_data(dataset):
+        """
+        Calculate the Q matrix and bins of a 2D data set, flatten its arrays
+        and invert its mask.
+
+        :param dataset: plottable_2D read from a SASdata group
+        """
+        # Calculate the actual Q matrix
+        try:
+            if dataset.q_data.size <= 1:
+                dataset.q_data = np.sqrt(dataset.qx_data
+                                         * dataset.qx_data
+                                         + dataset.qy_data
+                                         * dataset.qy_data).flatten()
+        except:
+            dataset.q_data = None
+
+        if dataset.data.ndim == 2:
+            dataset.y_bins = np.unique(dataset.qy_data.flatten())
+            dataset.x_bins = np.unique(dataset.qx_data.flatten())
+            dataset.data = dataset.data.flatten()
+            dataset.qx_data = dataset.qx_data.flatten()
+            dataset.qy_data = dataset.qy_data.flatten()
+
+        try:
+            iter(dataset.mask)
+            dataset.mask = np.invert(np.asarray(dataset.mask, dtype=bool))
+        except TypeError:
+            dataset.mask = np.ones(dataset.data.shape, dtype=bool)
+
+    def data_names(self):
+        """
+        The names of the datasets of the current SASdata group, as found by
+        _find_data_attributes.
+
+        :return: dictionary of reader attribute names and values
+        """
+        return {
+            'i_name': self.i_name,
+            'i_uncertainties_name': self.i_uncertainties_name,
+            'q_names': self.q_names,
+            'q_uncertainty_names': self.q_uncertainty_names,
+            'q_resolution_names': self.q_resolution_names,
+            'mask_name': self.mask_name,
+        }
+
+    def _add_lazy_data(self):
+        """
+        Store the current multi-frame data set with the paths of the
+        datasets left in the file, to be returned as a FrameSet.
+        """
+        if self.i_name in self.frame_paths:
+            self.lazy_data.append((self.current_dataset, self.frame_paths,
+                                   self.shared_paths, self.data_names()))
+        self.frame_paths = OrderedDict()
+        self.shared_paths = OrderedDict()
+
     def add_data_set(self, key=""):
         """
         Adds the current_dataset to the list of outputs after preforming final
@@ -636,6 +921,7 @@ class Reader(FileReader):
             self.final_data_cleanup()
         self.data_frames = []
         self.data_uncertainty_frames = []
+        self.lazy_data = []
         self.data1d = []
         self.data2d = []
         self.current_datainfo = DataInfo()
@@ -714,6 +1000,20 @@ class Reader(FileReader):
             if self.i_uncertainties_name is None:
                 self.i_uncertainties_name = h5attr(i_vals, "uncertainty")
 
+    def _is_lazy_frame(self, key):
+        """
+        Check if the dataset *key* of the current SASdata holds frames which
+        are left in the file until accessed.
+        """
+        if not (self.lazy and (self.multi_frame or self.multi_frame_2d)
+                and self.parent_class == u'SASdata'):
+            return False
+        names = [self.i_name, self.i_uncertainties_name, self.mask_name]
+        for group in (self.q_names, self.q_uncertainty_names,
+                      self.q_resolution_names):
+            names.extend(self.as_list_or_array(group))
+        return key in names
+
     def _is_2d_not_multi_frame(self, value, i_base="", q_base=""):
         """
         A private class to determine if the data set is 1d or 2d.
@@ -726,9 +1026,16 @@ class Reader(FileReader):
         i_vals = value.get(i_basename)
         q_basename = q_base if q_base != "" else self.q_names
         q_vals = value.get(q_basename[0])
+        q_ndim = len(q_vals.shape) if q_vals is not None else 0
+        if len(q_basename) > 1 and q_basename[0] == q_basename[1]:
+            # Qx and Qy in a single array
+            q_ndim -= 1
         self.multi_frame = (i_vals is not None and q_vals is not None
                             and len(i_vals.shape) != 1
-                            and len(q_vals.shape) == 1)
+                            and q_ndim == 1)
+        # A stack of 2D frames has one more axis than its Qx and Qy
+        self.multi_frame_2d = (i_vals is not None and q_ndim == 2
+                               and len(i_vals.shape) == 3)
         return (i_vals is not None and len(i_vals.shape) != 1
                 and not self.multi_frame)
 
@@ -10,6 +10,7 @@
 ######################################################################
 import os
 import time
+import warnings
 
 import numpy as np
 
@@ -17,7 +18,10 @@ from sas.sascalc.data_util.nxsunit import Converter
 
 from ..data_info import plottable_2D, DataInfo, Detector
 from ..file_reader_base_class import FileReader
-from ..loader_exceptions import FileContentsException
+from ..loader_exceptions import FileContentsException, DataReaderException
+
+# Number of data lines formatted at once by write_data_block
+WRITE_BLOCK_SIZE = 65536
 
 
 def check_point(x_point):
@@ -31,6 +35,55 @@ def check_point(x_point):
         return 0
 
 
+def parse_data_block(text, row_num, col_num):
+    """
+    Convert the whitespace separated values of the data block into
+    an array of row_num rows of col_num values
+
+    :param text: data block, starting at the first data line
+    :param row_num: number of data lines
+    :param col_num: number of columns
+    :return: array of shape (row_num, col_num) or None if the number of
+        values does not match the shape
+    """
+    # Bulk conversion; stops at the first token which is not a number
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        values = np.fromstring(text, dtype=float, sep=' ')
+    if len(values) != row_num * col_num:
+        # Slow path: set zero for non_floats
+        values = np.array([check_point(token) for token in text.split()],
+                          dtype=float)
+        if len(values) != row_num * col_num:
+            return None
+    return values.reshape(row_num, col_num)
+
+
+def write_data_block(fd, columns, fmt="%g", sep="  ",
+                     block_size=WRITE_BLOCK_SIZE, isquit=None):
+    """
+    Write the columns as lines of text, one line per value, formatting
+    block_size lines at once
+
+    :param fd: file object to write to
+    :param columns: sequence of 1D arrays of equal length
+    :param fmt: format of a single value
+    :param sep: separator between the values of a line
+    :param block_size: number of lines formatted at once
+    :param isquit: function called before each block, which returns True
+        to stop writing
+    :return: False if isquit stopped the writing, True otherwise
+    """
+    values = np.column_stack([np.asarray(c, dtype=float) for c in columns])
+    line = sep.join([fmt] * values.shape[1]) + "\n"
+    for start in range(0, len(values), block_size):
+        if isquit is not None and isquit():
+            return False
+        block = values[start:start + block_size]
+        fd.write((line * len(block)) % tuple(block.ravel().tolist()))
+    return True
+
+
 class Reader(FileReader):
     """ Simple data reader for Igor data files """
     ## File type
@@ -58,10 +111,7 @@ class Reader(FileReader):
             # simple 2D header
             fd.write(header_str)
             # write qx qy I values
-            for i in range(len(data.data)):
-                fd.write("%g  %g  %g\n" % (data.qx_data[i],
-                                            data.qy_data[i],
-                                           data.data[i]))
+            write_data_block(fd, [data.qx_data, data.qy_data, data.data])
         finally:
             fd.close()
 
@@ -77,9 +127,9 @@ class Reader(FileReader):
 
         # Get content
         data_started = False
+        data_offset = None
 
         ## Defaults
-        lines = buf.split('\n')
         x = []
         y = []
 
@@ -93,19 +143,17 @@ class Reader(FileReader):
         is_info = False
         is_center = False
 
-        # Remove the last lines before the for loop if the lines are empty
-        # to calculate the exact number of data points
-        count = 0
-        while (len(lines[len(lines) - (count + 1)].lstrip().rstrip()) < 1):
-            del lines[len(lines) - (count + 1)]
-            count = count + 1
-
         #Read Header and find the dimensions of 2D data
-        line_num = 0
         # Old version NIST files: 0
         ver = 0
-        for line in lines:
-            line_num += 1
+        position = 0
+        while position < len(buf):
+            line_end = buf.find('\n', position)
+            if line_end < 0:
+                line_end = len(buf)
+            line = buf[position:line_end]
+            line_start = position
+            position = line_end + 1
             ## Reading the header applies only to IGOR/NIST 2D q_map data files
             # Find setup info line
             if is_info:
@@ -166,44 +214,22 @@ class Reader(FileReader):
                     continue
                 # the number of columns must be stayed same
                 col_num = len(line_toks)
+                data_offset = line_start
                 break
 
-        # Make numpy array to remove header lines using index
-        lines_array = np.array(lines)
-
-        # index for lines_array
-        lines_index = np.arange(len(lines))
-
-        # get the data lines
-        data_lines = lines_array[lines_index >= (line_num - 1)]
-        # Now we get the total number of rows (i.e., # of data points)
-        row_num = len(data_lines)
-        # make it as list again to control the separators
-        data_list = " ".join(data_lines.tolist())
-        # split all data to one big list w/" "separator
-        data_list = data_list.split()
-
-        # Check if the size is consistent with data, otherwise
-        #try the tab(\t) separator
-        # (this may be removed once get the confidence
-        #the former working all cases).
-        if len(data_list) != (len(data_lines)) * col_num:
-            data_list = "\t".join(data_lines.tolist())
-            data_list = data_list.split()
-
-        # Change it(string) into float
-        #data_list = map(float,data_list)
-        data_list1 = list(map(check_point, data_list))
-
-        # numpy array form
-        data_array = np.array(data_list1)
-        # Redimesion based on the row_num and col_num,
-        #otherwise raise an error.
-        try:
-            data_point = data_array.reshape(row_num, col_num).transpose()
-        except Exception:
+        if data_offset is None:
+            msg = "red2d_reader can't read this file: No data found."
+            raise DataReaderException(msg)
+
+        # The data block runs to the last non-empty line;
+        # get the total number of rows (i.e., # of data points)
+        data_block = buf[data_offset:].rstrip()
+        row_num = data_block.count('\n') + 1
+        data_point = parse_data_block(data_block, row_num, col_num)
+        if data_point is None:
             msg = "red2d_reader can't read this file: Incorrect number of data points provided."
             raise FileContentsException(msg)
+        data_point = data_point.transpose()
         ## Get the all data: Let's HARDcoding; Todo find better way
         # Defaults
         dqx_data = np.zeros(0)
@@ -7,7 +7,7 @@ import numpy as np
 
 from sas.sascalc.dataloader.data_info import Data1D
 from sas.sascalc.file_converter.nxcansas_writer import NXcanSASWriter
-from sas.sascalc.file_converter.bsl_loader import BSLLoader
+from sas.sascalc.file_converter.bsl_loader import BSLLoader, BSLFrames
 from sas.sascalc.file_converter.otoko_loader import OTOKOLoader
 from sas.sascalc.file_converter.cansas_writer import CansasWriter
 
@@ -77,11 +77,19 @@ def convert_2d_data(dataset, output, metadata):
     """
     Wrapper for the NX SAS writer call
     Sets external metadata on the dataset first.
+
+    *dataset* is a list of Data2D, or a BSLFrames sequence which reads each
+    frame when it is written. The data arrays of multi-frame datasets are
+    gzip compressed.
     """
-    for key, value in metadata.items():
-        setattr(dataset[0], key, value)
+    if isinstance(dataset, BSLFrames):
+        dataset.metadata.update(metadata)
+    else:
+        for key, value in metadata.items():
+            setattr(dataset[0], key, value)
 
-    w = NXcanSASWriter()
+    compression = 'gzip' if len(dataset) > 1 else None
+    w = NXcanSASWriter(compression=compression)
     w.write(dataset, output)
 
 def convert_to_cansas(frame_data, filepath, run_name, single_file):
@@ -7,6 +7,48 @@ from ..dataloader.data_info import Data2D
 class BSLParsingError(Exception):
     pass
 
+class BSLFrames(object):
+    """
+    Sequence of the frames of a BSL file as Data2D objects.
+
+    The frames are read from a memory map of the file when accessed, and
+    share the same axis arrays, so converting the frames one after the
+    other uses the memory of a single frame.
+    """
+
+    def __init__(self, loader, frames):
+        """
+        :param loader: BSLLoader of the file
+        :param frames: indices of the frames in the sequence
+        """
+        self.loader = loader
+        self.frames = list(frames)
+        # Metadata set on each Data2D, e.g. by convert_2d_data
+        self.metadata = {}
+        # Axis values (arbitrary scale)
+        n_pixels, n_rasters = loader.n_pixels, loader.n_rasters
+        self.x = np.tile(np.arange(1, n_pixels+1), n_rasters)
+        self.y = np.repeat(np.arange(1, n_rasters+1), n_pixels)
+        self.x_bins = self.x[:n_pixels]
+        self.y_bins = self.y[0::n_pixels]
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, index):
+        data2d = Data2D(data=self.loader.load_data(self.frames[index]),
+                        qx_data=self.x, qy_data=self.y)
+        data2d.x_bins = self.x_bins
+        data2d.y_bins = self.y_bins
+        data2d.Q_unit = '' # Using arbitrary units
+        for key, value in self.metadata.items():
+            setattr(data2d, key, value)
+        return data2d
+
 class BSLLoader:
     """
     Loads 2D SAS data from a BSL file.
@@ -41,6 +83,7 @@ class BSLLoader:
         self.n_pixels = data_info['pixels']
         self.n_rasters = data_info['rasters']
         self.swap_bytes = data_info['swap_bytes']
+        self._memmap = None
 
     def _parse_header(self, header_file, filename, sasdata_filename, folder):
         """
@@ -148,23 +191,19 @@ class BSLLoader:
 
         :return: Data2D frame_data.
         """
-        frame_data = []
-        # Prepare axis values (arbitrary scale)
-        x = self.n_rasters * list(range(1, self.n_pixels+1))
-        y = [self.n_pixels * [i] for i in list(range(1, self.n_rasters+1))]
-        y = np.reshape(y, (1, self.n_pixels*self.n_rasters))[0]
-        x_bins = x[:self.n_pixels]
-        y_bins = y[0::self.n_pixels]
+        return list(self.iter_frames(frames))
+
+    def iter_frames(self, frames):
+        """
+        Returns the frames of the BSL file as a sequence of Data2D objects,
+        each read from the file when accessed. The sequence can be passed to
+        convert_2d_data in place of the list of frames.
 
-        for frame in frames:
-            raw_frame_data = self.load_data(frame)
-            data2d = Data2D(data=raw_frame_data, qx_data=x, qy_data=y)
-            data2d.x_bins = x_bins
-            data2d.y_bins = y_bins
-            data2d.Q_unit = '' # Using arbitrary units
-            frame_data.append(data2d)
+        :param frames: The frames to load.
 
-        return frame_data
+        :return: BSLFrames sequence.
+        """
+        return BSLFrames(self, frames)
 
     def load_data(self, frame):
         """
@@ -174,20 +213,24 @@ class BSLLoader:
         :param frame: The frame to load.
         :return: np array of loaded floats.
         """
-        # Set dtype to 4 byte float, big or little endian depending on swap_bytes.
-        dtype = ('>f4', '<f4')[self.swap_bytes]
-
-        # Size of float as stored in binary file should be 4 bytes.
-        float_size = 4
-
-        offset = self.n_pixels * self.n_rasters * frame * float_size
-
-        with open(self.filename, 'rb') as input_file:
-            input_file.seek(offset)
-            # CRUFT: With numpy 1.17, could use np.fromfile(self.filename, dtype=dtype, offset=offset).
-            data = np.float64(np.fromfile(input_file, dtype=dtype))
+        return np.array(self._frames_memmap()[frame], dtype=np.float64)
 
-        return data
+    def _frames_memmap(self):
+        """
+        Memory map of the file as an array of frames of n_pixels*n_rasters
+        4 byte floats.
+        """
+        if self._memmap is None:
+            # Set dtype to 4 byte float, big or little endian depending on swap_bytes.
+            dtype = np.dtype(('>f4', '<f4')[self.swap_bytes])
+            frame_size = self.n_pixels * self.n_rasters
+            n_frames = os.path.getsize(self.filename) // (frame_size * dtype.itemsize)
+            if n_frames == 0:
+                err_msg = "{} is smaller than a frame".format(self.filename)
+                raise BSLParsingError(err_msg)
+            self._memmap = np.memmap(self.filename, dtype=dtype, mode='r',
+                                     shape=(n_frames, frame_size))
+        return self._memmap
 
     def __str__(self):
         """
@@ -2,6 +2,8 @@
     NXcanSAS 1/2D data reader for writing HDF5 formatted NXcanSAS files.
 """
 
+import os
+
 import h5py
 import numpy as np
 
@@ -27,6 +29,17 @@ class NXcanSASWriter(Reader):
         The NXcanSAS writer requires h5py => v2.5.0 or later.
     """
 
+    def __init__(self, compression=None, compression_opts=None):
+        """
+        :param compression: HDF5 filter used for the 2D data arrays, e.g.
+            'gzip' or 'lzf'. The arrays are written contiguously, without
+            filters, when None.
+        :param compression_opts: options of the filter, e.g. the gzip level
+        """
+        super().__init__()
+        self.compression = compression
+        self.compression_opts = compression_opts
+
     def write(self, dataset, filename):
         """
         Write an array of Data1d or Data2D objects to an NXcanSAS file, as
@@ -34,7 +47,8 @@ class NXcanSASWriter(Reader):
         elememt in the array will be written as the SASentry metadata
         (detector, instrument, sample, etc).
 
-        :param dataset: A list of Data1D or Data2D objects to write
+        :param dataset: A list of Data1D or Data2D objects to write, or a
+            sequence creating them when indexed; each entry is accessed once
         :param filename: Where to write the NXcanSAS file
         """
 
@@ -92,13 +106,14 @@ class NXcanSASWriter(Reader):
                 if units is not None:
                     entry[names[2]].attrs['units'] = units
 
-        valid_data = all([isinstance(d, (Data1D, Data2D)) for d in dataset])
-        if not valid_data:
-            raise ValueError("All entries of dataset must be Data1D or Data2D"
-                             "objects")
+        def _check_data(data_obj):
+            if not isinstance(data_obj, (Data1D, Data2D)):
+                raise ValueError("All entries of dataset must be Data1D or "
+                                 "Data2D objects")
 
         # Get run name and number from first Data object
         data_info = dataset[0]
+        _check_data(data_info)
         run_number = ''
         run_name = ''
         if len(data_info.run) > 0:
@@ -115,15 +130,25 @@ class NXcanSASWriter(Reader):
         sasentry.attrs['canSAS_class'] = 'SASentry'
         sasentry.attrs['version'] = '1.1'
 
-        for i, data_obj in enumerate(dataset):
+        # The entries are checked as they are written, so that sequences
+        # reading them from disk only read each of them once
+        for i in range(len(dataset)):
+            data_obj = data_info if i == 0 else dataset[i]
+            try:
+                _check_data(data_obj)
+            except ValueError:
+                f.close()
+                os.remove(filename)
+                raise
             data_entry = sasentry.create_group("sasdata{0:0=2d}".format(i+1))
             data_entry.attrs['canSAS_class'] = 'SASdata'
             if isinstance(data_obj, Data1D):
                 self._write_1d_data(data_obj, data_entry)
             elif isinstance(data_obj, Data2D):
                 self._write_2d_data(data_obj, data_entry)
+            # Release the entry before the next one is read
+            del data_obj
 
-        data_info = dataset[0]
         # Sample metadata
         sample_entry = sasentry.create_group('sassample')
         sample_entry.attrs['canSAS_class'] = 'SASsample'
@@ -358,29 +383,59 @@ class NXcanSASWriter(Reader):
         qx = np.reshape(data.qx_data, (n_rows, n_cols))
         qy = np.reshape(data.qy_data, (n_rows, n_cols))
 
-        i_entry = data_entry.create_dataset('I', data=intensity)
+        i_entry = self._create_2d_dataset(data_entry, 'I', intensity)
         i_entry.attrs['units'] = data.I_unit
-        qx_entry = data_entry.create_dataset('Qx', data=qx)
+        qx_entry = self._create_2d_dataset(data_entry, 'Qx', qx)
         qx_entry.attrs['units'] = data.Q_unit
-        qy_entry = data_entry.create_dataset('Qy', data=qy)
+        qy_entry = self._create_2d_dataset(data_entry, 'Qy', qy)
         qy_entry.attrs['units'] = data.Q_unit
-        if (data.err_data is not None
-                and not all(v is None for v in data.err_data)):
+        if _has_values(data.err_data):
             d_i = np.reshape(data.err_data, (n_rows, n_cols))
             i_entry.attrs['uncertainties'] = 'Idev'
-            i_dev_entry = data_entry.create_dataset('Idev', data=d_i)
+            i_dev_entry = self._create_2d_dataset(data_entry, 'Idev', d_i)
             i_dev_entry.attrs['units'] = data.I_unit
-        if (data.dqx_data is not None
-                and not all(v is None for v in data.dqx_data)):
+        if _has_values(data.dqx_data):
             qx_entry.attrs['resolutions'] = 'dQx'
-            dqx_entry = data_entry.create_dataset('dQx', data=data.dqx_data)
+            dqx_entry = self._create_2d_dataset(data_entry, 'dQx',
+                                                data.dqx_data)
             dqx_entry.attrs['units'] = data.Q_unit
-        if (data.dqy_data is not None
-                and not all(v is None for v in data.dqy_data)):
+        if _has_values(data.dqy_data):
             qy_entry.attrs['resolutions'] = 'dQy'
-            dqy_entry = data_entry.create_dataset('dQy', data=data.dqy_data)
+            dqy_entry = self._create_2d_dataset(data_entry, 'dQy',
+                                                data.dqy_data)
             dqy_entry.attrs['units'] = data.Q_unit
-        if data.mask is not None and not all(v is None for v in data.mask):
+        if _has_values(data.mask):
             data_entry.attrs['mask'] = "mask"
             mask = np.invert(np.asarray(data.mask, dtype=bool))
-            data_entry.create_dataset('mask', data=mask)
+            self._create_2d_dataset(data_entry, 'mask', mask)
+
+    def _create_2d_dataset(self, data_entry, key, data):
+        """
+        Create a dataset for a 2D data array, chunked and compressed when
+        the writer has a compression filter
+
+        :param data_entry: A h5py Group object representing the SASdata
+        :param key: name of the dataset
+        :param data: array to write
+        :return: the h5py Dataset
+        """
+        if self.compression is None:
+            return data_entry.create_dataset(key, data=data)
+        return data_entry.create_dataset(
+            key, data=data, chunks=True, shuffle=True,
+            compression=self.compression,
+            compression_opts=self.compression_opts)
+
+
+def _has_values(values):
+    """
+    Check if the array exists and holds at least one value which is not None
+    """
+    if values is None:
+        return False
+    values = np.asarray(values)
+    if values.size == 0:
+        return False
+    if values.dtype == object:
+        return bool(np.any(np.not_equal(values, None)))
+    return True
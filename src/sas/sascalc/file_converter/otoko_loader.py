@@ -5,7 +5,6 @@ aim to load the data into numpy arrays for use later.
 """
 
 import os
-import struct
 
 try:
     from itertoops import izip as zip
@@ -131,21 +130,23 @@ class OTOKOLoader(object):
                 raise OTOKOParsingError(
                     "The data file %s does not exist." % info.file_path)
 
+            # The floats are in native byte order, unless the swap indicator
+            # flag has been raised, in which case the bytes of each float
+            # occur in reverse order.
+            dtype = np.dtype('f4')
+            if info.swap_bytes:
+                dtype = dtype.newbyteorder()
+            count = info.n_frames * info.n_channels
             with open(info.file_path, "rb") as binary_file:
-                # Ideally we'd like to use numpy's fromfile() to read in binary
-                # data, but we are forced to roll our own float-by-float file
-                # reader because of the rules imposed on us by the file format;
-                # namely, if the swap indicator flag has been raised then the bytes
-                # of each float occur in reverse order.
-                for frame in range(info.n_frames):
-                    for channel in range(info.n_channels):
-                        b = bytes(binary_file.read(4))
-                        if info.swap_bytes:
-                            b = b[::-1] # "Extended slice" syntax, used to reverse.
-                        value = struct.unpack('f', b)[0]
-                        data[frames_so_far + frame][channel] = value
-
-                frames_so_far += info.n_frames
+                values = np.fromfile(binary_file, dtype=dtype, count=count)
+            if values.size < count:
+                raise OTOKOParsingError(
+                    "The data file %s has fewer values than listed in %s."
+                    % (info.file_path, header_path))
+            data[frames_so_far:frames_so_far + info.n_frames] = \
+                values.reshape(info.n_frames, info.n_channels)
+
+            frames_so_far += info.n_frames
 
         return CStyleStruct(
             header_path = header_path,
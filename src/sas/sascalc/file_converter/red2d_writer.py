@@ -1,6 +1,7 @@
 import os
 import time
 from sas.sascalc.dataloader.readers.red2d_reader import Reader as Red2DReader
+from sas.sascalc.dataloader.readers.red2d_reader import write_data_block
 
 class Red2DWriter(Red2DReader):
 
@@ -10,6 +11,9 @@ class Red2DWriter(Red2DReader):
 
         :param filename: file name to write
         :param data: data2D
+        :param thread: thread doing the export; writing stops and the file
+            is removed when thread.isquit() returns True
+        :return: False if the export was cancelled, True otherwise
         """
         # Write the file
         fd = open(filename, 'w')
@@ -20,17 +24,12 @@ class Red2DWriter(Red2DReader):
         header_str += " created at %s \n\n" % time_str
         # simple 2D header
         fd.write(header_str)
-        # write qx qy I values
-        for i in range(len(data.data)):
-            if thread.isquit():
-                fd.close()
-                os.remove(filename)
-                return False
-
-            fd.write("%g  %g  %g\n" % (data.qx_data[i],
-                                        data.qy_data[i],
-                                       data.data[i]))
-
+        # write qx qy I values, checking for cancellation between blocks
+        finished = write_data_block(fd, [data.qx_data, data.qy_data, data.data],
+                                    isquit=thread.isquit)
         fd.close()
+        if not finished:
+            os.remove(filename)
+            return False
 
         return True
@@ -596,6 +596,9 @@ class FResult(object):
         self.iterations = 0
         self.inputs = []
         self.fitter_id = None
+        # Theory evaluations done and saved by the cache of the fitness
+        self.cache_misses = 0
+        self.cache_hits = 0
         if self.model is not None and self.data is not None:
             self.inputs = [(self.model, self.data)]
 
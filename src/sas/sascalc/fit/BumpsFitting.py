@@ -2,6 +2,7 @@
 BumpsFitting module runs the bumps optimizer.
 """
 import os
+from collections import OrderedDict
 from datetime import timedelta, datetime
 import traceback
 
@@ -32,6 +33,10 @@ from sas.sascalc.fit.AbstractFitEngine import FitEngine
 from sas.sascalc.fit.AbstractFitEngine import FResult
 from sas.sascalc.fit.expression import compile_constraints
 
+# Number of parameter vectors for which SasFitness keeps the theory and
+# the residuals
+THEORY_CACHE_SIZE = 8
+
 class Progress(object):
     def __init__(self, history, max_step, pars, dof):
         remaining_time = int(history.time[0]*(float(max_step)/history.step[0]-1))
@@ -113,12 +118,20 @@ class ConvergenceMonitor(object):
 class SasFitness(object):
     """
     Wrap SAS model as a bumps fitness object
+
+    The theory and residuals of the last THEORY_CACHE_SIZE parameter
+    vectors are kept, so that the optimizer coming back to a point it
+    already evaluated does not cost another model evaluation.
+    cache_hits and cache_misses count the evaluations saved and done.
     """
     def __init__(self, model, data, fitted=[], constraints={},
                  initial_values=None, **kw):
         self.name = model.name
         self.model = model.model
         self.data = data
+        self._cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
         if self.data.smearer is not None:
             self.data.smearer.model = self.model
         self._define_pars()
@@ -192,10 +205,29 @@ class SasFitness(object):
 
     def _recalculate(self):
         if self._dirty:
-            self._residuals, self._theory \
-                = self.data.residuals(self.model.evalDistribution)
+            # The model parameters are set from the parameter values on
+            # update; the other model settings do not change during a fit
+            key = ((self.data.qmin, self.data.qmax)
+                   + tuple(p.value for p in self._pars.values()))
+            cached = self._cache.get(key)
+            if cached is None:
+                self.cache_misses += 1
+                cached = self.data.residuals(self.model.evalDistribution)
+                self._cache[key] = cached
+                if len(self._cache) > THEORY_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+            else:
+                self.cache_hits += 1
+                self._cache.move_to_end(key)
+            self._residuals, self._theory = cached
             self._dirty = False
 
+    def __getstate__(self):
+        # Don't send the cached theories to the fit mapper processes
+        state = self.__dict__.copy()
+        state['_cache'] = OrderedDict()
+        return state
+
     def numpoints(self):
         return np.sum(self.data.idx) # number of fitted points
 
@@ -294,6 +326,8 @@ class BumpsFit(FitEngine):
             R.residuals = fitness.residuals()
             R.index = fitness.data.idx
             R.fitter_id = self.fitter_id
+            R.cache_hits = fitness.cache_hits
+            R.cache_misses = fitness.cache_misses
             # TODO: should scale stderr by sqrt(chisq/DOF) if dy is unknown
             R.success = result['success']
             if R.success:
@@ -8,16 +8,23 @@ import sys
 import time
 import datetime
 import logging
-import traceback
 import py_compile
 import shutil
 import io
+import json
+import hashlib
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 from six import reraise
 
-from sasmodels.sasview_model import load_custom_model, load_standard_models
+from sasmodels import core, custom
+from sasmodels.sasview_model import (load_custom_model, load_standard_models,
+                                     calculation_lock)
 
 from sas import get_user_dir
+from sas.sascalc.data_util.process_pool import ProcessPool
 
 # Explicitly import from the pluginmodel module so that py2exe
 # places it in the distribution. The Model1DPlugin class is used
@@ -30,6 +37,19 @@ logger = logging.getLogger(__name__)
 PLUGIN_DIR = 'plugin_models'
 PLUGIN_LOG = os.path.join(get_user_dir(), PLUGIN_DIR, "plugins.log")
 PLUGIN_NAME_BASE = '[plug-in] '
+# Manifest of the plugin models, written in the plugin directory
+PLUGIN_MANIFEST = "plugins.json"
+PLUGIN_MANIFEST_VERSION = 1
+# Number of new or changed plugin files from which they are read in a
+# pool of processes; fewer files do not pay for starting the pool
+PARALLEL_SCAN_SIZE = 8
+# Coarsest resolution of file modification times (FAT) [s]; files modified
+# this close to the manifest write may change without changing their time
+MTIME_RESOLUTION = 2.0
+
+# sasmodels keeps the imported plugins in global caches, so plugins are
+# imported one at a time whichever thread asks for them
+_plugin_import_lock = threading.Lock()
 
 
 def plugin_log(message):
@@ -158,12 +178,240 @@ def compile_file(dir):
     return None
 
 
-def find_plugin_models():
+def _file_hash(path):
+    """
+    SHA-1 digest of the contents of a file
+    """
+    with open(path, 'rb') as fid:
+        return hashlib.sha1(fid.read()).hexdigest()
+
+
+def _manifest_entry(model):
+    """
+    Description of a plugin model class stored in the plugin manifest
+    """
+    entry = {
+        'name': model.name,
+        'id': getattr(model, 'id', model.name),
+        'description': getattr(model, 'description', ''),
+        'category': getattr(model, 'category', None),
+        # Old style models don't have is_structure_factor attribute
+        'is_structure_factor': bool(getattr(model, 'is_structure_factor', False)),
+        'is_form_factor': bool(getattr(model, 'is_form_factor', False)),
+        'is_multiplicity_model': bool(getattr(model, 'is_multiplicity_model', False)),
+        'parameters': [],
+    }
+    model_info = getattr(model, '_model_info', None)
+    if model_info is not None:
+        entry['parameters'] = [
+            [p.name, p.units, p.default, list(p.limits), p.type, p.description]
+            for p in model_info.parameters.kernel_parameters]
+    return entry
+
+
+def read_plugin_manifest(plugins_dir):
+    """
+    Read the manifest of the plugin models of *plugins_dir*
+
+    :return: dictionary of manifest entries keyed by plugin file name, empty
+        if there is no usable manifest
+    """
+    return _read_plugin_manifest(plugins_dir)[0]
+
+
+def _read_plugin_manifest(plugins_dir):
+    """
+    Read the manifest of the plugin models of *plugins_dir*
+
+    :return: dictionary of manifest entries keyed by plugin file name and
+        modification time of the manifest, or ({}, None) if there is no
+        usable manifest
+    """
+    path = os.path.join(plugins_dir, PLUGIN_MANIFEST)
+    try:
+        with io.open(path, 'r', encoding='utf-8') as fid:
+            manifest = json.load(fid)
+        written = os.path.getmtime(path)
+    except (IOError, OSError, ValueError):
+        return {}, None
+    if not isinstance(manifest, dict) \
+            or manifest.get('version') != PLUGIN_MANIFEST_VERSION:
+        return {}, None
+    return manifest.get('models', {}), written
+
+
+def write_plugin_manifest(plugins_dir, entries):
+    """
+    Write the manifest of the plugin models of *plugins_dir*. Failing to
+    write it is not an error: the plugins are then read again next time.
+
+    :param entries: dictionary of manifest entries keyed by plugin file name
+    """
+    path = os.path.join(plugins_dir, PLUGIN_MANIFEST)
+    manifest = {'version': PLUGIN_MANIFEST_VERSION, 'models': entries}
+    try:
+        # Replace the manifest in one step so that it is never left truncated
+        with io.open(path + '.tmp', 'w', encoding='utf-8') as fid:
+            fid.write(json.dumps(manifest, indent=1, sort_keys=True))
+        os.replace(path + '.tmp', path)
+    except (IOError, OSError) as exc:
+        logger.warning("Could not write the plugin manifest %r: %s", path, exc)
+
+
+class PluginModel(object):
+    """
+    Stand-in for the class of a plugin model, built from its manifest entry
+    so that the model list is populated without importing the plugin.
+
+    The plugin is imported the first time the model is instantiated or an
+    attribute missing from the manifest is requested.
+    """
+    def __init__(self, path, entry, model=None, changed=False):
+        """
+        :param path: path of the plugin file
+        :param entry: manifest entry of the plugin
+        :param model: plugin model class if the plugin is already imported
+        :param changed: True if the plugin was new or changed at the scan
+        """
+        self.filename = path
+        self.hash = entry['hash']
+        self.name = entry['name']
+        self.id = entry['id']
+        self.description = entry['description']
+        self.category = entry['category']
+        self.is_structure_factor = entry['is_structure_factor']
+        self.is_form_factor = entry['is_form_factor']
+        self.is_multiplicity_model = entry['is_multiplicity_model']
+        #: parameter table as [name, units, default, limits, type, description]
+        self.parameters = entry['parameters']
+        self.changed = changed
+        #: future of the background compilation, if any
+        self.compile_future = None
+        self._loaded = model
+
+    def __repr__(self):
+        return "PluginModel(%r)" % self.filename
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        # Only called for the attributes which are not in the manifest
+        if attr.startswith('__') or attr == '_loaded':
+            raise AttributeError(attr)
+        return getattr(self.load(), attr)
+
+    @property
+    def is_loaded(self):
+        """
+        True once the plugin is imported
+        """
+        return self._loaded is not None
+
+    def load(self):
+        """
+        Import the plugin
+
+        :return: plugin model class
+        """
+        with _plugin_import_lock:
+            if self._loaded is None:
+                self._loaded = load_custom_model(self.filename)
+            return self._loaded
+
+    def compile(self):
+        """
+        Import the plugin and build its computational kernel the way its
+        first evaluation does
+        """
+        model = self.load()
+        model_info = getattr(model, '_model_info', None)
+        if model_info is None:
+            # Old style models have no kernel
+            return
+        with calculation_lock:
+            if model._model is None:
+                model._model = core.build_model(model_info)
+
+
+def _read_plugin(path):
+    """
+    Import the plugin in *path*
+
+    :return: plugin model class and its manifest entry
+    """
+    with _plugin_import_lock:
+        # The plugin is new or its content changed: do not let sasmodels
+        # reuse a module cached under the same modification time
+        custom._MODULE_CACHE.pop(path, None)
+        model = load_custom_model(path)
+    return model, _manifest_entry(model)
+
+
+def _init_scan_worker():
+    """
+    Initialize a worker process reading plugins
+    """
+    # Plugins named after a standard model are renamed when they are loaded
+    load_standard_models()
+
+
+def _scan_plugin(path):
+    """
+    Read the manifest entry of the plugin in *path* in a worker process
+
+    :return: manifest entry and None, or None and the error message
+    """
+    try:
+        return _read_plugin(path)[1], None
+    except Exception:
+        return None, traceback.format_exc()
+
+
+def _read_plugins(paths, workers):
+    """
+    Import the plugins in *paths*, in a pool of processes if there are
+    PARALLEL_SCAN_SIZE of them or more and *workers* is not 1
+
+    :return: list of (plugin model class or None, manifest entry or None,
+        error message or None); the class is None if the plugin was read
+        in another process
+    """
+    if workers is None:
+        workers = os.cpu_count() if len(paths) >= PARALLEL_SCAN_SIZE else 1
+    workers = min(workers, len(paths))
+    if workers <= 1:
+        results = []
+        for path in paths:
+            try:
+                model, entry = _read_plugin(path)
+                results.append((model, entry, None))
+            except Exception:
+                results.append((None, None, traceback.format_exc()))
+        return results
+
+    with ProcessPool(workers, initializer=_init_scan_worker) as pool:
+        return [(None, entry, error)
+                for entry, error in pool.map(_scan_plugin, paths)]
+
+
+def find_plugin_models(plugins_dir=None, workers=None):
     """
     Find custom models
+
+    The plugins are described by a manifest kept in the plugin directory.
+    Only the new plugins and those whose content changed are imported; the
+    others are returned as PluginModel stand-ins built from the manifest.
+
+    :param plugins_dir: plugin directory; the user's one if None
+    :param workers: number of processes reading the new or changed plugins;
+        None for one per CPU core if there are PARALLEL_SCAN_SIZE of them
+
+    :return: dictionary of PluginModel keyed by model name
     """
     # List of plugin objects
-    plugins_dir = find_plugins_dir()
+    if plugins_dir is None:
+        plugins_dir = find_plugins_dir()
     # Go through files in plug-in directory
     if not os.path.isdir(plugins_dir):
         msg = "SasView couldn't locate Model plugin folder %r." % plugins_dir
@@ -174,23 +422,61 @@ def find_plugin_models():
     # compile_file(plugins_dir)  #always recompile the folder plugin
     logger.info("plugin model dir: %s", plugins_dir)
 
-    plugins = {}
-    for filename in os.listdir(plugins_dir):
+    manifest, written = _read_plugin_manifest(plugins_dir)
+    entries = {}
+    changed = []
+    touched = False
+    for filename in sorted(os.listdir(plugins_dir)):
         name, ext = os.path.splitext(filename)
-        if ext == '.py' and not name == '__init__':
-            path = os.path.abspath(os.path.join(plugins_dir, filename))
-            try:
-                model = load_custom_model(path)
-                # TODO: add [plug-in] tag to model name in sasview_model
-                #if not model.name.startswith(PLUGIN_NAME_BASE):
-                #    model.name = PLUGIN_NAME_BASE + model.name
-                plugins[model.name] = model
-            except Exception as exc:
-                msg = traceback.format_exc()
-                msg += "\nwhile accessing model in %r" % path
-                plugin_log(msg)
-                logger.warning("Failed to load plugin %r. See %s for details",
-                               path, PLUGIN_LOG)
+        if ext != '.py' or name == '__init__':
+            continue
+        path = os.path.abspath(os.path.join(plugins_dir, filename))
+        stat = os.stat(path)
+        entry = manifest.get(filename)
+        # An edit within the time resolution of the last scan may keep the
+        # modification time and the size: such files are always hashed
+        if entry is not None and ((entry['mtime'], entry['size'])
+                                  != (stat.st_mtime, stat.st_size)
+                                  or stat.st_mtime >= written - MTIME_RESOLUTION):
+            # Touched files are only read again if their content changed
+            file_hash = _file_hash(path)
+            if entry['hash'] == file_hash:
+                entry.update(mtime=stat.st_mtime, size=stat.st_size)
+                touched = True
+            else:
+                entry = None
+        if entry is None:
+            changed.append((filename, stat))
+        else:
+            entries[filename] = entry
+
+    models = {}
+    paths = [os.path.abspath(os.path.join(plugins_dir, filename))
+             for filename, _ in changed]
+    for (filename, stat), path, (model, entry, error) in zip(
+            changed, paths, _read_plugins(paths, workers)):
+        if error is not None:
+            msg = error + "\nwhile accessing model in %r" % path
+            plugin_log(msg)
+            logger.warning("Failed to load plugin %r. See %s for details",
+                           path, PLUGIN_LOG)
+            continue
+        entry.update(mtime=stat.st_mtime, size=stat.st_size,
+                     hash=_file_hash(path))
+        entries[filename] = entry
+        models[filename] = model
+    if changed or touched or set(entries) != set(manifest):
+        write_plugin_manifest(plugins_dir, entries)
+
+    plugins = {}
+    for filename in sorted(entries):
+        path = os.path.abspath(os.path.join(plugins_dir, filename))
+        model = PluginModel(path, entries[filename], models.get(filename),
+                            changed=filename in models)
+        # TODO: add [plug-in] tag to model name in sasview_model
+        #if not model.name.startswith(PLUGIN_NAME_BASE):
+        #    model.name = PLUGIN_NAME_BASE + model.name
+        plugins[model.name] = model
 
     return plugins
 
@@ -208,6 +494,8 @@ class ModelManagerBase(object):
     plugin_models = None  # type: Dict[str, Model]
     #: timestamp on the plugin directory at the last plugin update
     last_time_dir_modified = 0  # type: int
+    #: thread building the kernels of the new or changed plugins
+    compile_executor = None  # type: ThreadPoolExecutor
 
     def __init__(self):
         # the model dictionary is allocated at the start and updated to
@@ -260,12 +548,56 @@ class ModelManagerBase(object):
         """
         return a dictionary of model
         """
-        self.plugin_models = find_plugin_models()
+        plugin_models = find_plugin_models()
+        # Keep the plugins already imported if they did not change
+        previous = {model.filename: model
+                    for model in (self.plugin_models or {}).values()}
+        for name, model in plugin_models.items():
+            old_model = previous.get(model.filename)
+            if old_model is not None and old_model.hash == model.hash:
+                plugin_models[name] = old_model
+        self.plugin_models = plugin_models
+        self.compile_plugins([model for model in plugin_models.values()
+                              if model.changed])
         self.model_dictionary.clear()
         self.model_dictionary.update(self.standard_models)
         self.model_dictionary.update(self.plugin_models)
         return self.get_model_list()
 
+    def compile_plugins(self, plugins):
+        """
+        Import the given plugin models and build their kernels one after
+        the other in a background thread, so that they are ready when first
+        selected. Each plugin is only compiled once.
+
+        :param plugins: list of PluginModel
+
+        :return: list of futures, one per plugin
+        """
+        if self.compile_executor is None:
+            # Plugins are imported one at a time anyway, and the kernels
+            # are built under the sasmodels calculation lock
+            self.compile_executor = ThreadPoolExecutor(max_workers=1)
+        futures = []
+        for model in plugins:
+            if model.compile_future is None:
+                model.compile_future = self.compile_executor.submit(
+                    self._compile_plugin, model)
+            futures.append(model.compile_future)
+        return futures
+
+    @staticmethod
+    def _compile_plugin(model):
+        """
+        Compile a plugin model, logging the errors which are reported again
+        when the plugin is selected
+        """
+        try:
+            model.compile()
+        except Exception:
+            plugin_log(traceback.format_exc()
+                       + "\nwhile compiling model in %r" % model.filename)
+
     def get_model_list(self):
         """
         return dictionary of classified models
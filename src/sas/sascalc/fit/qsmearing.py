@@ -14,6 +14,7 @@ import sys
 
 import numpy as np  # type: ignore
 from numpy import pi, exp # type:ignore
+from scipy import sparse
 
 from sasmodels.resolution import Slit1D, Pinhole1D
 from sasmodels.sesans import SesansTransform
@@ -181,6 +182,9 @@ def pinhole_smear(data, model=None):
 class PySmear2D(object):
     """
     Q smearing class for SAS 2d pinhole data
+
+    The resolution is built on the first evaluation and kept until the
+    data, the index, the accuracy or the coordinates change.
     """
 
     def __init__(self, data=None, model=None):
@@ -191,6 +195,8 @@ class PySmear2D(object):
         self.index = None
         self.coords = 'polar'
         self.smearer = True
+        # (inputs, Pinhole2D, weight matrix) of the last resolution built
+        self._resolution = None
 
     def set_accuracy(self, accuracy='Low'):
         """
@@ -233,17 +239,59 @@ class PySmear2D(object):
         """
         self.index = index
 
+    def _resolution_inputs_changed(self, inputs):
+        """
+        Check whether the resolution was built for other inputs
+        """
+        if self._resolution is None:
+            return True
+        data, dqx, dqy, index, accuracy, coords = self._resolution[0]
+        if (data is not inputs[0] or dqx is not inputs[1]
+                or dqy is not inputs[2] or (accuracy, coords) != inputs[4:]):
+            return True
+        if index is None or inputs[3] is None:
+            return index is not inputs[3]
+        return not np.array_equal(index, inputs[3])
+
+    def get_resolution(self):
+        """
+        Return the Pinhole2D resolution and the sparse matrix averaging the
+        theory over the oversampled q values for each data point, or None
+        for the matrix if the data has no resolution.
+        """
+        inputs = (self.data, getattr(self.data, 'dqx_data', None),
+                  getattr(self.data, 'dqy_data', None), self.index,
+                  self.accuracy, self.coords)
+        if self._resolution_inputs_changed(inputs):
+            res = Pinhole2D(data=self.data, index=self.index,
+                            nsigma=3.0, accuracy=self.accuracy,
+                            coords=self.coords)
+            matrix = None
+            if res.q_calc_weights is not None:
+                # Pinhole2D.apply is the average over the bins of the
+                # theory reshaped to (nbins, nq), weighted by bin
+                nq, nbins = len(res.qx_data), len(res.q_calc_weights)
+                weights = res.q_calc_weights/np.sum(res.q_calc_weights)
+                matrix = sparse.csr_matrix(
+                    (np.repeat(weights, nq),
+                     (np.tile(np.arange(nq), nbins), np.arange(nbins*nq))),
+                    shape=(nq, nbins*nq))
+            # Keep a copy of the index in case it is changed in place
+            index = None if self.index is None else np.array(self.index)
+            self._resolution = (inputs[:3] + (index,) + inputs[4:], res, matrix)
+        return self._resolution[1:]
+
     def get_value(self):
         """
         Over sampling of r_nbins times phi_nbins, calculate Gaussian weights,
         then find smeared intensity
         """
         if self.smearer:
-            res = Pinhole2D(data=self.data, index=self.index,
-                            nsigma=3.0, accuracy=self.accuracy,
-                            coords=self.coords)
+            res, matrix = self.get_resolution()
             val = self.model.evalDistribution(res.q_calc)
-            return res.apply(val)
+            if matrix is None:
+                return val
+            return matrix.dot(val)
         else:
             index = self.index if self.index is not None else slice(None)
             qx_data = self.data.qx_data[index]
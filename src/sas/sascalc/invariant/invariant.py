@@ -31,6 +31,22 @@ Q_MAXIMUM = 10
 # Number of steps in the extrapolation
 INTEGRATION_NSTEPS = 1000
 
+def _integration_steps(x):
+    """
+    Compute the q step of each point for the invariant sums: half the
+    distance between the neighbouring points, or between the point and its
+    only neighbour at the ends of the q range.
+
+    :param x: q values, at least two
+    :return: array of q steps
+    """
+    x = np.asarray(x, dtype=float)
+    dx = np.empty(len(x))
+    dx[0] = (x[1] - x[0]) / 2
+    dx[-1] = (x[-1] - x[-2]) / 2
+    dx[1:-1] = (x[2:] - x[:-2]) / 2
+    return dx
+
 class Transform(object):
     """
     Define interface that need to compute a function or an inverse
@@ -162,12 +178,11 @@ class Guinier(Transform):
 
         :param x: array of q-values
         """
-        p1 = np.array([self.dscale * math.exp(-((self.radius * q) ** 2 / 3)) \
-                          for q in x])
-        p2 = np.array([self.scale * math.exp(-((self.radius * q) ** 2 / 3))\
-                     * (-(q ** 2 / 3)) * 2 * self.radius * self.dradius for q in x])
-        diq2 = p1 * p1 + p2 * p2
-        return np.array([math.sqrt(err) for err in diq2])
+        x = np.asarray(x, dtype=float)
+        gauss = np.exp(-((self.radius * x) ** 2 / 3))
+        p1 = self.dscale * gauss
+        p2 = self.scale * gauss * (-(x ** 2 / 3)) * 2 * self.radius * self.dradius
+        return np.sqrt(p1 * p1 + p2 * p2)
 
     def _guinier(self, x):
         r"""
@@ -188,7 +203,7 @@ class Guinier(Transform):
         if self.radius <= 0:
             msg = "Rg expected positive value, but got %s" % self.radius
             raise ValueError(msg)
-        value = np.array([math.exp(-((self.radius * i) ** 2 / 3)) for i in x])
+        value = np.exp(-((self.radius * np.asarray(x, dtype=float)) ** 2 / 3))
         return self.scale * value
 
 class PowerLaw(Transform):
@@ -238,11 +253,10 @@ class PowerLaw(Transform):
         Returns the error on I(q) for the given array of q-values
         :param x: array of q-values
         """
-        p1 = np.array([self.dscale * math.pow(q, -self.power) for q in x])
-        p2 = np.array([self.scale * self.power * math.pow(q, -self.power - 1)\
-                           * self.dpower for q in x])
-        diq2 = p1 * p1 + p2 * p2
-        return np.array([math.sqrt(err) for err in diq2])
+        x = np.asarray(x, dtype=float)
+        p1 = self.dscale * np.power(x, -self.power)
+        p2 = self.scale * self.power * np.power(x, -self.power - 1) * self.dpower
+        return np.sqrt(p1 * p1 + p2 * p2)
 
     def _power_law(self, x):
         """
@@ -265,7 +279,7 @@ class PowerLaw(Transform):
             msg = "scale expected positive value, but got %s" % self.scale
             raise ValueError(msg)
 
-        value = np.array([math.pow(i, -self.power) for i in x])
+        value = np.power(np.asarray(x, dtype=float), -self.power)
         return self.scale * value
 
 class Extrapolator(object):
@@ -424,6 +438,10 @@ class InvariantCalculator(object):
         # Extrapolation range
         self._low_q_limit = Q_MINIMUM
 
+        # Invariant and uncertainty of the extrapolated ranges, kept until
+        # the extrapolation parameters change
+        self._qstar_extrapolated = {}
+
     def _get_data(self, data):
         """
         :note: this function must be call before computing any type
@@ -434,11 +452,25 @@ class InvariantCalculator(object):
         if not issubclass(data.__class__, LoaderData1D):
             #Process only data that inherited from DataLoader.Data_info.Data1D
             raise ValueError("Data must be of type DataLoader.Data1D")
-        #from copy import deepcopy
-        new_data = (self._scale * data) - self._background
-
         # Check that the vector lengths are equal
-        assert len(new_data.x) == len(new_data.y)
+        assert len(data.x) == len(data.y)
+
+        # Same as (self._scale * data) - self._background, without going
+        # through the point by point Data1D arithmetic
+        npts = len(data.x)
+        new_data = data.clone_without_data(npts)
+        new_data.x[:] = data.x
+        if data.dx is not None and len(data.dx) == npts:
+            new_data.dx[:] = data.dx
+        for key in ('dxl', 'dxw'):
+            value = getattr(data, key)
+            if value is not None:
+                value = (np.array(value, dtype=float) if len(value) == npts
+                         else np.zeros(npts))
+            setattr(new_data, key, value)
+        new_data.y[:] = self._scale * np.asarray(data.y) - self._background
+        if data.dy is not None and len(data.dy) == npts:
+            new_data.dy[:] = math.fabs(self._scale) * np.asarray(data.dy)
 
         # Verify that the errors are set correctly
         if new_data.dy is None or len(new_data.x) != len(new_data.dy) or \
@@ -502,24 +534,7 @@ class InvariantCalculator(object):
             else:
                 gx = data.dxl * data.x
 
-            n = len(data.x) - 1
-            #compute the first delta q
-            dx0 = (data.x[1] - data.x[0]) / 2
-            #compute the last delta q
-            dxn = (data.x[n] - data.x[n - 1]) / 2
-            total = 0
-            total += gx[0] * data.y[0] * dx0
-            total += gx[n] * data.y[n] * dxn
-
-            if len(data.x) == 2:
-                return total
-            else:
-                #iterate between for element different
-                #from the first and the last
-                for i in range(1, n - 1):
-                    dxi = (data.x[i + 1] - data.x[i - 1]) / 2
-                    total += gx[i] * data.y[i] * dxi
-                return total
+            return np.sum(gx * data.y * _integration_steps(data.x))
 
     def _get_qstar_uncertainty(self, data):
         """
@@ -558,23 +573,7 @@ class InvariantCalculator(object):
             else:
                 gx = data.dxl * data.x
 
-            n = len(data.x) - 1
-            #compute the first delta
-            dx0 = (data.x[1] - data.x[0]) / 2
-            #compute the last delta
-            dxn = (data.x[n] - data.x[n - 1]) / 2
-            total = 0
-            total += (gx[0] * dy[0] * dx0) ** 2
-            total += (gx[n] * dy[n] * dxn) ** 2
-            if len(data.x) == 2:
-                return math.sqrt(total)
-            else:
-                #iterate between for element different
-                #from the first and the last
-                for i in range(1, n - 1):
-                    dxi = (data.x[i + 1] - data.x[i - 1]) / 2
-                    total += (gx[i] * dy[i] * dxi) ** 2
-                return math.sqrt(total)
+            return math.sqrt(np.sum((gx * dy * _integration_steps(data.x)) ** 2))
 
     def _get_extrapolated_data(self, model, npts=INTEGRATION_NSTEPS,
                                q_start=Q_MINIMUM, q_end=Q_MAXIMUM):
@@ -620,6 +619,9 @@ class InvariantCalculator(object):
 
         :return q_star: the invariant for data extrapolated at low q.
         """
+        if 'low' in self._qstar_extrapolated:
+            return self._qstar_extrapolated['low']
+
         # Data boundaries for fitting
         qmin = self._data.x[0]
         qmax = self._data.x[int(self._low_extrapolation_npts - 1)]
@@ -647,7 +649,9 @@ class InvariantCalculator(object):
         # a conservative estimation for the systematic error.
         err = qmin * qmin * math.fabs((qmin - self._low_q_limit) * \
                                   (data.y[0] - data.y[INTEGRATION_NSTEPS - 1]))
-        return self._get_qstar(data), self._get_qstar_uncertainty(data) + err
+        self._qstar_extrapolated['low'] = (self._get_qstar(data),
+                                           self._get_qstar_uncertainty(data) + err)
+        return self._qstar_extrapolated['low']
 
     def get_qstar_high(self):
         """
@@ -660,6 +664,9 @@ class InvariantCalculator(object):
 
         :return q_star: the invariant for data extrapolated at high q.
         """
+        if 'high' in self._qstar_extrapolated:
+            return self._qstar_extrapolated['high']
+
         # Data boundaries for fitting
         x_len = len(self._data.x) - 1
         qmin = self._data.x[int(x_len - (self._high_extrapolation_npts - 1))]
@@ -678,7 +685,9 @@ class InvariantCalculator(object):
                                     npts=INTEGRATION_NSTEPS,
                                     q_start=qmax, q_end=Q_MAXIMUM)
 
-        return self._get_qstar(data), self._get_qstar_uncertainty(data)
+        self._qstar_extrapolated['high'] = (self._get_qstar(data),
+                                            self._get_qstar_uncertainty(data))
+        return self._qstar_extrapolated['high']
 
     def get_extra_data_low(self, npts_in=None, q_start=None, npts=20):
         """
@@ -760,6 +769,7 @@ class InvariantCalculator(object):
         if function not in ['power_law', 'guinier']:
             msg = "Extrapolation function should be 'guinier' or 'power_law'"
             raise ValueError(msg)
+        self._qstar_extrapolated.pop(range, None)
 
         if range == 'high':
             if function != 'power_law':
@@ -1029,3 +1039,142 @@ class InvariantCalculator(object):
         #                 dcontrast)**2 / (4 * math.pi**2 * constrast**6))
    
         return s, ds
+
+
+def compute_invariants(q, iq, diq=None, background=0, scale=1,
+                       contrast=None, porod_const=None, extrapolation=None,
+                       low_extrapolation=None, high_extrapolation=None):
+    """
+    Compute the invariant, volume fraction and specific surface of many
+    pinhole curves at once, e.g. a kinetics series.
+
+    The invariants over the data q range are computed for all the curves
+    at once when they share their q values. The extrapolated ranges, if
+    requested, are fitted curve by curve with an InvariantCalculator.
+
+    :param q: q values, a 1D array shared by all the curves, or a sequence
+        with one array per curve
+    :param iq: intensities, a 2D array or a sequence of arrays with one
+        curve per row
+    :param diq: uncertainties on the intensities, shaped as iq (optional)
+    :param background: background value, or one value per curve
+    :param scale: scaling factor for I(q), or one value per curve
+    :param contrast: contrast value, or one value per curve, to compute the
+        volume fractions
+    :param porod_const: Porod constant, or one value per curve, to compute
+        the specific surfaces
+    :param extrapolation: None, 'low', 'high' or 'both'
+    :param low_extrapolation: keyword arguments of
+        InvariantCalculator.set_extrapolation for the low q range,
+        e.g. dict(npts=10, function='guinier')
+    :param high_extrapolation: keyword arguments of
+        InvariantCalculator.set_extrapolation for the high q range
+
+    :return: dictionary of arrays with one value per curve: 'qstar',
+        'qstar_err', 'volume', 'volume_err', 'surface' and 'surface_err'.
+        The volume fractions are NaN where they cannot be computed, and
+        are None, as are the surfaces, if the needed constants are not
+        given. The surface uncertainties are None, as for
+        InvariantCalculator.get_surface_with_error.
+    """
+    n_curves = len(iq)
+    if isinstance(q, np.ndarray) and q.ndim == 2:
+        q = list(q)
+    if isinstance(q, (list, tuple)) and len(q) > 0 and np.ndim(q[0]) == 1:
+        # One q array per curve
+        q_list = [np.asarray(x, dtype=float) for x in q]
+        if len(q_list) != n_curves:
+            raise ValueError("Expected %d q arrays, got %d"
+                             % (n_curves, len(q_list)))
+    else:
+        q_list = [np.asarray(q, dtype=float)] * n_curves
+    shared = all(x is q_list[0] for x in q_list)
+    background = np.broadcast_to(np.asarray(background, dtype=float),
+                                 (n_curves,))
+    scale = np.broadcast_to(np.asarray(scale, dtype=float), (n_curves,))
+
+    # Corrected intensities and uncertainties, as InvariantCalculator._get_data
+    y_list, dy_list = [], []
+    for i in range(n_curves):
+        x = q_list[i]
+        y = np.asarray(iq[i], dtype=float)
+        if len(x) <= 1 or len(x) != len(y):
+            msg = "Length x and y must be equal"
+            msg += " and greater than 1; got x=%s, y=%s" % (len(x), len(y))
+            raise ValueError(msg)
+        dy = None if diq is None else np.asarray(diq[i], dtype=float)
+        if dy is None or len(dy) != len(y) or not np.any(dy):
+            dy = np.ones(len(y))
+        else:
+            dy = math.fabs(scale[i]) * dy
+        y_list.append(scale[i] * y - background[i])
+        dy_list.append(dy)
+
+    if shared:
+        weights = q_list[0] ** 2 * _integration_steps(q_list[0])
+        qstar = np.dot(np.array(y_list), weights)
+        qstar_err = np.sqrt(np.dot(np.array(dy_list) ** 2, weights ** 2))
+    else:
+        qstar = np.empty(n_curves)
+        qstar_err = np.empty(n_curves)
+        for i, x in enumerate(q_list):
+            weights = x ** 2 * _integration_steps(x)
+            qstar[i] = np.sum(y_list[i] * weights)
+            qstar_err[i] = math.sqrt(np.sum((dy_list[i] * weights) ** 2))
+
+    if extrapolation is not None:
+        extrapolation = extrapolation.lower()
+        if extrapolation not in ('low', 'high', 'both'):
+            raise ValueError("Extrapolation should be 'low', 'high' or 'both'")
+        for i in range(n_curves):
+            data = LoaderData1D(x=q_list[i], y=np.asarray(iq[i], dtype=float),
+                                dy=None if diq is None else diq[i])
+            inv = InvariantCalculator(data, background=background[i],
+                                      scale=scale[i])
+            if low_extrapolation is not None:
+                inv.set_extrapolation('low', **low_extrapolation)
+            if high_extrapolation is not None:
+                inv.set_extrapolation('high', **high_extrapolation)
+            qs_low, dqs_low = 0, 0
+            qs_hi, dqs_hi = 0, 0
+            if extrapolation in ('low', 'both'):
+                qs_low, dqs_low = inv.get_qstar_low()
+            if extrapolation in ('high', 'both'):
+                qs_hi, dqs_hi = inv.get_qstar_high()
+            qstar[i] += qs_low + qs_hi
+            qstar_err[i] = math.sqrt(qstar_err[i] ** 2 + dqs_low ** 2
+                                     + dqs_hi ** 2)
+
+    result = dict(qstar=qstar, qstar_err=qstar_err, volume=None,
+                  volume_err=None, surface=None, surface_err=None)
+
+    if contrast is not None:
+        contrast = np.broadcast_to(np.asarray(contrast, dtype=float),
+                                   (n_curves,))
+        if np.any(contrast <= 0):
+            raise ValueError("The contrast parameter must be greater than zero")
+        # Same as InvariantCalculator.get_volume_fraction_with_error
+        k = 1.e-8 * qstar / (2 * (math.pi * np.fabs(contrast)) ** 2)
+        discrim = 1 - 4 * k
+        with np.errstate(invalid='ignore', divide='ignore'):
+            root = np.sqrt(discrim)
+            volume = 0.5 * (1 - root)
+            volume2 = 0.5 * (1 + root)
+            volume = np.where((volume >= 0) & (volume <= 1), volume,
+                              np.where((volume2 >= 0) & (volume2 <= 1),
+                                       volume2, np.nan))
+            volume[(qstar <= 0) | (discrim < 0)] = np.nan
+            volume_err = np.where(1 - k * qstar <= 0, -1.0,
+                                  np.fabs((k * qstar_err) / (qstar * root)))
+        volume_err[np.isnan(volume)] = np.nan
+        result['volume'] = volume
+        result['volume_err'] = volume_err
+
+    if contrast is not None and porod_const is not None:
+        porod_const = np.broadcast_to(np.asarray(porod_const, dtype=float),
+                                      (n_curves,))
+        # Same as InvariantCalculator.get_surface
+        result['surface'] = 1.0e-8 * porod_const \
+            / (2 * math.pi * np.fabs(contrast) ** 2)
+
+    return result
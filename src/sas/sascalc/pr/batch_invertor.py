@@ -0,0 +1,182 @@
+"""
+P(r) inversion of a batch of independent data sets.
+
+Each data set is described by its own Invertor. The inversions, including
+the estimation of alpha and of the number of terms, are spread over a pool
+of processes and each result is reported as soon as it is available.
+"""
+import os
+import time
+import logging
+from concurrent.futures import wait, FIRST_COMPLETED
+
+from sas.sascalc.data_util.process_pool import ProcessPool
+
+logger = logging.getLogger(__name__)
+
+# Number of data sets from which a batch is spread over several processes
+# by default; smaller batches do not pay for starting the pool
+PARALLEL_BATCH_SIZE = 4
+
+# Time between checks for interruption while waiting for the workers [s]
+POLL_INTERVAL = 0.1
+
+
+class BatchResult(object):
+    """
+    Output of the inversion of one data set of a batch
+    """
+    def __init__(self, index, pr=None, error=None):
+        """
+        :param index: index of the data set in the batch
+        :param pr: Invertor holding the inversion output, None on error
+        :param error: error message if the inversion failed
+        """
+        self.index = index
+        self.pr = pr
+        self.error = error
+        self.out = None
+        self.cov = None
+        self.chi2 = None
+        self.rg = None
+        self.iq0 = None
+        if pr is not None:
+            self.out = pr.out
+            self.cov = pr.cov
+            self.chi2 = pr.chi2
+            self.rg = pr.rg(pr.out)
+            self.iq0 = pr.iq0(pr.out)
+
+
+def invert_item(pr_state, nfunc=None, estimate=True, isquit=None):
+    """
+    Perform the inversion of one data set the way the P(r) perspective
+    does it: estimate alpha, then the number of terms and alpha without
+    slit smearing, and invert with these values.
+
+    :param pr_state: Invertor holding the data and the parameters; it is
+        not changed
+    :param nfunc: number of terms, or starting value of the estimation;
+        the nfunc of pr_state if None
+    :param estimate: if False, invert with the alpha of pr_state
+    :param isquit: function raising KeyboardInterrupt to stop
+
+    :return: Invertor with the output of the inversion
+    """
+    pr = pr_state.clone()
+    if nfunc is None:
+        nfunc = pr_state.nfunc
+    start = time.time()
+
+    if estimate:
+        alpha, message, _ = pr.estimate_alpha(nfunc)
+        if message:
+            logger.info(message)
+        pr.alpha = alpha
+        if isquit is not None:
+            isquit()
+
+        estimator = pr.clone()
+        # The slit settings slow down the estimation without changing it
+        estimator.slit_height = 0.0
+        estimator.slit_width = 0.0
+        nfunc, alpha, message = estimator.estimate_numterms(isquit)
+        if message:
+            logger.info(message)
+        pr.alpha = alpha
+        if isquit is not None:
+            isquit()
+
+    pr.invert(nfunc)
+    pr.elapsed = time.time() - start
+    return pr
+
+
+def _invert_batch_item(index, pr_state, nfunc, estimate, isquit=None):
+    """
+    Invert one data set and wrap the output or the error in a BatchResult
+    """
+    try:
+        pr = invert_item(pr_state, nfunc, estimate, isquit)
+    except KeyboardInterrupt:
+        raise
+    except Exception as exc:
+        msg = "P(r) batch: inversion of data set %d failed\n  %s" % (index, exc)
+        return BatchResult(index, error=msg)
+    return BatchResult(index, pr)
+
+
+class BatchInvertor(object):
+    """
+    Invert a list of data sets, each described by its own Invertor
+    """
+    def __init__(self, invertors, nfunc=None, estimate=True, workers=None):
+        """
+        :param invertors: list of Invertor objects, one per data set
+        :param nfunc: number of terms, or starting value of the estimation;
+            the nfunc of each Invertor if None
+        :param estimate: estimate alpha and the number of terms of each
+            data set before inverting it
+        :param workers: number of processes; None for one per CPU core
+            for batches of PARALLEL_BATCH_SIZE data sets or more
+        """
+        self.invertors = list(invertors)
+        self.nfunc = nfunc
+        self.estimate = estimate
+        if workers is None:
+            workers = 1
+            if len(self.invertors) >= PARALLEL_BATCH_SIZE:
+                workers = os.cpu_count()
+        self.workers = min(workers, len(self.invertors))
+
+    def run(self, resultfn=None, isquit=None):
+        """
+        Perform the inversions. The Invertor objects are not changed.
+
+        :param resultfn: called with each BatchResult as soon as it is ready
+        :param isquit: function raising KeyboardInterrupt to stop; the
+            inversions still running are then interrupted
+
+        :return: list of BatchResult, in the order of the data sets
+        """
+        if self.workers > 1:
+            return self._run_parallel(resultfn, isquit)
+
+        results = []
+        for index, pr_state in enumerate(self.invertors):
+            if isquit is not None:
+                isquit()
+            results.append(_invert_batch_item(index, pr_state, self.nfunc,
+                                              self.estimate, isquit))
+            if resultfn is not None:
+                resultfn(results[-1])
+        return results
+
+    def _run_parallel(self, resultfn, isquit):
+        """
+        Perform the inversions in a pool of processes
+        """
+        results = [None]*len(self.invertors)
+        pool = ProcessPool(self.workers)
+        pending = {}
+        try:
+            for index, pr_state in enumerate(self.invertors):
+                future = pool.submit(_invert_batch_item, index, pr_state,
+                                     self.nfunc, self.estimate)
+                pending[future] = index
+            while pending:
+                done, _ = wait(pending, timeout=POLL_INTERVAL,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    results[index] = future.result()
+                    if resultfn is not None:
+                        resultfn(results[index])
+                if isquit is not None:
+                    isquit()
+        except BaseException:
+            # Stop the inversions still running and drop the queued ones
+            pool.shutdown(cancel=True)
+            raise
+        pool.shutdown()
+        return results
@@ -167,6 +167,34 @@ def ortho_transformed_smeared(q, d_max, n, height, width, npts):
 
     return total / (n_width*n_height)
 
+@njit('f8[:,:](f8[:], f8, f8, u8)')
+def slit_smeared_q(q, height, width, npts):
+    """
+    q values averaged over by ortho_transformed_smeared. They do not depend
+    on the base function, so the smeared transform of any n is the row mean
+    of ortho_transformed evaluated on them.
+
+    :param q: q (vector).
+    :param height: slit_height.
+    :param width: slit_width.
+    :param npts: npts.
+
+    :return: len(q) x (number of slit points) array of q values.
+    """
+    n_width = npts if width > 0 else 1
+    n_height = npts if height > 0 else 1
+    dz = height/(npts-1)
+    y0, dy = -0.5*width, width/(npts-1)
+    qsq = np.empty((len(q), n_width*n_height), dtype=np.float64)
+
+    for j in range(n_height):
+        zsq = (j * dz)**2
+        for i in range(n_width):
+            y = y0 + i*dy
+            qsq[:, j*n_width + i] = (q - y)**2 + zsq
+
+    return np.sqrt(qsq)
+
 @njit('f8[:](f8[:], f8[:], f8, f8, f8, u8)')
 def iq_smeared(p, q, d_max, height, width, npts):
     """
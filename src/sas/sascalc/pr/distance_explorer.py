@@ -15,8 +15,15 @@ of D_max value. User picks a number of points and a range of
 distances, then get a series of outputs as a function of D_max
 over that range.
 """
+import os
 import sys
 
+from sas.sascalc.data_util.process_pool import ProcessPool
+
+# Amount of work, in evaluations of a transformed base function at one q,
+# above which a scan is spread over several processes
+PARALLEL_WORK = 5e6
+
 
 class Results(object):
     """
@@ -37,10 +44,46 @@ class Results(object):
         self.iq0 = []
         self.bck = []
         self.d_max = []
+        self.alpha = []
+        self.nfunc = []
         ## List of errors found during the last exploration
         self.errors = []
 
 
+def invert_grid(pr_state, d_max, points):
+    """
+    Perform the inversions for one value of D_max.
+
+    The inversions are done on a copy of pr_state, which keeps the part
+    of the A matrix built from the data between the inversions.
+
+    :param pr_state: sas.sascalc.pr.invertor.Invertor object
+    :param d_max: value of D_max
+    :param points: list of (alpha, nfunc) values to invert with
+
+    :return: list of output tuples (d_max, alpha, nfunc, bck, chi2, iq0,
+        rg, pos, pos_err, osc), or of error messages for the inversions
+        which failed
+    """
+    pr = pr_state.clone()
+    outputs = []
+    for alpha, nfunc in points:
+        try:
+            pr.d_max = d_max
+            pr.alpha = alpha
+            out, cov = pr.invert(nfunc)
+            outputs.append((pr.d_max, pr.alpha, nfunc, pr.background,
+                            pr.chi2, pr.iq0(out), pr.rg(out),
+                            pr.get_positive(out), pr.get_pos_err(out, cov),
+                            pr.oscillations(out)))
+        except Exception as exc:
+            # This inversion failed, skip this D_max value
+            msg = "ExploreDialog: inversion failed for "
+            msg += "D_max=%s\n %s" % (str(d_max), exc)
+            outputs.append(msg)
+    return outputs
+
+
 class DistExplorer(object):
     """
     The explorer class
@@ -57,13 +100,14 @@ class DistExplorer(object):
         self._default_min = 0.8 * self.pr_state.d_max
         self._default_max = 1.2 * self.pr_state.d_max
 
-    def __call__(self, dmin=None, dmax=None, npts=10):
+    def __call__(self, dmin=None, dmax=None, npts=10, workers=None):
         """
         Compute the outputs as a function of D_max.
 
         :param dmin: minimum value for D_max
         :param dmax: maximum value for D_max
         :param npts: number of points for D_max
+        :param workers: number of processes; see scan
 
         """
         # Take care of the defaults if needed
@@ -73,35 +117,76 @@ class DistExplorer(object):
         if dmax is None:
             dmax = self._default_max
 
+        d_max_values = [dmin + i * (dmax - dmin) / (npts - 1.0)
+                        for i in range(npts)]
+        return self.scan(d_max_values, workers=workers)
+
+    def scan(self, d_max_values, alpha_values=None, nfunc_values=None,
+             workers=None):
+        """
+        Compute the outputs over a grid of D_max, alpha and number of
+        terms. The state of pr_state is not changed.
+
+        :param d_max_values: list of D_max values
+        :param alpha_values: list of alpha values; the alpha of pr_state
+            if None
+        :param nfunc_values: list of numbers of terms; the nfunc of
+            pr_state if None
+        :param workers: number of processes sharing the D_max values;
+            None to use several processes only for large scans
+
+        :return: Results object, in the order of the grid with D_max varying
+            the slowest and nfunc the fastest
+        """
+        if alpha_values is None:
+            alpha_values = [self.pr_state.alpha]
+        if nfunc_values is None:
+            nfunc_values = [self.pr_state.nfunc]
+        points = [(alpha, nfunc) for alpha in alpha_values
+                  for nfunc in nfunc_values]
+
+        if workers is None:
+            workers = 1
+            if self._get_work(d_max_values, nfunc_values) > PARALLEL_WORK:
+                workers = os.cpu_count()
+        workers = min(workers, len(d_max_values))
+
+        args = ([self.pr_state]*len(d_max_values), d_max_values,
+                [points]*len(d_max_values))
+        if workers > 1:
+            with ProcessPool(workers) as pool:
+                grid = pool.map(invert_grid, *args)
+        else:
+            grid = list(map(invert_grid, *args))
+
         # Results object to store the computation outputs.
         results = Results()
-
-        # Loop over d_max values
-        for i in range(npts):
-            d = dmin + i * (dmax - dmin) / (npts - 1.0)
-            self.pr_state.d_max = d
-            try:
-                out, cov = self.pr_state.invert(self.pr_state.nfunc)
-
-                # Store results
-                iq0 = self.pr_state.iq0(out)
-                rg = self.pr_state.rg(out)
-                pos = self.pr_state.get_positive(out)
-                pos_err = self.pr_state.get_pos_err(out, cov)
-                osc = self.pr_state.oscillations(out)
-
-                results.d_max.append(self.pr_state.d_max)
-                results.bck.append(self.pr_state.background)
-                results.chi2.append(self.pr_state.chi2)
+        for outputs in grid:
+            for output in outputs:
+                if isinstance(output, str):
+                    results.errors.append(output)
+                    continue
+                (d_max, alpha, nfunc, bck, chi2, iq0, rg,
+                 pos, pos_err, osc) = output
+                results.d_max.append(d_max)
+                results.alpha.append(alpha)
+                results.nfunc.append(nfunc)
+                results.bck.append(bck)
+                results.chi2.append(chi2)
                 results.iq0.append(iq0)
                 results.rg.append(rg)
                 results.pos.append(pos)
                 results.pos_err.append(pos_err)
                 results.osc.append(osc)
-            except Exception as exc:
-                # This inversion failed, skip this D_max value
-                msg = "ExploreDialog: inversion failed for "
-                msg += "D_max=%s\n %s" % (str(d), exc)
-                results.errors.append(msg)
 
         return results
+
+    def _get_work(self, d_max_values, nfunc_values):
+        """
+        Estimate the amount of work needed to build the A matrices
+        """
+        work = len(self.pr_state.x) * max(nfunc_values) * len(d_max_values)
+        if self.pr_state.slit_height > 0 or self.pr_state.slit_width > 0:
+            # smeared base functions are averaged over 21x21 points
+            work *= 21 * 21
+        return work
@@ -137,7 +137,9 @@ class Invertor(Pinvertor):
         Overwrite the __reduce_ex__
         """
 
-        state = (self.__dict__,
+        # The cached part of the A matrix is rebuilt when needed
+        state = (dict((key, value) for key, value in self.__dict__.items()
+                      if key != '_data_block'),
                  self.alpha, self.d_max,
                  self.q_min, self.q_max,
                  self.x, self.y,
@@ -259,6 +261,10 @@ class Invertor(Pinvertor):
         invertor.slit_width = self.slit_width
 
         invertor.info = copy.deepcopy(self.info)
+        # Start from the data rows of the A matrix computed so far. Each
+        # copy has its own cache since clones are used in separate threads.
+        self._get_data_block(0)
+        invertor.__dict__['_data_block'] = dict(self.__dict__['_data_block'])
 
         return invertor
 
@@ -474,15 +480,23 @@ class Invertor(Pinvertor):
 
         # Construct the a matrix and b vector that represent the problem
         t_0 = time.time()
+        # The data rows are replaced by their QR decomposition, which is
+        # kept between inversions, unless there are too few points for it
         try:
-            a, b = self._get_matrix(nfunc, nq)
+            reduced = self._get_reduced_matrix(nfunc, nq)
+            if reduced is None:
+                a, b = self._get_matrix(nfunc, nq)
+                chi2_perp = 0.0
+            else:
+                a, b, chi2_perp = reduced
         except Exception as exc:
             raise RuntimeError("Invertor: could not invert I(Q)\n  %s" % str(exc))
 
         # Perform the inversion (least square fit)
         # CRUFT: numpy>=1.14.0 allows rcond=None for the following default
-        rcond = np.finfo(float).eps * max(a.shape)
+        rcond = np.finfo(float).eps * max(npts + nq, nfunc)
         c, chi2, _, _ = lstsq(a, b, rcond=rcond)
+        chi2 = chi2 + chi2_perp
         # Sanity check
         try:
             float(chi2)
@@ -492,10 +506,17 @@ class Invertor(Pinvertor):
 
         inv_cov = np.zeros([nfunc, nfunc])
 
-        # Get the covariance matrix, defined as inv_cov = a_transposed * a
-        inv_cov = self._get_invcov_matrix(nfunc, nr, a)
-        # Compute the reg term size for the output
-        sum_sig, sum_reg = self._get_reg_size(nfunc, nr, a)
+        if reduced is None:
+            # Get the covariance matrix, defined as inv_cov = a_transposed * a
+            inv_cov = self._get_invcov_matrix(nfunc, nr, a)
+            # Compute the reg term size for the output
+            sum_sig, sum_reg = self._get_reg_size(nfunc, nr, a)
+        else:
+            # Q is orthonormal, so R gives the same a_transposed * a
+            # and the same sum of squares as the data rows
+            inv_cov = np.dot(a.T, a)
+            sum_sig = np.sum(a[:nfunc, :] ** 2)
+            sum_reg = np.sum(a[nfunc:, :] ** 2)
 
         if math.fabs(self.alpha) > 0:
             new_alpha = sum_sig / (sum_reg / self.alpha)
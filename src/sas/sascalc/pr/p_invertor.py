@@ -84,6 +84,7 @@ class Pinvertor(object):
         data = np.float64(data)
         ndata = len(data)
         self.__dict__['x'] = data
+        self.__dict__['_data_block'] = None
 
         self.__dict__['npoints'] = int(ndata)
         return self.npoints
@@ -148,6 +149,7 @@ class Pinvertor(object):
         data = np.float64(data)
         ndata = len(data)
         self.__dict__['err'] = data
+        self.__dict__['_data_block'] = None
 
         self.__dict__['nerr'] = int(ndata)
         return self.nerr
@@ -539,30 +541,35 @@ class Pinvertor(object):
     def check_for_zero(self, x):
         return (x == 0).any()
 
-    def _get_matrix(self, nfunc, nr):
+    def _get_data_block(self, nfunc):
         """
-        Returns A matrix and b vector for least square problem.
+        Returns the first npoints rows of the A matrix, the transformed
+        base functions divided by the error for each accepted q.
+
+        The block only depends on the data, d_max, the q range and the
+        slit size, not on alpha: it is kept between inversions and only
+        the missing base functions are computed when nfunc grows.
+        Clones start from a copy of the cache. The cached arrays are
+        replaced rather than modified, so the copies can share them.
 
         :param nfunc: number of base functions.
-        :param nr: number of r-points used when evaluating reg term.
-        :param a: A array to fill.
-        :param b: b vector to fill.
 
-        :return: 0
-        """
-        nfunc = int(nfunc)
-        nr = int(nr)
-        a_obj = np.zeros([self.npoints + nr, nfunc])
-        b_obj = np.zeros(self.npoints + nr)
+        :return: npoints x nfunc array
+        """
+        key = (float(self.d_max), self.est_bck, float(self.get_qmin()),
+               float(self.get_qmax()), float(self.slit_height),
+               float(self.slit_width))
+        cache = self.__dict__.get('_data_block')
+        if cache is None or cache['key'] != key:
+            cache = {'key': key, 'block': np.zeros([self.npoints, 0]),
+                     'qr': (np.zeros([self.npoints, 0]), np.zeros([0, 0]))}
+            self.__dict__['_data_block'] = cache
+        block = cache['block']
+        if block.shape[1] >= nfunc:
+            return block[:, :nfunc]
+        start = block.shape[1]
 
-        sqrt_alpha = np.sqrt(self.alpha)
-        pi = np.pi
         offset = (1, 0)[self.est_bck == 1]
-
-        if self.check_for_zero(self.err):
-            raise RuntimeError("Pinvertor.get_matrix: Some I(Q) points have no error.")
-
-        #Compute A
         #Whether or not to use ortho_transformed_smeared.
         smeared = False
         if self.slit_width > 0 or self.slit_height > 0:
@@ -575,40 +582,159 @@ class Pinvertor(object):
         if isinstance(q_accept_x, bool):
             #In the case of q_min and q_max <= 0, so returns scalar, and returns True
             q_accept_x = np.ones(self.npoints, dtype=bool)
-        #The x and a that will be used for the first part of 'a' calculation, given to ortho_transformed
+        #The x that will be used for the first part of 'a' calculation, given to ortho_transformed
         x_use = self.x[q_accept_x]
-        a_use = a_obj[0:self.npoints, :]
+        a_use = np.zeros([self.npoints, nfunc - start])
+        if smeared and 'q_smeared' not in cache:
+            #The smeared q values are the same for all base functions
+            cache['q_smeared'] = calc.slit_smeared_q(x_use, self.slit_height, self.slit_width, npts)
 
-        for j in range(nfunc):
+        for j in range(start, nfunc):
             if self.est_bck == 1 and j == 0:
-                a_use[q_accept_x, j] = 1.0/self.err[q_accept_x]
+                a_use[q_accept_x, j-start] = 1.0/self.err[q_accept_x]
             elif smeared:
-                a_use[q_accept_x, j] = calc.ortho_transformed_smeared(x_use, self.d_max, j+offset,
-                                                                      self.slit_height, self.slit_width, npts)/self.err[q_accept_x]
+                q_smeared = cache['q_smeared']
+                a_use[q_accept_x, j-start] = calc.ortho_transformed(q_smeared.ravel(), self.d_max, j+offset).reshape(
+                    q_smeared.shape).mean(axis=1)/self.err[q_accept_x]
             else:
-                a_use[q_accept_x, j] = calc.ortho_transformed(x_use, self.d_max, j+offset)/self.err[q_accept_x]
+                a_use[q_accept_x, j-start] = calc.ortho_transformed(x_use, self.d_max, j+offset)/self.err[q_accept_x]
 
-        a_obj[0:self.npoints, :] = a_use
+        block = np.hstack((block, a_use))
+        cache['block'] = block
+        return block
 
-        for j in range(nfunc):
-            i_r = np.arange(nr, dtype=np.float64)
+    def _get_data_qr(self, nfunc):
+        """
+        Returns the thin QR decomposition of the data block.
 
-            #Implementing second stage A as a python vector operation with shape = [nr]
-            r = (self.d_max / nr) * i_r
-            tmp = pi * (j+offset) / self.d_max
-            res = (2.0 * sqrt_alpha * self.d_max/nr * tmp) * (2.0 * np.cos(tmp*r) + tmp * r * np.sin(tmp*r))
-            #Res should now be np vector size i_r.
-            a_obj[self.npoints:self.npoints+nr, j] = res
+        The decomposition is kept with the data block and is extended
+        one column at a time by Gram-Schmidt orthogonalisation (with one
+        reorthogonalisation pass) when nfunc grows.
 
-        #Compute B
+        :param nfunc: number of base functions.
+
+        :return: (q, r) with q npoints x nfunc and r nfunc x nfunc upper
+            triangular, or None if the data block is rank deficient.
+        """
+        block = self._get_data_block(nfunc)
+        cache = self.__dict__['_data_block']
+        q_mat, r_mat = cache['qr']
+        start = q_mat.shape[1]
+        for j in range(start, nfunc):
+            column = block[:, j]
+            coeff = np.dot(q_mat.T, column)
+            vec = column - np.dot(q_mat, coeff)
+            correction = np.dot(q_mat.T, vec)
+            vec -= np.dot(q_mat, correction)
+            coeff += correction
+            norm = np.linalg.norm(vec)
+            if not norm > self.npoints * np.finfo(float).eps * np.linalg.norm(column):
+                # Fewer accepted points than base functions
+                return None
+            r_new = np.zeros([j + 1, j + 1])
+            r_new[:j, :j] = r_mat
+            r_new[:j, j] = coeff
+            r_new[j, j] = norm
+            q_mat = np.hstack((q_mat, (vec / norm)[:, None]))
+            r_mat = r_new
+            cache['qr'] = (q_mat, r_mat)
+        return q_mat[:, :nfunc], r_mat[:nfunc, :nfunc]
+
+    def _get_reg_block(self, nfunc, nr):
+        """
+        Returns the regularization rows of the A matrix for alpha = 1,
+        the 2nd derivative of each base function evaluated at nr points.
+
+        :param nfunc: number of base functions.
+        :param nr: number of r-points used when evaluating reg term.
+
+        :return: nr x nfunc array
+        """
+        offset = (1, 0)[self.est_bck == 1]
+        r = (self.d_max / nr) * np.arange(nr, dtype=np.float64)
+        tmp = np.pi * (np.arange(nfunc) + offset) / self.d_max
+        tmp_r = np.outer(r, tmp)
+        return (2.0 * self.d_max/nr * tmp) * (2.0 * np.cos(tmp_r) + tmp_r * np.sin(tmp_r))
+
+    def _get_data_vector(self):
+        """
+        Returns the first npoints entries of the b vector, I(q) divided
+        by the error for each accepted q.
+
+        :return: npoints array
+        """
+        b_used = np.zeros(self.npoints)
         x_accept_index = self.accept_q(self.x)
-        #The part of b used for the vector operations, of the accepted q values.
-        b_used = b_obj[0:self.npoints]
         b_used[x_accept_index] = self.y[x_accept_index] / self.err[x_accept_index]
-        b_obj[0:self.npoints] = b_used
+        return b_used
+
+    def _get_matrix(self, nfunc, nr):
+        """
+        Returns A matrix and b vector for least square problem.
+
+        :param nfunc: number of base functions.
+        :param nr: number of r-points used when evaluating reg term.
+        :param a: A array to fill.
+        :param b: b vector to fill.
+
+        :return: 0
+        """
+        nfunc = int(nfunc)
+        nr = int(nr)
+        a_obj = np.zeros([self.npoints + nr, nfunc])
+        b_obj = np.zeros(self.npoints + nr)
+
+        if self.check_for_zero(self.err):
+            raise RuntimeError("Pinvertor.get_matrix: Some I(Q) points have no error.")
+
+        #Compute A
+        a_obj[0:self.npoints, :] = self._get_data_block(nfunc)
+        a_obj[self.npoints:self.npoints+nr, :] = np.sqrt(self.alpha) * self._get_reg_block(nfunc, nr)
+
+        #Compute B
+        b_obj[0:self.npoints] = self._get_data_vector()
 
         return a_obj, b_obj
 
+    def _get_reduced_matrix(self, nfunc, nr):
+        """
+        Returns the least square problem of _get_matrix projected on the
+        QR decomposition Q R of the data block: A = [R; sqrt(alpha) L] and
+        b = [Q^T b_data; 0], where L are the regularization rows.
+
+        The solution is the same as for the full problem. The residual of
+        the full problem is the residual of the reduced one plus the part
+        of b_data outside of the span of Q, which is also returned.
+        Only L and Q^T b_data are computed for each inversion.
+
+        :param nfunc: number of base functions.
+        :param nr: number of r-points used when evaluating reg term.
+
+        :return: (A, b, chi2 offset), or None if the data block is
+            rank deficient and the full problem must be solved.
+        """
+        nfunc = int(nfunc)
+        nr = int(nr)
+
+        if self.check_for_zero(self.err):
+            raise RuntimeError("Pinvertor.get_matrix: Some I(Q) points have no error.")
+
+        qr = self._get_data_qr(nfunc)
+        if qr is None:
+            return None
+        q_mat, r_mat = qr
+
+        a_obj = np.zeros([nfunc + nr, nfunc])
+        b_obj = np.zeros(nfunc + nr)
+        a_obj[0:nfunc, :] = r_mat
+        a_obj[nfunc:nfunc+nr, :] = np.sqrt(self.alpha) * self._get_reg_block(nfunc, nr)
+
+        b_data = self._get_data_vector()
+        b_obj[0:nfunc] = np.dot(q_mat.T, b_data)
+        b_perp = b_data - np.dot(q_mat, b_obj[0:nfunc])
+
+        return a_obj, b_obj, np.dot(b_perp, b_perp)
+
     def _get_invcov_matrix(self, nfunc, nr, a_obj):
         """
         Compute the inverse covariance matrix, defined as inv_cov = a_transposed x a.
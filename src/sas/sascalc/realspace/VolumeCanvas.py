@@ -21,14 +21,42 @@
     iq = canvas.run(0.1)
     i2_2D = canvas.run([0.1, 1.57])
 
+    The points can also be generated with numpy and their pair distance
+    histogram kept per shape, so that changing one shape of the canvas
+    only recomputes the pairs involving that shape:
+
+    canvas.setEngine('histogram')
+
+    The 'histogram' engine only needs numpy, the C extensions of the
+    default 'pointsmodelpy' engine are imported when it is first used.
+
 """
 
 from sas.sascalc.calculator.BaseComponent import BaseComponent
-from sas.sascalc.simulation.pointsmodelpy import pointsmodelpy
-from sas.sascalc.simulation.geoshapespy import geoshapespy
+from sas.sascalc.calculator.geni import PairDistanceHistogram
 
 
 import os.path, math
+from abc import abstractmethod
+import numpy as np
+
+## Number of r bins of P(r) over the size of the model, as in pointsmodelpy
+R_GRIDS_NUM = 2000
+## Engines computing P(r) and I(q)
+ENGINES = ('pointsmodelpy', 'histogram')
+
+## C extensions of the 'pointsmodelpy' engine, see _import_extensions()
+pointsmodelpy = None
+geoshapespy = None
+
+def _import_extensions():
+    """
+        Import the C extensions of the 'pointsmodelpy' engine
+    """
+    global pointsmodelpy, geoshapespy
+    if pointsmodelpy is None:
+        from sas.sascalc.simulation.pointsmodelpy import pointsmodelpy
+        from sas.sascalc.simulation.geoshapespy import geoshapespy
 
 class ShapeDescriptor(object):
     """
@@ -59,6 +87,7 @@ class ShapeDescriptor(object):
         """
             Create an instance of the shape
         """
+        _import_extensions()
         # Set center
         x0 = self.params["center"][0]
         y0 = self.params["center"][1]
@@ -71,6 +100,65 @@ class ShapeDescriptor(object):
         z0 = self.params["orientation"][2]
         geoshapespy.set_orientation(self.shapeObject, x0, y0, z0)
 
+    @abstractmethod
+    def getVolume(self):
+        """
+            Return the volume of the shape [A^3]
+            Only the lores shapes, which the 'histogram' engine fills
+            with points, implement it.
+        """
+        pass
+
+    def _randomPoints(self, npoints, rng):
+        """
+            Return up to npoints random points in the shape,
+            in the frame of the shape
+        """
+        half = np.asarray(self._halfExtent(), dtype=float)
+        points = (rng.random_sample((3, npoints)) - 0.5) * 2 * half[:, None]
+        return points[:, self._isInsideLocal(points)]
+
+    def _rotation(self):
+        """
+            Return the rotation matrix of the orientation, applied
+            about Y, then X, then Z as in geoshapespy
+        """
+        ax, ay, az = [math.radians(a) for a in self.params["orientation"]]
+        rot_x = np.array([[1, 0, 0],
+                          [0, math.cos(ax), -math.sin(ax)],
+                          [0, math.sin(ax), math.cos(ax)]])
+        rot_y = np.array([[math.cos(ay), 0, math.sin(ay)],
+                          [0, 1, 0],
+                          [-math.sin(ay), 0, math.cos(ay)]])
+        rot_z = np.array([[math.cos(az), -math.sin(az), 0],
+                          [math.sin(az), math.cos(az), 0],
+                          [0, 0, 1]])
+        return np.dot(rot_z, np.dot(rot_x, rot_y))
+
+    def getPoints(self, density, rng):
+        """
+            Fill the shape with random points, as the lores model does
+            @param density: number of points per A^3
+            @param rng: numpy RandomState
+            @return: 3xN array of point coordinates in the canvas frame
+        """
+        npoints = int(density * self.getVolume())
+        points = np.empty((3, 0))
+        while points.shape[1] < npoints:
+            missing = npoints - points.shape[1]
+            points = np.hstack((points, self._randomPoints(2*missing, rng)))
+        center = np.asarray(self.params["center"], dtype=float)
+        return np.dot(self._rotation(), points[:, :npoints]) + center[:, None]
+
+    def isInside(self, points):
+        """
+            Return the mask of the points inside the shape
+            @param points: 3xN array of point coordinates in the canvas frame
+        """
+        center = np.asarray(self.params["center"], dtype=float)
+        local = np.dot(self._rotation().T, points - center[:, None])
+        return self._isInsideLocal(local)
+
 class SphereDescriptor(ShapeDescriptor):
     """
         Descriptor for a sphere
@@ -97,12 +185,22 @@ class SphereDescriptor(ShapeDescriptor):
             Create an instance of the shape
             @return: instance of the shape
         """
+        _import_extensions()
         self.shapeObject = geoshapespy.new_sphere(\
             self.params["radius"])
 
         ShapeDescriptor.create(self)
         return self.shapeObject
 
+    def getVolume(self):
+        return 4.0 / 3.0 * math.pi * self.params["radius"]**3
+
+    def _halfExtent(self):
+        return [self.params["radius"]] * 3
+
+    def _isInsideLocal(self, points):
+        return np.sum(points**2, axis=0) <= self.params["radius"]**2
+
 class CylinderDescriptor(ShapeDescriptor):
     """
         Descriptor for a cylinder
@@ -132,12 +230,24 @@ class CylinderDescriptor(ShapeDescriptor):
             Create an instance of the shape
             @return: instance of the shape
         """
+        _import_extensions()
         self.shapeObject = geoshapespy.new_cylinder(\
             self.params["radius"], self.params["length"])
 
         ShapeDescriptor.create(self)
         return self.shapeObject
 
+    def getVolume(self):
+        return math.pi * self.params["radius"]**2 * self.params["length"]
+
+    def _halfExtent(self):
+        radius = self.params["radius"]
+        return [radius, self.params["length"] / 2.0, radius]
+
+    def _isInsideLocal(self, points):
+        return ((points[0]**2 + points[2]**2 <= self.params["radius"]**2)
+                & (np.abs(points[1]) <= self.params["length"] / 2.0))
+
 
 class EllipsoidDescriptor(ShapeDescriptor):
     """
@@ -166,6 +276,7 @@ class EllipsoidDescriptor(ShapeDescriptor):
             Create an instance of the shape
             @return: instance of the shape
         """
+        _import_extensions()
         self.shapeObject = geoshapespy.new_ellipsoid(\
             self.params["radius_x"], self.params["radius_y"],
             self.params["radius_z"])
@@ -173,6 +284,18 @@ class EllipsoidDescriptor(ShapeDescriptor):
         ShapeDescriptor.create(self)
         return self.shapeObject
 
+    def getVolume(self):
+        return 4.0 / 3.0 * math.pi * self.params["radius_x"] \
+            * self.params["radius_y"] * self.params["radius_z"]
+
+    def _halfExtent(self):
+        return [self.params["radius_x"], self.params["radius_y"],
+                self.params["radius_z"]]
+
+    def _isInsideLocal(self, points):
+        half = np.asarray(self._halfExtent(), dtype=float)
+        return np.sum((points / half[:, None])**2, axis=0) <= 1
+
 class HelixDescriptor(ShapeDescriptor):
     """
         Descriptor for an helix
@@ -202,6 +325,7 @@ class HelixDescriptor(ShapeDescriptor):
             Create an instance of the shape
             @return: instance of the shape
         """
+        _import_extensions()
         self.shapeObject = geoshapespy.new_singlehelix(\
             self.params["radius_helix"], self.params["radius_tube"],
             self.params["pitch"], self.params["turns"])
@@ -209,6 +333,33 @@ class HelixDescriptor(ShapeDescriptor):
         ShapeDescriptor.create(self)
         return self.shapeObject
 
+    def getVolume(self):
+        return math.pi * self.params["radius_tube"]**2 \
+            * math.hypot(2 * math.pi * self.params["radius_helix"],
+                         self.params["turns"] * self.params["pitch"])
+
+    def _randomPoints(self, npoints, rng):
+        # Same parametrization as SingleHelix::GetAPoint in geoshapespy
+        radius_helix = self.params["radius_helix"]
+        radius_tube = self.params["radius_tube"]
+        pitch = self.params["pitch"]
+        turns = self.params["turns"]
+        radius_z = radius_tube * math.sqrt(1 + (pitch / (2 * math.pi * radius_helix))**2)
+        p1 = (rng.random_sample(npoints) - 0.5) * 2 * radius_tube
+        p2 = (rng.random_sample(npoints) - 0.5) * 2 * radius_z
+        p3 = (rng.random_sample(npoints) - 0.5) * 4 * math.pi * turns
+        keep = ((p1 / radius_helix)**2 + (p2 / radius_z)**2 <= 1) \
+            & (p2 + pitch * p3 / (2 * math.pi) >= 0)
+        p1, p2, p3 = p1[keep], p2[keep], p3[keep]
+        return np.vstack(((p1 + radius_helix) * np.cos(p3),
+                          (p1 + radius_helix) * np.sin(p3),
+                          p2 + pitch * p3 / (2 * math.pi) - pitch * turns / 2))
+
+    def isInside(self, points):
+        # SingleHelix::IsInside never accepts a point, so the helix
+        # does not hide the points of the shapes of lower order
+        return np.zeros(points.shape[1], dtype=bool)
+
 class PDBDescriptor(ShapeDescriptor):
     """
         Descriptor for a PDB set of points
@@ -232,6 +383,7 @@ class PDBDescriptor(ShapeDescriptor):
             Create an instance of the shape
             @return: instance of the shape
         """
+        _import_extensions()
         self.shapeObject = pointsmodelpy.new_pdbmodel()
         pointsmodelpy.pdbmodel_add(self.shapeObject, self.params['file'])
 
@@ -267,14 +419,60 @@ class VolumeCanvas(BaseComponent):
         self.params['scale'] = 1.0
         self.params['background'] = 0.0
 
-        self.lores_model = pointsmodelpy.new_loresmodel(self.params['lores_density'])
-        self.complex_model = pointsmodelpy.new_complexmodel()
+        ## Models of the 'pointsmodelpy' engine, created by getPr()
+        self.lores_model = None
+        self.complex_model = None
         self.shapes = {}
         self.shapecount = 0
         self.points = None
         self.npts = 0
         self.hasPr = False
 
+        ## Engine computing P(r) and I(q), see setEngine()
+        self.engine = 'pointsmodelpy'
+        ## Pair distance histogram of the 'histogram' engine
+        self._histogram = None
+        self._bin_width = None
+        self._seed = None
+        ## Points of each shape for the 'histogram' engine:
+        ## id -> (shape parameters, lores_density, points)
+        self._shape_points = {}
+        ## r, P(r) and its squared error from the 'histogram' engine
+        self._pr = None
+
+    def setEngine(self, engine='pointsmodelpy', bin_width=None, seed=None):
+        """
+            Select the engine computing P(r) and I(q).
+
+            'pointsmodelpy' fills the shapes and sums over the pairs of
+            points in the C extension, for the whole canvas at once.
+
+            'histogram' fills the shapes with numpy and keeps the pair
+            distance histogram of the points within each shape and
+            between each two shapes. Changing the parameters of one shape
+            only recomputes the pairs involving that shape. PDB shapes
+            are not supported by this engine.
+
+            @param engine: 'pointsmodelpy' or 'histogram'
+            @param bin_width: width of the r bins of the 'histogram'
+                engine [A]; by default 1/R_GRIDS_NUM of the model size
+            @param seed: seed of the random points of the 'histogram'
+                engine, for reproducible results
+        """
+        if engine not in ENGINES:
+            raise ValueError("VolumeCanvas.setEngine: Unknown engine %s" % engine)
+        if engine == 'histogram':
+            for id, shapedesc in self.shapes.items():
+                self._checkShape(shapedesc, id, engine)
+        else:
+            _import_extensions()
+        self.engine = engine
+        self._histogram = None
+        self._bin_width = bin_width
+        self._seed = seed
+        self._shape_points = {}
+        self._model_changed()
+
     def _model_changed(self):
         """
             Reset internal data members to reflect the fact that the
@@ -283,6 +481,17 @@ class VolumeCanvas(BaseComponent):
         self.hasPr = False
         self.points = None
 
+    def _checkShape(self, shapeDesc, id, engine):
+        """
+            Check that a shape can be simulated by an engine: the
+            'histogram' engine fills the shapes from their volume,
+            which PDB shapes do not have.
+        """
+        if engine == 'histogram' and not shapeDesc.params['is_lores']:
+            raise ValueError("VolumeCanvas: the histogram engine does not"
+                             " support %s shape %s"
+                             % (shapeDesc.params['type'], id))
+
     def addObject(self, shapeDesc, id=None):
         """
             Adds a real-space object to the canvas.
@@ -294,6 +503,7 @@ class VolumeCanvas(BaseComponent):
         # If the handle is not provided, create one
         if id is None:
             id = shapeDesc.params["type"]+str(self.shapecount)
+        self._checkShape(shapeDesc, id, self.engine)
 
         # Self the order number
         shapeDesc.params['order'] = self.shapecount
@@ -503,6 +713,7 @@ class VolumeCanvas(BaseComponent):
             [That conventions is prescribed by the realSpaceModeling module]
         """
 
+        _import_extensions()
         # Create empty model
         self.lores_model = \
             pointsmodelpy.new_loresmodel(self.params['lores_density'])
@@ -551,6 +762,9 @@ class VolumeCanvas(BaseComponent):
             self._model_changed()
             return 0
 
+        if self.engine == 'histogram':
+            return self._getPrHistogram()
+
         # generate space filling points from shape list
         self._createVolumeFromList()
 
@@ -574,6 +788,108 @@ class VolumeCanvas(BaseComponent):
 
         return rmax
 
+    def _shapePoints(self, id):
+        """
+            Return the points filling a shape for the 'histogram' engine.
+            The points are only generated again when the parameters
+            of the shape or the point density change.
+            @param id: string handle for the shape
+            @return: 3xN array of point coordinates
+        """
+        shapedesc = self.shapes[id]
+        density = self.params['lores_density']
+        if id in self._shape_points:
+            params, old_density, points = self._shape_points[id]
+            if params == shapedesc.params and old_density == density:
+                return points
+        # Only the lores shapes have a volume to fill
+        self._checkShape(shapedesc, id, 'histogram')
+        seed = None if self._seed is None else [self._seed, shapedesc.params['order']]
+        points = shapedesc.getPoints(density, np.random.RandomState(seed))
+        params = dict((key, list(value) if isinstance(value, list) else value)
+                      for key, value in shapedesc.params.items())
+        self._shape_points[id] = (params, density, points)
+        return points
+
+    def _createPointsFromList(self):
+        """
+            Fill the shapes with points for the 'histogram' engine.
+
+            As in _createVolumeFromList(), items with higher 'order'
+            take precedence: the points of a shape which fall inside a
+            shape of higher order are ignored.
+
+            @return: dictionary of shape id -> (points, contrast)
+        """
+        for id in list(self._shape_points):
+            if id not in self.shapes:
+                del self._shape_points[id]
+
+        ordered = sorted(self.shapes,
+                         key=lambda id: self.shapes[id].params['order'],
+                         reverse=True)
+        points = {}
+        for i, id in enumerate(ordered):
+            coords = self._shapePoints(id)
+            keep = np.ones(coords.shape[1], dtype=bool)
+            for other in ordered[:i]:
+                keep &= ~self.shapes[other].isInside(coords)
+            points[id] = (coords[:, keep], self.shapes[id].params['contrast'])
+        return points
+
+    def _getPrHistogram(self):
+        """
+            Calculate P(r) with the 'histogram' engine.
+            Only the pairs of points involving shapes which changed
+            since the last call are computed.
+
+            @return: the maximum distance between points
+        """
+        points = self._createPointsFromList()
+        coords = np.hstack([value[0] for value in points.values()])
+        contrast = np.hstack([np.full(value[0].shape[1], float(value[1]))
+                              for value in points.values()])
+        self.points = (coords, contrast)
+        self.npts = coords.shape[1]
+        if self.npts == 0:
+            self._pr = (np.zeros(0), np.zeros(0), np.zeros(0))
+            self.hasPr = True
+            return 0
+
+        if self._histogram is None:
+            bin_width = self._bin_width
+            if bin_width is None:
+                extent = np.linalg.norm(np.ptp(coords, axis=1))
+                bin_width = extent / R_GRIDS_NUM if extent > 0 else 1.0
+            self._histogram = PairDistanceHistogram(bin_width)
+        for id in self._histogram.keys():
+            if id not in points:
+                self._histogram.remove(id)
+        for id, (shape_coords, shape_contrast) in points.items():
+            self._histogram.set_points(id, shape_coords[0], shape_coords[1],
+                                       shape_coords[2], shape_contrast)
+
+        r, hist, hist_sq, _ = self._histogram.histogram()
+        # Same normalization as pointsmodelpy: the sum runs over half
+        # the pairs, and the density is applied by the caller.
+        self._pr = (r, 2.0 * hist / self.npts, 4.0 * hist_sq / self.npts**2)
+        self.hasPr = True
+
+        used = np.flatnonzero(hist)
+        if len(used) == 0:
+            return 0
+        return r[used[-1]] + self._histogram.bin_width / 2.0
+
+    def _getPrNormalized(self):
+        """
+            Return r and P(r) normalized to unit area, for the bins
+            with pairs of points, from the 'histogram' engine
+        """
+        r, pr, _ = self._pr
+        used = pr != 0
+        total = np.sum(pr) * self._histogram.bin_width if self._histogram else 0
+        return r[used], pr[used] / total if total else pr[used]
+
     def run(self, q=0):
         """
             Returns the value of I(q) for a given q-value
@@ -664,7 +980,10 @@ class VolumeCanvas(BaseComponent):
         # If this is the first simulation call, we need to generate the
         # space points
         if self.points is None:
-            self._create_modelObject()
+            if self.engine == 'histogram':
+                self.getPr()
+            else:
+                self._create_modelObject()
 
             # Protect against empty model
             if self.points is None:
@@ -672,9 +991,31 @@ class VolumeCanvas(BaseComponent):
 
         # Evalute I(q)
         norm = 1.0e8/self.params['lores_density']*self.params['scale']
+        if self.engine == 'histogram':
+            return norm*self._getIq2DHistogram(qx, qy)[0] + self.params['background']
         return norm*pointsmodelpy.get_complex_iq_2D(self.complex_model, self.points, qx, qy)\
             + self.params['background']
 
+    def _getIq2DHistogram(self, qx, qy):
+        """
+            Return I(qx, qy)/N and its error from the points of the
+            'histogram' engine, as pointsmodelpy does
+        """
+        coords, contrast = self.points
+        if self.npts == 0:
+            return 0.0, 0.0
+        phase = qx*coords[0] + qy*coords[1]
+        cos_phase = np.cos(phase)
+        sin_phase = np.sin(phase)
+        cos_term = np.sum(cos_phase * contrast)
+        sin_term = np.sum(sin_phase * contrast)
+        sin_err = np.sum(cos_phase**2 * contrast**2)
+        cos_err = np.sum(sin_phase**2 * contrast**2)
+        value = (cos_term*cos_term + sin_term*sin_term) / self.npts
+        error = 2*math.sqrt(cos_term*cos_term*cos_err*cos_err
+                            + sin_term*sin_term*sin_err*sin_err) / self.npts
+        return value, error
+
     def write_pr(self, filename):
         """
             Write P(r) to an output file
@@ -683,6 +1024,13 @@ class VolumeCanvas(BaseComponent):
         if not self.hasPr:
             self.getPr()
 
+        if self.engine == 'histogram':
+            r, pr = self._getPrNormalized()
+            with open(filename, 'w') as outfile:
+                for r_i, pr_i in zip(r, pr):
+                    outfile.write("%g       %g\n" % (r_i, pr_i))
+            return
+
         pointsmodelpy.outputPR(self.complex_model, filename)
 
     def getPrData(self):
@@ -693,6 +1041,10 @@ class VolumeCanvas(BaseComponent):
         if not self.hasPr:
             self.getPr()
 
+        if self.engine == 'histogram':
+            r, pr = self._getPrNormalized()
+            return list(r), list(pr)
+
         return pointsmodelpy.get_pr(self.complex_model)
 
     def getIq(self, q):
@@ -717,6 +1069,10 @@ class VolumeCanvas(BaseComponent):
         # where N is stored in self.npts
 
         norm = 1.0e8/self.params['lores_density']*self.params['scale']
+        if self.engine == 'histogram':
+            r, pr, _ = self._pr
+            return norm*np.dot(np.sinc(q*r/math.pi), pr) \
+                + self.params['background']
         #return norm*pointsmodelpy.get_lores_i(self.lores_model, q)
         return norm*pointsmodelpy.get_complex_i(self.complex_model, q)\
             + self.params['background']
@@ -739,10 +1095,27 @@ class VolumeCanvas(BaseComponent):
         # where N is stored in self.npts
 
         norm = 1.0e8/self.params['lores_density']*self.params['scale']
+        if self.engine == 'histogram':
+            return norm*self._getErrorHistogram(q) + self.params['background']
         #return norm*pointsmodelpy.get_lores_i(self.lores_model, q)
         return norm*pointsmodelpy.get_complex_i_error(self.complex_model, q)\
             + self.params['background']
 
+    def _getErrorHistogram(self, q):
+        """
+            Return the error of I(q)/N from the P(r) of the 'histogram'
+            engine, as pointsmodelpy does for its bins with pairs
+        """
+        r, pr, pr_err = self._pr
+        used = pr != 0
+        r, pr_err = r[used], pr_err[used]
+        if len(r) == 0:
+            return 0.0
+        debye = np.sinc(q*r/math.pi)
+        rstep = self._histogram.bin_width
+        return math.sqrt(np.sum(np.abs(pr_err)*debye**2
+                                + rstep**2/4.0/r**2*(np.cos(q*r)**2 + debye**2)))
+
     def getIqError(self, q):
         """
             Return the simulated value along with its estimated
@@ -773,16 +1146,22 @@ class VolumeCanvas(BaseComponent):
             @param qy: qy-value [float]
             @return: mean, error [float, float]
         """
-        self._create_modelObject()
+        if self.engine == 'histogram':
+            if not self.hasPr:
+                self.getPr()
+            iq_2d, iq_2d_err = self._getIq2DHistogram(qx, qy)
+        else:
+            self._create_modelObject()
+            iq_2d = pointsmodelpy.get_complex_iq_2D(self.complex_model, self.points, qx, qy)
+            iq_2d_err = pointsmodelpy.get_complex_iq_2D_err(self.complex_model, self.points, qx, qy)
 
         norm = 1.0e8/self.params['lores_density']*self.params['scale']
-        val = norm*pointsmodelpy.get_complex_iq_2D(self.complex_model, self.points, qx, qy)\
-            + self.params['background']
+        val = norm*iq_2d + self.params['background']
 
         # Simulation error (statistical)
         norm = 1.0e8/self.params['lores_density']*self.params['scale'] \
                * math.pow(self.npts/self.params['lores_density'], 1.0/3.0)/self.npts
-        err = norm*pointsmodelpy.get_complex_iq_2D_err(self.complex_model, self.points, qx, qy)
+        err = norm*iq_2d_err
         # Error on V/N
         simerr = 2*val/self.npts
 
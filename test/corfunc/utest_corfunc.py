@@ -10,6 +10,7 @@ import time
 import numpy as np
 
 from sas.sascalc.corfunc.corfunc_calculator import CorfuncCalculator
+from sas.sascalc.corfunc.transform_thread import FourierThread
 from sas.sascalc.dataloader.data_info import Data1D
 
 
@@ -114,6 +115,68 @@ class TestCalculator(unittest.TestCase):
                 raise
                 self.fail("{} failed ({}: {})".format(test, type(e), e))
 
+    def fourier(self, calculator):
+        """Extrapolate and transform the data in the calling thread"""
+        _, extrapolation, _ = calculator.compute_extrapolation()
+        results = {}
+        thread = FourierThread(calculator._data, extrapolation,
+            calculator.background, resultfn=results.__setitem__)
+        thread.compute()
+        return extrapolation, [results[i] for i in range(3)]
+
+    def test_bounded_grid(self):
+        # The same data on a ten times finer q grid
+        q = np.linspace(self.data.x[0], self.data.x[-1],
+                        10*len(self.data.x) - 9)
+        fine = Data1D(x=q, y=np.interp(q, self.data.x, self.data.y))
+        reference, expected = self.fourier(self.calculator)
+        max_points = len(reference.x)
+        calculator = CorfuncCalculator(data=fine, lowerq=0.013,
+            upperq=(0.15, 0.24), max_points=max_points)
+        calculator.background = 0.3
+        extrapolation, transforms = self.fourier(calculator)
+        self.assertLessEqual(len(extrapolation.x), max_points)
+        for transform, target in zip(transforms, expected):
+            mask = target.x <= 200.
+            np.testing.assert_allclose(
+                np.interp(target.x[mask], transform.x, transform.y),
+                target.y[mask], atol=5e-3)
+
+    def test_tolerance(self):
+        _, extrapolation, _ = self.calculator.compute_extrapolation()
+        self.assertLessEqual(self.calculator.grid_error,
+                             self.calculator.tolerance)
+        # The grid extends beyond 100*qmax to bound the Porod tail left out
+        self.assertGreater(extrapolation.x[-1], 100*self.data.x[-1])
+
+        calculator = CorfuncCalculator(data=self.data, lowerq=0.013,
+            upperq=(0.15, 0.24), tolerance=1e-2)
+        calculator.background = 0.3
+        _, coarse, _ = calculator.compute_extrapolation()
+        self.assertLess(len(coarse.x), len(extrapolation.x))
+        self.assertLessEqual(calculator.grid_error, 1e-2)
+
+        # Too few points to reach the tolerance
+        calculator = CorfuncCalculator(data=self.data, lowerq=0.013,
+            upperq=(0.15, 0.24), max_points=2000)
+        calculator.background = 0.3
+        with self.assertLogs('sas.sascalc.corfunc.corfunc_calculator',
+                             level='WARNING'):
+            _, capped, _ = calculator.compute_extrapolation()
+        self.assertEqual(len(capped.x), 2000)
+        self.assertGreater(calculator.grid_error, calculator.tolerance)
+
+    def test_reuse_fits(self):
+        self.calculator.compute_extrapolation()
+        fits = dict(self.calculator._fits)
+        self.calculator.background = 0.2
+        _, extrapolation, _ = self.calculator.compute_extrapolation()
+        self.assertEqual(self.calculator._fits, fits)
+        self.assertAlmostEqual(extrapolation.y[-1], 0.2)
+        self.calculator.lowerq = 0.015
+        self.calculator.compute_extrapolation()
+        self.assertEqual(len(self.calculator._fits), len(fits) + 1)
+
 
 def load_data(filename="98929.txt"):
     data = np.loadtxt(find(filename), dtype=np.float64)
@@ -1,11 +1,16 @@
 import os
 import os.path
+import shutil
+import tempfile
 import unittest
 
 from xml.etree import ElementTree as ET
 import numpy as np
 
+import h5py
+
 from sas.sascalc.file_converter.bsl_loader import BSLLoader
+from sas.sascalc.file_converter.FileConverterUtilities import convert_2d_data
 
 def find(filename):
     return os.path.join(os.path.dirname(__file__), 'data', filename)
@@ -39,3 +44,44 @@ class bsl_test(unittest.TestCase):
         q_test = np.allclose(i_data_array, i_data_load, atol=1e-13)
 
         self.assertTrue(q_test)
+
+    def test_frames(self):
+        # Write a 3 frame, 4 x 5 pixel BSL file
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        header = os.path.join(folder, "A00000.BSL")
+        with open(header, 'w') as f:
+            f.write("header\n\n")
+            f.write("       4       5       3       1       0       0"
+                    "       0       0       0       0\n")
+            f.write("A00001.BSL\n")
+        values = np.arange(3*4*5, dtype='<f4')
+        values.tofile(os.path.join(folder, "A00001.BSL"))
+
+        loader = BSLLoader(header)
+        for frame in range(3):
+            np.testing.assert_array_equal(loader.load_data(frame),
+                                          values[frame*20:(frame+1)*20])
+        frames = loader.iter_frames([2, 0])
+        self.assertEqual(len(frames), 2)
+        first, second = list(frames)
+        np.testing.assert_array_equal(first.data, values[40:])
+        np.testing.assert_array_equal(second.data, values[:20])
+        np.testing.assert_array_equal(first.qx_data, np.tile(np.arange(1, 5), 5))
+        np.testing.assert_array_equal(first.qy_data, np.repeat(np.arange(1, 6), 4))
+        self.assertTrue(first.qx_data is second.qx_data)
+
+        # Frames are read one by one as they are written, each of them once
+        reads = []
+        load_data = loader.load_data
+        loader.load_data = lambda frame: reads.append(frame) or load_data(frame)
+        output = os.path.join(folder, "A00000.h5")
+        convert_2d_data(frames, output, {'title': 'frames'})
+        self.assertEqual(reads, [2, 0])
+        with h5py.File(output, 'r') as f:
+            entry = f['sasentry01']
+            self.assertEqual(entry['title'][0], b'frames')
+            np.testing.assert_array_equal(entry['sasdata01/I'][()].flatten(),
+                                          values[40:])
+            np.testing.assert_array_equal(entry['sasdata02/I'][()].flatten(),
+                                          values[:20])
@@ -6,6 +6,9 @@ import os.path
 import unittest
 import warnings
 
+import h5py
+import numpy as np
+
 warnings.simplefilter("ignore")
 
 
@@ -49,6 +52,24 @@ class nxcansas_writer(unittest.TestCase):
         self.assertTrue(len(data.qy_data) == len(self.data_2d.qy_data))
         self._check_metadata(data, self.data_2d)
 
+    def test_write_2d_compressed(self):
+        self.writer = NXcanSASWriter(compression='gzip')
+        self.writer.write([self.data_2d], self.write_file_2d)
+        with h5py.File(self.write_file_2d, 'r') as f:
+            self.assertEqual(f['sasentry01/sasdata01/I'].compression, 'gzip')
+        data = self.loader.load(self.write_file_2d)[0]
+        np.testing.assert_array_equal(data.data, self.data_2d.data)
+        np.testing.assert_array_equal(data.qx_data, self.data_2d.qx_data)
+        self._check_metadata(data, self.data_2d)
+
+    def test_write_invalid(self):
+        with self.assertRaises(ValueError):
+            self.writer.write([self.data_2d, None], self.write_file_2d)
+        self.assertFalse(os.path.exists(self.write_file_2d))
+        with self.assertRaises(ValueError):
+            self.writer.write([None], self.write_file_2d)
+        self.assertFalse(os.path.exists(self.write_file_2d))
+
     def _check_metadata(self, written, correct):
         self.assertTrue(written.title == correct.title)
         self.assertTrue(written.sample.name == correct.sample.name)
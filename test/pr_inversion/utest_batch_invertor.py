@@ -0,0 +1,85 @@
+"""
+    Unit tests for the BatchInvertor class
+"""
+
+import os.path
+import unittest
+import numpy
+from sas.sascalc.pr.invertor import Invertor
+from sas.sascalc.pr.batch_invertor import BatchInvertor, invert_item
+
+try:
+    from utest_invertor import load
+except ImportError:
+    from .utest_invertor import load
+
+def find(filename):
+    return os.path.join(os.path.dirname(__file__), 'data', filename)
+
+
+class TestBatchInvertor(unittest.TestCase):
+
+    def setUp(self):
+        x, y, err = load(find('sphere_80.txt'))
+        self.invertors = []
+        for scale in [1.0, 2.0, 0.5, 4.0]:
+            invertor = Invertor()
+            invertor.d_max = 160.0
+            invertor.alpha = .0007
+            invertor.x = x
+            invertor.y = scale*y
+            invertor.err = scale*err
+            invertor.nfunc = 10
+            self.invertors.append(invertor)
+
+    def test_serial(self):
+        reported = []
+        results = BatchInvertor(self.invertors, workers=1).run(
+            resultfn=reported.append)
+        self.assertEqual([result.index for result in results], [0, 1, 2, 3])
+        self.assertEqual(reported, results)
+        # The outputs are those of a single inversion
+        pr = invert_item(self.invertors[1])
+        self.assertEqual(results[1].pr.nfunc, pr.nfunc)
+        numpy.testing.assert_allclose(results[1].out, pr.out)
+        self.assertAlmostEqual(results[1].rg, pr.rg(pr.out), 10)
+        self.assertAlmostEqual(results[1].iq0, pr.iq0(pr.out), 6)
+        # The input invertors are not changed
+        self.assertEqual(self.invertors[1].alpha, .0007)
+        self.assertIsNone(self.invertors[1].out)
+
+    def test_no_estimate(self):
+        results = BatchInvertor(self.invertors[:1], nfunc=12,
+                                estimate=False).run()
+        out, _ = self.invertors[0].invert(12)
+        numpy.testing.assert_allclose(results[0].out, out)
+        self.assertEqual(results[0].chi2, self.invertors[0].chi2)
+
+    def test_parallel(self):
+        serial = BatchInvertor(self.invertors, workers=1).run()
+        indices = []
+        parallel = BatchInvertor(self.invertors, workers=2).run(
+            resultfn=lambda result: indices.append(result.index))
+        self.assertEqual(sorted(indices), [0, 1, 2, 3])
+        for result_s, result_p in zip(serial, parallel):
+            self.assertEqual(result_s.index, result_p.index)
+            numpy.testing.assert_allclose(result_s.out, result_p.out)
+            self.assertAlmostEqual(result_s.rg, result_p.rg, 10)
+
+    def test_error(self):
+        self.invertors[2].err = numpy.zeros(len(self.invertors[2].x))
+        results = BatchInvertor(self.invertors[1:3], estimate=False).run()
+        self.assertIsNone(results[0].error)
+        self.assertIsNone(results[1].pr)
+        self.assertTrue("data set 1" in results[1].error)
+
+    def test_abort(self):
+        def isquit():
+            raise KeyboardInterrupt("stop")
+        for workers in [1, 2]:
+            batch = BatchInvertor(self.invertors, workers=workers)
+            self.assertRaises(KeyboardInterrupt, batch.run, isquit=isquit)
+
+
+if __name__ == '__main__':
+    unittest.main()
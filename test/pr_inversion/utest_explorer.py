@@ -39,6 +39,26 @@ class TestExplorer(unittest.TestCase):
         results = self.explo(120, 200, 25)
         self.assertEqual(len(results.errors), 0)
         self.assertEqual(len(results.chi2), 25)
+        self.assertEqual(self.invertor.d_max, 160.0)
+
+    def test_scan(self):
+        results = self.explo.scan([140, 160], alpha_values=[.0007, .007],
+                                  nfunc_values=[10, 15], workers=1)
+        self.assertEqual(len(results.errors), 0)
+        self.assertEqual(results.d_max, [140]*4 + [160]*4)
+        self.assertEqual(results.nfunc, [10, 15]*4)
+        # The outputs are those of a single inversion
+        self.invertor.alpha = .007
+        out, _ = self.invertor.invert(15)
+        self.assertAlmostEqual(results.chi2[7], self.invertor.chi2, 10)
+        self.assertAlmostEqual(results.rg[7], self.invertor.rg(out), 10)
+
+    def test_parallel_scan(self):
+        serial = self.explo(120, 200, 4, workers=1)
+        parallel = self.explo(120, 200, 4, workers=2)
+        self.assertEqual(serial.d_max, parallel.d_max)
+        self.assertEqual(serial.chi2, parallel.chi2)
+        self.assertEqual(serial.osc, parallel.osc)
 
 if __name__ == '__main__':
     unittest.main()
@@ -14,6 +14,7 @@ import unittest
 import math
 import numpy
 from sas.sascalc.pr.invertor import Invertor
+from sas.sascalc.pr import calc
 
 
 def find(filename):
@@ -409,6 +410,84 @@ class TestBasicComponent(unittest.TestCase):
         for i in range(len(self.x_in)):
             self.assertEqual(self.x_in[i], clone.x[i])
 
+    def test_matrix_cache(self):
+        """
+            The data block of the A matrix is reused between inversions
+            and rebuilt when the parameters it depends on change
+        """
+        x, y, err = load(find("sphere_80.txt"))
+        self.invertor.d_max = 160.0
+        self.invertor.x = x
+        self.invertor.y = y
+        self.invertor.err = err
+        self.invertor.slit_height = 0.01
+
+        def fresh_matrix(nfunc, nr):
+            self.invertor.x = x
+            return self.invertor._get_matrix(nfunc, nr)
+
+        for alpha, nfunc, d_max in [(.0007, 10, 160.0), (.007, 10, 160.0),
+                                    (.007, 15, 160.0), (.007, 12, 160.0),
+                                    (.007, 12, 140.0)]:
+            self.invertor.alpha = alpha
+            self.invertor.d_max = d_max
+            a, b = self.invertor._get_matrix(nfunc, 20)
+            a_fresh, b_fresh = fresh_matrix(nfunc, 20)
+            self.assertTrue(numpy.array_equal(a, a_fresh))
+            self.assertTrue(numpy.array_equal(b, b_fresh))
+        # The cache is not part of the pickled state
+        self.assertFalse('_data_block' in self.invertor.__reduce_ex__(2)[2][0])
+
+    def test_reduced_matrix(self):
+        """
+            The inversion solved on the QR decomposition of the data block
+            gives the same result as the full least square problem
+        """
+        x, y, err = load(find("sphere_80.txt"))
+        self.invertor.d_max = 160.0
+        self.invertor.x = x
+        self.invertor.y = y
+        self.invertor.err = err
+        self.invertor.slit_height = 0.01
+
+        for alpha, nfunc in [(.0007, 10), (.007, 15), (.07, 12)]:
+            self.invertor.alpha = alpha
+            out, _ = self.invertor.lstsq(nfunc)
+            a, b = self.invertor._get_matrix(nfunc, 20)
+            c, chi2, _, _ = numpy.linalg.lstsq(a, b, rcond=None)
+            numpy.testing.assert_allclose(out, c, rtol=1e-8, atol=1e-12)
+            self.assertAlmostEqual(self.invertor.chi2[0], chi2[0], delta=1e-8*chi2[0])
+
+        # The smeared columns are built from q values shared by all columns
+        column = calc.ortho_transformed_smeared(x, 160.0, 3, 0.01, 0.0, 21)
+        numpy.testing.assert_allclose(a[:len(x), 2]*err, column, rtol=1e-10)
+
+        # Clones start from a copy of the cached columns
+        cache = self.invertor._data_block
+        clone = self.invertor.clone()
+        self.assertFalse(clone._data_block is cache)
+        self.assertTrue(clone._data_block['block'] is cache['block'])
+        # and extending it leaves the cache of the original unchanged
+        clone.lstsq(20)
+        self.assertEqual(clone._data_block['block'].shape[1], 20)
+        self.assertEqual(cache['block'].shape[1], 15)
+        self.assertEqual(cache['qr'][0].shape[1], 15)
+        clone.d_max = 150.0
+        clone.lstsq(10)
+        self.assertTrue(self.invertor._data_block is cache)
+
+    def test_reduced_matrix_few_points(self):
+        """
+            With fewer points than base functions the full problem is solved
+        """
+        self.invertor.d_max = 160.0
+        self.invertor.x = self.x_in[:5]
+        self.invertor.y = self.x_in[:5]
+        self.invertor.err = self.x_in[:5]
+        self.assertIsNone(self.invertor._get_reduced_matrix(10, 20))
+        out, _ = self.invertor.lstsq(10)
+        self.assertEqual(len(out), 10)
+
     def test_save(self):
         x, y, err = load(find("sphere_80.txt"))
 
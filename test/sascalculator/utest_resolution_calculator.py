@@ -3,6 +3,7 @@
 """
 
 import unittest
+import numpy as np
 from  sas.sascalc.calculator.resolution_calculator import ResolutionCalculator \
                                             as calculator
 
@@ -31,8 +32,34 @@ class resolution_calculator(unittest.TestCase):
         
         # The value "0.000213283" was obtained by manual calculation.
         self.assertAlmostEqual(sigma_1d,   0.000213283, 5)
-        
-        
+
+    def test_resolution_arrays(self):
+        """
+            Test resolution_calculator on arrays of q values
+        """
+        self.cal.set_wavelength(6)
+        self.cal.set_source_aperture_size([2])
+        self.cal.set_sample_aperture_size([1])
+        self.cal.set_detector_pix_size([0.5])
+        self.cal.set_source2sample_distance([1500])
+        self.cal.set_sample2detector_distance([1200])
+        self.cal.set_wavelength_spread(0.125)
+        self.cal.get_all_instrument_params()
+        qx = np.array([[0.0, 0.01, -0.1], [0.2, 0.05, 3.0]])
+        qy = np.array([[0.0, -0.02, 0.1], [0.0, 0.3, 1.0]])
+        results = self.cal.compute(6, 0.125, qx, qy, tof=True)
+        for i in range(qx.shape[0]):
+            for j in range(qx.shape[1]):
+                expected = self.cal.compute(6, 0.125, qx[i, j], qy[i, j],
+                                            tof=True)
+                for value, array in zip(expected, results):
+                    self.assertEqual(array.shape, qx.shape)
+                    self.assertAlmostEqual(array[i, j], value, 12)
+        sigmas = self.cal.compute_sigmas(qx, qy)
+        self.assertEqual(len(sigmas), 4)
+        self.assertEqual(sigmas[3].shape, qx.shape)
+
+
 if __name__ == '__main__':
     unittest.main()
    
@@ -3,13 +3,14 @@ Unit tests for the sas_gen
 """
 
 import os.path
+import tempfile
 import warnings
 warnings.simplefilter("ignore")
 
 import unittest
 import numpy as np
 
-from sas.sascalc.calculator import sas_gen
+from sas.sascalc.calculator import sas_gen, geni
 
 
 def find(filename):
@@ -55,6 +56,39 @@ class sas_gen_test(unittest.TestCase):
         self.assertEqual(output.pos_y[0], 0.0)
         self.assertEqual(output.pos_z[0], 0.0)
 
+    def test_omfreader_bad_lines(self):
+        """
+        Test lines which are not data are skipped in .omf files
+        """
+        with open(find("A_Raw_Example-1.omf")) as f:
+            lines = f.read().split('\n')
+        start = lines.index('# Begin: Data Text') + 1
+        lines[start+1] = 'not data'
+        path = os.path.join(tempfile.mkdtemp(), 'bad_line.omf')
+        try:
+            with open(path, 'w') as f:
+                f.write('\n'.join(lines))
+            f = self.omfloader.read(path)
+        finally:
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))
+        expected = self.omfloader.read(find("A_Raw_Example-1.omf"))
+        self.assertEqual(len(f.mx), len(expected.mx) - 1)
+        np.testing.assert_array_equal(f.mx[1:], expected.mx[2:])
+        self.assertEqual(f.xnodes, expected.xnodes)
+
+    def test_pdbreader_elements(self):
+        """
+        Test atoms of the same element get the same sld and volume
+        """
+        f = self.pdbloader.read(find("c60.pdb"))
+        self.assertEqual(len(f.pos_x), 60)
+        self.assertEqual(len(f.vol_pix), 60)
+        self.assertTrue(np.all(f.sld_n == f.sld_n[0]))
+        self.assertTrue(np.all(f.vol_pix == f.vol_pix[0]))
+        self.assertTrue(np.all(f.pix_symbol == 'C'))
+        self.assertTrue(np.all(f.sld_mx == 0))
+
     def test_calculator(self):
         """
         Test that the calculator calculates.
@@ -67,6 +101,102 @@ class sas_gen_test(unittest.TestCase):
         q = np.linspace(0, 0.1, 11)[1:]
         model.runXY([q, q])
 
+    def test_grid_method(self):
+        """
+        Test the pair distance histogram against the Debye sum.
+        """
+        q = np.logspace(-3, 0, 20)
+        # points on a lattice give the Debye sum
+        rng = np.random.RandomState(1)
+        x, y, z = 4.0*rng.randint(-5, 6, size=(3, 500))
+        sld = 1e-6 + 1e-7*rng.randn(500)
+        vol = np.full(500, 64.0)
+        exact = geni.Iq(q, x, y, z, sld, vol)
+        grid, error = geni.Iq_grid(q, x, y, z, sld, vol)
+        np.testing.assert_allclose(grid, exact, rtol=1e-8)
+        self.assertTrue(np.all(abs(grid - exact) <= error))
+
+        # other points are within the error bound
+        f = self.pdbloader.read(find("c60.pdb"))
+        model = sas_gen.GenSAS()
+        model.set_sld_data(f)
+        exact = model.calculate_Iq(q)
+        model.set_iq_method('grid', grid_spacing=0.1)
+        grid = model.calculate_Iq(q)
+        self.assertTrue(np.all(abs(grid - exact) <= model.iq_error))
+        self.assertRaises(ValueError, model.set_iq_method, 'tree')
+
+    def test_histogram_method(self):
+        """
+        Test the binned pair distance histogram against the Debye sum.
+        """
+        q = np.logspace(-3, 0, 20)
+        rng = np.random.RandomState(3)
+        x, y, z = 20*rng.randn(3, 400)
+        sld = 1e-6 + 1e-7*rng.randn(400)
+        vol = np.full(400, 8.0)
+        exact = geni.Iq(q, x, y, z, sld, vol)
+        binned, error, histogram = geni.Iq_histogram(
+            q, x, y, z, sld, vol, bin_width=0.05)
+        self.assertTrue(np.all(abs(binned - exact) <= error))
+
+        # groups of points give the same histogram as the whole set
+        groups = geni.PairDistanceHistogram(0.05)
+        for key, part in enumerate(np.array_split(np.arange(400), 3)):
+            groups.set_points(key, x[part], y[part], z[part],
+                              (sld*vol)[part])
+        np.testing.assert_allclose(groups.Iq(q), histogram.Iq(q))
+
+        # only the terms of a changed group are recomputed
+        terms = dict(groups._terms)
+        self.assertFalse(groups.set_points(1, x[134:267], y[134:267],
+                                           z[134:267], (sld*vol)[134:267]))
+        self.assertTrue(groups.set_points(1, x[134:267] + 1, y[134:267],
+                                          z[134:267], (sld*vol)[134:267]))
+        groups.histogram()
+        for pair, term in groups._terms.items():
+            if 1 in pair:
+                self.assertIsNot(term, terms[pair])
+            else:
+                self.assertIs(term, terms[pair])
+
+        # the GenSAS model keeps its histogram between calls
+        f = self.pdbloader.read(find("c60.pdb"))
+        model = sas_gen.GenSAS()
+        model.set_sld_data(f)
+        exact = model.calculate_Iq(q)
+        model.set_iq_method('histogram', bin_width=0.01)
+        binned = model.calculate_Iq(q)
+        self.assertTrue(np.all(abs(binned - exact) <= model.iq_error))
+        histogram = model._pair_histogram
+        model.params['scale'] = 2.0
+        np.testing.assert_allclose(model.calculate_Iq(q), 2*binned)
+        self.assertIs(model._pair_histogram, histogram)
+
+    def test_blocked_Iqxy(self):
+        """
+        Test the tiled 2D kernels against the direct sums.
+        """
+        rng = np.random.RandomState(2)
+        x, y, rho, vol, mx, my, mz = rng.randn(7, 300)
+        x, y, vol = 50*x, 50*y, 1 + abs(vol)
+        qx, qy = 0.1*rng.randn(2, 50)
+        phase = np.exp(1j*(np.outer(qx, x) + np.outer(qy, y)))
+        weights = vol[:, None] * np.column_stack((rho, mx, my, mz))
+        expected = np.dot(phase, weights)
+        # small tiles over several threads
+        Fq = geni._calc_Fqxy(qx, qy, x, y, weights, memory=10000, threads=3)
+        np.testing.assert_allclose(Fq, expected, rtol=1e-10, atol=1e-10)
+
+        spin = geni._spin_weights(0.9, 0.2)
+        direct = np.zeros_like(qx)
+        geni._calc_Iqxy_magnetic_helper(
+            direct, qx, qy, x, y, rho, vol, mx, my, mz, 0.6, 0.8, *spin)
+        blocked = np.zeros_like(qx)
+        geni._calc_Iqxy_magnetic_blocked(
+            blocked, qx, qy, x, y, rho, vol, mx, my, mz, 0.6, 0.8, *spin)
+        np.testing.assert_allclose(blocked, direct, rtol=1e-10)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -7,10 +7,13 @@ import numpy as np
 
 import sas.sascalc.dataloader.data_info as data_info
 from sas.sascalc.dataloader.loader import Loader
-from sas.sascalc.dataloader.manipulations import (Boxavg, Boxsum,
-                                                  CircularAverage, Ring,
-                                                  SectorPhi, SectorQ, SlabX,
-                                                  SlabY, get_q,
+import sas.sascalc.dataloader.manipulations as manipulations
+from sas.sascalc.dataloader.manipulations import (Binning, Boxavg, Boxsum,
+                                                  CircularAverage,
+                                                  DetectorGeometryIndex, Ring,
+                                                  Ringcut, SectorPhi, SectorQ,
+                                                  Sectorcut, SlabX, SlabY,
+                                                  get_geometry_index, get_q,
                                                   reader2D_converter)
 
 
@@ -101,6 +104,36 @@ class Averaging(unittest.TestCase):
         for i in range(17):
             self.assertEqual(o.y[i], 1.0)
 
+    def test_circular_masked_flat_distribution(self):
+        """
+            Test circular averaging of the unmasked points only
+        """
+        self.data.data[::2] = np.nan
+        self.data.mask[1::4] = False
+        r = CircularAverage(r_min=self.qmin, r_max=self.qmax, bin_width=self.qmin)
+        o = r(self.data, ismask=True)
+        self.assertTrue(len(o.x) > 0)
+        for i in range(len(o.x)):
+            self.assertEqual(o.y[i], 1.0)
+            self.assertTrue(self.qmin <= o.x[i] <= self.qmax)
+
+
+class BinningTests(unittest.TestCase):
+
+    def test_bin_indices(self):
+        """
+            The array version of the bin index matches the scalar one
+        """
+        values = np.linspace(0.001, 0.1, 137)
+        for base in (None, 10, math.e):
+            binning = Binning(0.005, 0.08, 23, base)
+            indices = binning.get_bin_indices(values)
+            for value, index in zip(values, indices):
+                self.assertEqual(index, binning.get_bin_index(value))
+        # values that cannot be binned get a negative index
+        binning = Binning(0.005, 0.08, 23, 10)
+        self.assertTrue(binning.get_bin_indices([0.0])[0] < 0)
+
 
 class DataInfoTests(unittest.TestCase):
 
@@ -293,5 +326,78 @@ class DataInfoTests(unittest.TestCase):
         # print o.y.shape
 
 
+class GeometryIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        filepath = find('MAR07232_rest.h5')
+        self.data = Loader().load(filepath)[0]
+        manipulations.clear_geometry_cache()
+
+    def tearDown(self):
+        manipulations.clear_geometry_cache()
+
+    def test_same_results(self):
+        """
+            Reducing with a geometry index gives the same results
+        """
+        geometry = DetectorGeometryIndex.from_data(self.data)
+        averagers = [
+            CircularAverage(r_min=.00, r_max=.025, bin_width=0.0003),
+            Ring(r_min=.005, r_max=.01, nbins=20),
+            SectorPhi(r_min=.005, r_max=.01, phi_min=0, phi_max=math.pi / 2.0),
+            SectorQ(r_min=.005, r_max=.01, phi_min=0, phi_max=math.pi / 2.0),
+            SlabX(x_min=-.01, x_max=.01, y_min=-0.0002, y_max=0.0002,
+                  bin_width=0.0004),
+        ]
+        # twice, so that the second pass uses the cached layouts
+        for _ in range(2):
+            for averager in averagers:
+                expected = averager(self.data)
+                result = averager(self.data, geometry=geometry)
+                np.testing.assert_array_equal(result.x, expected.x)
+                np.testing.assert_array_equal(result.y, expected.y)
+                np.testing.assert_array_equal(result.dy, expected.dy)
+        self.assertEqual(len(geometry._layouts), len(averagers))
+
+        box = Boxsum(x_min=.01, x_max=.015, y_min=0.01, y_max=0.015)
+        self.assertEqual(box(self.data, geometry=geometry), box(self.data))
+        cuts = [Ringcut(r_min=.005, r_max=.01),
+                Sectorcut(phi_min=0, phi_max=math.pi / 4.0)]
+        for _ in range(2):
+            for cut in cuts:
+                np.testing.assert_array_equal(cut(self.data, geometry=geometry),
+                                              cut(self.data))
+
+    def test_mismatched_geometry(self):
+        """
+            A geometry of a different detector is refused
+        """
+        geometry = DetectorGeometryIndex([0.0, 0.1], [0.0, 0.1])
+        r = Ring(r_min=.005, r_max=.01, nbins=20)
+        self.assertRaises(ValueError, r, self.data, geometry=geometry)
+
+    def test_cache(self):
+        """
+            Data sets with the same qx/qy values share their geometry
+        """
+        geometry = get_geometry_index(self.data)
+        self.assertTrue(get_geometry_index(self.data) is geometry)
+        other = self.data.clone_without_data(len(self.data.data))
+        other.qx_data = self.data.qx_data.copy()
+        other.qy_data = self.data.qy_data.copy()
+        self.assertTrue(get_geometry_index(other) is geometry)
+
+        # least recently used geometries are evicted first
+        old_size = manipulations.GEOMETRY_CACHE_SIZE
+        try:
+            manipulations.GEOMETRY_CACHE_SIZE = 2
+            for shift in (1.0, 2.0):
+                other.qx_data = self.data.qx_data + shift
+                self.assertFalse(get_geometry_index(other) is geometry)
+            self.assertFalse(get_geometry_index(self.data) is geometry)
+        finally:
+            manipulations.GEOMETRY_CACHE_SIZE = old_size
+
+
 if __name__ == '__main__':
     unittest.main()
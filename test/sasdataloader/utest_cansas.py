@@ -2,7 +2,9 @@
     Unit tests for the new recursive cansas reader
 """
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 import logging
 import warnings
@@ -11,6 +13,8 @@ if sys.version_info[0] >= 3:
 else:
     from StringIO import StringIO
 
+import h5py
+import numpy as np
 from lxml import etree
 from lxml.etree import XMLSyntaxError
 from xml.dom import minidom
@@ -20,6 +24,8 @@ from sas.sascalc.dataloader.loader import Loader
 from sas.sascalc.dataloader.data_info import Data1D, Data2D
 from sas.sascalc.dataloader.readers.xml_reader import XMLreader
 from sas.sascalc.dataloader.readers.cansas_reader import Reader
+from sas.sascalc.dataloader.readers.cansas_reader_HDF5 import \
+    Reader as HDF5Reader, FrameSet
 from sas.sascalc.dataloader.readers.cansas_constants import CansasConstants
 
 logger = logging.getLogger(__name__)
@@ -415,6 +421,28 @@ class cansas_reader_xml(unittest.TestCase):
         if os.path.isfile(self.write_filename):
             os.remove(self.write_filename)
 
+    def test_many_points(self):
+        """
+            Check a data set with many points is read back point by point.
+        """
+        data = self.loader.load(self.isis_1_1)[0]
+        npoints = 5000
+        data.x = np.linspace(0.001, 0.5, npoints)
+        data.y = 1.0/data.x
+        data.dy = 0.1*data.y
+        data.dx = 0.01*data.x
+        self.cansas_reader.write(self.write_filename, data)
+        try:
+            reloaded = self.loader.load(self.write_filename)[0]
+        finally:
+            if os.path.isfile(self.write_filename):
+                os.remove(self.write_filename)
+        for attr in ('x', 'y', 'dy', 'dx'):
+            np.testing.assert_allclose(getattr(reloaded, attr),
+                                       getattr(data, attr), rtol=1e-6)
+        trans = reloaded.trans_spectrum[0]
+        self.assertEqual(len(trans.wavelength), len(trans.transmission))
+
     def test_units(self):
         """
             Check units.
@@ -500,6 +528,94 @@ class cansas_reader_hdf5(unittest.TestCase):
             self.assertEqual(frame.run[0], frame.title)
             self.assertEqual(len(frame.y), 1617)
 
+    def test_multi_frame_lazy(self):
+        eager = self.loader.load(self.datafile_multiple_frames)
+        self.assertFalse(np.array_equal(eager[0].y, eager[1].y))
+        reader = HDF5Reader(lazy=True, frame_cache_size=2)
+        frames = reader.read(self.datafile_multiple_frames)
+        self.assertEqual(len(frames), 1)
+        frames = frames[0]
+        self.assertTrue(isinstance(frames, FrameSet))
+        self.assertEqual(len(frames), 120)
+        for index in (0, 1, 119, 1):
+            frame = frames[index]
+            self.assertTrue(isinstance(frame, Data1D))
+            self.assertEqual(frame.title, eager[index].title)
+            np.testing.assert_array_equal(frame.x, eager[index].x)
+            np.testing.assert_array_equal(frame.y, eager[index].y)
+            np.testing.assert_array_equal(frame.dy, eager[index].dy)
+        self.assertEqual(list(frames._cache.keys()), [119, 1])
+        self.assertTrue(frames[-1] is frames[119])
+        frames.close()
+
+    def _write_multi_frame_2d(self, filename, n_frames=4, shape=(6, 5)):
+        qx, qy = np.meshgrid(np.linspace(-0.1, 0.1, shape[1]),
+                             np.linspace(-0.05, 0.05, shape[0]))
+        intensity = np.random.rand(n_frames, *shape)
+        mask = np.zeros(shape, dtype=np.int8)
+        mask[0, 0] = 1
+        with h5py.File(filename, 'w') as h5_file:
+            entry = h5_file.create_group(u'sasentry01')
+            entry.attrs[u'canSAS_class'] = u'SASentry'
+            entry.create_dataset(u'title', data=[b'frames'])
+            data = entry.create_group(u'sasdata01')
+            data.attrs[u'canSAS_class'] = u'SASdata'
+            data.attrs[u'signal'] = u'I'
+            data.attrs[u'I_axes'] = u'Qx,Qy'
+            data.attrs[u'Q_indices'] = [0, 1]
+            data.attrs[u'mask'] = u'mask'
+            i_node = data.create_dataset(u'I', data=intensity)
+            i_node.attrs[u'units'] = u'1/cm'
+            i_node.attrs[u'uncertainties'] = u'Idev'
+            # Compressed frames are read through h5py, others memory mapped
+            data.create_dataset(u'Idev', data=intensity/10,
+                                chunks=(1,) + shape, compression='gzip')
+            data.create_dataset(u'Qx', data=qx).attrs[u'units'] = u'1/A'
+            data.create_dataset(u'Qy', data=qy).attrs[u'units'] = u'1/A'
+            data.create_dataset(u'mask', data=mask)
+        return intensity
+
+    def test_multi_frame_2d(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        filename = os.path.join(tmp_dir, "multiframe_2d.h5")
+        intensity = self._write_multi_frame_2d(filename)
+
+        eager = HDF5Reader().read(filename)
+        self.assertEqual(len(eager), 4)
+        for index, frame in enumerate(eager):
+            self.assertTrue(isinstance(frame, Data2D))
+            np.testing.assert_array_equal(frame.data,
+                                          intensity[index].flatten())
+            np.testing.assert_allclose(frame.err_data,
+                                       intensity[index].flatten()/10)
+            self.assertEqual(len(frame.x_bins), 5)
+            self.assertEqual(len(frame.y_bins), 6)
+            self.assertFalse(frame.mask[0])
+            self.assertTrue(frame.mask[1:].all())
+
+        with HDF5Reader(lazy=True, frame_cache_size=1).read(filename)[0] \
+                as frames:
+            self.assertTrue(isinstance(frames, FrameSet))
+            self.assertEqual(len(frames), 4)
+            for index in (3, 0, 2):
+                frame = frames[index]
+                self.assertTrue(isinstance(frame, Data2D))
+                self.assertEqual(frame.title, eager[index].title)
+                for attr in ('data', 'err_data', 'qx_data', 'qy_data',
+                             'q_data', 'mask', 'x_bins', 'y_bins'):
+                    np.testing.assert_array_equal(
+                        getattr(frame, attr), getattr(eager[index], attr))
+            self.assertEqual(list(frames._cache.keys()), [2])
+            intensity_frames = frames._frames[u'I'][0]
+            uncertainty_frames = frames._frames[u'Idev'][0]
+            self.assertIsNotNone(intensity_frames._memmap)
+            self.assertIsNotNone(uncertainty_frames._file)
+        # The file handles are released when leaving the with block
+        self.assertIsNone(intensity_frames._memmap)
+        self.assertIsNone(uncertainty_frames._file)
+        self.assertEqual(len(frames._cache), 0)
+
     def test_no_di(self):
         self.data = self.loader.load(self.datafile_nodi)
         self.assertTrue(self.data is not None)
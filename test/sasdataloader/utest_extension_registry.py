@@ -6,9 +6,12 @@ import logging
 import unittest
 import os
 import shutil
+import threading
+import time
 import numpy as np
 
 from sas.sascalc.dataloader.loader import Registry as Loader
+from sas.sascalc.dataloader.loader import Loader as SingletonLoader
 
 logger = logging.getLogger(__name__)
 
@@ -81,3 +84,65 @@ class ExtensionRegistryTests(unittest.TestCase):
             os.remove(self.valid_file_wrong_known_ext)
         if os.path.isfile(self.valid_file_wrong_unknown_ext):
             os.remove(self.valid_file_wrong_unknown_ext)
+
+
+class LoadManyTests(unittest.TestCase):
+
+    def setUp(self):
+        self.files = [find("valid_cansas_xml.xml"), find("ascii_test_1.txt"),
+                      find("ISIS_1_0.xml"), find("no_such_file.xml"),
+                      find("MAR07232_rest.h5")]
+        self.loader = SingletonLoader()
+
+    def test_load_many(self):
+        """
+        Load several files concurrently and compare to loading them one by one
+        """
+        results = list(self.loader.load_many(self.files, workers=3,
+                                             ordered=True))
+        self.assertEqual([r[0] for r in results], list(range(len(self.files))))
+        for index, path, data, error in results:
+            self.assertEqual(path, self.files[index])
+            if not os.path.isfile(path):
+                self.assertIsNone(data)
+                self.assertIsNotNone(error)
+                continue
+            self.assertIsNone(error)
+            serial = self.loader.load(path)
+            self.assertEqual(len(data), len(serial))
+            for item, expected in zip(data, serial):
+                self.assertEqual(item.filename, expected.filename)
+                self.assertTrue(np.all(item.y == expected.y)
+                                if hasattr(item, 'y') else
+                                np.all(item.data == expected.data))
+
+    def test_unordered(self):
+        """
+        Every file is reported once when results come in completion order
+        """
+        results = list(self.loader.load_many(self.files[:3]*4, workers=4))
+        self.assertEqual(sorted(r[0] for r in results), list(range(12)))
+        self.assertEqual([r[3] for r in results if r[3] is not None], [])
+
+    def test_cancel(self):
+        """
+        Nothing is yielded once the load is cancelled
+        """
+        cancel = threading.Event()
+        cancel.set()
+        results = list(self.loader.load_many(self.files, cancel=cancel))
+        self.assertEqual(results, [])
+
+    def test_cancel_while_loading(self):
+        """
+        The results already loaded are not yielded after a cancel
+        """
+        cancel = threading.Event()
+        results = []
+        for result in self.loader.load_many(self.files[:3], ordered=True,
+                                            cancel=cancel):
+            results.append(result)
+            # Wait for the other files before cancelling
+            time.sleep(0.5)
+            cancel.set()
+        self.assertEqual([r[0] for r in results], [0])
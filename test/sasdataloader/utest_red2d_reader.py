@@ -1,13 +1,19 @@
 """
     Unit tests for the red2d (3-7-column) reader
 """
+import io
 import warnings
 
 import unittest
 
 import os.path
 
+import numpy as np
+
 from sas.sascalc.dataloader.loader import Loader
+from sas.sascalc.dataloader.readers.red2d_reader import parse_data_block
+from sas.sascalc.dataloader.readers.red2d_reader import write_data_block
+from sas.sascalc.dataloader.readers.red2d_reader import Reader
 
 warnings.simplefilter("ignore")
 
@@ -58,6 +64,56 @@ class DatReaderTests(unittest.TestCase):
         self.assertEqual(f.qx_data[0], -0.009160664)
         self._check_common_data(f, 15)
 
+    def test_parse_data_block(self):
+        """
+            Test the bulk conversion of the data block
+        """
+        block = "1 2\t3\n4 nan 6\r\n7 8 9"
+        values = parse_data_block(block, 3, 3)
+        self.assertEqual(values.shape, (3, 3))
+        self.assertEqual(values[2].tolist(), [7, 8, 9])
+        self.assertTrue(np.isnan(values[1, 1]))
+        # Values which are not numbers are set to zero
+        values = parse_data_block("1 x 3\n4 5 6", 2, 3)
+        self.assertEqual(values.ravel().tolist(), [1, 0, 3, 4, 5, 6])
+        # Inconsistent number of values
+        self.assertIsNone(parse_data_block("1 2 3\n4 5", 2, 3))
+
+    def test_write_data_block(self):
+        """
+            Test the block formatting of the data lines
+        """
+        columns = [np.arange(5.), -np.arange(5.), np.linspace(0, 1e-3, 5)]
+        fd = io.StringIO()
+        self.assertTrue(write_data_block(fd, columns, block_size=2))
+        expected = "".join("%g  %g  %g\n" % row for row in zip(*columns))
+        self.assertEqual(fd.getvalue(), expected)
+        # Writing stops between blocks
+        calls = []
+        fd = io.StringIO()
+        def isquit():
+            calls.append(1)
+            return len(calls) > 2
+        self.assertFalse(write_data_block(fd, columns, block_size=2,
+                                          isquit=isquit))
+        self.assertEqual(fd.getvalue().count("\n"), 4)
+
+    def test_write_read(self):
+        """
+            Test the written file is read back
+        """
+        f = self.data_list[0]
+        filename = find("write_test.dat")
+        try:
+            Reader().write(filename, f)
+            data = self.loader.load(filename)[0]
+        finally:
+            if os.path.isfile(filename):
+                os.remove(filename)
+        # Values are written with 6 significant digits
+        np.testing.assert_allclose(data.qx_data, f.qx_data, rtol=1e-5)
+        np.testing.assert_allclose(data.data, f.data, rtol=1e-5)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,88 @@
+"""
+Unit tests for the bumps fit engine
+"""
+
+import unittest
+import numpy as np
+
+from bumps.fitproblem import FitProblem
+from sasmodels.core import load_model_info
+from sasmodels.sasview_model import make_model_from_info
+
+from sas.sascalc.dataloader.data_info import Data1D
+from sas.sascalc.fit.AbstractFitEngine import Model, FitData1D
+from sas.sascalc.fit.BumpsFitting import BumpsFit, SasFitness, THEORY_CACHE_SIZE
+
+
+def sphere_model():
+    return make_model_from_info(load_model_info('sphere'))()
+
+
+def sphere_data(radius=60.0):
+    model = sphere_model()
+    model.setParam('radius', radius)
+    x = np.linspace(0.005, 0.3, 100)
+    y = model.evalDistribution(x)
+    return Data1D(x=x, y=y, dy=0.05*y)
+
+
+class TheoryCacheTest(unittest.TestCase):
+    """Test the cache of theory evaluations of SasFitness"""
+
+    def setUp(self):
+        data = sphere_data()
+        fitdata = FitData1D(x=data.x, y=data.y, dy=data.dy)
+        fitdata.set_fit_range()
+        self.fitness = SasFitness(Model(sphere_model()), fitdata,
+                                  fitted=['radius', 'scale'])
+        self.problem = FitProblem(self.fitness)
+
+    def test_revisit(self):
+        p0 = self.problem.getp()
+        nllf0 = self.problem.nllf()
+        self.problem.setp(1.1*p0)
+        nllf1 = self.problem.nllf()
+        self.assertEqual(self.fitness.cache_misses, 2)
+        # Coming back to a point does not evaluate the model again
+        self.problem.setp(p0.copy())
+        self.assertEqual(self.problem.nllf(), nllf0)
+        self.problem.setp(1.1*p0)
+        self.assertEqual(self.problem.nllf(), nllf1)
+        self.assertEqual(self.fitness.cache_misses, 2)
+        self.assertEqual(self.fitness.cache_hits, 2)
+
+    def test_fit_range(self):
+        self.problem.nllf()
+        self.fitness.data.set_fit_range(qmin=0.01, qmax=0.2)
+        self.fitness.update()
+        n = np.sum(self.fitness.data.idx)
+        self.assertEqual(len(self.fitness.residuals()), n)
+        self.assertEqual(self.fitness.cache_misses, 2)
+
+    def test_size(self):
+        p0 = self.problem.getp()
+        for i in range(THEORY_CACHE_SIZE + 1):
+            self.problem.setp(p0*(1 + 0.01*i))
+            self.problem.nllf()
+        # The first point was dropped
+        self.problem.setp(p0.copy())
+        self.problem.nllf()
+        self.assertEqual(self.fitness.cache_hits, 0)
+        self.assertEqual(len(self.fitness._cache), THEORY_CACHE_SIZE)
+
+    def test_fit(self):
+        engine = BumpsFit()
+        model = sphere_model()
+        model.setParam('radius', 57.0)
+        engine.set_model(model, 1, pars=['radius'])
+        engine.set_data(sphere_data(), 1)
+        engine.select_problem_for_fit(1, 1)
+        result, = engine.fit()
+        self.assertTrue(result.success)
+        self.assertAlmostEqual(result.pvec[0], 60.0, 3)
+        self.assertGreater(result.cache_misses, 0)
+        self.assertGreater(result.cache_hits, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+"""
+Unit tests for the plugin model manifest
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from sas.sascalc.fit import models
+from sas.sascalc.fit.models import (find_plugin_models, read_plugin_manifest,
+                                    ModelManagerBase, PLUGIN_MANIFEST)
+
+PLUGIN = '''
+from numpy import inf, exp
+name = "{name}"
+title = "Test plugin"
+description = "Gaussian peak"
+category = "plugin"
+parameters = [
+    ["height", "", 1.0, [0, inf], "", "Peak height"],
+    ["{width}", "1/Ang", 0.1, [0, inf], "", "Peak width"],
+]
+def Iq(q, height, {width}):
+    return height*exp(-0.5*(q/{width})**2)
+Iq.vectorized = True
+'''
+
+
+class PluginManifestTest(unittest.TestCase):
+    """Test the scan of the plugin directory"""
+
+    def setUp(self):
+        self.plugins_dir = tempfile.mkdtemp()
+        self.plugin_log = models.PLUGIN_LOG
+        models.PLUGIN_LOG = os.path.join(self.plugins_dir, "plugins.log")
+        # Models are registered by name for the whole session in sasmodels
+        self.name = "peak_" + uuid.uuid4().hex[:8]
+        self.name2 = self.name + "_2"
+        self.path = self.write_plugin(self.name)
+
+    def tearDown(self):
+        models.PLUGIN_LOG = self.plugin_log
+        shutil.rmtree(self.plugins_dir)
+
+    def write_plugin(self, name, width="width"):
+        path = os.path.join(self.plugins_dir, name + ".py")
+        with open(path, 'w') as fid:
+            fid.write(PLUGIN.format(name=name, width=width))
+        return path
+
+    def test_manifest(self):
+        plugins = find_plugin_models(self.plugins_dir)
+        model = plugins[self.name]
+        self.assertTrue(model.changed)
+        self.assertTrue(model.is_loaded)
+        entry = read_plugin_manifest(self.plugins_dir)[self.name + ".py"]
+        self.assertEqual(entry['name'], self.name)
+        self.assertEqual(entry['category'], "plugin")
+        self.assertEqual(entry['size'], os.path.getsize(self.path))
+        self.assertEqual(entry['hash'], model.hash)
+
+        # The plugin is listed from the manifest without being imported
+        model = find_plugin_models(self.plugins_dir)[self.name]
+        self.assertFalse(model.changed)
+        self.assertFalse(model.is_loaded)
+        self.assertEqual(model.filename, os.path.abspath(self.path))
+        self.assertEqual(model.category, "plugin")
+        self.assertFalse(model.is_structure_factor)
+        self.assertFalse(model.is_multiplicity_model)
+        self.assertEqual([p[0] for p in model.parameters], ["height", "width"])
+        self.assertEqual(model.parameters[1][3], [0, np.inf])
+        # and imported when first used
+        instance = model()
+        self.assertTrue(model.is_loaded)
+        self.assertEqual(instance.getParam("width"), 0.1)
+
+    def test_touched(self):
+        find_plugin_models(self.plugins_dir)
+        mtime = os.path.getmtime(self.path) + 10
+        os.utime(self.path, (mtime, mtime))
+        model = find_plugin_models(self.plugins_dir)[self.name]
+        self.assertFalse(model.is_loaded)
+        entry = read_plugin_manifest(self.plugins_dir)[self.name + ".py"]
+        self.assertEqual(entry['mtime'], mtime)
+
+    def test_racy_edit(self):
+        first = find_plugin_models(self.plugins_dir)[self.name]
+        stat = os.stat(self.path)
+        # Same size and modification time as the scanned file
+        self.write_plugin(self.name, width="sigma")
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        model = find_plugin_models(self.plugins_dir)[self.name]
+        self.assertTrue(model.changed)
+        self.assertNotEqual(model.hash, first.hash)
+        self.assertEqual(model.parameters[1][0], "sigma")
+
+        # Files older than the manifest by more than the time resolution
+        # are not hashed again
+        manifest = os.path.join(self.plugins_dir, PLUGIN_MANIFEST)
+        later = stat.st_mtime + 2*models.MTIME_RESOLUTION
+        os.utime(manifest, (later, later))
+        calls = []
+        file_hash = models._file_hash
+        models._file_hash = lambda path: calls.append(path) or file_hash(path)
+        try:
+            find_plugin_models(self.plugins_dir)
+        finally:
+            models._file_hash = file_hash
+        self.assertEqual(calls, [])
+
+    def test_changed(self):
+        first = find_plugin_models(self.plugins_dir)[self.name]
+        self.write_plugin(self.name, width="sig")
+        self.write_plugin(self.name2)
+        plugins = find_plugin_models(self.plugins_dir)
+        self.assertEqual(sorted(plugins), [self.name, self.name2])
+        model = plugins[self.name]
+        self.assertTrue(model.changed)
+        self.assertNotEqual(model.hash, first.hash)
+        self.assertEqual(model.parameters[1][0], "sig")
+
+        os.remove(self.path)
+        self.assertEqual(list(find_plugin_models(self.plugins_dir)),
+                         [self.name2])
+        self.assertEqual(list(read_plugin_manifest(self.plugins_dir)),
+                         [self.name2 + ".py"])
+
+    def test_broken(self):
+        with open(os.path.join(self.plugins_dir, "broken.py"), 'w') as fid:
+            fid.write("parameters = [\n")
+        with open(os.path.join(self.plugins_dir, PLUGIN_MANIFEST), 'w') as fid:
+            fid.write("{")
+        self.assertEqual(list(find_plugin_models(self.plugins_dir)),
+                         [self.name])
+        self.assertEqual(list(read_plugin_manifest(self.plugins_dir)),
+                         [self.name + ".py"])
+        self.assertTrue(os.path.exists(models.PLUGIN_LOG))
+
+    def test_parallel(self):
+        self.write_plugin(self.name2)
+        plugins = find_plugin_models(self.plugins_dir, workers=2)
+        self.assertEqual(sorted(plugins), [self.name, self.name2])
+        # The plugins read in other processes are imported when first used
+        model = plugins[self.name2]
+        self.assertTrue(model.changed)
+        self.assertFalse(model.is_loaded)
+        self.assertEqual(model().getParam("height"), 1.0)
+        serial = read_plugin_manifest(self.plugins_dir)
+        os.remove(os.path.join(self.plugins_dir, PLUGIN_MANIFEST))
+        find_plugin_models(self.plugins_dir, workers=1)
+        self.assertEqual(read_plugin_manifest(self.plugins_dir), serial)
+
+    def test_compile(self):
+        model = find_plugin_models(self.plugins_dir)[self.name]
+        manager = ModelManagerBase.__new__(ModelManagerBase)
+        futures = manager.compile_plugins([model])
+        self.assertEqual(manager.compile_plugins([model]), futures)
+        futures[0].result()
+        self.assertIsNotNone(model._model)
+        manager.compile_executor.shutdown()
+
+    def test_compile_concurrent_load(self):
+        names = [self.name + "_%d" % i for i in range(4)]
+        for name in names:
+            self.write_plugin(name)
+        find_plugin_models(self.plugins_dir)
+        plugins = find_plugin_models(self.plugins_dir)
+        manager = ModelManagerBase.__new__(ModelManagerBase)
+        futures = manager.compile_plugins([plugins[name] for name in names])
+        # Plugins selected while the background thread imports them
+        pool = ThreadPoolExecutor(max_workers=4)
+        instances = list(pool.map(lambda name: plugins[name](), names))
+        pool.shutdown()
+        for future in futures:
+            future.result()
+        manager.compile_executor.shutdown()
+        for name, instance in zip(names, instances):
+            self.assertEqual(instance.name, name)
+            self.assertIsNotNone(plugins[name]._model)
+
+
+if __name__ == '__main__':
+    unittest.main()
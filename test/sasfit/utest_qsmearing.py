@@ -0,0 +1,74 @@
+"""
+Unit tests for the 2D resolution smearing
+"""
+
+import unittest
+import numpy as np
+
+from sasmodels.core import load_model_info
+from sasmodels.sasview_model import make_model_from_info
+from sasmodels.resolution2d import Pinhole2D
+
+from sas.sascalc.dataloader.data_info import Data2D
+from sas.sascalc.fit.qsmearing import smear_selection
+
+
+def make_data(n=30):
+    q = np.linspace(-0.2, 0.2, n)
+    qx, qy = [v.flatten() for v in np.meshgrid(q, q + 1e-3)]
+    q_data = np.sqrt(qx**2 + qy**2)
+    return Data2D(data=np.ones_like(qx), err_data=np.ones_like(qx),
+                  qx_data=qx, qy_data=qy, q_data=q_data,
+                  mask=np.ones_like(qx, dtype=bool),
+                  dqx_data=0.002 + 0.05*q_data, dqy_data=0.001 + 0*qx)
+
+
+class PySmear2DTest(unittest.TestCase):
+    """Test the pinhole smearing of 2D data"""
+
+    def setUp(self):
+        self.data = make_data()
+        self.smearer = smear_selection(self.data)
+        model = make_model_from_info(load_model_info('cylinder'))()
+        model.setParam('theta', 30.0)
+        self.smearer.set_model(model)
+        self.index = self.data.q_data < 0.15
+        self.smearer.set_index(self.index)
+
+    def expected(self, accuracy='Low', coords='polar'):
+        res = Pinhole2D(data=self.data, index=self.smearer.index,
+                        nsigma=3.0, accuracy=accuracy, coords=coords)
+        return res.apply(self.smearer.model.evalDistribution(res.q_calc))
+
+    def test_value(self):
+        value = self.smearer.get_value()
+        self.assertEqual(len(value), np.sum(self.index))
+        np.testing.assert_allclose(value, self.expected(), rtol=1e-12)
+        self.smearer.coords = 'cartesian'
+        np.testing.assert_allclose(self.smearer.get_value(),
+                                   self.expected(coords='cartesian'), rtol=1e-12)
+
+    def test_cache(self):
+        res, matrix = self.smearer.get_resolution()
+        # The fit sets the same index before each evaluation
+        self.smearer.set_index(self.index.copy())
+        self.assertIs(self.smearer.get_resolution()[0], res)
+
+        self.smearer.set_accuracy('High')
+        res_high, _ = self.smearer.get_resolution()
+        self.assertIsNot(res_high, res)
+        np.testing.assert_allclose(self.smearer.get_value(),
+                                   self.expected(accuracy='High'), rtol=1e-12)
+
+        self.index[np.flatnonzero(self.index)[:10]] = False
+        self.smearer.set_index(self.index)
+        self.assertIsNot(self.smearer.get_resolution()[0], res_high)
+        self.assertEqual(len(self.smearer.get_value()), np.sum(self.index))
+
+        self.smearer.set_data(make_data(20))
+        self.smearer.set_index(None)
+        self.assertEqual(len(self.smearer.get_value()), 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -785,3 +785,65 @@ class TestDataExtraHighSlitPowerLaw(unittest.TestCase):
         for i in range(len(self.data.x[start:])):
             value  = math.fabs(test_y[i]- temp[i])/temp[i]
             self.assertTrue(value < 0.001)
+
+
+class TestBatchInvariant(unittest.TestCase):
+    """
+        Compare the batch computation with InvariantCalculator
+    """
+    def setUp(self):
+        data = Loader().load(find("100nmSpheresNodQ.txt"))[0]
+        self.q = data.x
+        self.iq = np.array([data.y * factor for factor in (0.8, 1.0, 1.2)])
+        self.diq = np.array([data.dy * factor for factor in (0.8, 1.0, 1.2)])
+        self.scale = [1.0, 1.5, 2.0]
+
+    def _compare(self, result, q_list, extrapolation=None):
+        for i, q in enumerate(q_list):
+            inv = invariant.InvariantCalculator(
+                Data1D(x=q, y=self.iq[i][:len(q)], dy=self.diq[i][:len(q)]),
+                scale=self.scale[i])
+            inv.set_extrapolation('low', npts=10, function='guinier')
+            inv.set_extrapolation('high', npts=10, function='power_law')
+            qstar, dqstar = inv.get_qstar_with_error(extrapolation)
+            v, dv = inv.get_volume_fraction_with_error(2.2e-6, extrapolation)
+            s, _ = inv.get_surface_with_error(2.2e-6, 1.825e-7, extrapolation)
+            self.assertAlmostEqual(result['qstar'][i], qstar, 15)
+            self.assertAlmostEqual(result['qstar_err'][i], dqstar, 15)
+            self.assertAlmostEqual(result['volume'][i], v, 12)
+            self.assertAlmostEqual(result['volume_err'][i], dv, 12)
+            self.assertAlmostEqual(result['surface'][i], s, 15)
+        self.assertIsNone(result['surface_err'])
+
+    def test_shared_q(self):
+        result = invariant.compute_invariants(
+            self.q, self.iq, self.diq, scale=self.scale,
+            contrast=2.2e-6, porod_const=1.825e-7)
+        self._compare(result, [self.q]*3)
+        for extrapolation in ('low', 'high', 'both'):
+            result = invariant.compute_invariants(
+                self.q, self.iq, self.diq, scale=self.scale,
+                contrast=2.2e-6, porod_const=1.825e-7,
+                extrapolation=extrapolation,
+                low_extrapolation=dict(npts=10, function='guinier'),
+                high_extrapolation=dict(npts=10, function='power_law'))
+            self._compare(result, [self.q]*3, extrapolation)
+
+    def test_varying_q(self):
+        q_list = [self.q[:-i] for i in (20, 10, 1)]
+        iq = [y[:len(q)] for y, q in zip(self.iq, q_list)]
+        diq = [dy[:len(q)] for dy, q in zip(self.diq, q_list)]
+        result = invariant.compute_invariants(
+            q_list, iq, diq, scale=self.scale,
+            contrast=2.2e-6, porod_const=1.825e-7, extrapolation='both',
+            low_extrapolation=dict(npts=10, function='guinier'),
+            high_extrapolation=dict(npts=10, function='power_law'))
+        self._compare(result, q_list, 'both')
+
+    def test_without_constants(self):
+        result = invariant.compute_invariants(self.q, self.iq)
+        self.assertEqual(result['qstar'].shape, (3,))
+        self.assertIsNone(result['volume'])
+        self.assertIsNone(result['surface'])
+        self.assertRaises(ValueError, invariant.compute_invariants,
+                          self.q, self.iq, contrast=-1.0)
@@ -367,5 +367,78 @@ class TestOrdering(unittest.TestCase):
         self.assertTrue(math.fabs(ana-val)/ana < 1.1)
 
 
+class TestHistogramEngine(unittest.TestCase):
+    """ Unit tests for the pair distance histogram engine """
+
+    def setUp(self):
+        self.canvas = VolumeCanvas.VolumeCanvas()
+        self.canvas.params['lores_density'] = 0.05
+        self.canvas.setEngine('histogram', seed=1)
+
+    def testSphere(self):
+        handle = self.canvas.add('sphere', 'sph')
+        self.canvas.setParam('%s.radius' % handle, 30.0)
+        self.canvas.setParam('%s.contrast' % handle, 1.0e-6)
+        sphere = SphereModel()
+        sphere.setParam('scale', 1.0)
+        sphere.setParam('background', 0.0)
+        sphere.setParam('radius', 30.0)
+        sphere.setParam('sld', 1.0)
+        sphere.setParam('sld_solvent', 0.0)
+        for q in [0.01, 0.05, 0.1]:
+            ana = sphere.run(q)
+            val, err = self.canvas.getIqError(q)
+            self.assertTrue(math.fabs(ana-val)/ana < 0.05)
+
+    def testCaching(self):
+        self.canvas.add('sphere', 'sph')
+        self.canvas.add('cylinder', 'cyl')
+        self.canvas.setParam('cyl.center', [50, 0, 0])
+        self.canvas.add('ellipsoid', 'elli')
+        self.canvas.setParam('elli.center', [0, 60, 0])
+        self.canvas.getPr()
+        terms = dict(self.canvas._histogram._terms)
+        self.assertEqual(len(terms), 6)
+
+        # Only the pairs involving the moved shape are recomputed
+        self.canvas.setParam('cyl.center', [55, 0, 0])
+        self.canvas.getPr()
+        for pair, term in self.canvas._histogram._terms.items():
+            if 'cyl' in pair:
+                self.assertIsNot(term, terms[pair])
+            else:
+                self.assertIs(term, terms[pair])
+
+    def testOrdering(self):
+        # The sphere is added last and takes precedence over the cylinder
+        self.canvas.add('cylinder', 'cyl')
+        self.canvas.add('sphere', 'sph')
+        self.canvas.setParam('sph.radius', 10.0)
+        points = self.canvas._createPointsFromList()
+        cylinder = VolumeCanvas.CylinderDescriptor()
+        self.assertEqual(points['sph'][0].shape[1],
+                         int(0.05*4.0/3.0*math.pi*1000))
+        self.assertFalse(self.canvas.shapes['sph'].isInside(points['cyl'][0]).any())
+        self.assertTrue(cylinder.isInside(points['sph'][0]).all())
+
+        # Deleting a shape removes its terms
+        self.canvas.delete('sph')
+        self.canvas.getPr()
+        self.assertEqual(self.canvas._histogram.keys(), ['cyl'])
+        r, pr = self.canvas.getPrData()
+        self.assertAlmostEqual(sum(pr)*self.canvas._histogram.bin_width, 1.0)
+
+    def testPDB(self):
+        # PDB shapes have no volume to fill with points
+        pdb = VolumeCanvas.PDBDescriptor("model.pdb")
+        self.assertRaises(ValueError, self.canvas.addObject, pdb, 'pdb')
+        self.assertEqual(self.canvas.getShapeList(), [])
+
+        canvas = VolumeCanvas.VolumeCanvas()
+        canvas.addObject(pdb, 'pdb')
+        self.assertRaises(ValueError, canvas.setEngine, 'histogram')
+        self.assertEqual(canvas.engine, 'pointsmodelpy')
+
+
 if __name__ == '__main__':
     unittest.main()